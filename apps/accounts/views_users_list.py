@@ -2,18 +2,17 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import date
-from io import BytesIO
 
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils.html import format_html, format_html_join
 
 from apps.core.decorators import require_perm
-from apps.core.exports import export_csv
+from apps.core.exports import stream_csv, stream_xlsx
 from apps.core.rbac import can
 
 from .views_users_common import (
@@ -137,58 +136,40 @@ def _build_group_cards(qs, modo: str):
     return cards
 
 
-def _export_users_xlsx(*, rows: list[list[str]]) -> HttpResponse:
-    try:
-        from openpyxl import Workbook
-    except Exception:
-        headers = [
-            "Nome",
-            "Username",
-            "E-mail",
-            "Código",
-            "Função",
-            "Município",
-            "Secretaria",
-            "Unidade",
-            "Setor",
-            "Local estrutural",
-            "Aluno",
-            "Paciente",
-            "Status",
-        ]
-        return export_csv("usuarios.xlsx.csv", headers=headers, rows=rows)
+USERS_EXPORT_HEADERS = [
+    "Nome",
+    "Username",
+    "E-mail",
+    "Código",
+    "Função",
+    "Município",
+    "Secretaria",
+    "Unidade",
+    "Setor",
+    "Local estrutural",
+    "Aluno",
+    "Paciente",
+    "Status",
+]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Usuarios"
-    ws.append(
-        [
-            "Nome",
-            "Username",
-            "E-mail",
-            "Código",
-            "Função",
-            "Município",
-            "Secretaria",
-            "Unidade",
-            "Setor",
-            "Local estrutural",
-            "Aluno",
-            "Paciente",
-            "Status",
-        ]
-    )
-    for r in rows:
-        ws.append(r)
-    buf = BytesIO()
-    wb.save(buf)
-    response = HttpResponse(
-        buf.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = 'attachment; filename="usuarios.xlsx"'
-    response["X-Content-Type-Options"] = "nosniff"
-    return response
+
+def _user_export_row(u) -> list[str]:
+    p = getattr(u, "profile", None)
+    return [
+        (u.get_full_name() or u.username).strip(),
+        u.username or "",
+        u.email or "",
+        getattr(p, "codigo_acesso", "") or "",
+        p.get_role_display() if p and getattr(p, "role", "") else "",
+        str(getattr(p, "municipio", "") or ""),
+        str(getattr(p, "secretaria", "") or ""),
+        str(getattr(p, "unidade", "") or ""),
+        str(getattr(p, "setor", "") or ""),
+        str(getattr(p, "local_estrutural", "") or ""),
+        str(getattr(p, "aluno", "") or ""),
+        str(getattr(p, "paciente", "") or ""),
+        _status_slug(p, u),
+    ]
 
 
 @login_required
@@ -272,45 +253,16 @@ def usuarios_list(request):
 
     qs = qs.order_by("first_name", "last_name", "username")
 
-    if export in {"csv", "xlsx"}:
-        rows_export = []
-        for u in qs:
-            p = getattr(u, "profile", None)
-            rows_export.append(
-                [
-                    (u.get_full_name() or u.username).strip(),
-                    u.username or "",
-                    u.email or "",
-                    getattr(p, "codigo_acesso", "") or "",
-                    p.get_role_display() if p and getattr(p, "role", "") else "",
-                    str(getattr(p, "municipio", "") or ""),
-                    str(getattr(p, "secretaria", "") or ""),
-                    str(getattr(p, "unidade", "") or ""),
-                    str(getattr(p, "setor", "") or ""),
-                    str(getattr(p, "local_estrutural", "") or ""),
-                    str(getattr(p, "aluno", "") or ""),
-                    str(getattr(p, "paciente", "") or ""),
-                    _status_slug(p, u),
-                ]
-            )
-        if export == "csv":
-            headers = [
-                "Nome",
-                "Username",
-                "E-mail",
-                "Código",
-                "Função",
-                "Município",
-                "Secretaria",
-                "Unidade",
-                "Setor",
-                "Local estrutural",
-                "Aluno",
-                "Paciente",
-                "Status",
-            ]
-            return export_csv("usuarios.csv", headers=headers, rows=rows_export)
-        return _export_users_xlsx(rows=rows_export)
+    if export == "csv":
+        return stream_csv("usuarios.csv", USERS_EXPORT_HEADERS, qs, row_mapper=_user_export_row)
+    if export == "xlsx":
+        return stream_xlsx(
+            "usuarios.xlsx",
+            USERS_EXPORT_HEADERS,
+            qs,
+            row_mapper=_user_export_row,
+            sheet_title="Usuarios",
+        )
 
     can_manage = can(request.user, "accounts.manage_users") or is_admin(request.user)
     base_qs = build_querystring(filter_params)
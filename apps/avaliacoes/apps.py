@@ -5,3 +5,6 @@ class AvaliacoesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.avaliacoes"
     verbose_name = "Provas e Gabarito"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -197,6 +197,13 @@ class CorrecaoFolhaForm(RespostasObjetivasForm):
     )
 
 
+class OMRLoteForm(forms.Form):
+    arquivo = forms.FileField(
+        label="Folhas digitalizadas",
+        help_text="ZIP com uma imagem por folha ou TIFF multipágina, na ordem do PDF de provas.",
+    )
+
+
 class TokenLookupForm(forms.Form):
     token = forms.UUIDField(
         label="Token da folha",
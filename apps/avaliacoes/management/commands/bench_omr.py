@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+import time
+import zipfile
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageOps
+
+from apps.avaliacoes.forms import option_letters
+from apps.avaliacoes.omr import (
+    REGISTRATION_MARK_CENTER,
+    REGISTRATION_MARK_SIZE,
+    _bubble_boxes,
+    suggest_answers_from_omr_batch,
+    suggest_answers_from_omr_image,
+)
+
+
+def render_sheet(
+    respostas: list[str],
+    *,
+    opcoes: int,
+    size=(2480, 3508),
+    marks: bool = True,
+    image_format: str = "PNG",
+) -> bytes:
+    """Folha sintética no layout padrão: bolhas preenchidas nas respostas e marcas de registro nos cantos."""
+    width, height = size
+    img = Image.new("L", size, color=255)
+    draw = ImageDraw.Draw(img)
+    letras = option_letters(opcoes)
+    rows = _bubble_boxes(width, height, total_q=len(respostas), total_opts=len(letras))
+    for boxes, resposta in zip(rows, respostas):
+        for letra, (x0, y0, x1, y1) in zip(letras, boxes):
+            if letra == resposta:
+                draw.ellipse((x0 + 2, y0 + 2, x1 - 2, y1 - 2), fill=30)
+            else:
+                draw.ellipse((x0, y0, x1, y1), outline=140, width=2)
+    if marks:
+        side = REGISTRATION_MARK_SIZE * width / 2
+        for fx in (REGISTRATION_MARK_CENTER, 1 - REGISTRATION_MARK_CENTER):
+            for fy in (REGISTRATION_MARK_CENTER, 1 - REGISTRATION_MARK_CENTER):
+                cx, cy = fx * width, fy * height
+                draw.rectangle((cx - side, cy - side, cx + side, cy + side), fill=0)
+    buf = BytesIO()
+    if image_format == "JPEG":
+        # Scanners/celulares entregam JPEG colorido.
+        img.convert("RGB").save(buf, format="JPEG", quality=85)
+    else:
+        img.save(buf, format=image_format)
+    return buf.getvalue()
+
+
+def _legacy_suggest(raw: bytes, *, qtd_questoes: int, opcoes: int) -> dict:
+    """Caminho antigo: decodificação completa e list(getdata()) com contagem em Python por bolha."""
+    img = ImageOps.exif_transpose(Image.open(BytesIO(raw)))
+    img.load()
+    if img.width > img.height:
+        img = img.rotate(90, expand=True)
+    img = img.convert("L")
+    respostas = {}
+    for q_idx, boxes in enumerate(_bubble_boxes(img.width, img.height, total_q=qtd_questoes, total_opts=opcoes)):
+        scores = []
+        for box in boxes:
+            pixels = list(img.crop(box).get_flattened_data())
+            scores.append(sum(1 for px in pixels if px < 110) / float(len(pixels) or 1))
+        best = max(range(len(scores)), key=scores.__getitem__)
+        respostas[str(q_idx + 1)] = option_letters(opcoes)[best]
+    return respostas
+
+
+class Command(BaseCommand):
+    help = "Mede folhas/segundo do OMR (caminho antigo, folha a folha e lote ZIP) sobre folhas sintéticas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sheets", type=int, default=60)
+        parser.add_argument("--questoes", type=int, default=50)
+        parser.add_argument("--opcoes", type=int, default=5)
+        parser.add_argument("--workers", type=int, default=None, help="Processos do lote (padrão: OMR_BATCH_WORKERS).")
+        parser.add_argument("--formato", choices=("PNG", "JPEG"), default="JPEG")
+        parser.add_argument("--largura", type=int, default=2480, help="Largura da folha (A4 a 300 dpi: 2480).")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        total_q = max(1, options["questoes"])
+        letras = option_letters(options["opcoes"])
+        gabaritos = [[rng.choice(letras) for _ in range(total_q)] for _ in range(max(1, options["sheets"]))]
+        width = max(600, options["largura"])
+        size = (width, int(width * 297 / 210))
+        sheets = [
+            render_sheet(respostas, opcoes=len(letras), size=size, image_format=options["formato"])
+            for respostas in gabaritos
+        ]
+        expected = [{str(idx + 1): letra for idx, letra in enumerate(respostas)} for respostas in gabaritos]
+
+        started = time.perf_counter()
+        legacy = [_legacy_suggest(raw, qtd_questoes=total_q, opcoes=len(letras)) for raw in sheets]
+        self._report("antigo", len(sheets), time.perf_counter() - started, legacy, expected)
+
+        started = time.perf_counter()
+        single = [
+            suggest_answers_from_omr_image(BytesIO(raw), qtd_questoes=total_q, opcoes=len(letras), align=True)["respostas"]
+            for raw in sheets
+        ]
+        self._report("folha", len(sheets), time.perf_counter() - started, single, expected)
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+            for idx, raw in enumerate(sheets):
+                zf.writestr(f"folha-{idx:04d}.{options['formato'].lower()}", raw)
+        archive.name = "turma.zip"
+        started = time.perf_counter()
+        batch = suggest_answers_from_omr_batch(
+            archive,
+            qtd_questoes=total_q,
+            opcoes=len(letras),
+            workers=options["workers"],
+        )
+        self._report("lote zip", len(sheets), time.perf_counter() - started, [item.get("respostas") for item in batch], expected)
+
+    def _report(self, label: str, total: int, elapsed: float, found: list, expected: list):
+        hits = sum(1 for got, want in zip(found, expected) if got == want)
+        self.stdout.write(
+            f"{label:<9} folhas={total:<5} corretas={hits:<5} tempo={elapsed:.2f}s  "
+            f"{total / elapsed if elapsed else 0:.1f} folhas/s"
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.12 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avaliacoes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avaliacaoprova',
+            name='resultados_cache',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='avaliacaoprova',
+            name='resultados_revisao',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -15,6 +15,15 @@ def _hash_payload(payload: dict) -> str:
     return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
 
 
+def _bump_resultados_revisao(**lookup) -> None:
+    # update() direto: não dispara auto_now nem carrega a avaliação.
+    # Chamado pelos sinais de gabaritos, aplicações e folhas (apps.avaliacoes.signals).
+    AvaliacaoProva.objects.filter(**lookup).update(resultados_revisao=models.F("resultados_revisao") + 1)
+
+
+RESULTADOS_CACHE_FIELDS = frozenset({"resultados_revisao", "resultados_cache"})
+
+
 class AvaliacaoProva(models.Model):
     class Tipo(models.TextChoices):
         OBJETIVA = "OBJETIVA", "Objetiva"
@@ -63,6 +72,9 @@ class AvaliacaoProva(models.Model):
     qtd_questoes = models.PositiveIntegerField(default=10)
     tem_versoes = models.BooleanField(default=False)
     ativo = models.BooleanField(default=True)
+    # Incrementada a cada folha corrigida/gabarito alterado; invalida resultados_cache.
+    resultados_revisao = models.PositiveIntegerField(default=0, editable=False)
+    resultados_cache = models.JSONField(default=dict, blank=True, editable=False)
 
     criado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -84,6 +96,20 @@ class AvaliacaoProva(models.Model):
             models.Index(fields=["tipo", "ativo"]),
         ]
 
+    def save_sem_resultados(self, **kwargs) -> None:
+        """
+        Grava os demais campos sem tocar em `resultados_revisao`/`resultados_cache`, que só
+        mudam via update() (sinais e acumulador): uma instância desatualizada não os faz regredir.
+        """
+        self.save(
+            update_fields=[
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RESULTADOS_CACHE_FIELDS
+            ],
+            **kwargs,
+        )
+
     def __str__(self) -> str:
         return f"{self.turma} • {self.titulo}"
 
@@ -1,12 +1,35 @@
 from __future__ import annotations
 
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from io import BytesIO
 from statistics import median
-from typing import BinaryIO
+from typing import BinaryIO, Iterator
 
+from django.conf import settings
 from PIL import Image, ImageOps
 
-from .forms import option_letters
+
+# Menor lado desejado na decodificação reduzida (draft) de JPEGs grandes.
+OMR_DECODE_MIN_SIDE = 1200
+BATCH_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+DARK_THRESHOLD = 110
+# Tabela do Image.point: pixel escuro -> 255, claro -> 0.
+_DARK_LUT = [255 if value < DARK_THRESHOLD else 0 for value in range(256)]
+
+# Marcas de registro (quadrados pretos) opcionais nos cantos da folha, em frações da página.
+REGISTRATION_MARK_CENTER = 0.04
+REGISTRATION_MARK_SIZE = 0.025
+_REGISTRATION_WINDOW = 0.15
 
 
 class OMRDetectionError(Exception):
@@ -40,77 +63,162 @@ def _prepare_image(file_obj) -> Image.Image:
 
     try:
         img = Image.open(stream)
-        img = ImageOps.exif_transpose(img)
+        # JPEG: decodifica direto em tons de cinza e, em fotos/scans grandes, em escala reduzida.
+        img.draft("L", (OMR_DECODE_MIN_SIDE, OMR_DECODE_MIN_SIDE))
         img.load()
+        # Sem cópia da imagem inteira quando não há orientação EXIF a aplicar.
+        ImageOps.exif_transpose(img, in_place=True)
     except Exception as exc:
         raise OMRDetectionError("Não foi possível ler a imagem para OMR.") from exc
 
+    return _normalize_page(img)
+
+
+def _normalize_page(img: Image.Image) -> Image.Image:
+    if img.mode != "L":
+        img = img.convert("L")
     if img.width > img.height:
         img = img.rotate(90, expand=True)
-
-    return img.convert("L")
+    return img
 
 
 def _dark_ratio(img_gray: Image.Image) -> float:
-    pixels = list(img_gray.getdata())
-    if not pixels:
+    # Histograma calculado em C: sem copiar os pixels para uma lista Python.
+    total = img_gray.width * img_gray.height
+    if not total:
         return 0.0
-    dark = sum(1 for px in pixels if px < 110)
-    return dark / float(len(pixels))
+    dark = sum(img_gray.histogram()[:DARK_THRESHOLD])
+    return dark / float(total)
 
 
 def _clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(v, hi))
 
 
-def suggest_answers_from_omr_image(
-    file_obj,
-    *,
-    qtd_questoes: int,
-    opcoes: int,
-) -> dict:
-    """
-    OMR semiautomático (beta).
-    Assume folha padrão do PDF gerado pelo módulo com grade central em A4.
-    """
-    img = _prepare_image(file_obj)
-    width, height = img.size
-
+def _bubble_boxes(width: int, height: int, *, total_q: int, total_opts: int):
+    """Caixas (x0, y0, x1, y1) de cada bolha, por questão, no layout padrão do PDF (A4, grade central)."""
     # Região aproximada da grade no layout PDF padrão
     left = int(width * 0.08)
     right = int(width * 0.92)
     top = int(height * 0.32)
     bottom = int(height * 0.92)
 
-    total_q = max(1, int(qtd_questoes or 1))
-    letras = option_letters(opcoes)
-    total_cols = 1 + len(letras)  # coluna Q + alternativas
-
+    total_cols = 1 + total_opts  # coluna Q + alternativas
     row_h = (bottom - top) / float(total_q + 1)  # +1 cabeçalho
     col_w = (right - left) / float(total_cols)
+    r = int(min(col_w, row_h) * 0.24)
 
-    resultados: list[OMRQuestionResult] = []
-    respostas: dict[str, str] = {}
-
+    rows = []
     for q_idx in range(total_q):
         # linha de questão começa após cabeçalho da tabela
         y0 = top + int((q_idx + 1) * row_h)
         y1 = top + int((q_idx + 2) * row_h)
-
-        scores: list[float] = []
-        for opt_idx in range(len(letras)):
+        cy = int((y0 + y1) / 2)
+        boxes = []
+        for opt_idx in range(total_opts):
             # colunas de resposta começam após a coluna de número
             x0 = left + int((opt_idx + 1) * col_w)
             x1 = left + int((opt_idx + 2) * col_w)
-
             cx = int((x0 + x1) / 2)
-            cy = int((y0 + y1) / 2)
-            r = int(min(col_w, row_h) * 0.24)
+            boxes.append((cx - r, cy - r, cx + r, cy + r))
+        rows.append(boxes)
+    return rows
+
+
+def _projection(mask: Image.Image, *, axis: int) -> list[int]:
+    """Média (0-255) da máscara por coluna (axis=0) ou linha (axis=1), reduzida em C."""
+    size = (mask.width, 1) if axis == 0 else (1, mask.height)
+    return list(mask.resize(size, Image.Resampling.BOX).get_flattened_data())
+
+
+def _find_registration_mark(img: Image.Image, box: tuple[int, int, int, int]) -> tuple[float, float] | None:
+    window = img.crop(box).point(_DARK_LUT)
+    cols = _projection(window, axis=0)
+    rows = _projection(window, axis=1)
+    dark_cols = [idx for idx, val in enumerate(cols) if val]
+    dark_rows = [idx for idx, val in enumerate(rows) if val]
+    if not dark_cols or not dark_rows:
+        return None
+
+    expected_side = REGISTRATION_MARK_SIZE * img.width
+    bw = dark_cols[-1] - dark_cols[0] + 1
+    bh = dark_rows[-1] - dark_rows[0] + 1
+    if not (0.5 * expected_side <= bw <= 2.0 * expected_side and 0.5 * expected_side <= bh <= 2.0 * expected_side):
+        return None
+    dark = window.histogram()[255]
+    if dark < 0.6 * bw * bh:
+        # Texto ou sujeira no canto: a marca é um quadrado cheio.
+        return None
+
+    col_total = float(sum(cols))
+    row_total = float(sum(rows))
+    cx = sum(idx * val for idx, val in enumerate(cols)) / col_total
+    cy = sum(idx * val for idx, val in enumerate(rows)) / row_total
+    return box[0] + cx + 0.5, box[1] + cy + 0.5
+
+
+def _registration_transform(img: Image.Image):
+    """
+    Localiza as marcas dos cantos superior esquerdo, superior direito e inferior esquerdo
+    e devolve a transformação afim (translação, escala, rotação leve) do layout nominal
+    para a imagem, ou None se alguma marca não for encontrada.
+    """
+    width, height = img.size
+    win_w = int(width * _REGISTRATION_WINDOW)
+    win_h = int(height * _REGISTRATION_WINDOW)
+    tl = _find_registration_mark(img, (0, 0, win_w, win_h))
+    tr = _find_registration_mark(img, (width - win_w, 0, width, win_h))
+    bl = _find_registration_mark(img, (0, height - win_h, win_w, height))
+    if not (tl and tr and bl):
+        return None
+
+    px0 = REGISTRATION_MARK_CENTER * width
+    py0 = REGISTRATION_MARK_CENTER * height
+    dx = (1.0 - 2 * REGISTRATION_MARK_CENTER) * width
+    dy = (1.0 - 2 * REGISTRATION_MARK_CENTER) * height
+    ux = ((tr[0] - tl[0]) / dx, (tr[1] - tl[1]) / dx)
+    uy = ((bl[0] - tl[0]) / dy, (bl[1] - tl[1]) / dy)
+
+    def transform(x: float, y: float) -> tuple[float, float]:
+        rx, ry = x - px0, y - py0
+        return tl[0] + rx * ux[0] + ry * uy[0], tl[1] + rx * ux[1] + ry * uy[1]
+
+    scale = abs(ux[0] * uy[1] - ux[1] * uy[0]) ** 0.5
+    return transform, scale
+
+
+def _align_boxes(rows, transform, scale: float):
+    aligned = []
+    for boxes in rows:
+        out = []
+        for x0, y0, x1, y1 in boxes:
+            cx, cy = transform((x0 + x1) / 2.0, (y0 + y1) / 2.0)
+            r = (x1 - x0) / 2.0 * scale
+            out.append((int(cx - r), int(cy - r), int(cx + r), int(cy + r)))
+        aligned.append(out)
+    return aligned
+
+
+def _detect_answers(img: Image.Image, *, qtd_questoes: int, opcoes: int, align: bool = False) -> dict:
+    total_q = max(1, int(qtd_questoes or 1))
+    # Import tardio: o processo spawn importa este módulo antes de _init_worker configurar o Django.
+    from .forms import option_letters
 
-            patch = img.crop((cx - r, cy - r, cx + r, cy + r))
-            score = _dark_ratio(patch)
-            scores.append(score)
+    letras = option_letters(opcoes)
+    rows = _bubble_boxes(img.width, img.height, total_q=total_q, total_opts=len(letras))
 
+    alinhada = False
+    if align:
+        registration = _registration_transform(img)
+        if registration is not None:
+            rows = _align_boxes(rows, *registration)
+            alinhada = True
+
+    resultados: list[OMRQuestionResult] = []
+    respostas: dict[str, str] = {}
+
+    for q_idx, boxes in enumerate(rows):
+        scores = [_dark_ratio(img.crop(box)) for box in boxes]
         if not scores:
             continue
 
@@ -142,6 +250,7 @@ def suggest_answers_from_omr_image(
         "questoes_detectadas": len(resultados),
         "total_questoes": total_q,
         "confianca_media": round(confianca_media * 100.0, 2),
+        "alinhada": alinhada,
         "detalhes": [
             {
                 "questao": item.questao,
@@ -151,3 +260,195 @@ def suggest_answers_from_omr_image(
             for item in resultados
         ],
     }
+
+
+def suggest_answers_from_omr_image(
+    file_obj,
+    *,
+    qtd_questoes: int,
+    opcoes: int,
+    align: bool = False,
+) -> dict:
+    """
+    OMR semiautomático (beta).
+    Assume folha padrão do PDF gerado pelo módulo com grade central em A4.
+    Com `align=True`, usa marcas de registro nos cantos (se presentes) para
+    corrigir deslocamento, escala e rotação leve da digitalização.
+    """
+    img = _prepare_image(file_obj)
+    return _detect_answers(img, qtd_questoes=qtd_questoes, opcoes=opcoes, align=align)
+
+
+def _batch_limits() -> tuple[int, int]:
+    return (
+        int(getattr(settings, "OMR_BATCH_MAX_ENTRY_BYTES", 25 * 1024 * 1024)),
+        int(getattr(settings, "OMR_BATCH_MAX_TOTAL_BYTES", 400 * 1024 * 1024)),
+    )
+
+
+def _iter_tiff_pages(img: Image.Image) -> Iterator[tuple[str, Image.Image]]:
+    """
+    Páginas de um TIFF multipágina já em tons de cinza. O tamanho decodificado de cada
+    página (largura x altura x bandas, lido do cabeçalho) conta para os mesmos limites
+    do ZIP antes de decodificá-la; o número de páginas também é limitado.
+    """
+    max_entry, max_total = _batch_limits()
+    max_pages = int(getattr(settings, "OMR_BATCH_MAX_PAGES", 500))
+    total_pages = getattr(img, "n_frames", 1)
+    if total_pages > max_pages:
+        raise OMRDetectionError(f"O lote tem {total_pages} páginas; o máximo é {max_pages}.")
+
+    total = 0
+    for page in range(total_pages):
+        img.seek(page)
+        decoded = img.width * img.height * len(img.getbands())
+        if decoded > max_entry:
+            raise OMRDetectionError(f"A página {page + 1} excede o tamanho máximo por imagem do lote.")
+        total += decoded
+        if total > max_total:
+            raise OMRDetectionError("O lote descompactado excede o tamanho máximo permitido.")
+        try:
+            frame = _normalize_page(img.convert("L"))
+        except Exception as exc:
+            raise OMRDetectionError(f"Não foi possível ler a página {page + 1} do TIFF.") from exc
+        yield f"pagina-{page + 1}", frame
+
+
+def _check_zip_sizes(entries: list[zipfile.ZipInfo]) -> None:
+    """Recusa o lote pelos tamanhos declarados no ZIP antes de descompactar qualquer entrada."""
+    max_entry, max_total = _batch_limits()
+    for info in entries:
+        if info.file_size > max_entry:
+            raise OMRDetectionError(f"A folha {info.filename} excede o tamanho máximo por imagem do lote.")
+    if sum(info.file_size for info in entries) > max_total:
+        raise OMRDetectionError("O lote descompactado excede o tamanho máximo permitido.")
+
+
+def _read_zip_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    # O tamanho declarado pode mentir: lê no máximo o limite e recusa o que passar dele.
+    max_entry, _max_total = _batch_limits()
+    with archive.open(info) as entry:
+        raw = entry.read(max_entry + 1)
+    if len(raw) > max_entry:
+        raise OMRDetectionError(f"A folha {info.filename} excede o tamanho máximo por imagem do lote.")
+    return raw
+
+
+def _iter_batch_pages(file_obj) -> Iterator[tuple[str, bytes | Image.Image]]:
+    """Folhas de um lote: bytes das entradas de imagem de um ZIP ou as páginas de um TIFF multipágina."""
+    name = str(getattr(file_obj, "name", "") or "").lower().strip()
+    if hasattr(file_obj, "seek"):
+        try:
+            file_obj.seek(0)
+        except Exception:
+            pass
+
+    if name.endswith(".zip") or zipfile.is_zipfile(file_obj):
+        if hasattr(file_obj, "seek"):
+            file_obj.seek(0)
+        try:
+            with zipfile.ZipFile(file_obj) as archive:
+                entries = [
+                    info
+                    for info in sorted(archive.infolist(), key=lambda item: item.filename)
+                    if not info.is_dir() and info.filename.lower().endswith(BATCH_IMAGE_EXTENSIONS)
+                ]
+                _check_zip_sizes(entries)
+                for info in entries:
+                    yield info.filename, _read_zip_entry(archive, info)
+        except zipfile.BadZipFile as exc:
+            raise OMRDetectionError("Arquivo ZIP do lote inválido.") from exc
+        return
+
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+    try:
+        img = Image.open(file_obj)
+    except Exception as exc:
+        raise OMRDetectionError("Envie um ZIP de imagens ou um TIFF multipágina com as folhas.") from exc
+
+    yield from _iter_tiff_pages(img)
+
+
+def _process_batch_page(item: tuple[str, bytes | Image.Image, int, int, bool]) -> dict:
+    nome, raw, qtd_questoes, opcoes, align = item
+    try:
+        if isinstance(raw, Image.Image):
+            # Página de TIFF: já decodificada e normalizada, vai direto para a leitura.
+            resultado = _detect_answers(raw, qtd_questoes=qtd_questoes, opcoes=opcoes, align=align)
+        else:
+            stream = BytesIO(raw)
+            stream.name = nome
+            resultado = suggest_answers_from_omr_image(stream, qtd_questoes=qtd_questoes, opcoes=opcoes, align=align)
+    except OMRDetectionError as exc:
+        return {"arquivo": nome, "ok": False, "erro": str(exc)}
+    return {"arquivo": nome, "ok": True, **resultado}
+
+
+def _init_worker() -> None:
+    """Inicializador do pool (spawn): configura o Django antes da primeira folha, como no pool de PDF."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            # Outro tamanho pedido: recria o pool em vez de reaproveitar o antigo em silêncio.
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            import multiprocessing
+
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_omr_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def suggest_answers_from_omr_batch(
+    file_obj,
+    *,
+    qtd_questoes: int,
+    opcoes: int,
+    align: bool = True,
+    workers: int | None = None,
+) -> list[dict]:
+    """
+    OMR de uma turma inteira: ZIP de imagens ou TIFF multipágina, uma folha por
+    entrada/página, na ordem do arquivo. Com OMR_BATCH_WORKERS > 1 (ou `workers`),
+    as folhas vão para um pool de processos spawn reaproveitado entre lotes, como o
+    de PDF; com 0/1 ou uma folha só, roda em série no próprio processo.
+    """
+    items = [
+        (nome, raw, qtd_questoes, opcoes, align)
+        for nome, raw in _iter_batch_pages(file_obj)
+    ]
+    if not items:
+        raise OMRDetectionError("Nenhuma folha encontrada no lote.")
+
+    workers = int(workers if workers is not None else getattr(settings, "OMR_BATCH_WORKERS", 0))
+    if workers <= 1 or len(items) == 1:
+        return [_process_batch_page(item) for item in items]
+
+    try:
+        pool = _get_pool(workers)
+        return list(pool.map(_process_batch_page, items, chunksize=max(1, len(items) // (workers * 4))))
+    except BrokenProcessPool:
+        shutdown_omr_pool()
+        return [_process_batch_page(item) for item in items]
@@ -281,6 +281,36 @@ def corrigir_folha_manual(
     }
 
 
+def associar_folhas_omr_lote(avaliacao: AvaliacaoProva, lote: list[dict]) -> list[dict[str, Any]]:
+    """
+    Associa cada folha lida no lote à sua FolhaResposta. Arquivos cujo nome contém o
+    token da folha vão direto para ela; os demais seguem a ordem de impressão do PDF
+    (alunos por nome) entre as folhas que sobraram.
+    """
+    folhas = list(
+        FolhaResposta.objects.filter(aplicacao__avaliacao=avaliacao)
+        .select_related("aplicacao", "aplicacao__aluno")
+        .order_by("aplicacao__aluno__nome", "aplicacao_id")
+    )
+    por_token = {str(folha.token): folha for folha in folhas}
+    associadas: list[FolhaResposta | None] = []
+    usadas: set[int] = set()
+    for item in lote:
+        nome = str(item.get("arquivo") or "").lower()
+        folha = next((f for token, f in por_token.items() if token in nome and f.pk not in usadas), None)
+        if folha is not None:
+            usadas.add(folha.pk)
+        associadas.append(folha)
+
+    restantes = iter([folha for folha in folhas if folha.pk not in usadas])
+    linhas: list[dict[str, Any]] = []
+    for item, folha in zip(lote, associadas):
+        if folha is None:
+            folha = next(restantes, None)
+        linhas.append({"folha": folha, "resultado": item})
+    return linhas
+
+
 def resumo_avaliacao(avaliacao: AvaliacaoProva) -> dict[str, Any]:
     qs = avaliacao.aplicacoes.all()
     stats = qs.aggregate(
@@ -297,30 +327,69 @@ def resumo_avaliacao(avaliacao: AvaliacaoProva) -> dict[str, Any]:
     }
 
 
-def resultados_por_questao(avaliacao: AvaliacaoProva) -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    corrected = (
-        FolhaResposta.objects.select_related("aplicacao", "aplicacao__avaliacao")
-        .filter(aplicacao__avaliacao=avaliacao, aplicacao__status=AplicacaoAvaliacao.Status.CORRIGIDA)
-        .order_by("id")
-    )
-    total_corrigidas = corrected.count()
-
-    if total_corrigidas == 0:
-        for idx in range(1, int(avaliacao.qtd_questoes or 0) + 1):
-            rows.append(
-                {
-                    "numero": idx,
-                    "gabarito": "-",
-                    "acertos": 0,
-                    "erros": 0,
-                    "taxa_acerto": Decimal("0.00"),
-                    "marcacoes": {},
-                }
-            )
-        return rows
-
-    gabaritos = {
+DISCRIMINACAO_GRUPO = Decimal("0.27")
+
+
+class _AcumuladorQuestoes:
+    """
+    Acumulador de passada única sobre as folhas corrigidas: contadores por questão para
+    todas as versões de uma vez e, por folha, só o total de acertos e uma máscara de bits
+    das questões acertadas (base do índice de discriminação).
+    """
+
+    def __init__(self, qtd_questoes: int):
+        self.qtd_questoes = qtd_questoes
+        self.keys = [str(idx) for idx in range(1, qtd_questoes + 1)]
+        self.total = 0
+        self.acertos = [0] * qtd_questoes
+        self.erros = [0] * qtd_questoes
+        self.brancos = [0] * qtd_questoes
+        self.marcacoes = [Counter() for _ in range(qtd_questoes)]
+        self.distratores = [Counter() for _ in range(qtd_questoes)]
+        self.folhas: list[tuple[int, int]] = []
+
+    def add(self, respostas: dict | None, gabarito: dict[str, str]) -> None:
+        respostas = respostas if isinstance(respostas, dict) else {}
+        self.total += 1
+        mascara = 0
+        pontos = 0
+        for pos, key in enumerate(self.keys):
+            esperado = gabarito.get(key, "")
+            marcado = str(respostas.get(key, "") or "").upper().strip()
+            if marcado:
+                self.marcacoes[pos][marcado] += 1
+            if not esperado:
+                continue
+            if marcado == esperado:
+                self.acertos[pos] += 1
+                mascara |= 1 << pos
+                pontos += 1
+            else:
+                self.erros[pos] += 1
+                if marcado:
+                    self.distratores[pos][marcado] += 1
+                else:
+                    self.brancos[pos] += 1
+        self.folhas.append((pontos, mascara))
+
+    def discriminacao(self) -> list[Decimal | None]:
+        """Índice de discriminação clássico: p(grupo superior) - p(grupo inferior), 27% de cada ponta."""
+        grupo = int((Decimal(len(self.folhas)) * DISCRIMINACAO_GRUPO).to_integral_value(rounding=ROUND_HALF_UP))
+        if grupo < 1 or len(self.folhas) < 2:
+            return [None] * self.qtd_questoes
+        ordenadas = sorted(self.folhas, key=lambda item: item[0])
+        inferior = [mascara for _pontos, mascara in ordenadas[:grupo]]
+        superior = [mascara for _pontos, mascara in ordenadas[-grupo:]]
+        indices: list[Decimal | None] = []
+        for pos in range(self.qtd_questoes):
+            bit = 1 << pos
+            diff = sum(1 for m in superior if m & bit) - sum(1 for m in inferior if m & bit)
+            indices.append((Decimal(diff) / Decimal(grupo)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        return indices
+
+
+def _gabaritos_normalizados(avaliacao: AvaliacaoProva) -> dict[str, dict[str, str]]:
+    return {
         versao: normalize_respostas(
             gab.respostas,
             qtd_questoes=avaliacao.qtd_questoes,
@@ -331,52 +400,150 @@ def resultados_por_questao(avaliacao: AvaliacaoProva) -> list[dict[str, Any]]:
         }.items()
     }
 
-    for idx in range(1, int(avaliacao.qtd_questoes or 0) + 1):
-        key = str(idx)
-        acertos = 0
-        erros = 0
-        marcacoes = Counter()
 
-        for folha in corrected:
-            versao = folha.versao or folha.aplicacao.versao or GabaritoProva.Versao.A
-            gabarito = gabaritos.get(versao) or gabaritos.get(GabaritoProva.Versao.A) or {}
-            esperado = gabarito.get(key, "")
-            marcado = str((folha.respostas_marcadas or {}).get(key, "") or "").upper().strip()
-            if marcado:
-                marcacoes[marcado] += 1
+def _gabarito_da_folha(gabaritos: dict[str, dict[str, str]], versao: str) -> dict[str, str]:
+    return gabaritos.get(versao) or gabaritos.get(GabaritoProva.Versao.A) or {}
 
-            if esperado and marcado == esperado:
-                acertos += 1
-            elif esperado:
-                erros += 1
 
+def _folhas_corrigidas(avaliacao_ids):
+    return (
+        FolhaResposta.objects.filter(
+            aplicacao__avaliacao_id__in=avaliacao_ids,
+            aplicacao__status=AplicacaoAvaliacao.Status.CORRIGIDA,
+        )
+        .order_by()
+        .values_list("aplicacao__avaliacao_id", "versao", "aplicacao__versao", "respostas_marcadas")
+        .iterator(chunk_size=2000)
+    )
+
+
+def _linhas_do_acumulador(acc: _AcumuladorQuestoes, gabarito_display: list[str], opcoes: int) -> list[dict[str, Any]]:
+    letras = option_letters(opcoes)
+    discriminacao = acc.discriminacao()
+    rows: list[dict[str, Any]] = []
+    for pos in range(acc.qtd_questoes):
         taxa = Decimal("0")
-        if total_corrigidas > 0:
-            taxa = (Decimal(acertos) / Decimal(total_corrigidas) * Decimal("100")).quantize(
+        if acc.total > 0:
+            taxa = (Decimal(acc.acertos[pos]) / Decimal(acc.total) * Decimal("100")).quantize(
                 Decimal("0.01"), rounding=ROUND_HALF_UP
             )
-
-        gabarito_display = "-"
-        for versao in versoes_da_avaliacao(avaliacao):
-            resposta = (gabaritos.get(versao) or {}).get(key)
-            if resposta:
-                gabarito_display = resposta
-                break
-
+        chave = gabarito_display[pos]
+        distratores = {letra: acc.distratores[pos].get(letra, 0) for letra in letras if letra != chave}
         rows.append(
             {
-                "numero": idx,
-                "gabarito": gabarito_display,
-                "acertos": acertos,
-                "erros": erros,
+                "numero": pos + 1,
+                "gabarito": gabarito_display[pos],
+                "acertos": acc.acertos[pos],
+                "erros": acc.erros[pos],
                 "taxa_acerto": taxa,
-                "marcacoes": dict(marcacoes),
+                "marcacoes": dict(acc.marcacoes[pos]),
+                "discriminacao": discriminacao[pos],
+                "distratores": distratores,
+                "em_branco": acc.brancos[pos],
             }
         )
+    return rows
+
+
+def _calcular_resultados_por_questao(avaliacao: AvaliacaoProva) -> list[dict[str, Any]]:
+    total_q = int(avaliacao.qtd_questoes or 0)
+    gabaritos = _gabaritos_normalizados(avaliacao)
+    acc = _AcumuladorQuestoes(total_q)
+    for _avaliacao_id, folha_versao, aplicacao_versao, respostas in _folhas_corrigidas([avaliacao.pk]):
+        versao = folha_versao or aplicacao_versao or GabaritoProva.Versao.A
+        acc.add(respostas, _gabarito_da_folha(gabaritos, versao))
+
+    if acc.total == 0:
+        return [
+            {
+                "numero": idx,
+                "gabarito": "-",
+                "acertos": 0,
+                "erros": 0,
+                "taxa_acerto": Decimal("0.00"),
+                "marcacoes": {},
+                "discriminacao": None,
+                "distratores": {},
+                "em_branco": 0,
+            }
+            for idx in range(1, total_q + 1)
+        ]
+
+    versoes = versoes_da_avaliacao(avaliacao)
+    gabarito_display = []
+    for key in acc.keys:
+        resposta = "-"
+        for versao in versoes:
+            if (gabaritos.get(versao) or {}).get(key):
+                resposta = gabaritos[versao][key]
+                break
+        gabarito_display.append(resposta)
+    return _linhas_do_acumulador(acc, gabarito_display, avaliacao.opcoes)
+
 
+_DECIMAL_FIELDS = ("taxa_acerto", "discriminacao")
+
+
+def _rows_to_cache(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{k: (str(v) if k in _DECIMAL_FIELDS and v is not None else v) for k, v in row.items()} for row in rows]
+
+
+def _rows_from_cache(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{k: (Decimal(v) if k in _DECIMAL_FIELDS and v is not None else v) for k, v in row.items()} for row in rows]
+
+
+def resultados_por_questao(avaliacao: AvaliacaoProva) -> list[dict[str, Any]]:
+    """
+    Estatísticas por questão (acertos, marcações, discriminação e distratores), calculadas
+    numa única passada pelas folhas corrigidas e guardadas em `resultados_cache`. O cache
+    vale enquanto `resultados_revisao` não mudar (folha corrigida ou gabarito alterado).
+    """
+    estado = (
+        AvaliacaoProva.objects.filter(pk=avaliacao.pk)
+        .values("resultados_revisao", "resultados_cache", "qtd_questoes", "opcoes")
+        .first()
+    )
+    if estado is None:
+        return _calcular_resultados_por_questao(avaliacao)
+
+    revisao = estado["resultados_revisao"]
+    cache = estado["resultados_cache"] or {}
+    assinatura = [revisao, estado["qtd_questoes"], estado["opcoes"]]
+    if cache.get("assinatura") == assinatura and isinstance(cache.get("questoes"), list):
+        return _rows_from_cache(cache["questoes"])
+
+    rows = _calcular_resultados_por_questao(avaliacao)
+    # Só grava se nenhuma correção entrou durante o cálculo.
+    AvaliacaoProva.objects.filter(pk=avaliacao.pk, resultados_revisao=revisao).update(
+        resultados_cache={"assinatura": assinatura, "questoes": _rows_to_cache(rows)}
+    )
     return rows
 
 
+def analise_itens_rede(avaliacoes) -> list[dict[str, Any]]:
+    """
+    Análise de itens em nível de rede: uma mesma prova aplicada em várias turmas
+    (mesma quantidade de questões e alternativas), agregada numa única consulta e
+    numa única passada. Cada folha é corrigida pelo gabarito da própria avaliação/versão.
+    """
+    avaliacoes = list(avaliacoes)
+    if not avaliacoes:
+        return []
+    total_q = int(avaliacoes[0].qtd_questoes or 0)
+    opcoes = avaliacoes[0].opcoes
+    if any(int(item.qtd_questoes or 0) != total_q or item.opcoes != opcoes for item in avaliacoes):
+        raise ValueError("As avaliações precisam ter a mesma quantidade de questões e alternativas.")
+
+    gabaritos = {item.pk: _gabaritos_normalizados(item) for item in avaliacoes}
+    acc = _AcumuladorQuestoes(total_q)
+    for avaliacao_id, folha_versao, aplicacao_versao, respostas in _folhas_corrigidas(list(gabaritos)):
+        versao = folha_versao or aplicacao_versao or GabaritoProva.Versao.A
+        acc.add(respostas, _gabarito_da_folha(gabaritos[avaliacao_id], versao))
+
+    referencia = _gabarito_da_folha(gabaritos[avaliacoes[0].pk], GabaritoProva.Versao.A)
+    return _linhas_do_acumulador(acc, [referencia.get(key) or "-" for key in acc.keys], opcoes)
+
+
 def public_validation_payload(folha: FolhaResposta) -> dict[str, Any]:
     aplicacao = folha.aplicacao
     aluno = aplicacao.aluno
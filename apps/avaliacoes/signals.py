@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AplicacaoAvaliacao, FolhaResposta, GabaritoProva, _bump_resultados_revisao
+
+
+# Qualquer gravação ou exclusão de gabarito, aplicação (status/versão) ou folha
+# muda as estatísticas da avaliação: avança a revisão e o cache de resultados vence.
+@receiver(post_save, sender=GabaritoProva)
+@receiver(post_delete, sender=GabaritoProva)
+@receiver(post_save, sender=AplicacaoAvaliacao)
+@receiver(post_delete, sender=AplicacaoAvaliacao)
+def bump_resultados_avaliacao(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _bump_resultados_revisao(pk=instance.avaliacao_id)
+
+
+@receiver(post_save, sender=FolhaResposta)
+@receiver(post_delete, sender=FolhaResposta)
+def bump_resultados_folha(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    _bump_resultados_revisao(aplicacoes__pk=instance.aplicacao_id)
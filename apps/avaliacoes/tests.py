@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import zipfile
 from io import BytesIO
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from PIL import Image, ImageDraw
 
@@ -13,9 +14,22 @@ from apps.educacao.models import Aluno, Matricula, Turma
 from apps.educacao.models_diario import Nota
 from apps.org.models import Municipio, Secretaria, Unidade
 
+from .management.commands.bench_omr import render_sheet
 from .models import AvaliacaoProva, GabaritoProva
-from .omr import suggest_answers_from_omr_image
-from .services import corrigir_folha_manual, ensure_aplicacoes_da_avaliacao
+from .omr import (
+    REGISTRATION_MARK_CENTER,
+    OMRDetectionError,
+    REGISTRATION_MARK_SIZE,
+    _bubble_boxes,
+    suggest_answers_from_omr_batch,
+    suggest_answers_from_omr_image,
+)
+from .services import (
+    analise_itens_rede,
+    corrigir_folha_manual,
+    ensure_aplicacoes_da_avaliacao,
+    resultados_por_questao,
+)
 
 
 class AvaliacoesServicesTests(TestCase):
@@ -156,6 +170,216 @@ class AvaliacoesServicesTests(TestCase):
         self.assertEqual(result["respostas"], {str(idx + 1): val for idx, val in enumerate(escolhas)})
 
 
+class ResultadosPorQuestaoTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="prof_resultados", password="x")
+        self.municipio = Municipio.objects.create(nome="Cidade Itens", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="SEMED")
+        self.unidade = Unidade.objects.create(
+            secretaria=self.secretaria,
+            nome="Escola Itens",
+            tipo=Unidade.Tipo.EDUCACAO,
+        )
+
+    def _avaliacao(self, nome_turma: str, alunos: list[str]) -> AvaliacaoProva:
+        turma = Turma.objects.create(unidade=self.unidade, nome=nome_turma, ano_letivo=2026)
+        for nome in alunos:
+            aluno = Aluno.objects.create(nome=nome)
+            Matricula.objects.create(aluno=aluno, turma=turma, situacao=Matricula.Situacao.ATIVA)
+        avaliacao = AvaliacaoProva.objects.create(
+            municipio=self.municipio,
+            turma=turma,
+            titulo="Diagnóstica",
+            qtd_questoes=3,
+            opcoes=4,
+            tem_versoes=True,
+            criado_por=self.user,
+        )
+        ensure_aplicacoes_da_avaliacao(avaliacao, actor=self.user)
+        for versao, respostas in (("A", {"1": "A", "2": "B", "3": "C"}), ("B", {"1": "B", "2": "C", "3": "D"})):
+            gabarito = GabaritoProva.objects.get(avaliacao=avaliacao, versao=versao)
+            gabarito.respostas = respostas
+            gabarito.save()
+        return avaliacao
+
+    def _corrigir(self, avaliacao, nome: str, respostas: dict):
+        folha = avaliacao.aplicacoes.get(aluno__nome=nome).folha
+        corrigir_folha_manual(folha, respostas_marcadas=respostas, actor=self.user)
+
+    def test_single_pass_stats_are_cached_per_revision(self):
+        # Ana, Bruno, Carla, Davi -> versões A, B, A, B.
+        avaliacao = self._avaliacao("6A", ["Ana", "Bruno", "Carla", "Davi"])
+        self._corrigir(avaliacao, "Ana", {"1": "A", "2": "B", "3": "C"})
+        self._corrigir(avaliacao, "Bruno", {"1": "B", "2": "C", "3": "A"})
+        self._corrigir(avaliacao, "Carla", {"1": "D", "2": "", "3": "A"})
+        self._corrigir(avaliacao, "Davi", {"1": "A", "2": "A", "3": "A"})
+
+        rows = resultados_por_questao(avaliacao)
+        q1, q2, q3 = rows
+        self.assertEqual((q1["gabarito"], q1["acertos"], q1["erros"]), ("A", 2, 2))
+        self.assertEqual(q1["taxa_acerto"], Decimal("50.00"))
+        self.assertEqual(q1["marcacoes"], {"A": 2, "B": 1, "D": 1})
+        self.assertEqual(q2["em_branco"], 1)
+        self.assertEqual(q3["distratores"], {"A": 3, "B": 0, "D": 0})
+        # Grupos de 27% (1 folha): Ana (3 acertos) contra Davi/Carla (0 acertos).
+        self.assertEqual(q1["discriminacao"], Decimal("1.00"))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(resultados_por_questao(avaliacao), rows)
+
+        self._corrigir(avaliacao, "Davi", {"1": "B", "2": "C", "3": "D"})
+        atualizadas = resultados_por_questao(avaliacao)
+        self.assertEqual(atualizadas[2]["acertos"], 2)
+
+    def test_deletes_and_aplicacao_changes_expire_cached_stats(self):
+        avaliacao = self._avaliacao("6C", ["Ana", "Bruno", "Carla"])
+        self._corrigir(avaliacao, "Ana", {"1": "A", "2": "B", "3": "C"})
+        self._corrigir(avaliacao, "Bruno", {"1": "B", "2": "C", "3": "D"})
+        self._corrigir(avaliacao, "Carla", {"1": "D", "2": "D", "3": "D"})
+        self.assertEqual(resultados_por_questao(avaliacao)[0]["acertos"], 2)
+
+        avaliacao.aplicacoes.get(aluno__nome="Bruno").folha.delete()
+        self.assertEqual(resultados_por_questao(avaliacao)[0]["acertos"], 1)
+
+        aplicacao = avaliacao.aplicacoes.get(aluno__nome="Carla")
+        revisao = AvaliacaoProva.objects.values_list("resultados_revisao", flat=True).get(pk=avaliacao.pk)
+        aplicacao.save(update_fields=["versao"])
+        self.assertGreater(
+            AvaliacaoProva.objects.values_list("resultados_revisao", flat=True).get(pk=avaliacao.pk), revisao
+        )
+
+        avaliacao.aplicacoes.get(aluno__nome="Ana").delete()
+        self.assertEqual(resultados_por_questao(avaliacao)[0]["acertos"], 0)
+
+    def test_stale_instance_save_does_not_rewind_revision(self):
+        avaliacao = self._avaliacao("6B", ["Eva"])
+        stale = AvaliacaoProva.objects.get(pk=avaliacao.pk)
+        self._corrigir(avaliacao, "Eva", {"1": "A"})
+        revisao = AvaliacaoProva.objects.values_list("resultados_revisao", flat=True).get(pk=avaliacao.pk)
+
+        stale.titulo = "Diagnóstica 2"
+        stale.save_sem_resultados()
+        self.assertEqual(AvaliacaoProva.objects.get(pk=avaliacao.pk).titulo, "Diagnóstica 2")
+        self.assertEqual(
+            AvaliacaoProva.objects.values_list("resultados_revisao", flat=True).get(pk=avaliacao.pk),
+            revisao,
+        )
+
+    def test_network_item_analysis_merges_turmas(self):
+        primeira = self._avaliacao("7A", ["Fábio", "Gil"])
+        segunda = self._avaliacao("7B", ["Hugo"])
+        self._corrigir(primeira, "Fábio", {"1": "A", "2": "B", "3": "C"})
+        self._corrigir(primeira, "Gil", {"1": "A", "2": "A", "3": "A"})
+        self._corrigir(segunda, "Hugo", {"1": "A", "2": "D", "3": "C"})
+
+        rows = analise_itens_rede([primeira, segunda])
+        self.assertEqual([row["acertos"] for row in rows], [2, 1, 2])
+        self.assertEqual(rows[1]["distratores"]["A"], 1)
+
+
+class OMREngineTests(SimpleTestCase):
+    escolhas = ["B", "D", "A", "C", "E", "A", "C", "B", "E", "D", "A", "B", "C", "D", "E", "A", "B", "C", "D", "E"]
+
+    def _sheet(self, escolhas, *, size=(1000, 1414)) -> Image.Image:
+        width, height = size
+        img = Image.new("L", size, color=255)
+        draw = ImageDraw.Draw(img)
+        letters = ["A", "B", "C", "D", "E"]
+        for boxes, resposta in zip(_bubble_boxes(width, height, total_q=len(escolhas), total_opts=5), escolhas):
+            x0, y0, x1, y1 = boxes[letters.index(resposta)]
+            draw.ellipse((x0, y0, x1, y1), fill=0)
+        side = REGISTRATION_MARK_SIZE * width / 2
+        for fx in (REGISTRATION_MARK_CENTER, 1 - REGISTRATION_MARK_CENTER):
+            for fy in (REGISTRATION_MARK_CENTER, 1 - REGISTRATION_MARK_CENTER):
+                draw.rectangle((fx * width - side, fy * height - side, fx * width + side, fy * height + side), fill=0)
+        return img
+
+    def _upload(self, img: Image.Image, name="folha.png", **save_kwargs) -> SimpleUploadedFile:
+        buf = BytesIO()
+        img.save(buf, format=save_kwargs.pop("format", "PNG"), **save_kwargs)
+        return SimpleUploadedFile(name, buf.getvalue())
+
+    def _expected(self, escolhas):
+        return {str(idx + 1): val for idx, val in enumerate(escolhas)}
+
+    def test_registration_marks_realign_shifted_scan(self):
+        # Folha digitalizada menor e deslocada dentro de uma página maior.
+        page = Image.new("L", (1000, 1414), color=255)
+        page.paste(self._sheet(self.escolhas, size=(880, 1244)), (90, 130))
+
+        sem_alinhamento = suggest_answers_from_omr_image(self._upload(page), qtd_questoes=20, opcoes=5)
+        self.assertNotEqual(sem_alinhamento["respostas"], self._expected(self.escolhas))
+
+        alinhado = suggest_answers_from_omr_image(self._upload(page), qtd_questoes=20, opcoes=5, align=True)
+        self.assertTrue(alinhado["alinhada"])
+        self.assertEqual(alinhado["respostas"], self._expected(self.escolhas))
+
+    def test_align_without_marks_falls_back_to_page_layout(self):
+        img = self._sheet(self.escolhas)
+        img.paste(255, (0, 0, img.width, int(img.height * 0.1)))
+        result = suggest_answers_from_omr_image(self._upload(img), qtd_questoes=20, opcoes=5, align=True)
+        self.assertFalse(result["alinhada"])
+        self.assertEqual(result["respostas"], self._expected(self.escolhas))
+
+    def test_batch_reads_zip_and_multipage_tiff(self):
+        outras = list(reversed(self.escolhas))
+        sheets = [self._sheet(self.escolhas), self._sheet(outras)]
+
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            for idx, img in enumerate(sheets):
+                out = BytesIO()
+                img.save(out, format="PNG")
+                archive.writestr(f"folha-{idx}.png", out.getvalue())
+            archive.writestr("leiame.txt", "ignorado")
+        zip_result = suggest_answers_from_omr_batch(
+            SimpleUploadedFile("turma.zip", buf.getvalue()), qtd_questoes=20, opcoes=5, workers=1
+        )
+        self.assertEqual([item["arquivo"] for item in zip_result], ["folha-0.png", "folha-1.png"])
+        self.assertEqual([item["respostas"] for item in zip_result], [self._expected(self.escolhas), self._expected(outras)])
+
+        pages = [img.copy() for img in sheets]
+        tiff = self._upload(pages[0], name="turma.tif", format="TIFF", save_all=True, append_images=pages[1:])
+        tiff_result = suggest_answers_from_omr_batch(tiff, qtd_questoes=20, opcoes=5, workers=2)
+        self.assertEqual([item["respostas"] for item in tiff_result], [self._expected(self.escolhas), self._expected(outras)])
+
+
+    @override_settings(OMR_BATCH_MAX_ENTRY_BYTES=1024 * 1024, OMR_BATCH_MAX_TOTAL_BYTES=1024 * 1024)
+    def test_batch_rejects_oversized_zip_before_decompressing(self):
+        def lote(*tamanhos):
+            buf = BytesIO()
+            with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for idx, tamanho in enumerate(tamanhos):
+                    archive.writestr(f"folha-{idx}.png", b"\0" * tamanho)
+            return SimpleUploadedFile("turma.zip", buf.getvalue())
+
+        with self.assertRaisesMessage(OMRDetectionError, "tamanho máximo por imagem"):
+            suggest_answers_from_omr_batch(lote(2 * 1024 * 1024), qtd_questoes=20, opcoes=5, workers=1)
+        with self.assertRaisesMessage(OMRDetectionError, "excede o tamanho máximo permitido"):
+            suggest_answers_from_omr_batch(lote(600 * 1024, 600 * 1024), qtd_questoes=20, opcoes=5, workers=1)
+
+
+    def test_batch_limits_multipage_tiff_before_decoding(self):
+        pages = [Image.new("L", (400, 400), color=255) for _ in range(3)]
+        tiff = self._upload(
+            pages[0],
+            name="turma.tif",
+            format="TIFF",
+            compression="tiff_deflate",
+            save_all=True,
+            append_images=pages[1:],
+        )
+        with override_settings(OMR_BATCH_MAX_PAGES=2):
+            with self.assertRaisesMessage(OMRDetectionError, "o máximo é 2"):
+                suggest_answers_from_omr_batch(tiff, qtd_questoes=20, opcoes=5, workers=1)
+        with override_settings(OMR_BATCH_MAX_ENTRY_BYTES=100_000):
+            with self.assertRaisesMessage(OMRDetectionError, "página 1 excede"):
+                suggest_answers_from_omr_batch(tiff, qtd_questoes=20, opcoes=5, workers=1)
+        with override_settings(OMR_BATCH_MAX_TOTAL_BYTES=400_000):
+            with self.assertRaisesMessage(OMRDetectionError, "excede o tamanho máximo permitido"):
+                suggest_answers_from_omr_batch(tiff, qtd_questoes=20, opcoes=5, workers=1)
+
+
 class AvaliacoesListEnhancementsTest(TestCase):
     def setUp(self):
         user_model = get_user_model()
@@ -247,3 +471,40 @@ class AvaliacoesListEnhancementsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("text/csv", response["Content-Type"])
         self.assertIn("avaliacoes.csv", response["Content-Disposition"])
+
+    def test_omr_lote_reads_batch_and_applies_reviewed_sheets(self):
+        gabarito = GabaritoProva.objects.get(avaliacao=self.av_pendente, versao="A")
+        gabarito.respostas = {"1": "A", "2": "B", "3": "C", "4": "D", "5": "A"}
+        gabarito.save()
+        folhas = list(self.av_pendente.aplicacoes.order_by("aluno__nome").select_related("folha"))
+
+        buf = BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            # A 1ª folha traz o token do último aluno no nome; a 2ª segue a ordem de impressão.
+            archive.writestr(
+                f"a-{folhas[2].folha.token}.png",
+                render_sheet(["A", "B", "C", "D", "A"], opcoes=4, size=(1000, 1414)),
+            )
+            archive.writestr("b.png", render_sheet(["A", "B", "C", "D", "B"], opcoes=4, size=(1000, 1414)))
+        url = reverse("avaliacoes:omr_lote", args=[self.av_pendente.pk])
+
+        response = self.client.post(
+            url, {"action": "ler", "arquivo": SimpleUploadedFile("turma.zip", buf.getvalue())}
+        )
+        self.assertEqual(response.status_code, 200)
+        linhas = response.context["linhas"]
+        self.assertEqual([linha["folha"].aplicacao.aluno for linha in linhas], [self.alunos[2], self.alunos[0]])
+
+        response = self.client.post(
+            url,
+            {
+                "action": "aplicar",
+                "aplicar": [str(linha["folha"].token) for linha in linhas],
+                **{f"respostas_{linha['folha'].token}": linha["respostas_json"] for linha in linhas},
+            },
+        )
+        self.assertRedirects(response, reverse("avaliacoes:avaliacao_detail", args=[self.av_pendente.pk]))
+        notas = dict(self.av_pendente.aplicacoes.values_list("aluno_id", "nota"))
+        self.assertEqual(notas[self.alunos[2].pk], Decimal("10.00"))
+        self.assertEqual(notas[self.alunos[0].pk], Decimal("8.00"))
+        self.assertIsNone(notas[self.alunos[1].pk])
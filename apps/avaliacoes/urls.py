@@ -24,6 +24,7 @@ urlpatterns = [
     path("<int:avaliacao_pk>/resultados/", views.resultados, name="resultados"),
     path("<int:avaliacao_pk>/resultados.csv", views.resultados_csv, name="resultados_csv"),
     path("<int:avaliacao_pk>/provas.pdf", views.prova_pdf, name="prova_pdf"),
+    path("<int:avaliacao_pk>/omr-lote/", views.omr_lote, name="omr_lote"),
     path("resposta/localizar/", views.folha_token_lookup, name="folha_lookup"),
     path("resposta/<uuid:token>/corrigir/", views.folha_corrigir, name="folha_corrigir"),
     path("validar/prova/<uuid:token>/", views.folha_validar, name="folha_validar"),
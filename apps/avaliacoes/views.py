@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from collections import defaultdict
 from decimal import Decimal
 
@@ -22,13 +23,15 @@ from apps.org.models import Municipio
 from .forms import (
     AvaliacaoProvaForm,
     CorrecaoFolhaForm,
+    OMRLoteForm,
     QuestaoProvaForm,
     RespostasObjetivasForm,
     TokenLookupForm,
 )
 from .models import AplicacaoAvaliacao, AvaliacaoProva, FolhaResposta, GabaritoProva
-from .omr import OMRDetectionError, suggest_answers_from_omr_image
+from .omr import OMRDetectionError, suggest_answers_from_omr_batch, suggest_answers_from_omr_image
 from .services import (
+    associar_folhas_omr_lote,
     build_validation_url,
     corrigir_folha_manual,
     ensure_aplicacoes_da_avaliacao,
@@ -466,6 +469,12 @@ def avaliacao_detail(request, pk: int):
             "icon": "fa-solid fa-file-csv",
             "variant": "gp-button--ghost",
         },
+        {
+            "label": "OMR em lote",
+            "url": reverse("avaliacoes:omr_lote", args=[avaliacao.pk]) + f"?municipio={avaliacao.municipio_id}",
+            "icon": "fa-solid fa-camera",
+            "variant": "gp-button--ghost",
+        },
     ]
 
     for versao in versoes:
@@ -805,6 +814,74 @@ def folha_corrigir(request, token):
     )
 
 
+@login_required
+@require_perm("avaliacoes.manage")
+def omr_lote(request, avaliacao_pk: int):
+    """
+    OMR da turma inteira: lê o lote enviado e mostra as sugestões por aluno para
+    revisão; só as folhas marcadas em "aplicar" são corrigidas.
+    """
+    avaliacao = get_object_or_404(_avaliacoes_queryset(request), pk=avaliacao_pk)
+    detail_url = reverse("avaliacoes:avaliacao_detail", args=[avaliacao.pk])
+    action = (request.POST.get("action") or "ler").strip().lower() if request.method == "POST" else ""
+
+    if action == "aplicar":
+        folhas = FolhaResposta.objects.select_related("aplicacao", "aplicacao__avaliacao").filter(
+            aplicacao__avaliacao=avaliacao,
+            token__in=[token for token in request.POST.getlist("aplicar") if token],
+        )
+        corrigidas = 0
+        for folha in folhas:
+            try:
+                respostas = json.loads(request.POST.get(f"respostas_{folha.token}") or "{}")
+                corrigir_folha_manual(folha, respostas_marcadas=respostas, actor=request.user)
+            except (ValueError, AttributeError) as exc:
+                messages.error(request, f"{folha.aplicacao.aluno.nome}: {exc}")
+            else:
+                corrigidas += 1
+        messages.success(request, f"{corrigidas} folha(s) corrigida(s) pelo OMR em lote.")
+        return redirect(detail_url)
+
+    form = OMRLoteForm(request.POST or None, request.FILES or None)
+    linhas = None
+    if action == "ler" and form.is_valid():
+        try:
+            lote = suggest_answers_from_omr_batch(
+                form.cleaned_data["arquivo"],
+                qtd_questoes=avaliacao.qtd_questoes,
+                opcoes=avaliacao.opcoes,
+            )
+        except OMRDetectionError as exc:
+            messages.error(request, str(exc))
+        else:
+            linhas = associar_folhas_omr_lote(avaliacao, lote)
+            for linha in linhas:
+                linha["respostas_json"] = json.dumps(linha["resultado"].get("respostas") or {})
+            sem_folha = sum(1 for linha in linhas if linha["folha"] is None)
+            if sem_folha:
+                messages.warning(request, f"{sem_folha} folha(s) do lote não correspondem a nenhum aluno.")
+
+    return render(
+        request,
+        "avaliacoes/omr_lote.html",
+        {
+            "title": "OMR em lote",
+            "subtitle": avaliacao.titulo,
+            "avaliacao": avaliacao,
+            "form": form,
+            "linhas": linhas,
+            "actions": [
+                {
+                    "label": "Voltar",
+                    "url": detail_url,
+                    "icon": "fa-solid fa-arrow-left",
+                    "variant": "gp-button--ghost",
+                }
+            ],
+        },
+    )
+
+
 @login_required
 @require_perm("avaliacoes.view")
 def resultados(request, avaliacao_pk: int):
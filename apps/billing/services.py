@@ -418,13 +418,7 @@ def get_assinatura_ativa(municipio: Municipio, *, criar_default: bool = True) ->
     )
 
 
-def municipio_plan_features(municipio: Municipio | None) -> set[str]:
-    """
-    Retorna as features habilitadas no plano ativo do município.
-    """
-    if not municipio:
-        return set()
-    assinatura = get_assinatura_ativa(municipio, criar_default=False)
+def assinatura_plan_features(assinatura: AssinaturaMunicipio | None) -> set[str]:
     if not assinatura or not assinatura.plano_id:
         return set()
 
@@ -436,15 +430,27 @@ def municipio_plan_features(municipio: Municipio | None) -> set[str]:
     return features
 
 
-def municipio_plan_apps(municipio: Municipio | None) -> set[str]:
-    if not municipio:
-        return set()
-    assinatura = get_assinatura_ativa(municipio, criar_default=False)
+def assinatura_plan_apps(assinatura: AssinaturaMunicipio | None) -> set[str]:
     if not assinatura or not assinatura.plano_id:
         return set()
     return plan_apps_for_code(assinatura.plano.codigo)
 
 
+def municipio_plan_features(municipio: Municipio | None) -> set[str]:
+    """
+    Retorna as features habilitadas no plano ativo do município.
+    """
+    if not municipio:
+        return set()
+    return assinatura_plan_features(get_assinatura_ativa(municipio, criar_default=False))
+
+
+def municipio_plan_apps(municipio: Municipio | None) -> set[str]:
+    if not municipio:
+        return set()
+    return assinatura_plan_apps(get_assinatura_ativa(municipio, criar_default=False))
+
+
 def municipio_has_plan_app(municipio: Municipio | None, app_key: str) -> bool:
     app = (app_key or "").strip().upper()
     if not app:
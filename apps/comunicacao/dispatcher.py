@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import http.client
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+from urllib import parse
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.core.models import AuditoriaEvento
+from apps.core.services_auditoria import build_auditoria_evento
+
+from .models import NotificationChannelConfig, NotificationJob, NotificationLog
+from .services import (
+    _build_fallback_job,
+    _build_log,
+    _email_connection,
+    _priority_order_expr,
+    _retry_delay_minutes,
+    _send_email,
+    _send_mock,
+    _send_sms,
+    _send_whatsapp,
+)
+
+
+# Despacho em lote da fila de notificações:
+# 1. reivindica um lote com SELECT ... FOR UPDATE SKIP LOCKED (vários workers da fila
+#    "comunicacao" podem rodar em paralelo sem pegar o mesmo job);
+# 2. resolve as configurações de canal do lote em uma consulta;
+# 3. envia em blocos por configuração, num pool de threads limitado, reaproveitando
+#    a conexão SMTP/HTTP dentro de cada bloco (as threads não acessam o banco);
+#    enquanto isso a thread principal renova a reivindicação (heartbeat);
+# 4. grava status, logs, auditoria e fallbacks com operações em lote, só para os jobs
+#    que ainda pertencem a esta reivindicação.
+#
+# A posse de um job é o par (id, attempts) gravado no claim: se o heartbeat atrasar e
+# outro worker reivindicar o job (attempts + 1), este worker deixa de enviá-lo e descarta
+# o desfecho em vez de sobrescrever o do novo dono.
+BULK_BATCH_SIZE = 500
+
+# Colunas alteradas por desfecho, gravadas com UPDATE agrupado; provider_message_id
+# (único por job) vai por executemany.
+JOB_FIELDS_BY_STATUS = {
+    NotificationJob.Status.ENTREGUE: ("provider", "status", "sent_at", "delivered_at", "error_message"),
+    NotificationJob.Status.PENDENTE: ("provider", "status", "scheduled_at", "error_message"),
+    NotificationJob.Status.FALHA: ("provider", "status", "error_message"),
+}
+
+
+class KeepAliveHttpClient:
+    """
+    Cliente HTTP/1.1 mínimo com uma conexão persistente por host.
+    Não é thread-safe: cada bloco de envio usa a sua instância.
+    """
+
+    RECONNECT_ERRORS = (
+        http.client.RemoteDisconnected,
+        http.client.CannotSendRequest,
+        BrokenPipeError,
+        ConnectionResetError,
+    )
+
+    def __init__(self, timeout: int = 20):
+        self.timeout = timeout
+        self._connections: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        key = (scheme, netloc)
+        conn = self._connections.get(key)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conn_class(netloc, timeout=self.timeout)
+            self._connections[key] = conn
+        return conn
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conn = self._connections.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def post_json(self, url: str, body: bytes, headers: dict[str, str]) -> dict[str, Any]:
+        parts = parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        for attempt in (1, 2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except self.RECONNECT_ERRORS:
+                # Servidor encerrou a conexão ociosa: reabre uma única vez.
+                self._drop(parts.scheme, parts.netloc)
+                if attempt == 2:
+                    raise
+                continue
+            if response.status >= 400:
+                raise ValueError(f"HTTP {response.status}: {raw[:280].decode('utf-8', 'replace')}")
+            return json.loads(raw.decode("utf-8") or "{}")
+        return {}
+
+    def close(self) -> None:
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+
+
+@dataclass
+class _SendOutcome:
+    job: NotificationJob
+    config: NotificationChannelConfig | None
+    response: dict[str, Any] | None = None
+    error: str = ""
+    finished_at: Any = None
+
+
+def claim_notification_jobs(*, limit: int, now=None) -> list[NotificationJob]:
+    """
+    Reivindica até `limit` jobs pendentes (ou presos em PROCESSANDO além do timeout),
+    marcando-os como PROCESSANDO e incrementando a tentativa em um único UPDATE.
+    """
+    now = now or timezone.now()
+    stale_minutes = int(getattr(settings, "COMUNICACAO_CLAIM_TIMEOUT_MINUTES", 15) or 15)
+    stale_before = now - timedelta(minutes=stale_minutes)
+    with transaction.atomic():
+        ids = list(
+            NotificationJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=NotificationJob.Status.PENDENTE, scheduled_at__lte=now)
+                | Q(status=NotificationJob.Status.PROCESSANDO, updated_at__lt=stale_before)
+            )
+            .annotate(priority_order=_priority_order_expr())
+            .order_by("priority_order", "scheduled_at", "id")
+            .values_list("id", flat=True)[: max(1, int(limit or 100))]
+        )
+        if not ids:
+            return []
+        NotificationJob.objects.filter(id__in=ids).update(
+            status=NotificationJob.Status.PROCESSANDO,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    jobs = NotificationJob.objects.select_related("municipio", "secretaria", "unidade", "created_by").in_bulk(ids)
+    return [jobs[job_id] for job_id in ids if job_id in jobs]
+
+
+def _channel_config_resolver(jobs: list[NotificationJob]):
+    """Mesma precedência de _resolve_channel_config (unidade → secretaria → município), em memória."""
+    configs: dict[tuple[int, str], list[NotificationChannelConfig]] = {}
+    qs = NotificationChannelConfig.objects.filter(
+        municipio_id__in={job.municipio_id for job in jobs},
+        channel__in={job.channel for job in jobs},
+        is_active=True,
+    ).order_by("prioridade", "-id")
+    for config in qs:
+        configs.setdefault((config.municipio_id, config.channel), []).append(config)
+
+    def resolve(job: NotificationJob) -> NotificationChannelConfig | None:
+        candidates = configs.get((job.municipio_id, job.channel), [])
+        if job.unidade_id is not None:
+            for config in candidates:
+                if config.unidade_id == job.unidade_id:
+                    return config
+        if job.secretaria_id is not None:
+            for config in candidates:
+                if config.secretaria_id == job.secretaria_id and config.unidade_id is None:
+                    return config
+        for config in candidates:
+            if config.secretaria_id is None and config.unidade_id is None:
+                return config
+        return None
+
+    return resolve
+
+
+def _send_with_session(
+    job: NotificationJob,
+    config: NotificationChannelConfig,
+    *,
+    connection=None,
+    http_client: KeepAliveHttpClient | None = None,
+):
+    if job.channel == NotificationChannelConfig.Channel.EMAIL:
+        return _send_email(job, config, connection=connection)
+    if job.channel == NotificationChannelConfig.Channel.WHATSAPP:
+        return _send_whatsapp(job, config, http=http_client)
+    if job.channel == NotificationChannelConfig.Channel.SMS:
+        return _send_sms(job, config, http=http_client)
+    return _send_mock(job, config)
+
+
+def _claim_filter(jobs: list[NotificationJob]) -> Q:
+    """Jobs ainda em PROCESSANDO com a mesma tentativa gravada quando foram reivindicados."""
+    by_attempt: dict[int, list[int]] = {}
+    for job in jobs:
+        by_attempt.setdefault(job.attempts, []).append(job.pk)
+    owned = Q()
+    for attempts, ids in by_attempt.items():
+        owned |= Q(attempts=attempts, id__in=ids)
+    return Q(status=NotificationJob.Status.PROCESSANDO) & owned
+
+
+class _ClaimLease:
+    """
+    Reivindicação de um lote em andamento. `renew()` roda na thread principal e
+    adia o timeout dos jobs ainda nossos; as threads de envio só leem `lost`.
+    """
+
+    def __init__(self, jobs: list[NotificationJob]):
+        self.jobs = jobs
+        self.lost: frozenset[int] = frozenset()
+        self.interval = max(0, int(getattr(settings, "COMUNICACAO_CLAIM_HEARTBEAT_SECONDS", 60)))
+        self._renewed_at = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self._renewed_at >= self.interval
+
+    def renew(self) -> None:
+        owned = set(NotificationJob.objects.filter(_claim_filter(self.jobs)).values_list("id", flat=True))
+        if owned:
+            NotificationJob.objects.filter(id__in=owned).update(updated_at=timezone.now())
+        # Atribuição única: as threads veem o conjunto antigo ou o novo, nunca um parcial.
+        self.lost = frozenset(job.pk for job in self.jobs if job.pk not in owned)
+        self._renewed_at = time.monotonic()
+
+
+def _send_chunk(
+    config: NotificationChannelConfig,
+    jobs: list[NotificationJob],
+    lease: _ClaimLease | None = None,
+) -> list[_SendOutcome]:
+    outcomes: list[_SendOutcome] = []
+    smtp_connection = None
+    http_client = None
+    try:
+        if config.channel == NotificationChannelConfig.Channel.EMAIL:
+            smtp_connection = _email_connection(config)
+            try:
+                smtp_connection.open()
+            except Exception as exc:
+                return [_SendOutcome(job, config, error=str(exc)) for job in jobs]
+        else:
+            http_client = KeepAliveHttpClient()
+
+        for job in jobs:
+            if lease is not None and job.pk in lease.lost:
+                # Reivindicado por outro worker: o envio agora é dele.
+                continue
+            try:
+                response = _send_with_session(job, config, connection=smtp_connection, http_client=http_client)
+                outcomes.append(_SendOutcome(job, config, response=response))
+            except Exception as exc:
+                outcomes.append(_SendOutcome(job, config, error=str(exc)))
+    finally:
+        if smtp_connection is not None:
+            try:
+                smtp_connection.close()
+            except Exception:
+                pass
+        if http_client is not None:
+            http_client.close()
+    # Um carimbo por bloco: permite gravar o bloco inteiro com um único UPDATE.
+    finished_at = timezone.now()
+    for outcome in outcomes:
+        outcome.finished_at = finished_at
+    return outcomes
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _send_claimed(jobs: list[NotificationJob], *, workers: int, chunk_size: int) -> list[_SendOutcome]:
+    lease = _ClaimLease(jobs)
+    resolve = _channel_config_resolver(jobs)
+    outcomes: list[_SendOutcome] = []
+    groups: dict[int, tuple[NotificationChannelConfig, list[NotificationJob]]] = {}
+    for job in jobs:
+        config = resolve(job)
+        if config is None:
+            outcomes.append(_SendOutcome(job, None))
+            continue
+        groups.setdefault(config.pk, (config, []))[1].append(job)
+
+    tasks = [
+        (config, chunk)
+        for config, group_jobs in groups.values()
+        for chunk in _chunks(group_jobs, chunk_size)
+    ]
+    if workers <= 1 or len(tasks) <= 1:
+        for config, chunk in tasks:
+            if lease.due():
+                lease.renew()
+            outcomes.extend(_send_chunk(config, chunk, lease))
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(tasks)), thread_name_prefix="comunicacao") as pool:
+        futures = [pool.submit(_send_chunk, config, chunk, lease) for config, chunk in tasks]
+        pending = set(futures)
+        while pending:
+            _done, pending = wait(pending, timeout=lease.interval or None, return_when=FIRST_COMPLETED)
+            if pending and lease.due():
+                lease.renew()
+        for future in futures:
+            outcomes.extend(future.result())
+    return outcomes
+
+
+def _apply_failure(job: NotificationJob, error: str, now) -> None:
+    if job.attempts < job.max_attempts:
+        job.status = NotificationJob.Status.PENDENTE
+        job.scheduled_at = now + timedelta(minutes=_retry_delay_minutes(job.attempts))
+    else:
+        job.status = NotificationJob.Status.FALHA
+    job.error_message = error
+
+
+def _persist_outcomes(outcomes: list[_SendOutcome]) -> dict[str, int]:
+    if not outcomes:
+        return {"processed": 0, "delivered": 0, "failed": 0}
+    with transaction.atomic():
+        # Confere a posse com as linhas travadas: um job reivindicado por outro worker
+        # durante o envio fica com o desfecho do novo dono.
+        owned = set(
+            NotificationJob.objects.select_for_update()
+            .filter(_claim_filter([outcome.job for outcome in outcomes]))
+            .values_list("id", flat=True)
+        )
+        return _record_outcomes([outcome for outcome in outcomes if outcome.job.pk in owned])
+
+
+def _record_outcomes(outcomes: list[_SendOutcome]) -> dict[str, int]:
+    now = timezone.now()
+    jobs: list[NotificationJob] = []
+    logs: list[NotificationLog] = []
+    audits: list[AuditoriaEvento] = []
+    fallbacks: list[NotificationJob] = []
+    delivered = 0
+    failed = 0
+
+    for outcome in outcomes:
+        job = outcome.job
+        job.updated_at = now
+        jobs.append(job)
+
+        if outcome.config is None:
+            error = f"Canal {job.get_channel_display()} sem configuração ativa no escopo."
+            _apply_failure(job, error, now)
+            logs.append(_build_log(job, status=job.status, error=error))
+        elif outcome.response is not None:
+            finished_at = outcome.finished_at or now
+            job.provider = outcome.config.provider
+            job.status = NotificationJob.Status.ENTREGUE
+            job.sent_at = finished_at
+            job.delivered_at = finished_at
+            job.provider_message_id = str(outcome.response.get("message_id") or "")
+            job.error_message = ""
+            logs.append(_build_log(job, status=job.status, response=outcome.response))
+            audits.append(
+                build_auditoria_evento(
+                    municipio=job.municipio,
+                    modulo="COMUNICACAO",
+                    evento="NOTIFICACAO_ENTREGUE",
+                    entidade="NotificationJob",
+                    entidade_id=job.pk,
+                    usuario=job.created_by,
+                    depois={
+                        "event_key": job.event_key,
+                        "channel": job.channel,
+                        "destination": job.destination,
+                        "provider": job.provider,
+                        "status": job.status,
+                    },
+                )
+            )
+        else:
+            job.provider = outcome.config.provider
+            _apply_failure(job, outcome.error, now)
+            logs.append(_build_log(job, status=job.status, error=outcome.error))
+            audits.append(
+                build_auditoria_evento(
+                    municipio=job.municipio,
+                    modulo="COMUNICACAO",
+                    evento="NOTIFICACAO_FALHOU",
+                    entidade="NotificationJob",
+                    entidade_id=job.pk,
+                    usuario=job.created_by,
+                    depois={
+                        "event_key": job.event_key,
+                        "channel": job.channel,
+                        "destination": job.destination,
+                        "status": job.status,
+                        "erro": outcome.error[:280],
+                    },
+                )
+            )
+
+        if job.status == NotificationJob.Status.ENTREGUE:
+            delivered += 1
+        elif job.status == NotificationJob.Status.FALHA:
+            failed += 1
+            fallback = _build_fallback_job(job)
+            if fallback is not None:
+                fallbacks.append(fallback)
+
+    _write_job_states(jobs, now)
+    NotificationLog.objects.bulk_create(logs, batch_size=BULK_BATCH_SIZE)
+    AuditoriaEvento.objects.bulk_create(audits, batch_size=BULK_BATCH_SIZE)
+    NotificationJob.objects.bulk_create(fallbacks, batch_size=BULK_BATCH_SIZE)
+
+    return {"processed": len(jobs), "delivered": delivered, "failed": failed}
+
+
+def _write_job_states(jobs: list[NotificationJob], now) -> None:
+    """
+    Grava o estado final dos jobs: um UPDATE por combinação de valores (na prática
+    um por bloco enviado) e um executemany para os ids de mensagem do provedor.
+    bulk_update() geraria um CASE por linha e coluna, caro em lotes de milhares.
+    """
+    groups: dict[tuple, list[int]] = {}
+    for job in jobs:
+        key = tuple((field, getattr(job, field)) for field in JOB_FIELDS_BY_STATUS[job.status])
+        groups.setdefault(key, []).append(job.pk)
+    for key, ids in groups.items():
+        NotificationJob.objects.filter(id__in=ids).update(updated_at=now, **dict(key))
+
+    message_ids = [(job.provider_message_id, job.pk) for job in jobs if job.provider_message_id]
+    if message_ids:
+        table = connection.ops.quote_name(NotificationJob._meta.db_table)
+        column = connection.ops.quote_name(NotificationJob._meta.get_field("provider_message_id").column)
+        pk_column = connection.ops.quote_name(NotificationJob._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.executemany(f"UPDATE {table} SET {column} = %s WHERE {pk_column} = %s", message_ids)
+
+
+def dispatch_pending_notification_jobs(
+    *,
+    limit: int = 100,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+) -> dict[str, int]:
+    workers = int(workers or getattr(settings, "COMUNICACAO_DISPATCH_WORKERS", 8) or 1)
+    chunk_size = max(1, int(chunk_size or getattr(settings, "COMUNICACAO_DISPATCH_CHUNK_SIZE", 50) or 50))
+
+    jobs = claim_notification_jobs(limit=limit)
+    if not jobs:
+        return {"processed": 0, "delivered": 0, "failed": 0}
+    outcomes = _send_claimed(jobs, workers=workers, chunk_size=chunk_size)
+    return _persist_outcomes(outcomes)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.comunicacao.dispatcher import dispatch_pending_notification_jobs
+from apps.comunicacao.models import NotificationChannelConfig, NotificationJob
+from apps.comunicacao.services import _priority_order_expr, send_notification_job
+from apps.org.models import Municipio
+
+
+def process_pending_notification_jobs_sequential(*, limit: int = 100) -> dict[str, int]:
+    """Caminho antigo, job a job (um save/log/auditoria por envio): só a referência do benchmark."""
+    now = timezone.now()
+    qs = (
+        NotificationJob.objects.select_related("municipio", "secretaria", "unidade", "created_by")
+        .filter(status=NotificationJob.Status.PENDENTE, scheduled_at__lte=now)
+        .annotate(priority_order=_priority_order_expr())
+        .order_by("priority_order", "scheduled_at", "id")
+    )
+    processed = 0
+    delivered = 0
+    failed = 0
+    for job in qs[: max(1, int(limit or 100))]:
+        processed += 1
+        send_notification_job(job)
+        if job.status == NotificationJob.Status.ENTREGUE:
+            delivered += 1
+        elif job.status == NotificationJob.Status.FALHA:
+            failed += 1
+    return {"processed": processed, "delivered": delivered, "failed": failed}
+
+
+class _MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency_seconds = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Sem Nagle: cabeçalho e corpo saem em writes separados e atrasariam 40 ms por resposta.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with _MockProviderHandler.lock:
+            _MockProviderHandler.connections += 1
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        body = json.dumps({"sid": f"SM{time.monotonic_ns()}"}).encode("utf-8")
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        return
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede jobs/segundo do despacho da fila de comunicação contra um provedor "
+        "SMS (API Twilio) simulado localmente. Tudo roda numa transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10000, help="Jobs pendentes criados para o lote.")
+        parser.add_argument("--batch", type=int, default=1000, help="Limite por chamada do despachante.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads de envio.")
+        parser.add_argument("--chunk-size", type=int, default=50, help="Mensagens por conexão reaproveitada.")
+        parser.add_argument("--latency-ms", type=float, default=5.0, help="Latência simulada do provedor.")
+        parser.add_argument(
+            "--baseline",
+            type=int,
+            default=500,
+            help="Jobs processados também pelo caminho sequencial antigo (0 para pular).",
+        )
+
+    def handle(self, *args, **options):
+        _MockProviderHandler.latency_seconds = max(0.0, options["latency_ms"]) / 1000
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _MockProviderHandler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        api_base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        try:
+            with override_settings(COMUNICACAO_TWILIO_API_BASE=api_base), transaction.atomic():
+                municipio = Municipio.objects.create(nome="Município Benchmark Comunicação", uf="MA")
+                NotificationChannelConfig.objects.create(
+                    municipio=municipio,
+                    channel=NotificationChannelConfig.Channel.SMS,
+                    provider=NotificationChannelConfig.Provider.TWILIO,
+                    credentials_json={"account_sid": "ACbench", "auth_token": "token", "from_number": "+5500000000"},
+                    options_json={"dry_run": False},
+                    is_active=True,
+                )
+
+                if options["baseline"] > 0:
+                    self._run(
+                        "sequencial",
+                        municipio,
+                        options["baseline"],
+                        lambda: process_pending_notification_jobs_sequential(limit=options["batch"]),
+                    )
+                self._run(
+                    "lote",
+                    municipio,
+                    options["jobs"],
+                    lambda: dispatch_pending_notification_jobs(
+                        limit=options["batch"],
+                        workers=options["workers"],
+                        chunk_size=options["chunk_size"],
+                    ),
+                )
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, label: str, municipio, total: int, dispatch):
+        NotificationJob.objects.bulk_create(
+            [
+                NotificationJob(
+                    municipio=municipio,
+                    event_key="bench.comunicacao",
+                    channel=NotificationChannelConfig.Channel.SMS,
+                    destination=f"+55989{index:08d}",
+                    body_rendered="Mensagem de benchmark.",
+                )
+                for index in range(total)
+            ],
+            batch_size=1000,
+        )
+        _MockProviderHandler.connections = 0
+        delivered = 0
+        started = time.perf_counter()
+        while True:
+            stats = dispatch()
+            if not stats["processed"]:
+                break
+            delivered += stats["delivered"]
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<11} jobs={total:<6} entregues={delivered:<6} "
+            f"conexões HTTP={_MockProviderHandler.connections:<5} "
+            f"tempo={elapsed:.2f}s  {total / elapsed if elapsed else 0:.0f} jobs/s"
+        )
@@ -5,10 +5,12 @@ import json
 import re
 from urllib import parse, request
 from datetime import timedelta
+from functools import lru_cache
 from typing import Any
 
 from django.conf import settings
 from django.core.mail import get_connection, send_mail
+from django.db import transaction
 from django.db.models import Case, IntegerField, Value, When
 from django.utils import timezone
 
@@ -18,22 +20,34 @@ from .models import NotificationChannelConfig, NotificationJob, NotificationLog,
 
 
 PLACEHOLDER_RE = re.compile(r"{{\s*([a-zA-Z0-9_]+)\s*}}")
+ENQUEUE_CHUNK_SIZE = 1000
 
 
-def render_placeholders(text: str, payload: dict[str, Any] | None = None) -> str:
-    payload = payload or {}
-    raw = text or ""
+@lru_cache(maxsize=512)
+def _compile_placeholders(text: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Divide o texto uma única vez em (trechos literais, chaves); o split intercala os dois."""
+    parts = PLACEHOLDER_RE.split(text)
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
 
-    def repl(match: re.Match[str]) -> str:
-        key = match.group(1)
-        val = payload.get(key, "")
-        if val is None:
-            return ""
-        if isinstance(val, (dict, list)):
-            return json.dumps(val, ensure_ascii=False)
-        return str(val)
+def _placeholder_value(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, (dict, list)):
+        return json.dumps(val, ensure_ascii=False)
+    return str(val)
 
-    return PLACEHOLDER_RE.sub(repl, raw)
+
+def render_placeholders(text: str, payload: dict[str, Any] | None = None) -> str:
+    payload = payload or {}
+    literals, keys = _compile_placeholders(text or "")
+    if not keys:
+        return literals[0]
+    chunks = [literals[0]]
+    for key, literal in zip(keys, literals[1:]):
+        chunks.append(_placeholder_value(payload.get(key, "")))
+        chunks.append(literal)
+    return "".join(chunks)
 
 
 def list_placeholders(text: str) -> list[str]:
@@ -161,6 +175,42 @@ def _resolve_template(
     return base_qs.filter(secretaria__isnull=True, unidade__isnull=True).first()
 
 
+def _template_resolver(*, municipio, event_key: str, secretaria=None, unidade=None):
+    """
+    Versão memoizada de _resolve_template para um envio em massa: carrega os modelos
+    ativos do evento numa consulta e resolve cada canal uma única vez.
+    """
+    templates = list(
+        NotificationTemplate.objects.filter(
+            municipio=municipio,
+            event_key=event_key,
+            is_active=True,
+        ).order_by("-id")
+    )
+    unidade_id = getattr(unidade, "pk", None)
+    secretaria_id = getattr(secretaria, "pk", None)
+    resolved: dict[str, NotificationTemplate | None] = {}
+
+    def resolve(channel: str) -> NotificationTemplate | None:
+        if channel in resolved:
+            return resolved[channel]
+        candidates = [item for item in templates if item.channel == channel]
+        item = None
+        if unidade is not None:
+            item = next((t for t in candidates if t.unidade_id == unidade_id), None)
+        if item is None and secretaria is not None:
+            item = next(
+                (t for t in candidates if t.secretaria_id == secretaria_id and t.unidade_id is None),
+                None,
+            )
+        if item is None:
+            item = next((t for t in candidates if t.secretaria_id is None and t.unidade_id is None), None)
+        resolved[channel] = item
+        return item
+
+    return resolve
+
+
 def _normalize_channels(channels: list[str] | None, *, urgent: bool) -> list[str]:
     base_order = (
         [
@@ -223,12 +273,12 @@ def _channels_from_preferences(channels: list[str], recipient: dict[str, Any]) -
     return [ch for ch in channels if ch in allowed]
 
 
-def queue_event_notifications(
+def _build_event_jobs(
     *,
     municipio,
     event_key: str,
     payload: dict[str, Any] | None,
-    recipients: list[dict[str, Any]],
+    recipients,
     actor=None,
     secretaria=None,
     unidade=None,
@@ -241,9 +291,21 @@ def queue_event_notifications(
     entity_module: str = "",
     entity_type: str = "",
     entity_id: str = "",
-) -> list[NotificationJob]:
+):
+    """Gera (sem salvar) um NotificationJob por destinatário alcançável."""
     payload = payload or {}
-    created_jobs: list[NotificationJob] = []
+    resolve_template = None
+    if not body_override:
+        resolve_template = _template_resolver(
+            municipio=municipio,
+            event_key=event_key,
+            secretaria=secretaria,
+            unidade=unidade,
+        )
+    correlation_key = (correlation_key or "")[:120]
+    entity_module = (entity_module or "")[:40]
+    entity_type = (entity_type or "")[:80]
+    entity_id = (entity_id or "")[:60]
 
     for recipient in recipients:
         preferred = recipient.get("channels")
@@ -270,15 +332,7 @@ def queue_event_notifications(
             "whatsapp": recipient.get("whatsapp") or "",
         }
 
-        template = None
-        if not body_override:
-            template = _resolve_template(
-                municipio=municipio,
-                event_key=event_key,
-                channel=first_channel,
-                secretaria=secretaria,
-                unidade=unidade,
-            )
+        template = resolve_template(first_channel) if resolve_template else None
 
         subject_text = subject_override
         body_text = body_override
@@ -296,36 +350,119 @@ def queue_event_notifications(
             if first_channel == NotificationChannelConfig.Channel.EMAIL and not subject_rendered:
                 subject_rendered = "Atualização de acompanhamento educacional"
 
-        created_jobs.append(
-            NotificationJob.objects.create(
-                municipio=municipio,
-                secretaria=secretaria,
-                unidade=unidade,
-                event_key=event_key,
-                channel=first_channel,
-                destination=destination,
-                to_name=merged_payload.get("nome", ""),
-                payload_json=merged_payload,
-                subject_rendered=subject_rendered,
-                body_rendered=body_rendered,
-                status=NotificationJob.Status.PENDENTE,
-                priority=priority,
-                message_kind=message_kind,
-                correlation_key=(correlation_key or "")[:120],
-                fallback_channels=channels,
-                fallback_index=channels.index(first_channel),
-                entity_module=(entity_module or "")[:40],
-                entity_type=(entity_type or "")[:80],
-                entity_id=(entity_id or "")[:60],
-                created_by=actor,
-            )
+        yield NotificationJob(
+            municipio=municipio,
+            secretaria=secretaria,
+            unidade=unidade,
+            event_key=event_key,
+            channel=first_channel,
+            destination=destination,
+            to_name=merged_payload.get("nome", ""),
+            payload_json=merged_payload,
+            subject_rendered=subject_rendered,
+            body_rendered=body_rendered,
+            status=NotificationJob.Status.PENDENTE,
+            priority=priority,
+            message_kind=message_kind,
+            correlation_key=correlation_key,
+            fallback_channels=channels,
+            fallback_index=channels.index(first_channel),
+            entity_module=entity_module,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            created_by=actor,
         )
 
+
+def _bulk_insert_jobs(jobs, *, chunk_size: int = ENQUEUE_CHUNK_SIZE, on_chunk=None) -> int:
+    total = 0
+    chunk: list[NotificationJob] = []
+    with transaction.atomic():
+        for job in jobs:
+            chunk.append(job)
+            if len(chunk) >= chunk_size:
+                total += _flush_jobs(chunk, on_chunk)
+                chunk = []
+        if chunk:
+            total += _flush_jobs(chunk, on_chunk)
+    return total
+
+
+def _flush_jobs(chunk: list[NotificationJob], on_chunk) -> int:
+    created = NotificationJob.objects.bulk_create(chunk)
+    if on_chunk is not None:
+        on_chunk(created)
+    return len(created)
+
+
+def enqueue_event_notifications(*, return_ids: bool = False, chunk_size: int = ENQUEUE_CHUNK_SIZE, **kwargs) -> dict[str, Any]:
+    """
+    Enfileiramento em massa: mesmos argumentos de queue_event_notifications, mas insere
+    com bulk_create em blocos e devolve contagens (e opcionalmente os ids) em vez das
+    instâncias. Modelo de mensagem resolvido uma vez por canal e placeholders pré-compilados.
+    """
+    recipients = kwargs.get("recipients") or []
+    job_ids: list[int] = []
+    on_chunk = (lambda created: job_ids.extend(job.pk for job in created if job.pk)) if return_ids else None
+    queued = _bulk_insert_jobs(_build_event_jobs(**kwargs), chunk_size=chunk_size, on_chunk=on_chunk)
+    result: dict[str, Any] = {"recipients": len(recipients), "queued": queued, "skipped": len(recipients) - queued}
+    if return_ids:
+        result["job_ids"] = job_ids
+    return result
+
+
+def queue_event_notifications(
+    *,
+    municipio,
+    event_key: str,
+    payload: dict[str, Any] | None,
+    recipients: list[dict[str, Any]],
+    actor=None,
+    secretaria=None,
+    unidade=None,
+    priority: str = NotificationJob.Priority.NORMAL,
+    urgent: bool = False,
+    subject_override: str = "",
+    body_override: str = "",
+    message_kind: str = NotificationJob.MessageKind.TRANSACIONAL,
+    correlation_key: str = "",
+    entity_module: str = "",
+    entity_type: str = "",
+    entity_id: str = "",
+) -> list[NotificationJob]:
+    created_jobs: list[NotificationJob] = []
+    _bulk_insert_jobs(
+        _build_event_jobs(
+            municipio=municipio,
+            event_key=event_key,
+            payload=payload,
+            recipients=recipients,
+            actor=actor,
+            secretaria=secretaria,
+            unidade=unidade,
+            priority=priority,
+            urgent=urgent,
+            subject_override=subject_override,
+            body_override=body_override,
+            message_kind=message_kind,
+            correlation_key=correlation_key,
+            entity_module=entity_module,
+            entity_type=entity_type,
+            entity_id=entity_id,
+        ),
+        on_chunk=created_jobs.extend,
+    )
     return created_jobs
 
 
-def _create_log(job: NotificationJob, *, status: str, response: dict[str, Any] | None = None, error: str = ""):
-    NotificationLog.objects.create(
+def _build_log(
+    job: NotificationJob,
+    *,
+    status: str,
+    response: dict[str, Any] | None = None,
+    error: str = "",
+) -> NotificationLog:
+    return NotificationLog(
         job=job,
         status=status,
         attempt=max(1, int(job.attempts or 1)),
@@ -339,14 +476,18 @@ def _create_log(job: NotificationJob, *, status: str, response: dict[str, Any] |
     )
 
 
-def _schedule_fallback(job: NotificationJob) -> NotificationJob | None:
+def _create_log(job: NotificationJob, *, status: str, response: dict[str, Any] | None = None, error: str = ""):
+    _build_log(job, status=status, response=response, error=error).save()
+
+
+def _build_fallback_job(job: NotificationJob) -> NotificationJob | None:
     chain = list(job.fallback_channels or [])
     next_index = int(job.fallback_index or 0) + 1
     while next_index < len(chain):
         next_channel = chain[next_index]
         destination = _destination_for_channel(next_channel, job.payload_json or {})
         if destination:
-            return NotificationJob.objects.create(
+            return NotificationJob(
                 municipio=job.municipio,
                 secretaria=job.secretaria,
                 unidade=job.unidade,
@@ -374,7 +515,30 @@ def _schedule_fallback(job: NotificationJob) -> NotificationJob | None:
     return None
 
 
-def _send_email(job: NotificationJob, config: NotificationChannelConfig) -> dict[str, Any]:
+def _schedule_fallback(job: NotificationJob) -> NotificationJob | None:
+    fallback = _build_fallback_job(job)
+    if fallback is not None:
+        fallback.save()
+    return fallback
+
+
+def _email_connection(config: NotificationChannelConfig):
+    credentials = config.get_credentials()
+    smtp_host = _credentials_value(config, "host", "smtp_host")
+    if not smtp_host:
+        return get_connection()
+    return get_connection(
+        host=smtp_host,
+        port=_to_int(_credentials_value(config, "port", "smtp_port", default="587"), 587),
+        username=_credentials_value(config, "username", "user", "smtp_user") or None,
+        password=_credentials_value(config, "password", "pass", "smtp_password") or None,
+        use_tls=_to_bool(credentials.get("use_tls"), default=True),
+        use_ssl=_to_bool(credentials.get("use_ssl"), default=False),
+        timeout=_to_int(credentials.get("timeout"), 20),
+    )
+
+
+def _send_email(job: NotificationJob, config: NotificationChannelConfig, connection=None) -> dict[str, Any]:
     from_email = (
         config.sender_identifier
         or _credentials_value(config, "from_email", "sender")
@@ -382,47 +546,31 @@ def _send_email(job: NotificationJob, config: NotificationChannelConfig) -> dict
     )
     subject = job.subject_rendered or f"Notificação GEPUB • {job.event_key}"
     message = job.body_rendered or "Você possui uma atualização no GEPUB."
-    smtp_host = _credentials_value(config, "host", "smtp_host")
-    smtp_port = _to_int(_credentials_value(config, "port", "smtp_port", default="587"), 587)
-    smtp_user = _credentials_value(config, "username", "user", "smtp_user")
-    smtp_password = _credentials_value(config, "password", "pass", "smtp_password")
-    use_tls = _to_bool(config.get_credentials().get("use_tls"), default=True)
-    use_ssl = _to_bool(config.get_credentials().get("use_ssl"), default=False)
-    timeout = _to_int(config.get_credentials().get("timeout"), 20)
-    if smtp_host:
-        connection = get_connection(
-            host=smtp_host,
-            port=smtp_port,
-            username=smtp_user or None,
-            password=smtp_password or None,
-            use_tls=use_tls,
-            use_ssl=use_ssl,
-            timeout=timeout,
-        )
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=[job.destination],
-            fail_silently=False,
-            connection=connection,
-        )
-    else:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=[job.destination],
-            fail_silently=False,
-        )
+    if connection is None:
+        connection = _email_connection(config)
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient_list=[job.destination],
+        fail_silently=False,
+        connection=connection,
+    )
     return {"provider": config.provider, "result": "accepted", "to": job.destination, "channel": "email"}
 
 
-def _twilio_send_message(*, account_sid: str, auth_token: str, payload: dict[str, Any]) -> dict[str, Any]:
-    base_url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+def _twilio_send_message(*, account_sid: str, auth_token: str, payload: dict[str, Any], http=None) -> dict[str, Any]:
+    api_base = getattr(settings, "COMUNICACAO_TWILIO_API_BASE", "") or "https://api.twilio.com"
+    base_url = f"{api_base.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
     encoded = parse.urlencode(payload).encode("utf-8")
     auth_raw = f"{account_sid}:{auth_token}".encode("utf-8")
     auth_header = base64.b64encode(auth_raw).decode("utf-8")
+    if http is not None:
+        return http.post_json(
+            base_url,
+            encoded,
+            {"Authorization": f"Basic {auth_header}", "Content-Type": "application/x-www-form-urlencoded"},
+        )
     req = request.Request(base_url, data=encoded, method="POST")
     req.add_header("Authorization", f"Basic {auth_header}")
     req.add_header("Content-Type", "application/x-www-form-urlencoded")
@@ -430,9 +578,22 @@ def _twilio_send_message(*, account_sid: str, auth_token: str, payload: dict[str
         return json.loads(resp.read().decode("utf-8"))
 
 
-def _meta_send_message(*, access_token: str, phone_number_id: str, payload: dict[str, Any]) -> dict[str, Any]:
-    url = f"https://graph.facebook.com/v20.0/{phone_number_id}/messages"
+def _meta_send_message(
+    *,
+    access_token: str,
+    phone_number_id: str,
+    payload: dict[str, Any],
+    http=None,
+) -> dict[str, Any]:
+    api_base = getattr(settings, "COMUNICACAO_META_API_BASE", "") or "https://graph.facebook.com"
+    url = f"{api_base.rstrip('/')}/v20.0/{phone_number_id}/messages"
     raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    if http is not None:
+        return http.post_json(
+            url,
+            raw,
+            {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"},
+        )
     req = request.Request(url, data=raw, method="POST")
     req.add_header("Authorization", f"Bearer {access_token}")
     req.add_header("Content-Type", "application/json")
@@ -440,7 +601,7 @@ def _meta_send_message(*, access_token: str, phone_number_id: str, payload: dict
         return json.loads(resp.read().decode("utf-8"))
 
 
-def _send_whatsapp(job: NotificationJob, config: NotificationChannelConfig) -> dict[str, Any]:
+def _send_whatsapp(job: NotificationJob, config: NotificationChannelConfig, http=None) -> dict[str, Any]:
     credentials = config.get_credentials()
     dry_run = _to_bool((config.options_json or {}).get("dry_run"), default=True)
     text_body = job.body_rendered or f"Atualização GEPUB: {job.event_key}"
@@ -467,7 +628,7 @@ def _send_whatsapp(job: NotificationJob, config: NotificationChannelConfig) -> d
                 "to": destination,
                 "payload": payload,
             }
-        response = _twilio_send_message(account_sid=account_sid, auth_token=auth_token, payload=payload)
+        response = _twilio_send_message(account_sid=account_sid, auth_token=auth_token, payload=payload, http=http)
         return {
             "provider": config.provider,
             "result": "accepted",
@@ -496,7 +657,12 @@ def _send_whatsapp(job: NotificationJob, config: NotificationChannelConfig) -> d
                 "to": destination,
                 "payload": payload,
             }
-        response = _meta_send_message(access_token=access_token, phone_number_id=phone_number_id, payload=payload)
+        response = _meta_send_message(
+            access_token=access_token,
+            phone_number_id=phone_number_id,
+            payload=payload,
+            http=http,
+        )
         message_id = ""
         try:
             message_id = str(((response.get("messages") or [{}])[0]).get("id") or "")
@@ -517,7 +683,7 @@ def _send_whatsapp(job: NotificationJob, config: NotificationChannelConfig) -> d
     raise ValueError(f"Provedor {config.provider} ainda não suportado para WhatsApp.")
 
 
-def _send_sms(job: NotificationJob, config: NotificationChannelConfig) -> dict[str, Any]:
+def _send_sms(job: NotificationJob, config: NotificationChannelConfig, http=None) -> dict[str, Any]:
     if config.provider == NotificationChannelConfig.Provider.TWILIO:
         account_sid = _credentials_value(config, "account_sid", "sid")
         auth_token = _credentials_value(config, "auth_token", "token")
@@ -539,7 +705,7 @@ def _send_sms(job: NotificationJob, config: NotificationChannelConfig) -> dict[s
                 "to": job.destination,
                 "payload": payload,
             }
-        response = _twilio_send_message(account_sid=account_sid, auth_token=auth_token, payload=payload)
+        response = _twilio_send_message(account_sid=account_sid, auth_token=auth_token, payload=payload, http=http)
         return {
             "provider": config.provider,
             "result": "accepted",
@@ -717,21 +883,6 @@ def run_channel_connection_test(
 
 
 def process_pending_notification_jobs(*, limit: int = 100) -> dict[str, int]:
-    now = timezone.now()
-    qs = (
-        NotificationJob.objects.select_related("municipio", "secretaria", "unidade", "created_by")
-        .filter(status=NotificationJob.Status.PENDENTE, scheduled_at__lte=now)
-        .annotate(priority_order=_priority_order_expr())
-        .order_by("priority_order", "scheduled_at", "id")
-    )
-    processed = 0
-    delivered = 0
-    failed = 0
-    for job in qs[: max(1, int(limit or 100))]:
-        processed += 1
-        send_notification_job(job)
-        if job.status == NotificationJob.Status.ENTREGUE:
-            delivered += 1
-        elif job.status == NotificationJob.Status.FALHA:
-            failed += 1
-    return {"processed": processed, "delivered": delivered, "failed": failed}
+    from .dispatcher import dispatch_pending_notification_jobs
+
+    return dispatch_pending_notification_jobs(limit=limit)
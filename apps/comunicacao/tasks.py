@@ -3,7 +3,7 @@ from __future__ import annotations
 from celery import shared_task
 
 from .models import NotificationJob
-from .services import process_pending_notification_jobs, send_notification_job
+from .services import enqueue_event_notifications, process_pending_notification_jobs, send_notification_job
 
 
 @shared_task(name="comunicacao.process_job")
@@ -17,3 +17,37 @@ def process_notification_job_task(job_id: int):
 @shared_task(name="comunicacao.process_pending")
 def process_pending_notification_jobs_task(limit: int = 100):
     return process_pending_notification_jobs(limit=limit)
+
+
+@shared_task(name="comunicacao.enqueue_event")
+def enqueue_event_notifications_task(
+    *,
+    municipio_id: int,
+    secretaria_id: int | None = None,
+    unidade_id: int | None = None,
+    actor_id: int | None = None,
+    **options,
+):
+    """
+    Enfileira audiências grandes fora da requisição e aciona o despacho em lote.
+    O resultado traz os `job_ids` criados, como a resposta síncrona da API.
+    """
+    from django.contrib.auth import get_user_model
+
+    from apps.org.models import Municipio, Secretaria, Unidade
+
+    municipio = Municipio.objects.filter(pk=municipio_id).first()
+    if not municipio:
+        return {"recipients": len(options.get("recipients") or []), "queued": 0, "skipped": 0, "job_ids": []}
+
+    result = enqueue_event_notifications(
+        return_ids=True,
+        municipio=municipio,
+        secretaria=Secretaria.objects.filter(pk=secretaria_id).first() if secretaria_id else None,
+        unidade=Unidade.objects.filter(pk=unidade_id).first() if unidade_id else None,
+        actor=get_user_model().objects.filter(pk=actor_id).first() if actor_id else None,
+        **options,
+    )
+    if result["queued"]:
+        process_pending_notification_jobs_task.delay(limit=result["queued"])
+    return result
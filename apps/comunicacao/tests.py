@@ -2,13 +2,20 @@ from __future__ import annotations
 
 import json
 from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from apps.accounts.models import Profile
+from apps.core.models import AuditoriaEvento
 from apps.org.models import Municipio, MunicipioOnboardingWizard
 
 from .models import (
@@ -19,7 +26,14 @@ from .models import (
     NotificationTemplate,
     NotificationWebhookEvent,
 )
-from .services import process_pending_notification_jobs
+from .dispatcher import _persist_outcomes, _send_claimed, claim_notification_jobs, dispatch_pending_notification_jobs
+from .services import (
+    enqueue_event_notifications,
+    process_pending_notification_jobs,
+    queue_event_notifications,
+    render_placeholders,
+)
+from .tasks import enqueue_event_notifications_task
 
 
 class ComunicacaoModuleTestCase(TestCase):
@@ -95,6 +109,34 @@ class ComunicacaoModuleTestCase(TestCase):
         self.assertEqual(job.status, NotificationJob.Status.ENTREGUE)
         self.assertTrue(NotificationLog.objects.filter(job=job).exists())
 
+    @override_settings(COMUNICACAO_SYNC_ENQUEUE_MAX_RECIPIENTS=2)
+    def test_bulk_send_reports_task_id_and_keeps_job_ids_meaning(self):
+        url = reverse("comunicacao:notifications_send") + f"?municipio={self.municipio.pk}"
+
+        def enviar(total: int) -> dict:
+            payload = {
+                "event_key": "educacao.comunicado",
+                "body": "Olá {{nome}}",
+                "recipients": [
+                    {"nome": f"R{index}", "whatsapp": f"559899999{index:04d}", "channels": ["WHATSAPP"]}
+                    for index in range(total)
+                ],
+            }
+            resp = self.client.post(url, data=json.dumps(payload), content_type="application/json")
+            self.assertEqual(resp.status_code, 200)
+            return resp.json()
+
+        sync = enviar(2)
+        self.assertEqual((sync["async"], sync["task_id"]), (False, None))
+        self.assertEqual(sorted(sync["job_ids"]), sorted(NotificationJob.objects.values_list("pk", flat=True)))
+
+        with mock.patch.object(enqueue_event_notifications_task, "delay", return_value=SimpleNamespace(id="t-123")):
+            assincrono = enviar(3)
+        self.assertEqual(set(assincrono), set(sync))
+        self.assertEqual((assincrono["async"], assincrono["task_id"]), (True, "t-123"))
+        # Nenhum job criado ainda: null, não uma lista vazia que sugeriria "nenhum job".
+        self.assertIsNone(assincrono["job_ids"])
+
     def test_templates_api_create_and_list(self):
         create_payload = {
             "scope": "MUNICIPIO",
@@ -306,3 +348,157 @@ class ComunicacaoModuleTestCase(TestCase):
                 external_event_id="SM123",
             ).exists()
         )
+
+
+class NotificationDispatcherTestCase(TestCase):
+    def setUp(self):
+        self.municipio = Municipio.objects.create(nome="Cidade Despacho", uf="MA", ativo=True)
+        NotificationChannelConfig.objects.create(
+            municipio=self.municipio,
+            channel=NotificationChannelConfig.Channel.EMAIL,
+            provider=NotificationChannelConfig.Provider.MOCK,
+            sender_identifier="no-reply@cidade.gov.br",
+            is_active=True,
+        )
+
+    def _jobs(self, total: int, channel=NotificationChannelConfig.Channel.EMAIL, **extra):
+        return NotificationJob.objects.bulk_create(
+            [
+                NotificationJob(
+                    municipio=self.municipio,
+                    event_key="educacao.comunicado",
+                    channel=channel,
+                    destination=f"responsavel{index}@example.com",
+                    subject_rendered="Comunicado",
+                    body_rendered="Mensagem",
+                    **extra,
+                )
+                for index in range(total)
+            ]
+        )
+
+    def test_batch_dispatch_reuses_connection_and_bulk_writes(self):
+        self._jobs(30)
+        with CaptureQueriesContext(connection) as ctx:
+            stats = dispatch_pending_notification_jobs(limit=100, workers=4, chunk_size=10)
+
+        self.assertEqual(stats, {"processed": 30, "delivered": 30, "failed": 0})
+        self.assertEqual(len(mail.outbox), 30)
+        self.assertEqual(NotificationJob.objects.filter(status=NotificationJob.Status.ENTREGUE, attempts=1).count(), 30)
+        self.assertEqual(NotificationLog.objects.count(), 30)
+        self.assertEqual(AuditoriaEvento.objects.filter(evento="NOTIFICACAO_ENTREGUE").count(), 30)
+        # Consultas não crescem com o número de jobs (sem save/log/auditoria por envio).
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_claimed_jobs_are_not_picked_again(self):
+        self._jobs(3)
+        claimed = claim_notification_jobs(limit=10)
+        self.assertEqual(len(claimed), 3)
+        self.assertEqual(claim_notification_jobs(limit=10), [])
+        self.assertTrue(all(job.status == NotificationJob.Status.PROCESSANDO for job in claimed))
+
+    @override_settings(COMUNICACAO_CLAIM_HEARTBEAT_SECONDS=0)
+    def test_reclaimed_jobs_are_neither_sent_nor_overwritten(self):
+        self._jobs(3)
+        claimed = claim_notification_jobs(limit=10)
+        primeiro, segundo, terceiro = claimed
+
+        # Outro worker reivindicou o 1º job antes do envio: o heartbeat percebe e ele não sai.
+        NotificationJob.objects.filter(pk=primeiro.pk).update(attempts=F("attempts") + 1)
+        outcomes = _send_claimed(claimed, workers=1, chunk_size=1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertNotIn(primeiro.pk, [outcome.job.pk for outcome in outcomes])
+
+        # O 2º foi reivindicado depois de enviado: o desfecho é descartado.
+        NotificationJob.objects.filter(pk=segundo.pk).update(attempts=F("attempts") + 1)
+        self.assertEqual(_persist_outcomes(outcomes), {"processed": 1, "delivered": 1, "failed": 0})
+
+        status = dict(NotificationJob.objects.values_list("pk", "status"))
+        self.assertEqual(status[primeiro.pk], NotificationJob.Status.PROCESSANDO)
+        self.assertEqual(status[segundo.pk], NotificationJob.Status.PROCESSANDO)
+        self.assertEqual(status[terceiro.pk], NotificationJob.Status.ENTREGUE)
+        self.assertEqual(list(NotificationLog.objects.values_list("job_id", flat=True)), [terceiro.pk])
+
+    def test_exhausted_job_without_config_schedules_fallback(self):
+        job = NotificationJob.objects.create(
+            municipio=self.municipio,
+            event_key="saude.consulta.lembrete",
+            channel=NotificationChannelConfig.Channel.SMS,
+            destination="5598999990000",
+            payload_json={"email": "responsavel@example.com"},
+            fallback_channels=["SMS", "EMAIL"],
+            max_attempts=1,
+        )
+        stats = dispatch_pending_notification_jobs(limit=10)
+        self.assertEqual(stats["failed"], 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, NotificationJob.Status.FALHA)
+        fallback = NotificationJob.objects.exclude(pk=job.pk).get()
+        self.assertEqual(fallback.channel, NotificationChannelConfig.Channel.EMAIL)
+        self.assertEqual(fallback.fallback_index, 1)
+
+
+class BulkEnqueueTestCase(TestCase):
+    def setUp(self):
+        self.municipio = Municipio.objects.create(nome="Cidade Fan-out", uf="MA", ativo=True)
+        NotificationTemplate.objects.create(
+            municipio=self.municipio,
+            event_key="educacao.comunicado",
+            channel=NotificationChannelConfig.Channel.EMAIL,
+            subject="Aviso {{ turma }}",
+            body="Olá {{nome}}, {{ detalhe }} {{ itens }}",
+            is_active=True,
+        )
+
+    def _recipients(self, total: int) -> list[dict]:
+        return [{"nome": f"Responsável {index}", "email": f"r{index}@example.com"} for index in range(total)]
+
+    def _queries_for(self, total: int) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            result = enqueue_event_notifications(
+                municipio=self.municipio,
+                event_key="educacao.comunicado",
+                payload={"turma": "5A"},
+                recipients=self._recipients(total),
+                chunk_size=50,
+            )
+        self.assertEqual(result["queued"], total)
+        return len(ctx.captured_queries)
+
+    def test_enqueue_query_count_does_not_grow_per_recipient(self):
+        # Um SELECT de modelos + savepoint + INSERTs em lote (o SQLite pode dividir o lote).
+        self.assertLessEqual(self._queries_for(120), 10)
+        job = NotificationJob.objects.order_by("id").first()
+        self.assertEqual(job.subject_rendered, "Aviso 5A")
+        self.assertEqual(job.body_rendered, "Olá Responsável 0,  ")
+
+    def test_queue_event_notifications_keeps_saved_instances_and_skips_unreachable(self):
+        recipients = self._recipients(3) + [{"nome": "Sem contato"}, {"email": "x@example.com", "opt_out": True}]
+        jobs = queue_event_notifications(
+            municipio=self.municipio,
+            event_key="educacao.comunicado",
+            payload={},
+            recipients=recipients,
+        )
+        self.assertEqual(len(jobs), 3)
+        self.assertTrue(all(job.pk for job in jobs))
+        result = enqueue_event_notifications(
+            municipio=self.municipio,
+            event_key="educacao.comunicado",
+            payload={},
+            recipients=recipients,
+            return_ids=True,
+        )
+        self.assertEqual((result["queued"], result["skipped"]), (3, 2))
+        self.assertEqual(len(result["job_ids"]), 3)
+
+    def test_render_placeholders_compiled_path(self):
+        text = "{{a}}-{{ b }}-{{c}}-{{a}}"
+        self.assertEqual(
+            render_placeholders(text, {"a": 1, "b": {"k": "ç"}, "c": None}),
+            '1-{"k": "ç"}--1',
+        )
+        self.assertEqual(render_placeholders(text, {"b": [1, 2]}), "-[1, 2]--")
+        self.assertEqual(render_placeholders("sem chaves"), "sem chaves")
+        self.assertEqual(render_placeholders(""), "")
+
@@ -32,12 +32,12 @@ from .models import (
     NotificationWebhookEvent,
 )
 from .services import (
+    enqueue_event_notifications,
     process_pending_notification_jobs,
-    queue_event_notifications,
     run_channel_connection_test,
     validate_template_payload,
 )
-from .tasks import process_notification_job_task
+from .tasks import enqueue_event_notifications_task, process_pending_notification_jobs_task
 
 EVENT_KEY_RE = re.compile(r"^[a-z0-9_.:-]{3,80}$")
 DEFAULT_MAX_API_JSON_BODY = 256 * 1024
@@ -215,6 +215,57 @@ def _parse_recipients(data: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
+def _enqueue_notifications(*, municipio, secretaria, unidade, actor, recipients, **options) -> dict[str, Any]:
+    """
+    Audiências até COMUNICACAO_SYNC_ENQUEUE_MAX_RECIPIENTS são inseridas na requisição
+    (bulk_create); acima disso o enfileiramento vai para a fila "comunicacao".
+    Em ambos os casos o despacho em lote é acionado uma vez, não por job.
+
+    A resposta tem as mesmas chaves nos dois caminhos. `job_ids` são sempre os jobs
+    criados por esta chamada: no caminho assíncrono ainda não existem e vêm como null
+    (não lista vazia), assim como `skipped`; o `task_id` da tarefa Celery devolve o
+    mesmo resultado, com os `job_ids`, quando ela termina.
+    """
+    sync_limit = int(getattr(settings, "COMUNICACAO_SYNC_ENQUEUE_MAX_RECIPIENTS", 500) or 500)
+    if len(recipients) > sync_limit:
+        try:
+            task = enqueue_event_notifications_task.delay(
+                municipio_id=municipio.pk,
+                secretaria_id=getattr(secretaria, "pk", None),
+                unidade_id=getattr(unidade, "pk", None),
+                actor_id=getattr(actor, "pk", None),
+                recipients=recipients,
+                **options,
+            )
+            return {
+                "ok": True,
+                "async": True,
+                "task_id": task.id,
+                "recipients": len(recipients),
+                "queued": 0,
+                "skipped": None,
+                "job_ids": None,
+            }
+        except Exception:
+            pass
+
+    result = enqueue_event_notifications(
+        municipio=municipio,
+        secretaria=secretaria,
+        unidade=unidade,
+        actor=actor,
+        recipients=recipients,
+        return_ids=True,
+        **options,
+    )
+    if result["queued"]:
+        try:
+            process_pending_notification_jobs_task.delay(limit=result["queued"])
+        except Exception:
+            pass
+    return {"ok": True, "async": False, "task_id": None, **result}
+
+
 def _serialize_tenant_settings(item: NotificationTenantSettings) -> dict[str, Any]:
     return {
         "municipio_id": item.municipio_id,
@@ -596,7 +647,7 @@ def notifications_send(request):
     subject = str(data.get("subject") or "").strip()[:220]
     body = str(data.get("body") or "").strip()[:10000]
 
-    jobs = queue_event_notifications(
+    result = _enqueue_notifications(
         municipio=municipio,
         secretaria=secretaria,
         unidade=unidade,
@@ -614,13 +665,7 @@ def notifications_send(request):
         entity_type=str(data.get("entity_type") or ""),
         entity_id=str(data.get("entity_id") or ""),
     )
-    for job in jobs:
-        try:
-            process_notification_job_task.delay(job.pk)
-        except Exception:
-            pass
-
-    return JsonResponse({"ok": True, "queued": len(jobs), "job_ids": [j.pk for j in jobs]})
+    return JsonResponse(result)
 
 
 @login_required
@@ -648,7 +693,7 @@ def notifications_trigger(request):
     priority = _normalize_priority(data.get("priority"))
     urgent = _bool_value(data.get("urgent"), default=(priority == NotificationJob.Priority.URGENTE))
 
-    jobs = queue_event_notifications(
+    result = _enqueue_notifications(
         municipio=municipio,
         secretaria=secretaria,
         unidade=unidade,
@@ -664,13 +709,7 @@ def notifications_trigger(request):
         entity_type=str(data.get("entity_type") or ""),
         entity_id=str(data.get("entity_id") or ""),
     )
-    for job in jobs:
-        try:
-            process_notification_job_task.delay(job.pk)
-        except Exception:
-            pass
-
-    return JsonResponse({"ok": True, "queued": len(jobs), "job_ids": [j.pk for j in jobs]})
+    return JsonResponse(result)
 
 
 @login_required
@@ -22,6 +22,7 @@ from .models import (
     PortalMenuPublico,
     PortalPaginaPublica,
     PortalNoticia,
+    RelatorioPdfJob,
 )
 
 
@@ -47,6 +48,14 @@ class DocumentoEmitidoAdmin(admin.ModelAdmin):
     readonly_fields = ("codigo", "gerado_em", "assinatura_emitente", "assinatura_cargo")
 
 
+@admin.register(RelatorioPdfJob)
+class RelatorioPdfJobAdmin(admin.ModelAdmin):
+    list_display = ("titulo", "status", "paginas", "solicitado_por", "criado_em", "concluido_em")
+    list_filter = ("status", "criado_em")
+    search_fields = ("titulo", "nome_arquivo", "codigo")
+    readonly_fields = ("codigo", "criado_em", "concluido_em")
+
+
 class InstitutionalSlideInline(admin.TabularInline):
     model = InstitutionalSlide
     extra = 1
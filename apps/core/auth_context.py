@@ -0,0 +1,192 @@
+# apps/core/auth_context.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any
+
+from apps.core.module_access import (
+    MANAGED_MODULES,
+    MODULE_ALIASES,
+    MODULE_PLAN_FEATURES_ANY,
+    _load_plan_catalog,
+    _load_scope_modules,
+)
+from apps.core.rbac import (
+    compile_role_perms,
+    get_profile,
+    is_admin,
+    normalize_role,
+    perm_allowed,
+    role_scope_base,
+)
+
+
+@dataclass(frozen=True)
+class AuthContext:
+    """
+    Contexto de autorização pré-compilado de um usuário para a requisição atual.
+
+    Permissões são um frozenset com índice de prefixos (macros), então
+    `can("educacao")` é uma busca O(1). Módulos ativos e features do plano
+    são resolvidos sob demanda uma única vez e reaproveitados por middleware,
+    decorators, context processor e views DRF.
+    """
+
+    is_authenticated: bool
+    is_superuser: bool
+    is_admin: bool
+    active: bool
+    role: str
+    role_base: str
+    perms: frozenset[str]
+    perm_macros: frozenset[str]
+    _user: Any = field(default=None, repr=False, compare=False)
+
+    def can(self, perm: str) -> bool:
+        if perm == "billing.admin":
+            if not self.is_authenticated:
+                return False
+            return self.is_superuser or self.role == "ADMIN"
+        return perm_allowed(self.perms, self.perm_macros, perm)
+
+    @cached_property
+    def scope_modules(self) -> tuple[frozenset[str], bool]:
+        if not self.is_authenticated or self.is_admin or not self.active:
+            return frozenset(), True
+        modules, enforce = _load_scope_modules(self._user)
+        return frozenset(modules), enforce
+
+    @cached_property
+    def plan_catalog(self) -> tuple[frozenset[str], frozenset[str], bool]:
+        if not self.is_authenticated:
+            return frozenset(), frozenset(), False
+        features, apps, enforce = _load_plan_catalog(self._user)
+        return frozenset(features), frozenset(apps), enforce
+
+    @property
+    def plan_features(self) -> frozenset[str]:
+        return self.plan_catalog[0]
+
+    @property
+    def plan_apps(self) -> frozenset[str]:
+        return self.plan_catalog[1]
+
+    def has_plan_app(self, app_key: str) -> bool:
+        app = (app_key or "").strip().upper()
+        return bool(app) and app in self.plan_apps
+
+    def module_enabled(self, module_key: str) -> bool:
+        module = (module_key or "").strip().lower()
+        if not module or module not in MANAGED_MODULES:
+            return True
+
+        if not self.is_authenticated:
+            return False
+
+        if self.is_admin:
+            return True
+
+        if not self.active:
+            return False
+
+        modules, enforce = self.scope_modules
+        if not enforce:
+            # Compatibilidade para bases antigas sem onboarding/catalogo ativado.
+            return True
+
+        accepted_keys = MODULE_ALIASES.get(module, {module})
+        if not any(key in modules for key in accepted_keys):
+            return False
+
+        required_features = MODULE_PLAN_FEATURES_ANY.get(module)
+        if not required_features:
+            return True
+
+        features, _apps, enforce_features = self.plan_catalog
+        if not enforce_features:
+            # Base legada sem assinatura/plano configurado: mantém compatibilidade.
+            return True
+
+        return bool(required_features.intersection(features))
+
+
+ANONYMOUS_AUTH_CONTEXT = AuthContext(
+    is_authenticated=False,
+    is_superuser=False,
+    is_admin=False,
+    active=False,
+    role="",
+    role_base=role_scope_base(None),
+    perms=frozenset(),
+    perm_macros=frozenset(),
+)
+
+
+def _context_key(user) -> tuple:
+    profile = get_profile(user)
+    return (
+        id(profile),
+        getattr(profile, "role", None) if profile else None,
+        bool(getattr(profile, "ativo", True)) if profile else False,
+        bool(getattr(user, "is_superuser", False)),
+    )
+
+
+def build_auth_context(user) -> AuthContext:
+    if not user or not getattr(user, "is_authenticated", False):
+        return ANONYMOUS_AUTH_CONTEXT
+
+    profile = get_profile(user)
+    role = normalize_role(getattr(profile, "role", None) if profile else None)
+    admin = is_admin(user)
+    active = admin or bool(profile and getattr(profile, "ativo", True))
+
+    if admin:
+        perms, macros = compile_role_perms("ADMIN")
+    elif active:
+        perms, macros = compile_role_perms(role)
+    else:
+        perms, macros = frozenset(), frozenset()
+
+    return AuthContext(
+        is_authenticated=True,
+        is_superuser=bool(getattr(user, "is_superuser", False)),
+        is_admin=admin,
+        active=active,
+        role=role if profile else "",
+        role_base=role_scope_base(getattr(profile, "role", None) if profile else None),
+        perms=perms,
+        perm_macros=macros,
+        _user=user,
+    )
+
+
+def get_auth_context(user) -> AuthContext:
+    """
+    Retorna o AuthContext memoizado no próprio usuário (vive enquanto a requisição).
+    A chave inclui o perfil efetivo, então a simulação de acesso
+    (`_gepub_preview_profile`) ou troca de papel gera um novo contexto.
+    """
+    if not user or not getattr(user, "is_authenticated", False):
+        return ANONYMOUS_AUTH_CONTEXT
+
+    key = _context_key(user)
+    cached = getattr(user, "_gepub_auth_context", None)
+    if cached is not None:
+        if cached[0] == key:
+            return cached[1]
+        # Perfil efetivo mudou: caches de catálogo ficaram obsoletos.
+        for attr in ("_gepub_module_scope_cache", "_gepub_plan_catalog_cache"):
+            if hasattr(user, attr):
+                delattr(user, attr)
+
+    ctx = build_auth_context(user)
+    user._gepub_auth_context = (key, ctx)
+    return ctx
+
+
+def auth_context_for_request(request) -> AuthContext:
+    ctx = get_auth_context(getattr(request, "user", None))
+    request.gepub_auth = ctx
+    return ctx
@@ -0,0 +1,132 @@
+# apps/core/catalog_cache.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Catálogos de tenant (módulos ativos, plano, vínculo unidade→secretaria) mudam
+# raramente, mas eram lidos do banco em toda requisição autenticada.
+# Estratégia: L2 compartilhado (CACHES["default"]: redis/memcached) com chaves
+# versionadas por escopo + L1 local do processo com TTL curto.
+# Sinais de post_save/post_delete incrementam a versão do escopo afetado.
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 6
+CATALOG_L1_TTL_SECONDS = 5.0
+CATALOG_L1_MAX_ENTRIES = 4096
+
+SCOPE_MUNICIPIO = "municipio"
+SCOPE_SECRETARIA = "secretaria"
+SCOPE_UNIDADE = "unidade"
+SCOPE_PLANOS = "planos"
+SCOPE_TENANT_HOSTS = "tenant_hosts"
+SCOPE_USER = "user"
+SCOPE_ORG_TREE = "org_tree"
+
+_KEY_PREFIX = "gepub:catalog"
+
+_l1: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+_l1_lock = threading.Lock()
+
+
+def _version_key(scope: str, scope_id) -> str:
+    return f"{_KEY_PREFIX}:ver:{scope}:{scope_id}"
+
+
+def _fresh_version() -> int:
+    # Base temporal evita reaproveitar dados antigos se a chave de versão for despejada.
+    return int(time.time() * 1000)
+
+
+def _read_versions(scopes: tuple[tuple[str, Any], ...]) -> tuple[int, ...]:
+    keys = [_version_key(scope, scope_id) for scope, scope_id in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        value = found.get(key)
+        if value is None:
+            value = _fresh_version()
+            if not cache.add(key, value, timeout=None):
+                value = cache.get(key) or value
+        versions.append(int(value))
+    return tuple(versions)
+
+
+def _l1_get(key: tuple):
+    with _l1_lock:
+        entry = _l1.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            _l1.pop(key, None)
+            return None
+        _l1.move_to_end(key)
+        return entry
+
+
+def _l1_set(key: tuple, value) -> None:
+    with _l1_lock:
+        _l1[key] = (time.monotonic() + CATALOG_L1_TTL_SECONDS, value)
+        _l1.move_to_end(key)
+        while len(_l1) > CATALOG_L1_MAX_ENTRIES:
+            _l1.popitem(last=False)
+
+
+def cached_catalog(
+    kind: str,
+    scopes: tuple[tuple[str, Any], ...],
+    loader: Callable[[], Any],
+    *,
+    entry: str = "",
+    timeout: int = CATALOG_CACHE_TIMEOUT,
+):
+    """
+    Retorna o catálogo `kind` para os escopos informados, carregando via `loader`
+    apenas quando L1 (LRU local) e L2 não têm a versão corrente.
+    O primeiro escopo (mais `entry`, quando informado) identifica a entrada;
+    os demais escopos apenas compõem a versão.
+    O loader não deve retornar None (use um valor vazio para cache negativo).
+    """
+    l1_key = (kind, scopes, entry)
+    cached = _l1_get(l1_key)
+    if cached is not None:
+        return cached[1]
+
+    versions = _read_versions(scopes)
+    primary_scope, primary_id = scopes[0]
+    data_key = f"{_KEY_PREFIX}:{kind}:{primary_scope}:{primary_id}:{entry}:" + ".".join(str(v) for v in versions)
+    value = cache.get(data_key)
+    if value is None:
+        value = loader()
+        cache.set(data_key, value, timeout=timeout)
+    _l1_set(l1_key, value)
+    return value
+
+
+def _bump(scope: str, scope_id) -> None:
+    key = _version_key(scope, scope_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+    with _l1_lock:
+        for l1_key in [k for k in _l1 if (scope, scope_id) in k[1]]:
+            _l1.pop(l1_key, None)
+
+
+def invalidate_catalog_scope(scope: str, scope_id) -> None:
+    if scope_id in (None, ""):
+        return
+    _bump(scope, scope_id)
+    # Segunda invalidação após o commit fecha a janela em que outra requisição
+    # poderia recarregar o estado anterior antes da transação terminar.
+    transaction.on_commit(lambda: _bump(scope, scope_id))
+
+
+def clear_local_catalog_cache() -> None:
+    with _l1_lock:
+        _l1.clear()
@@ -3,10 +3,10 @@ from __future__ import annotations
 
 from django.urls import reverse
 
-from apps.billing.services import PlanoApp, municipio_has_plan_app
+from apps.billing.services import PlanoApp
+from apps.core.auth_context import auth_context_for_request
 from apps.core.design_system import THEME_OPTIONS, resolve_admin_theme_context, token_overrides_to_style
-from apps.core.module_access import module_enabled_for_user
-from apps.core.rbac import can, get_profile, role_scope_base
+from apps.core.rbac import get_profile
 
 
 def permissions(request):
@@ -15,46 +15,43 @@ def permissions(request):
     Mantém as chaves esperadas pelo seu base.html e telas de Educação.
     """
     u = getattr(request, "user", None)
+    auth = auth_context_for_request(request)
     profile = get_profile(u)
     role = getattr(profile, "role", "")
     role_code = ((role or "") + "").strip().upper()
-    municipio = getattr(profile, "municipio", None)
-    role_base = role_scope_base(role)
+    role_base = auth.role_base
     is_professor_role = role_base == "PROFESSOR"
-    plan_portal_enabled = bool(getattr(u, "is_superuser", False)) or municipio_has_plan_app(municipio, PlanoApp.PORTAL)
-    plan_transparencia_enabled = bool(getattr(u, "is_superuser", False)) or municipio_has_plan_app(
-        municipio,
-        PlanoApp.TRANSPARENCIA,
-    )
-    plan_camara_enabled = bool(getattr(u, "is_superuser", False)) or municipio_has_plan_app(municipio, PlanoApp.CAMARA)
+    plan_portal_enabled = bool(getattr(u, "is_superuser", False)) or auth.has_plan_app(PlanoApp.PORTAL)
+    plan_transparencia_enabled = bool(getattr(u, "is_superuser", False)) or auth.has_plan_app(PlanoApp.TRANSPARENCIA)
+    plan_camara_enabled = bool(getattr(u, "is_superuser", False)) or auth.has_plan_app(PlanoApp.CAMARA)
     can_publicacoes_admin = (
         plan_portal_enabled
         and (
             bool(getattr(u, "is_superuser", False))
-        or (can(u, "org.view") and role_base in {"ADMIN", "MUNICIPAL", "SECRETARIA"})
+        or (auth.can("org.view") and role_base in {"ADMIN", "MUNICIPAL", "SECRETARIA"})
         )
     )
-    edu_enabled = module_enabled_for_user(u, "educacao")
-    avaliacoes_enabled = module_enabled_for_user(u, "avaliacoes")
-    nee_enabled = module_enabled_for_user(u, "nee")
-    saude_enabled = module_enabled_for_user(u, "saude")
-    financeiro_enabled = module_enabled_for_user(u, "financeiro")
-    processos_enabled = module_enabled_for_user(u, "processos")
-    compras_enabled = module_enabled_for_user(u, "compras")
-    contratos_enabled = module_enabled_for_user(u, "contratos")
-    integracoes_enabled = module_enabled_for_user(u, "integracoes")
-    comunicacao_enabled = module_enabled_for_user(u, "comunicacao")
-    paineis_enabled = module_enabled_for_user(u, "paineis")
-    conversor_enabled = module_enabled_for_user(u, "conversor")
-    rh_enabled = module_enabled_for_user(u, "rh")
-    ponto_enabled = module_enabled_for_user(u, "ponto")
-    folha_enabled = module_enabled_for_user(u, "folha")
-    patrimonio_enabled = module_enabled_for_user(u, "patrimonio")
-    almoxarifado_enabled = module_enabled_for_user(u, "almoxarifado")
-    frota_enabled = module_enabled_for_user(u, "frota")
-    ouvidoria_enabled = module_enabled_for_user(u, "ouvidoria")
-    tributos_enabled = module_enabled_for_user(u, "tributos")
-    camara_enabled = module_enabled_for_user(u, "camara")
+    edu_enabled = auth.module_enabled("educacao")
+    avaliacoes_enabled = auth.module_enabled("avaliacoes")
+    nee_enabled = auth.module_enabled("nee")
+    saude_enabled = auth.module_enabled("saude")
+    financeiro_enabled = auth.module_enabled("financeiro")
+    processos_enabled = auth.module_enabled("processos")
+    compras_enabled = auth.module_enabled("compras")
+    contratos_enabled = auth.module_enabled("contratos")
+    integracoes_enabled = auth.module_enabled("integracoes")
+    comunicacao_enabled = auth.module_enabled("comunicacao")
+    paineis_enabled = auth.module_enabled("paineis")
+    conversor_enabled = auth.module_enabled("conversor")
+    rh_enabled = auth.module_enabled("rh")
+    ponto_enabled = auth.module_enabled("ponto")
+    folha_enabled = auth.module_enabled("folha")
+    patrimonio_enabled = auth.module_enabled("patrimonio")
+    almoxarifado_enabled = auth.module_enabled("almoxarifado")
+    frota_enabled = auth.module_enabled("frota")
+    ouvidoria_enabled = auth.module_enabled("ouvidoria")
+    tributos_enabled = auth.module_enabled("tributos")
+    camara_enabled = auth.module_enabled("camara")
     ds_theme_ctx = resolve_admin_theme_context(request)
     meus_dados_url = ""
     aluno_historico_url = ""
@@ -161,41 +158,42 @@ def permissions(request):
             aluno_comunicacao_url = ""
 
     return {
-        "can_org": can(u, "org.view"),
-        "can_org_manage_secretaria": can(u, "org.manage_secretaria"),
-        "can_edu": can(u, "educacao.view") and edu_enabled,
-        "can_avaliacoes": can(u, "avaliacoes.view") and avaliacoes_enabled,
-        "can_nee": can(u, "nee.view") and nee_enabled,
-        "can_saude": can(u, "saude.view") and saude_enabled,
-        "can_users": can(u, "accounts.manage_users"),
+        "gepub_auth": auth,
+        "can_org": auth.can("org.view"),
+        "can_org_manage_secretaria": auth.can("org.manage_secretaria"),
+        "can_edu": auth.can("educacao.view") and edu_enabled,
+        "can_avaliacoes": auth.can("avaliacoes.view") and avaliacoes_enabled,
+        "can_nee": auth.can("nee.view") and nee_enabled,
+        "can_saude": auth.can("saude.view") and saude_enabled,
+        "can_users": auth.can("accounts.manage_users"),
         "can_exclusoes": bool(
             getattr(u, "is_superuser", False)
-            or can(u, "accounts.manage_users")
-            or can(u, "org.manage_secretaria")
-            or can(u, "org.manage_unidade")
+            or auth.can("accounts.manage_users")
+            or auth.can("org.manage_secretaria")
+            or auth.can("org.manage_unidade")
         ),
-        "can_billing": can(u, "billing.view"),
-        "can_billing_admin": can(u, "billing.admin"),
-        "can_financeiro": can(u, "financeiro.view") and financeiro_enabled,
-        "can_processos": can(u, "processos.view") and processos_enabled,
-        "can_compras": can(u, "compras.view") and compras_enabled,
-        "can_contratos": can(u, "contratos.view") and contratos_enabled,
-        "can_integracoes": can(u, "integracoes.view") and integracoes_enabled,
-        "can_comunicacao": can(u, "comunicacao.view") and comunicacao_enabled,
-        "can_paineis": can(u, "paineis.view") and paineis_enabled,
-        "can_conversor": can(u, "conversor.view") and conversor_enabled,
-        "can_rh": can(u, "rh.view") and rh_enabled,
-        "can_ponto": can(u, "ponto.view") and ponto_enabled,
-        "can_folha": can(u, "folha.view") and folha_enabled,
-        "can_patrimonio": can(u, "patrimonio.view") and patrimonio_enabled,
-        "can_almoxarifado": can(u, "almoxarifado.view") and almoxarifado_enabled,
-        "can_frota": can(u, "frota.view") and frota_enabled,
-        "can_ouvidoria": can(u, "ouvidoria.view") and ouvidoria_enabled,
-        "can_tributos": can(u, "tributos.view") and tributos_enabled,
-        "can_camara": can(u, "camara.view") and camara_enabled and plan_camara_enabled,
-        "can_system_admin": can(u, "system.admin_django"),
-        "can_edu_manage": can(u, "educacao.manage") and edu_enabled,
-        "can_org_municipios": can(u, "org.municipios.view") or can(u, "org.manage") or (getattr(u, "is_superuser", False)),
+        "can_billing": auth.can("billing.view"),
+        "can_billing_admin": auth.can("billing.admin"),
+        "can_financeiro": auth.can("financeiro.view") and financeiro_enabled,
+        "can_processos": auth.can("processos.view") and processos_enabled,
+        "can_compras": auth.can("compras.view") and compras_enabled,
+        "can_contratos": auth.can("contratos.view") and contratos_enabled,
+        "can_integracoes": auth.can("integracoes.view") and integracoes_enabled,
+        "can_comunicacao": auth.can("comunicacao.view") and comunicacao_enabled,
+        "can_paineis": auth.can("paineis.view") and paineis_enabled,
+        "can_conversor": auth.can("conversor.view") and conversor_enabled,
+        "can_rh": auth.can("rh.view") and rh_enabled,
+        "can_ponto": auth.can("ponto.view") and ponto_enabled,
+        "can_folha": auth.can("folha.view") and folha_enabled,
+        "can_patrimonio": auth.can("patrimonio.view") and patrimonio_enabled,
+        "can_almoxarifado": auth.can("almoxarifado.view") and almoxarifado_enabled,
+        "can_frota": auth.can("frota.view") and frota_enabled,
+        "can_ouvidoria": auth.can("ouvidoria.view") and ouvidoria_enabled,
+        "can_tributos": auth.can("tributos.view") and tributos_enabled,
+        "can_camara": auth.can("camara.view") and camara_enabled and plan_camara_enabled,
+        "can_system_admin": auth.can("system.admin_django"),
+        "can_edu_manage": auth.can("educacao.manage") and edu_enabled,
+        "can_org_municipios": auth.can("org.municipios.view") or auth.can("org.manage") or (getattr(u, "is_superuser", False)),
         "can_publicacoes_admin": can_publicacoes_admin,
         "plan_portal_enabled": plan_portal_enabled,
         "plan_transparencia_enabled": plan_transparencia_enabled,
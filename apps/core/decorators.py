@@ -7,7 +7,8 @@ from django.conf import settings
 from django.http import HttpResponseForbidden
 from django.shortcuts import redirect
 
-from apps.core.rbac import can, is_admin, is_professor_profile_role, role_scope_base
+from apps.core.auth_context import auth_context_for_request
+from apps.core.rbac import is_professor_profile_role, role_scope_base
 
 
 _PROFESSOR_EDUCACAO_ALLOWED_ROUTES = {
@@ -142,7 +143,7 @@ def require_perm(perm: str):
                     "403 — Perfil Aluno possui acesso apenas aos seus dados acadêmicos."
                 )
 
-            if not can(user, perm):
+            if not auth_context_for_request(request).can(perm):
                 return HttpResponseForbidden("403 — Você não tem permissão para acessar esta página.")
 
             if perm == "educacao.view" and _is_professor(user):
@@ -173,20 +174,11 @@ def require_plan_feature(*features: str, any_of: bool = True, allow_without_plan
                 login_url = getattr(settings, "LOGIN_URL", "/accounts/login/")
                 return redirect(f"{login_url}?next={request.get_full_path()}")
 
-            if not normalized or is_admin(user):
+            auth = auth_context_for_request(request)
+            if not normalized or auth.is_admin:
                 return view_func(request, *args, **kwargs)
 
-            profile = getattr(user, "profile", None)
-            municipio = getattr(profile, "municipio", None) if profile else None
-
-            try:
-                from apps.billing.services import municipio_plan_features
-            except Exception:
-                if allow_without_plan:
-                    return view_func(request, *args, **kwargs)
-                return HttpResponseForbidden(message or "403 — Recurso indisponível no plano atual.")
-
-            features_ativas = municipio_plan_features(municipio)
+            features_ativas = auth.plan_features
             if not features_ativas and allow_without_plan:
                 return view_func(request, *args, **kwargs)
 
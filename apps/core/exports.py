@@ -1,13 +1,21 @@
 import base64
 import csv
+import datetime
 import hashlib
-from io import BytesIO
+import math
+import re
+import zipfile
+from decimal import Decimal
+from functools import lru_cache
+from io import BytesIO, StringIO
+from xml.sax.saxutils import escape
 
-from django.http import HttpResponse
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-from weasyprint import HTML
+from .services_pdf import TABLE_STYLESHEET, enqueue_pdf_job, pdf_asset_url, pdf_job_response, render_pdf
 
 
 def export_csv(filename: str, headers: list[str], rows: list[list[str]]):
@@ -23,12 +31,237 @@ def export_csv(filename: str, headers: list[str], rows: list[list[str]]):
     return response
 
 
+EXPORT_STREAM_CHUNK_SIZE = 2000
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Tamanho aproximado de cada bloco enviado ao cliente nas exportações em streaming.
+_STREAM_FLUSH_BYTES = 64 * 1024
+
+
+def iter_export_rows(rows, row_mapper=None, *, chunk_size: int = EXPORT_STREAM_CHUNK_SIZE):
+    """
+    Linhas de exportação sob demanda: QuerySets são lidos com .iterator(chunk_size)
+    (sem cache de resultados) e cada item passa pelo `row_mapper`, se houver.
+    """
+    if isinstance(rows, QuerySet):
+        rows = rows.iterator(chunk_size=chunk_size)
+    if row_mapper is None:
+        return iter(rows)
+    return (row_mapper(row) for row in rows)
+
+
+def _iter_csv_bytes(headers: list[str], rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    # BOM para Excel abrir UTF-8 certo
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    # Cabeçalho sai antes da primeira consulta: o download começa imediatamente.
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= _STREAM_FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_csv(
+    filename: str,
+    headers: list[str],
+    rows,
+    *,
+    row_mapper=None,
+    chunk_size: int = EXPORT_STREAM_CHUNK_SIZE,
+) -> StreamingHttpResponse:
+    """
+    Versão em streaming do export_csv: `rows` pode ser um QuerySet ou qualquer
+    iterável, convertido linha a linha por `row_mapper`. Memória constante,
+    independente do tamanho da exportação.
+    """
+    response = StreamingHttpResponse(
+        _iter_csv_bytes(headers, iter_export_rows(rows, row_mapper, chunk_size=chunk_size)),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+_XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_XLSX_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XLSX_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XLSX_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{_XLSX_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{_XLSX_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_XLSX_REL_NS}/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    # Estilos mínimos: 0 = padrão, 1 = data (numFmt 14), 2 = data e hora (numFmt 22).
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{_XLSX_NS}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        "</styleSheet>"
+    ),
+}
+# Caracteres de controle que o XML 1.0 não aceita (o Excel recusa o arquivo).
+_XLSX_INVALID_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_XLSX_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+class _ZipChunkSink:
+    """Destino sem seek para o ZipFile: guarda os bytes produzidos até serem drenados."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def _xlsx_column(idx: int) -> str:
+    letters = ""
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _xlsx_cell(ref: str, value) -> str:
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)) and math.isfinite(value):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        delta = value - _XLSX_EPOCH
+        serial = delta.days + (delta.seconds + delta.microseconds / 1_000_000) / 86400
+        return f'<c r="{ref}" s="2"><v>{serial}</v></c>'
+    if isinstance(value, datetime.date):
+        return f'<c r="{ref}" s="1"><v>{(value - _XLSX_EPOCH.date()).days}</v></c>'
+    text = escape(_XLSX_INVALID_CHARS.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(number: int, values) -> str:
+    cells = "".join(_xlsx_cell(f"{_xlsx_column(col)}{number}", value) for col, value in enumerate(values, start=1))
+    return f'<row r="{number}">{cells}</row>'
+
+
+def _iter_xlsx_bytes(headers: list[str], rows, *, sheet_title: str, leading_rows):
+    sink = _ZipChunkSink()
+    # Sem tell()/seek() no destino, o ZipFile grava cada membro com data descriptor.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, body in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, _XLSX_XML_DECL + body)
+        title = escape(sheet_title[:31], {'"': "&quot;"})
+        archive.writestr(
+            "xl/workbook.xml",
+            f'{_XLSX_XML_DECL}<workbook xmlns="{_XLSX_NS}" xmlns:r="{_XLSX_REL_NS}">'
+            f'<sheets><sheet name="{title}" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(f'{_XLSX_XML_DECL}<worksheet xmlns="{_XLSX_NS}"><sheetData>'.encode("utf-8"))
+            number = 0
+            for values in (*(leading_rows or ()), headers):
+                number += 1
+                sheet.write(_xlsx_row(number, values).encode("utf-8"))
+            # Partes fixas e cabeçalho saem antes da primeira consulta.
+            yield sink.drain()
+
+            for values in rows:
+                number += 1
+                sheet.write(_xlsx_row(number, values).encode("utf-8"))
+                if sink.size >= _STREAM_FLUSH_BYTES:
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+def stream_xlsx(
+    filename: str,
+    headers: list[str],
+    rows,
+    *,
+    row_mapper=None,
+    chunk_size: int = EXPORT_STREAM_CHUNK_SIZE,
+    sheet_title: str = "Dados",
+    leading_rows: list[list] | None = None,
+) -> StreamingHttpResponse:
+    """
+    Mesma interface do stream_csv gerando XLSX em streaming de verdade: a planilha
+    é escrita como SpreadsheetML (strings inline) direto num ZIP sem seek, e os
+    blocos comprimidos vão ao cliente conforme as linhas chegam. O openpyxl não
+    serve aqui porque o modo write-only só monta o ZIP no save(), depois de ler
+    todas as linhas.
+    """
+    response = StreamingHttpResponse(
+        _iter_xlsx_bytes(
+            headers,
+            iter_export_rows(rows, row_mapper, chunk_size=chunk_size),
+            sheet_title=sheet_title,
+            leading_rows=leading_rows,
+        ),
+        content_type=XLSX_CONTENT_TYPE,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
 def _make_report_hash(title: str, headers: list[str], rows: list[list[str]], user_str: str, dt_str: str) -> str:
     # Hash curto e estável o suficiente para identificar o relatório impresso
     raw = f"{title}|{user_str}|{dt_str}|{headers}|{rows}".encode("utf-8", errors="ignore")
     return hashlib.sha256(raw).hexdigest()[:16].upper()
 
 
+@lru_cache(maxsize=256)
 def _try_make_qr_data_uri(text: str) -> str | None:
     """
     Gera QR Code como data URI (PNG base64).
@@ -46,6 +279,19 @@ def _try_make_qr_data_uri(text: str) -> str | None:
     return f"data:image/png;base64,{b64}"
 
 
+def _pdf_response(pdf_bytes: bytes, filename: str) -> HttpResponse:
+    resp = HttpResponse(pdf_bytes, content_type="application/pdf")
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp["X-Content-Type-Options"] = "nosniff"
+    return resp
+
+
+def _async_pdf_min_rows() -> int:
+    from django.conf import settings
+
+    return int(getattr(settings, "PDF_ASYNC_MIN_ROWS", 2000))
+
+
 def export_pdf_table(
     request,
     *,
@@ -55,6 +301,7 @@ def export_pdf_table(
     rows: list[list[str]],
     subtitle: str = "",
     filtros: str = "",
+    async_mode: bool | None = None,
 ):
     """
     PDF institucional (modelo padrão) via WeasyPrint (UTF-8),
@@ -66,6 +313,10 @@ def export_pdf_table(
       - Rodapé com marca + paginação real (Página X de Y)
       - Hash do relatório e QR Code (se disponível)
     Template: templates/core/relatorios/pdf/table.html
+    Estilos: static/css/pages/relatorio-pdf-tabela.css (parseado uma vez por processo)
+
+    `async_mode=None` gera em segundo plano a partir de PDF_ASYNC_MIN_ROWS
+    linhas; nesse caso a resposta é o job (202/redirect), não o PDF.
     """
     from django.templatetags.static import static
 
@@ -87,19 +338,19 @@ def export_pdf_table(
         "rows": rows,
         "report_hash": report_hash,
         "qr_data_uri": qr_data_uri,
-        # Se você trocar a logo no static depois, não precisa mexer aqui
-        "logo_url": request.build_absolute_uri(static("img/logo_prefeitura.png")),
+        # Servida do disco pelo url_fetcher de PDF; trocar a logo no static não exige mudança aqui
+        "logo_url": pdf_asset_url(static("img/logo_prefeitura.png")),
     }
 
     html = render_to_string("core/relatorios/pdf/table.html", context, request=request)
 
-    # base_url é fundamental pro WeasyPrint resolver assets (logo/css/etc.)
-    pdf_bytes = HTML(string=html, base_url=request.build_absolute_uri("/")).write_pdf()
+    if async_mode is None:
+        async_mode = len(rows) >= _async_pdf_min_rows()
+    if async_mode:
+        job = enqueue_pdf_job(request, html=html, filename=filename, title=title, stylesheets=[TABLE_STYLESHEET])
+        return pdf_job_response(request, job)
 
-    resp = HttpResponse(pdf_bytes, content_type="application/pdf")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    resp["X-Content-Type-Options"] = "nosniff"
-    return resp
+    return _pdf_response(render_pdf(html, stylesheets=[TABLE_STYLESHEET]), filename)
 
 
 def export_pdf_template(
@@ -112,10 +363,14 @@ def export_pdf_template(
     subtitle: str = "",
     filtros: str = "",
     hash_payload: str = "",
+    async_mode: bool = False,
+    stylesheets=(),
 ):
     """
     Exporta PDF renderizando um template arbitrário (WeasyPrint),
     preservando metadados institucionais (impresso por/data, hash e QR).
+    `stylesheets` são folhas estáticas compartilhadas (ver `pdf_stylesheet`).
+    Com `async_mode=True`, o PDF sai em segundo plano (resposta com o job).
     """
     from django.templatetags.static import static
 
@@ -136,15 +391,16 @@ def export_pdf_template(
         "printed_by": printed_by,
         "report_hash": report_hash,
         "qr_data_uri": qr_data_uri,
-        "logo_url": request.build_absolute_uri(static("img/logo_prefeitura.png")),
+        "logo_url": pdf_asset_url(static("img/logo_prefeitura.png")),
     }
     if context:
         base_context.update(context)
 
     html = render_to_string(template_name, base_context, request=request)
-    pdf_bytes = HTML(string=html, base_url=request.build_absolute_uri("/")).write_pdf()
+    if async_mode:
+        return pdf_job_response(
+            request,
+            enqueue_pdf_job(request, html=html, filename=filename, title=title, stylesheets=stylesheets),
+        )
 
-    resp = HttpResponse(pdf_bytes, content_type="application/pdf")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    resp["X-Content-Type-Options"] = "nosniff"
-    return resp
+    return _pdf_response(render_pdf(html, stylesheets=stylesheets), filename)
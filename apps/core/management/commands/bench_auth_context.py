@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import auth_context, rbac
+from apps.core.middleware import RBACMiddleware
+
+
+DEFAULT_ROLES = (
+    "ADMIN",
+    "MUNICIPAL",
+    "SECRETARIA",
+    "UNIDADE",
+    "EDU_SECRETARIO",
+    "PROFESSOR",
+    "SAU_MEDICO",
+    "NEE",
+    "LEITURA",
+    "ALUNO",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark do shell do dashboard por papel: conta chamadas a can(), "
+        "recompilações do conjunto de permissões e consultas ao banco por requisição, e compara "
+        "o tempo com o caminho anterior ao AuthContext (conjunto reconstruído a cada can())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--roles", default=",".join(DEFAULT_ROLES), help="Papéis separados por vírgula.")
+        parser.add_argument("--iterations", type=int, default=50, help="Requisições simuladas por papel.")
+        parser.add_argument("--path", default="/educacao/", help="Rota usada na passagem pelo RBACMiddleware.")
+        parser.add_argument("--template", default="core/base.html", help="Template do shell renderizado.")
+
+    def handle(self, *args, **options):
+        roles = [r.strip().upper() for r in (options["roles"] or "").split(",") if r.strip()]
+        iterations = max(1, int(options["iterations"]))
+
+        self.stdout.write(
+            f"{'papel':<16}{'can()':>8}{'rebuilds antes':>16}{'rebuilds agora':>16}{'queries':>9}"
+            f"{'ms antes':>10}{'ms agora':>10}"
+        )
+        with transaction.atomic():
+            for role in roles:
+                antes = self._bench_role(role, iterations, options["path"], options["template"], legado=True)
+                agora = self._bench_role(role, iterations, options["path"], options["template"])
+                self.stdout.write(
+                    f"{role:<16}{agora['can_calls']:>8}{antes['compiles']:>16}{agora['compiles']:>16}"
+                    f"{agora['queries']:>9}{antes['ms']:>10.2f}{agora['ms']:>10.2f}"
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            "'antes' repete a mesma requisição com o can() anterior ao AuthContext, que reconstruía o "
+            "conjunto de permissões e varria os prefixos a cada chamada; 'rebuilds antes' é por requisição, "
+            "'rebuilds agora' é por processo."
+        )
+
+    def _bench_role(self, role: str, iterations: int, path: str, template: str, legado: bool = False) -> dict:
+        from apps.accounts.models import Profile
+
+        user_model = get_user_model()
+        sufixo = "_legado" if legado else ""
+        user = user_model.objects.create_user(username=f"bench_auth_{role.lower()}{sufixo}", password="x")
+        Profile.objects.update_or_create(
+            user=user,
+            defaults={"role": role, "ativo": True, "must_change_password": False},
+        )
+        factory = RequestFactory()
+        middleware = RBACMiddleware(
+            lambda request: HttpResponse(render_to_string(template, {}, request=request))
+        )
+
+        # Aquecimento fora da medição: carga dos templates não deve cair no primeiro cenário.
+        warmup = factory.get(path)
+        warmup.session = SessionStore()
+        warmup.user = user_model.objects.select_related("profile").get(pk=user.pk)
+        middleware(warmup)
+
+        rbac.compile_role_perms.cache_clear()
+        can_calls = 0
+        rebuilds = 0
+        queries = 0
+        started = time.perf_counter()
+        original_can = auth_context.AuthContext.can
+        compile_uncached = rbac.compile_role_perms.__wrapped__
+
+        def legacy_can(ctx, perm):
+            # Caminho anterior: conjunto recompilado por chamada e busca de macro por prefixo.
+            nonlocal rebuilds
+            if perm == "billing.admin" or not ctx.is_authenticated or not ctx.active:
+                return original_can(ctx, perm)
+            rebuilds += 1
+            perms, _macros = compile_uncached("ADMIN" if ctx.is_admin else ctx.role)
+            if perm in perms:
+                return True
+            if "." in perm:
+                return False
+            prefix = perm + "."
+            return any(p.startswith(prefix) for p in perms)
+
+        def counting_can(ctx, perm):
+            nonlocal can_calls
+            can_calls += 1
+            return (legacy_can if legado else original_can)(ctx, perm)
+
+        with mock.patch.object(auth_context.AuthContext, "can", counting_can):
+            for _ in range(iterations):
+                request = factory.get(path)
+                request.session = SessionStore()
+                # Recarrega o usuário como o AuthenticationMiddleware faria.
+                request.user = user_model.objects.select_related("profile").get(pk=user.pk)
+                with CaptureQueriesContext(connection) as ctx:
+                    middleware(request)
+                queries += len(ctx.captured_queries)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "can_calls": can_calls // iterations,
+            "compiles": rebuilds // iterations if legado else rbac.compile_role_perms.cache_info().misses,
+            "queries": queries // iterations,
+            "ms": (elapsed / iterations) * 1000,
+        }
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.models import KpiSnapshot
+from apps.org.models import Municipio, Unidade
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a renderização do dashboard (admin, secretário de educação, secretaria e unidade) "
+        "calculando os painéis na requisição (sem snapshot) e lendo os snapshots de KPIs. "
+        "Use após seed_santa_aurora_100k. Usuários e snapshots criados são desfeitos no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Renderizações por cenário.")
+
+    def handle(self, *args, **options):
+        repeat = max(1, int(options["repeat"]))
+        municipio = (
+            Municipio.objects.annotate(total=Count("secretarias__unidades"))
+            .order_by("-total", "id")
+            .first()
+        )
+        if not municipio:
+            raise CommandError("Nenhum município encontrado. Rode seed_santa_aurora_100k antes.")
+        unidade = (
+            Unidade.objects.filter(secretaria__municipio=municipio, tipo=Unidade.Tipo.EDUCACAO)
+            .annotate(total=Count("turmas__matriculas"))
+            .order_by("-total", "id")
+            .first()
+        )
+        if not unidade:
+            raise CommandError(f"{municipio.nome} não tem unidades de educação.")
+
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        self.stdout.write(f"{municipio.nome}: secretaria {unidade.secretaria.nome}, unidade {unidade.nome}")
+        self.stdout.write(f"{'perfil':<16}{'modo':<14}{'consultas':>10}{'p50 ms':>10}")
+        with transaction.atomic():
+            cenarios = (
+                ("admin", self._user("admin", "ADMIN", superuser=True)),
+                ("edu_secretario", self._user("edusec", "EDU_SECRETARIO", secretaria=unidade.secretaria)),
+                ("secretaria", self._user("sec", "SECRETARIA", secretaria=unidade.secretaria)),
+                ("unidade", self._user("uni", "UNIDADE", unidade=unidade)),
+            )
+            for label, user in cenarios:
+                client = Client(HTTP_HOST=host)
+                client.force_login(user)
+                for modo in ("sem snapshot", "com snapshot"):
+                    self._run(client, label, modo, repeat, limpar=modo == "sem snapshot")
+            transaction.set_rollback(True)
+
+    def _user(self, sufixo: str, role: str, *, superuser: bool = False, **vinculos):
+        user = get_user_model().objects.create_user(
+            username=f"bench_kpi_{sufixo}", password="x", is_superuser=superuser, is_staff=superuser
+        )
+        profile = user.profile
+        profile.role = role
+        profile.ativo = True
+        profile.must_change_password = False
+        for campo, valor in vinculos.items():
+            setattr(profile, campo, valor)
+        if vinculos:
+            unidade = vinculos.get("unidade")
+            secretaria = vinculos.get("secretaria") or unidade.secretaria
+            profile.secretaria = secretaria
+            profile.municipio_id = secretaria.municipio_id
+        profile.save()
+        return user
+
+    def _run(self, client: Client, label: str, modo: str, repeat: int, *, limpar: bool):
+        url = reverse("core:dashboard")
+        client.get(url)
+        tempos = []
+        consultas = 0
+        for _ in range(repeat):
+            if limpar:
+                # Sem snapshot: cada renderização calcula os painéis, como antes.
+                KpiSnapshot.objects.all().delete()
+            # O log de consultas é limitado; a rodada anterior pode tê-lo enchido.
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                tempos.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{label}: dashboard respondeu {response.status_code}")
+            consultas = len(queries)
+        self.stdout.write(f"{label:<16}{modo:<14}{consultas:>10}{statistics.median(tempos):>10.1f}")
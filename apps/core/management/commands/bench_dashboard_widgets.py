@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.views_dashboard import WIDGETS_POR_TEMPLATE
+from apps.org.models import MunicipioOnboardingWizard, Unidade
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o dashboard com widgets: a casca (primeiro byte), os fragmentos buscados à parte "
+        "(soma e maior tempo, que é o que a página espera com as buscas simultâneas) e o modo "
+        "completo (?completo=1, fontes calculadas em paralelo). Sempre com o cache vazio. "
+        "Usuários criados são desfeitos no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Renderizações por cenário.")
+
+    def handle(self, *args, **options):
+        repeat = max(1, int(options["repeat"]))
+        unidade = (
+            Unidade.objects.filter(tipo=Unidade.Tipo.EDUCACAO)
+            .annotate(total=Count("laboratorios_informatica"))
+            .order_by("-total", "id")
+            .select_related("secretaria")
+            .first()
+        )
+        if not unidade:
+            raise CommandError("Nenhuma unidade de educação encontrada. Rode seed_santa_aurora_100k antes.")
+
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        self.stdout.write(f"secretaria {unidade.secretaria.nome}, unidade {unidade.nome}")
+        self.stdout.write(f"{'perfil':<16}{'etapa':<22}{'consultas':>10}{'p50 ms':>10}")
+        with transaction.atomic():
+            cenarios = (
+                ("edu_secretario", "secretaria_informatica", self._user(
+                    "edusec", "EDU_SECRETARIO", secretaria=unidade.secretaria
+                )),
+                ("edu_coord", "coordenacao_informatica", self._user("coord", "EDU_COORD", unidade=unidade)),
+                ("municipal", "municipal", self._user("muni", "MUNICIPAL", secretaria=unidade.secretaria)),
+            )
+            for label, parcial, user in cenarios:
+                client = Client(HTTP_HOST=host)
+                client.force_login(user)
+                self._run(client, label, WIDGETS_POR_TEMPLATE[f"core/dashboards/partials/{parcial}.html"], repeat)
+            transaction.set_rollback(True)
+
+    def _user(self, sufixo: str, role: str, **vinculos):
+        user = get_user_model().objects.create_user(username=f"bench_widget_{sufixo}", password="x")
+        profile = user.profile
+        profile.role = role
+        profile.ativo = True
+        profile.must_change_password = False
+        for campo, valor in vinculos.items():
+            setattr(profile, campo, valor)
+        secretaria = vinculos.get("secretaria") or vinculos["unidade"].secretaria
+        profile.municipio_id = secretaria.municipio_id
+        if role == "MUNICIPAL":
+            profile.secretaria = None
+            # Sem o assistente concluído o dashboard municipal redireciona para o onboarding.
+            MunicipioOnboardingWizard.objects.create(
+                user=user,
+                municipio_id=secretaria.municipio_id,
+                current_step=8,
+                total_steps=8,
+                completed_at=timezone.now(),
+            )
+        profile.save()
+        return user
+
+    def _medir(self, client: Client, url: str, params: dict | None = None) -> tuple[int, float]:
+        cache.clear()
+        # O log de consultas é limitado; a rodada anterior pode tê-lo enchido.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url, params or {})
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f"{url} respondeu {response.status_code}")
+        return len(queries), elapsed
+
+    def _linha(self, label: str, etapa: str, consultas: int, tempos: list[float]) -> None:
+        self.stdout.write(f"{label:<16}{etapa:<22}{consultas:>10}{statistics.median(tempos):>10.1f}")
+
+    def _run(self, client: Client, label: str, nomes: tuple[str, ...], repeat: int) -> None:
+        url = reverse("core:dashboard")
+        self._medir(client, url)
+
+        casca, soma, maior, completo = [], [], [], []
+        consultas = {}
+        for _ in range(repeat):
+            consultas["casca"], ms = self._medir(client, url)
+            casca.append(ms)
+            tempos = []
+            total = 0
+            for nome in nomes:
+                n, ms = self._medir(client, reverse("core:dashboard_widget", args=[nome]))
+                total += n
+                tempos.append(ms)
+            consultas["widgets"] = total
+            soma.append(sum(tempos) if tempos else 0.0)
+            maior.append(max(tempos) if tempos else 0.0)
+            consultas["completo"], ms = self._medir(client, url, {"completo": "1"})
+            completo.append(ms)
+
+        self._linha(label, "casca", consultas["casca"], casca)
+        self._linha(label, f"widgets soma ({len(nomes)})", consultas["widgets"], soma)
+        self._linha(label, "widgets maior", consultas["widgets"], maior)
+        # As consultas das threads do modo completo não entram na contagem (outras conexões).
+        self._linha(label, "completo", consultas["completo"], completo)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.exports import export_csv, stream_csv, stream_xlsx
+
+
+HEADERS = ["Nome", "CPF", "NIS", "Ativo"]
+
+
+def _row(item):
+    nome, cpf, nis, ativo = item
+    return [nome or "", cpf or "", nis or "", "Sim" if ativo else "Não"]
+
+
+def _rss_mb() -> float:
+    # ru_maxrss em KiB no Linux: pico do processo até aqui (não diminui).
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara export_csv (linhas materializadas) com stream_csv/stream_xlsx na listagem "
+        "de alunos: tempo até o primeiro byte, tempo total e pico de memória. "
+        "Os alunos sintéticos são criados numa transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alunos", type=int, default=100000)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--sem-xlsx", action="store_true", help="Pula a exportação XLSX.")
+        parser.add_argument(
+            "--tracemalloc",
+            action="store_true",
+            help="Mede também o pico de alocação Python (deixa os tempos bem mais lentos).",
+        )
+
+    def handle(self, *args, **options):
+        from apps.educacao.models import Aluno
+
+        self.trace = options["tracemalloc"]
+        total = max(1, options["alunos"])
+        chunk_size = max(1, options["chunk_size"])
+        with transaction.atomic():
+            Aluno.objects.bulk_create(
+                (
+                    Aluno(nome=f"Aluno Benchmark {idx:06d}", nis=f"{idx:011d}", nome_mae=f"Mãe {idx}")
+                    for idx in range(total)
+                ),
+                batch_size=5000,
+            )
+            qs = Aluno.objects.filter(nome__startswith="Aluno Benchmark").order_by("nome")
+            values = qs.values_list("nome", "cpf", "nis", "ativo")
+
+            # Streaming primeiro: o pico de RSS do processo só cresce depois com o caminho antigo.
+            self._run(
+                "stream_csv",
+                lambda: stream_csv("alunos.csv", HEADERS, values, row_mapper=_row, chunk_size=chunk_size),
+            )
+            if not options["sem_xlsx"]:
+                self._run(
+                    "stream_xlsx",
+                    lambda: stream_xlsx("alunos.xlsx", HEADERS, values, row_mapper=_row, chunk_size=chunk_size),
+                )
+            self._run(
+                "export_csv",
+                lambda: export_csv("alunos.csv", HEADERS, [_row(item) for item in list(values)]),
+            )
+            transaction.set_rollback(True)
+
+    def _run(self, label: str, build):
+        if self.trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        response = build()
+        first_byte = None
+        size = 0
+        if response.streaming:
+            for chunk in response.streaming_content:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+            # Sem response.close(): dispararia request_finished e fecharia a conexão da transação.
+        else:
+            size = len(response.content)
+            first_byte = time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        line = (
+            f"{label:<12} primeiro byte={first_byte * 1000:>9.1f} ms  total={elapsed:>7.2f}s  "
+            f"tamanho={size / 1024 / 1024:>6.1f} MiB  RSS máx. processo={_rss_mb():>7.1f} MiB"
+        )
+        if self.trace:
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            line += f"  pico Python={peak / 1024 / 1024:>7.1f} MiB"
+        self.stdout.write(line)
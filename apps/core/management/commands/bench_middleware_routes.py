@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from unittest import mock
+
+from apps.core import route_classifier
+from apps.core.middleware import AccessPreviewMiddleware, RBACMiddleware, TenantHostMiddleware
+
+
+PUBLIC_SAMPLE_PATHS = (
+    "/",
+    "/static/css/app.css",
+    "/media/uploads/foto.png",
+    "/noticias/",
+    "/transparencia/",
+    "/accounts/login/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo por requisição da cadeia TenantHost → AccessPreview → RBAC "
+        "sobre as rotas navegáveis do catálogo de códigos, para usuário anônimo e autenticado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Passagens por rota.")
+        parser.add_argument("--role", default="MUNICIPAL", help="Papel do usuário autenticado.")
+        parser.add_argument("--limit", type=int, default=200, help="Máximo de rotas do catálogo.")
+
+    def handle(self, *args, **options):
+        from apps.accounts.models import Profile
+        from apps.core.views_codes import get_code_routes
+
+        iterations = max(1, int(options["iterations"]))
+        paths = list(PUBLIC_SAMPLE_PATHS)
+        for entry in list(get_code_routes().values())[: max(0, int(options["limit"]))]:
+            try:
+                paths.append(reverse(entry["url_name"]))
+            except Exception:
+                continue
+
+        chain = TenantHostMiddleware(AccessPreviewMiddleware(RBACMiddleware(lambda request: HttpResponse(b""))))
+        factory = RequestFactory()
+        user_model = get_user_model()
+
+        with transaction.atomic():
+            user = user_model.objects.create_user(username="bench_middleware_routes", password="x")
+            Profile.objects.update_or_create(
+                user=user,
+                defaults={"role": options["role"].strip().upper(), "ativo": True, "must_change_password": False},
+            )
+            user = user_model.objects.select_related("profile").get(pk=user.pk)
+
+            self.stdout.write(f"{len(paths)} rotas, {iterations} passagens cada")
+            self.stdout.write(f"{'usuário':<14}{'resolve()/req':>15}{'µs/req':>10}")
+            for label, current_user in (("anônimo", AnonymousUser()), ("autenticado", user)):
+                resolves, elapsed = self._run(chain, factory, paths, iterations, current_user)
+                total = len(paths) * iterations
+                self.stdout.write(f"{label:<14}{resolves / total:>15.2f}{(elapsed / total) * 1_000_000:>10.1f}")
+            transaction.set_rollback(True)
+
+    def _run(self, chain, factory, paths, iterations, user):
+        resolves = 0
+        original_resolve = route_classifier.resolve
+
+        def counting_resolve(path, *args, **kwargs):
+            nonlocal resolves
+            resolves += 1
+            return original_resolve(path, *args, **kwargs)
+
+        started = time.perf_counter()
+        with mock.patch.object(route_classifier, "resolve", counting_resolve):
+            for _ in range(iterations):
+                for path in paths:
+                    request = factory.get(path)
+                    request.session = SessionStore()
+                    request.user = user
+                    chain(request)
+        return resolves, time.perf_counter() - started
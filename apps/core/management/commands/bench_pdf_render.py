@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from concurrent.futures import wait
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.test.utils import override_settings
+
+from apps.core.services_pdf import (
+    TABLE_STYLESHEET,
+    load_local_asset,
+    pdf_asset_url,
+    pdf_base_url,
+    shutdown_pdf_pool,
+    submit_pdf_render,
+)
+
+HEADERS = ["Matrícula", "Aluno", "Turma", "Unidade", "Situação", "Frequência"]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):  # noqa: A002
+        return
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede páginas/segundo do PDF de tabela (export_pdf_table) com N linhas: caminho antigo "
+        "(CSS inline reparseado e logo buscada por HTTP a cada relatório), renderização aquecida "
+        "no processo e pool de processos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=2000, help="Linhas da tabela.")
+        parser.add_argument("--relatorios", type=int, default=4, help="Relatórios gerados por cenário.")
+        parser.add_argument("--workers", type=int, default=4, help="Processos do pool (0 para pular).")
+
+    def handle(self, *args, **options):
+        from weasyprint import HTML
+
+        total = max(1, options["relatorios"])
+        rows = [
+            [
+                f"{idx:08d}",
+                f"Aluno Benchmark {idx:05d}",
+                f"{idx % 9 + 1}º ano {'ABC'[idx % 3]}",
+                f"Escola Municipal {idx % 25}",
+                "Ativa" if idx % 7 else "Transferida",
+                f"{80 + idx % 20}%",
+            ]
+            for idx in range(max(1, options["linhas"]))
+        ]
+        html = render_to_string(
+            "core/relatorios/pdf/table.html",
+            {
+                "title": "Benchmark PDF",
+                "subtitle": "Relação de alunos",
+                "printed_at": "01/01/2026 08:00",
+                "printed_by": "benchmark",
+                "headers": HEADERS,
+                "rows": rows,
+                "report_hash": "BENCHMARK",
+                "logo_url": pdf_asset_url(static("img/logo_prefeitura.png")),
+            },
+        )
+
+        # Caminho antigo: estilos inline no HTML e assets pedidos ao servidor via HTTP.
+        handler = functools.partial(_QuietHandler, directory=str(settings.BASE_DIR))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        legacy_base = f"http://127.0.0.1:{server.server_address[1]}/"
+        css_text = load_local_asset(pdf_asset_url(static(TABLE_STYLESHEET)))[0].decode("utf-8")
+        legacy_html = html.replace("</head>", f"<style>{css_text}</style></head>").replace(pdf_base_url(), legacy_base)
+        try:
+            started = time.perf_counter()
+            pages = 0
+            for _ in range(total):
+                document = HTML(string=legacy_html, base_url=legacy_base).render()
+                document.write_pdf()
+                pages += len(document.pages)
+            self._report("antigo", total, pages, time.perf_counter() - started)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        submit_pdf_render("<p>aquecimento</p>", stylesheets=[TABLE_STYLESHEET]).result()
+        started = time.perf_counter()
+        pages = sum(submit_pdf_render(html, stylesheets=[TABLE_STYLESHEET]).result()[1] for _ in range(total))
+        self._report("aquecido", total, pages, time.perf_counter() - started)
+
+        workers = options["workers"]
+        if workers > 0:
+            shutdown_pdf_pool()
+            with override_settings(PDF_RENDER_WORKERS=workers):
+                try:
+                    wait([submit_pdf_render("<p>aquecimento</p>") for _ in range(workers)])
+                    started = time.perf_counter()
+                    futures = [submit_pdf_render(html, stylesheets=[TABLE_STYLESHEET]) for _ in range(total)]
+                    pages = sum(future.result()[1] for future in futures)
+                    self._report(f"pool x{workers}", total, pages, time.perf_counter() - started)
+                finally:
+                    shutdown_pdf_pool()
+
+    def _report(self, label: str, total: int, pages: int, elapsed: float):
+        self.stdout.write(
+            f"{label:<10} relatórios={total:<3} páginas={pages:<5} tempo={elapsed:.2f}s  "
+            f"{pages / elapsed if elapsed else 0:.1f} páginas/s  {elapsed / total:.2f}s/relatório"
+        )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from apps.core import rbac
+
+
+SAMPLE_BASES = ("MUNICIPAL", "SECRETARIA", "PROFESSOR")
+
+
+def _legacy_querysets(user, profile, base: str) -> dict:
+    """Filtros como eram antes do escopo materializado (joins até o município, distinct, Exists)."""
+    from apps.educacao.models import Aluno, Matricula, Turma
+
+    if base == "PROFESSOR":
+        turmas = Turma.objects.filter(professores=user).distinct()
+        matriculas = Matricula.objects.filter(turma__professores=user).distinct()
+        scoped = Matricula.objects.filter(aluno_id=OuterRef("pk"), turma__professores=user)
+        alunos = Aluno.objects.annotate(_has_scope=Exists(scoped)).filter(_has_scope=True).distinct()
+    elif base == "SECRETARIA":
+        secretaria_id = rbac._resolve_secretaria_id_from_profile(profile)
+        turmas = Turma.objects.filter(unidade__secretaria_id=secretaria_id)
+        matriculas = Matricula.objects.filter(turma__unidade__secretaria_id=secretaria_id)
+        scoped = Matricula.objects.filter(aluno_id=OuterRef("pk"), turma__unidade__secretaria_id=secretaria_id)
+        alunos = Aluno.objects.annotate(_has_scope=Exists(scoped)).filter(_has_scope=True)
+    else:
+        municipio_id = profile.municipio_id
+        turmas = Turma.objects.filter(unidade__secretaria__municipio_id=municipio_id)
+        matriculas = Matricula.objects.filter(turma__unidade__secretaria__municipio_id=municipio_id)
+        scoped = Matricula.objects.filter(
+            aluno_id=OuterRef("pk"),
+            turma__unidade__secretaria__municipio_id=municipio_id,
+        )
+        alunos = Aluno.objects.annotate(_has_scope=Exists(scoped)).filter(_has_scope=True)
+    return {"turmas": turmas, "matriculas": matriculas, "alunos": alunos}
+
+
+def _current_querysets(user) -> dict:
+    from apps.educacao.models import Aluno, Matricula, Turma
+
+    return {
+        "turmas": rbac.scope_filter_turmas(user, Turma.objects.all()),
+        "matriculas": rbac.scope_filter_matriculas(user, Matricula.objects.all()),
+        "alunos": rbac.scope_filter_alunos(user, Aluno.objects.all()),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara (EXPLAIN + tempo de count) os filtros de escopo antigos com os baseados "
+        "no escopo materializado e na tabela de fechamento de locais. "
+        "Use após seed_santa_aurora_100k."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Execuções de count() por consulta.")
+        parser.add_argument("--explain", action="store_true", help="Imprime o plano de cada consulta.")
+
+    def handle(self, *args, **options):
+        from apps.accounts.models import Profile
+
+        repeat = max(1, int(options["repeat"]))
+        user_model = get_user_model()
+        samples = []
+        for base in SAMPLE_BASES:
+            roles = [role for role, _label in Profile.Role.choices if rbac.role_scope_base(role) == base]
+            qs = Profile.objects.filter(role__in=roles, ativo=True).exclude(municipio__isnull=True)
+            if base == "PROFESSOR":
+                qs = qs.filter(user__turmas_ministradas__isnull=False)
+            profile = qs.order_by("id").first()
+            if profile:
+                samples.append((base, profile))
+        if not samples:
+            raise CommandError("Nenhum perfil de amostra encontrado. Rode seed_santa_aurora_100k antes.")
+
+        self.stdout.write(f"{'escopo':<12}{'consulta':<12}{'linhas':>9}{'antes ms':>11}{'agora ms':>11}")
+        for base, profile in samples:
+            user = user_model.objects.select_related("profile").get(pk=profile.user_id)
+            legacy = _legacy_querysets(user, profile, base)
+            current = _current_querysets(user)
+            for name in ("turmas", "matriculas", "alunos"):
+                before_rows, before_ms = self._time(legacy[name], repeat)
+                after_rows, after_ms = self._time(current[name], repeat)
+                if before_rows != after_rows:
+                    self.stderr.write(f"{base}/{name}: divergência {before_rows} != {after_rows}")
+                self.stdout.write(f"{base:<12}{name:<12}{after_rows:>9}{before_ms:>11.2f}{after_ms:>11.2f}")
+                if options["explain"]:
+                    self.stdout.write(f"-- antes\n{legacy[name].explain()}\n-- agora\n{current[name].explain()}")
+
+        self._bench_locais(repeat, options["explain"])
+
+    def _time(self, qs, repeat: int) -> tuple[int, float]:
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows = qs.count()
+        return rows, ((time.perf_counter() - started) / repeat) * 1000
+
+    def _bench_locais(self, repeat: int, explain: bool):
+        from apps.org.models import LocalEstrutural
+
+        root = LocalEstrutural.objects.filter(local_pai__isnull=True, filhos__isnull=False).order_by("id").first()
+        if not root:
+            return
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            visited = {root.pk}
+            frontier = {root.pk}
+            while frontier:
+                children = set(
+                    LocalEstrutural.objects.filter(local_pai_id__in=frontier).values_list("id", flat=True)
+                ) - visited
+                visited |= children
+                frontier = children
+        before_ms = ((time.perf_counter() - started) / repeat) * 1000
+
+        from apps.org.services.locais_closure import local_estrutural_descendants_qs
+
+        qs = LocalEstrutural.objects.filter(id__in=local_estrutural_descendants_qs(root.pk))
+        rows, after_ms = self._time(qs, repeat)
+        self.stdout.write(f"{'LOCAL':<12}{'descend.':<12}{rows:>9}{before_ms:>11.2f}{after_ms:>11.2f}")
+        if explain:
+            self.stdout.write(f"-- agora\n{qs.explain()}")
@@ -1,18 +1,28 @@
 # apps/core/middleware.py
 from __future__ import annotations
 
+import re
+from functools import lru_cache
 from types import SimpleNamespace
 from urllib.parse import urlparse
 
 from django.conf import settings
+from django.db.models import Q
 from django.shortcuts import redirect
-from django.urls import resolve
 from django.http import HttpResponseForbidden
 
-from apps.core.module_access import module_enabled_for_user
+from apps.core.auth_context import auth_context_for_request
+from apps.core.catalog_cache import SCOPE_TENANT_HOSTS, cached_catalog
+from apps.core.route_classifier import (
+    ROUTE_ADMIN,
+    ROUTE_STATIC,
+    PublicPathIndex,
+    compile_namespace_rules,
+    resolve_route,
+    route_kind,
+)
 from apps.org.models import Municipio
 from .rbac import (
-    can,
     normalize_role,
     role_scope_base,
     PERM_ORG,
@@ -144,6 +154,63 @@ def _build_app_url(request, path: str) -> str:
     return f"{scheme}://{app_host}{path}"
 
 
+_TENANT_FIELDS = ("id", "nome", "uf", "slug_site", "dominio_personalizado")
+_TENANT_SLUG_RE = re.compile(r"^[a-z0-9_-]{1,90}$")
+_TENANT_DOMAIN_RE = re.compile(r"^[a-z0-9.-]{1,190}$")
+# Hosts desconhecidos também ficam em cache (negativo) para amortecer varreduras de subdomínio.
+TENANT_HOST_CACHE_TIMEOUT = 60 * 15
+
+
+@lru_cache(maxsize=8)
+def _tenant_host_sets(app_hosts: tuple, reserved: tuple) -> tuple[frozenset[str], frozenset[str]]:
+    return (
+        frozenset(_normalize_host(h) for h in app_hosts if _normalize_host(h)),
+        frozenset(s.strip().lower() for s in reserved if s and s.strip()),
+    )
+
+
+def _load_tenant_row(kind: str, value: str) -> tuple:
+    qs = Municipio.objects.filter(ativo=True)
+    if kind == "slug":
+        qs = qs.filter(slug_site__iexact=value)
+    else:
+        candidates = {value}
+        if value.startswith("www."):
+            candidates.add(value[4:])
+        else:
+            candidates.add(f"www.{value}")
+        domain_filter = Q()
+        for candidate in candidates:
+            domain_filter |= Q(dominio_personalizado__iexact=candidate)
+        qs = qs.filter(domain_filter).exclude(dominio_personalizado="")
+    row = qs.order_by("id").values_list(*_TENANT_FIELDS).first()
+    return tuple(row) if row else ()
+
+
+def resolve_tenant_municipio(kind: str, value: str) -> Municipio | None:
+    """
+    Resolve o município público por slug (`<slug>.gepub.com.br`) ou domínio personalizado.
+    Usa LRU local + cache compartilhado (inclusive negativo), invalidado quando um
+    Município é salvo/removido. Retorna instância com os demais campos adiados,
+    equivalente ao antigo `.only(...)`.
+    """
+    value = (value or "").strip().lower()
+    pattern = _TENANT_SLUG_RE if kind == "slug" else _TENANT_DOMAIN_RE
+    if not pattern.match(value):
+        return None
+
+    row = cached_catalog(
+        "tenant_host",
+        ((SCOPE_TENANT_HOSTS, 0),),
+        lambda: _load_tenant_row(kind, value),
+        entry=f"{kind}:{value}",
+        timeout=TENANT_HOST_CACHE_TIMEOUT,
+    )
+    if not row:
+        return None
+    return Municipio.from_db("default", _TENANT_FIELDS, row)
+
+
 class TenantHostMiddleware:
     """
     Resolve município por host público no formato:
@@ -202,9 +269,7 @@ class TenantHostMiddleware:
         request.public_login_url = _build_app_url(request, "/accounts/login/")
 
         path = request.path or ""
-        static_url = getattr(settings, "STATIC_URL", "/static/")
-        media_url = getattr(settings, "MEDIA_URL", "/media/")
-        if path.startswith(static_url) or path.startswith(media_url):
+        if route_kind(request) == ROUTE_STATIC:
             return self.get_response(request)
 
         host = _normalize_host(
@@ -215,11 +280,10 @@ class TenantHostMiddleware:
         if not host:
             return self.get_response(request)
 
-        app_hosts = {
-            _normalize_host(h)
-            for h in (getattr(settings, "GEPUB_APP_HOSTS", []) or [])
-            if _normalize_host(h)
-        }
+        app_hosts, reserved = _tenant_host_sets(
+            tuple(getattr(settings, "GEPUB_APP_HOSTS", []) or []),
+            tuple(getattr(settings, "GEPUB_RESERVED_SUBDOMAINS", []) or []),
+        )
         if host in app_hosts:
             request.gepub_host_kind = "app"
             return self.get_response(request)
@@ -237,17 +301,8 @@ class TenantHostMiddleware:
             slug = host[: -len(suffix)].strip().lower().strip(".")
             request.current_municipio_slug = slug
 
-            reserved = {
-                s.strip().lower()
-                for s in (getattr(settings, "GEPUB_RESERVED_SUBDOMAINS", []) or [])
-                if s and s.strip()
-            }
             if slug and "." not in slug and slug not in reserved:
-                municipio = (
-                    Municipio.objects.filter(ativo=True, slug_site__iexact=slug)
-                    .only("id", "nome", "uf", "slug_site", "dominio_personalizado")
-                    .first()
-                )
+                municipio = resolve_tenant_municipio("slug", slug)
                 if municipio:
                     request.current_municipio = municipio
                     request.is_public_tenant = True
@@ -255,6 +310,13 @@ class TenantHostMiddleware:
                 else:
                     request.tenant_lookup_failed = True
                     request.gepub_host_kind = "tenant_not_found"
+        else:
+            municipio = resolve_tenant_municipio("dominio", host)
+            if municipio:
+                request.current_municipio = municipio
+                request.current_municipio_slug = municipio.slug_site or ""
+                request.is_public_tenant = True
+                request.gepub_host_kind = "tenant_public"
 
         # Área administrativa sempre no host central do app.
         if (request.is_public_tenant or request.tenant_lookup_failed) and path.startswith("/accounts/"):
@@ -393,11 +455,7 @@ class AccessPreviewMiddleware:
 
     def __call__(self, request):
         request.access_preview_context = {"active": False}
-        path = request.path or ""
-
-        static_url = getattr(settings, "STATIC_URL", "/static/")
-        media_url = getattr(settings, "MEDIA_URL", "/media/")
-        if path.startswith(static_url) or path.startswith(media_url):
+        if route_kind(request) == ROUTE_STATIC:
             return self.get_response(request)
 
         user = getattr(request, "user", None)
@@ -414,11 +472,8 @@ class AccessPreviewMiddleware:
             return self.get_response(request)
 
         # Endpoints de gestão da própria visualização usam perfil real.
-        try:
-            match = resolve(path)
-            view_name = (match.view_name or "").strip()
-        except Exception:
-            view_name = ""
+        match = resolve_route(request)
+        view_name = (match.view_name or "").strip() if match else ""
 
         preview_context = {
             "active": True,
@@ -568,33 +623,29 @@ class RBACMiddleware:
         "/funcionalidades",
         "/por-que-usar",
     }
+    # Tabelas compiladas uma vez na carga do módulo.
+    PUBLIC_INDEX = PublicPathIndex(PUBLIC_PATH_PREFIXES, PUBLIC_EXACT_PATHS)
+    NAMESPACE_RULES = compile_namespace_rules(NS_TO_PERM, NS_TO_MODULE)
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Admin do Django sempre passa
-        path = request.path or ""
-        static_url = getattr(settings, "STATIC_URL", "/static/")
-        media_url = getattr(settings, "MEDIA_URL", "/media/")
-
-        # Nunca aplicar RBAC em arquivos estáticos/mídia
-        if path.startswith(static_url) or path.startswith(media_url):
-            return self.get_response(request)
+        kind = route_kind(request)
 
-        if path.startswith("/admin/"):
+        # Nunca aplicar RBAC em arquivos estáticos/mídia; admin do Django sempre passa.
+        if kind in {ROUTE_STATIC, ROUTE_ADMIN}:
             return self.get_response(request)
 
         # Se não autenticado, deixa passar login (se existir) e bloqueia resto
         if not request.user.is_authenticated:
-            if path in self.PUBLIC_EXACT_PATHS or any(path.startswith(prefix) for prefix in self.PUBLIC_PATH_PREFIXES):
+            if self.PUBLIC_INDEX.matches(request.path or ""):
                 return self.get_response(request)
             return redirect("accounts:login")
 
-        # Resolve rota
-        try:
-            match = resolve(path)
-        except Exception:
+        # Resolve rota (reaproveita o resolve feito por middlewares anteriores)
+        match = resolve_route(request)
+        if match is None:
             return self.get_response(request)
 
         # Permite as rotas públicas
@@ -607,18 +658,18 @@ class RBACMiddleware:
         if not ns:
             return self.get_response(request)
 
-        required = self.NS_TO_PERM.get(ns)
-        if not required:
+        rule = self.NAMESPACE_RULES.get(ns)
+        if not rule:
             return self.get_response(request)
 
-        if not can(request.user, required):
+        auth = auth_context_for_request(request)
+        if not auth.can(rule.perm):
             if ns == "educacao" and _is_aluno_allowed_educacao_view(request.user, match.view_name):
                 return self.get_response(request)
             # 403 simples (depois fazemos uma página bonita)
             return HttpResponseForbidden("Você não tem permissão para acessar esta área.")
 
-        module_key = self.NS_TO_MODULE.get(ns)
-        if module_key and not module_enabled_for_user(request.user, module_key):
+        if rule.module and not auth.module_enabled(rule.module):
             return HttpResponseForbidden("Este módulo não está ativo para o seu escopo.")
 
         return self.get_response(request)
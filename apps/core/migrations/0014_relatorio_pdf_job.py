@@ -0,0 +1,41 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_alter_institutionalpageconfig_hero_cta_secundario_label'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatorioPdfJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('titulo', models.CharField(max_length=255)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=14)),
+                ('html', models.FileField(blank=True, null=True, upload_to='relatorios/pdf/html/%Y/%m/')),
+                ('folhas_estilo', models.JSONField(blank=True, default=list)),
+                ('arquivo', models.FileField(blank=True, null=True, upload_to='relatorios/pdf/%Y/%m/')),
+                ('paginas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='relatorios_pdf', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Relatório PDF em segundo plano',
+                'verbose_name_plural': 'Relatórios PDF em segundo plano',
+                'ordering': ['-criado_em', '-id'],
+                'indexes': [models.Index(fields=['solicitado_por', 'criado_em'], name='core_relato_solicit_176ca0_idx'), models.Index(fields=['status', 'criado_em'], name='core_relato_status_76e217_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.12 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_relatorio_pdf_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KpiSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('escopo_tipo', models.CharField(choices=[('GLOBAL', 'Global'), ('MUNICIPIO', 'Município'), ('SECRETARIA', 'Secretaria'), ('UNIDADE', 'Unidade')], max_length=12)),
+                ('escopo_id', models.PositiveBigIntegerField(default=0)),
+                ('painel', models.CharField(max_length=60)),
+                ('dados', models.JSONField(blank=True, default=dict)),
+                ('calculado_em', models.DateTimeField()),
+                ('invalidado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de indicadores',
+                'verbose_name_plural': 'Snapshots de indicadores',
+                'indexes': [models.Index(fields=['painel', 'calculado_em'], name='core_kpisna_painel_d67ae2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('escopo_tipo', 'escopo_id', 'painel'), name='uniq_kpi_snapshot_escopo_painel')],
+            },
+        ),
+    ]
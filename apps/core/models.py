@@ -140,6 +140,88 @@ class DocumentoEmitido(models.Model):
         super().save(*args, **kwargs)
 
 
+class RelatorioPdfJob(models.Model):
+    """
+    Relatório PDF gerado em segundo plano (tarefa core.render_pdf_job): o HTML
+    é montado na requisição e a renderização fica com o worker.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        PROCESSANDO = "PROCESSANDO", "Processando"
+        CONCLUIDO = "CONCLUIDO", "Concluído"
+        ERRO = "ERRO", "Erro"
+
+    codigo = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    titulo = models.CharField(max_length=255)
+    nome_arquivo = models.CharField(max_length=255)
+    status = models.CharField(max_length=14, choices=Status.choices, default=Status.PENDENTE)
+    html = models.FileField(upload_to="relatorios/pdf/html/%Y/%m/", blank=True, null=True)
+    folhas_estilo = models.JSONField(default=list, blank=True)
+    arquivo = models.FileField(upload_to="relatorios/pdf/%Y/%m/", blank=True, null=True)
+    paginas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="relatorios_pdf",
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Relatório PDF em segundo plano"
+        verbose_name_plural = "Relatórios PDF em segundo plano"
+        ordering = ["-criado_em", "-id"]
+        indexes = [
+            models.Index(fields=["solicitado_por", "criado_em"]),
+            models.Index(fields=["status", "criado_em"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.titulo} • {self.get_status_display()}"
+
+
+class KpiSnapshot(models.Model):
+    """
+    Indicadores pré-calculados de um painel do dashboard para um escopo
+    (apps.core.services_kpis). Vale enquanto `invalidado_em` (marcado pelos
+    sinais dos modelos de que o painel depende) for anterior a `calculado_em`
+    e dentro de KPI_SNAPSHOT_TTL_SECONDS.
+    """
+
+    class EscopoTipo(models.TextChoices):
+        GLOBAL = "GLOBAL", "Global"
+        MUNICIPIO = "MUNICIPIO", "Município"
+        SECRETARIA = "SECRETARIA", "Secretaria"
+        UNIDADE = "UNIDADE", "Unidade"
+
+    escopo_tipo = models.CharField(max_length=12, choices=EscopoTipo.choices)
+    escopo_id = models.PositiveBigIntegerField(default=0)
+    painel = models.CharField(max_length=60)
+    dados = models.JSONField(default=dict, blank=True)
+    calculado_em = models.DateTimeField()
+    invalidado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Snapshot de indicadores"
+        verbose_name_plural = "Snapshots de indicadores"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["escopo_tipo", "escopo_id", "painel"],
+                name="uniq_kpi_snapshot_escopo_painel",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["painel", "calculado_em"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.painel} • {self.get_escopo_tipo_display()} {self.escopo_id}"
+
+
 class InstitutionalPageConfig(models.Model):
     nome = models.CharField(max_length=120, default="Página Institucional")
     ativo = models.BooleanField(default=True)
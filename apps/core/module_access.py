@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from apps.core.rbac import get_profile, is_admin, role_scope_base
+from apps.core.catalog_cache import SCOPE_MUNICIPIO, SCOPE_PLANOS, SCOPE_SECRETARIA, SCOPE_UNIDADE, cached_catalog
+from apps.core.rbac import get_profile, role_scope_base
 
 
 MANAGED_MODULES: set[str] = {
@@ -47,6 +48,17 @@ MODULE_PLAN_FEATURES_ANY: dict[str, set[str]] = {
 }
 
 
+def unidade_secretaria_id(unidade_id: int) -> int | None:
+    """secretaria_id da unidade, com cache compartilhado."""
+
+    def _load():
+        from apps.org.models import Unidade
+
+        return Unidade.objects.filter(pk=unidade_id).values_list("secretaria_id", flat=True).first()
+
+    return cached_catalog("unidade_secretaria", ((SCOPE_UNIDADE, int(unidade_id)),), _load)
+
+
 def _resolve_secretaria_id_from_profile(profile) -> int | None:
     secretaria_id = getattr(profile, "secretaria_id", None)
     if secretaria_id:
@@ -57,13 +69,63 @@ def _resolve_secretaria_id_from_profile(profile) -> int | None:
         return None
 
     try:
-        from apps.org.models import Unidade
-
-        return Unidade.objects.filter(pk=unidade_id).values_list("secretaria_id", flat=True).first()
+        return unidade_secretaria_id(unidade_id)
     except Exception:
         return None
 
 
+def _modules_from_rows(rows) -> tuple[frozenset[str], bool]:
+    rows = list(rows)
+    modules = frozenset(str(modulo).strip().lower() for modulo, ativo in rows if ativo)
+    return modules, bool(rows)
+
+
+def secretaria_module_catalog(secretaria_id: int) -> tuple[frozenset[str], bool]:
+    """(modulos_ativos, possui_catalogo) da secretaria, com cache compartilhado."""
+
+    def _load():
+        from apps.org.models import SecretariaModuloAtivo
+
+        return _modules_from_rows(
+            SecretariaModuloAtivo.objects.filter(secretaria_id=secretaria_id).values_list("modulo", "ativo")
+        )
+
+    return cached_catalog("modulos", ((SCOPE_SECRETARIA, int(secretaria_id)),), _load)
+
+
+def municipio_module_catalog(municipio_id: int) -> tuple[frozenset[str], bool]:
+    """(modulos_ativos, possui_catalogo) do município, com cache compartilhado."""
+
+    def _load():
+        from apps.org.models import MunicipioModuloAtivo
+
+        return _modules_from_rows(
+            MunicipioModuloAtivo.objects.filter(municipio_id=municipio_id).values_list("modulo", "ativo")
+        )
+
+    return cached_catalog("modulos", ((SCOPE_MUNICIPIO, int(municipio_id)),), _load)
+
+
+def municipio_plan_catalog(municipio) -> tuple[frozenset[str], frozenset[str], bool]:
+    """(features, apps, possui_assinatura) do plano ativo do município, com cache compartilhado."""
+
+    def _load():
+        from apps.billing.services import assinatura_plan_apps, assinatura_plan_features, get_assinatura_ativa
+
+        assinatura = get_assinatura_ativa(municipio, criar_default=False)
+        return (
+            frozenset(assinatura_plan_features(assinatura)),
+            frozenset(assinatura_plan_apps(assinatura)),
+            bool(assinatura),
+        )
+
+    return cached_catalog(
+        "plano",
+        ((SCOPE_MUNICIPIO, int(municipio.pk)), (SCOPE_PLANOS, 0)),
+        _load,
+    )
+
+
 def _load_scope_modules(user) -> tuple[set[str], bool]:
     """
     Retorna (modulos_ativos, enforce_flag).
@@ -81,12 +143,6 @@ def _load_scope_modules(user) -> tuple[set[str], bool]:
         user._gepub_module_scope_cache = (modules, True)
         return user._gepub_module_scope_cache
 
-    try:
-        from apps.org.models import MunicipioModuloAtivo, SecretariaModuloAtivo
-    except Exception:
-        user._gepub_module_scope_cache = (modules, False)
-        return user._gepub_module_scope_cache
-
     role_base = role_scope_base(getattr(p, "role", None))
     secretaria_id = _resolve_secretaria_id_from_profile(p) if role_base in {"SECRETARIA", "UNIDADE"} else None
     municipio_id = getattr(p, "municipio_id", None)
@@ -98,82 +154,54 @@ def _load_scope_modules(user) -> tuple[set[str], bool]:
         return user._gepub_module_scope_cache
 
     if secretaria_id:
-        qs = SecretariaModuloAtivo.objects.filter(secretaria_id=secretaria_id, ativo=True)
-        modules = {str(item).strip().lower() for item in qs.values_list("modulo", flat=True)}
-        enforce = SecretariaModuloAtivo.objects.filter(secretaria_id=secretaria_id).exists()
+        active, enforce = secretaria_module_catalog(secretaria_id)
+        modules = set(active)
 
         # Fallback: se secretaria ainda não tiver catálogo próprio, usa catálogo do município.
         if (not enforce) and municipio_id:
-            muni_qs = MunicipioModuloAtivo.objects.filter(municipio_id=municipio_id, ativo=True)
-            modules = {str(item).strip().lower() for item in muni_qs.values_list("modulo", flat=True)}
-            enforce = MunicipioModuloAtivo.objects.filter(municipio_id=municipio_id).exists()
+            active, enforce = municipio_module_catalog(municipio_id)
+            modules = set(active)
     elif municipio_id:
-        qs = MunicipioModuloAtivo.objects.filter(municipio_id=municipio_id, ativo=True)
-        modules = {str(item).strip().lower() for item in qs.values_list("modulo", flat=True)}
-        enforce = MunicipioModuloAtivo.objects.filter(municipio_id=municipio_id).exists()
+        active, enforce = municipio_module_catalog(municipio_id)
+        modules = set(active)
 
     user._gepub_module_scope_cache = (modules, enforce)
     return user._gepub_module_scope_cache
 
 
-def _load_plan_features(user) -> tuple[set[str], bool]:
+def _load_plan_catalog(user) -> tuple[set[str], set[str], bool]:
     """
-    Retorna (features_ativas, enforce_flag) para o plano do município.
+    Retorna (features_ativas, apps_do_plano, enforce_flag) com uma única
+    leitura da assinatura ativa do município do perfil.
     - enforce_flag=False => não restringe por feature (ex.: base legada sem assinatura).
     """
-    if hasattr(user, "_gepub_plan_feature_cache"):
-        return user._gepub_plan_feature_cache
+    if hasattr(user, "_gepub_plan_catalog_cache"):
+        return user._gepub_plan_catalog_cache
 
     p = get_profile(user)
-    if not p or not getattr(p, "ativo", True) or not getattr(p, "municipio_id", None):
-        user._gepub_plan_feature_cache = (set(), False)
-        return user._gepub_plan_feature_cache
-
-    try:
-        from apps.billing.services import get_assinatura_ativa, municipio_plan_features
-    except Exception:
-        user._gepub_plan_feature_cache = (set(), False)
-        return user._gepub_plan_feature_cache
+    municipio = getattr(p, "municipio", None) if p and getattr(p, "municipio_id", None) else None
+    if not municipio:
+        user._gepub_plan_catalog_cache = (set(), set(), False)
+        return user._gepub_plan_catalog_cache
 
-    municipio = getattr(p, "municipio", None)
-    assinatura = get_assinatura_ativa(municipio, criar_default=False) if municipio else None
-    features = municipio_plan_features(municipio)
-    enforce = bool(assinatura)
-    user._gepub_plan_feature_cache = (features, enforce)
-    return user._gepub_plan_feature_cache
+    features, apps, enforce = municipio_plan_catalog(municipio)
+    user._gepub_plan_catalog_cache = (set(features), set(apps), enforce)
+    return user._gepub_plan_catalog_cache
 
 
-def module_enabled_for_user(user, module_key: str) -> bool:
-    module = (module_key or "").strip().lower()
-    if not module or module not in MANAGED_MODULES:
-        return True
-
-    if not user or not getattr(user, "is_authenticated", False):
-        return False
-
-    if is_admin(user):
-        return True
-
+def _load_plan_features(user) -> tuple[set[str], bool]:
+    """
+    Retorna (features_ativas, enforce_flag) para o plano do município.
+    - enforce_flag=False => não restringe por feature (ex.: base legada sem assinatura).
+    """
     p = get_profile(user)
     if not p or not getattr(p, "ativo", True):
-        return False
+        return set(), False
+    features, _apps, enforce = _load_plan_catalog(user)
+    return features, enforce
 
-    modules, enforce = _load_scope_modules(user)
-    if not enforce:
-        # Compatibilidade para bases antigas sem onboarding/catalogo ativado.
-        return True
 
-    accepted_keys = MODULE_ALIASES.get(module, {module})
-    if not any(key in modules for key in accepted_keys):
-        return False
-
-    required_features = MODULE_PLAN_FEATURES_ANY.get(module)
-    if not required_features:
-        return True
-
-    features, enforce_features = _load_plan_features(user)
-    if not enforce_features:
-        # Base legada sem assinatura/plano configurado: mantém compatibilidade.
-        return True
+def module_enabled_for_user(user, module_key: str) -> bool:
+    from apps.core.auth_context import get_auth_context
 
-    return bool(required_features.intersection(features))
+    return get_auth_context(user).module_enabled(module_key)
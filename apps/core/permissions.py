@@ -0,0 +1,31 @@
+# apps/core/permissions.py
+from __future__ import annotations
+
+from rest_framework.permissions import BasePermission
+
+from apps.core.auth_context import get_auth_context
+
+
+class HasGepubPerm(BasePermission):
+    """
+    Permissão DRF baseada no AuthContext da requisição.
+
+    A view declara `required_perm` (ex.: "educacao.view") e, opcionalmente,
+    `required_module` para exigir o módulo ativo no escopo do usuário.
+    """
+
+    message = "Você não tem permissão para acessar esta área."
+
+    def has_permission(self, request, view) -> bool:
+        user = getattr(request, "user", None)
+        if not user or not getattr(user, "is_authenticated", False):
+            return False
+        # Com JWT o usuário só existe no Request do DRF, não no HttpRequest.
+        auth = get_auth_context(user)
+        required_perm = getattr(view, "required_perm", "") or ""
+        if required_perm and not auth.can(required_perm):
+            return False
+        required_module = getattr(view, "required_module", "") or ""
+        if required_module and not auth.module_enabled(required_module):
+            return False
+        return True
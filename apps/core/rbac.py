@@ -1,6 +1,8 @@
 # apps/core/rbac.py
 from __future__ import annotations
 
+from functools import lru_cache
+
 from django.db.models import Exists, OuterRef
 
 
@@ -777,40 +779,57 @@ def _resolve_perm_role(role: str) -> str:
     return ROLE_PERM_FALLBACK.get(role, "LEITURA")
 
 
-def get_user_perms(user) -> set[str]:
+@lru_cache(maxsize=None)
+def compile_role_perms(role: str) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Compila (perms, macros) de um papel normalizado uma única vez por processo.
+    `macros` é o índice de prefixos usado por `can(user, "educacao")`.
+    """
+    if role == "ADMIN":
+        fine_perms = set(ROLE_PERMS_FINE.get("ADMIN", set()))
+        perms = set(ALL_PERMS) | fine_perms
+    else:
+        perm_role = _resolve_perm_role(role)
+        perms = set(ROLE_PERMS.get(perm_role, set()))
+        fine_perms = set(ROLE_PERMS_FINE.get(perm_role, set()))
+        if role != perm_role:
+            fine_perms |= set(ROLE_PERMS_FINE.get(role, set()))
+        perms |= fine_perms
+
+    macros: set[str] = set()
+    for fp in fine_perms:
+        m = _macro_from_fine(fp)
+        if m:
+            perms.add(m)
+            macros.add(m)
+    return frozenset(perms), frozenset(macros)
+
+
+def get_user_perm_index(user) -> tuple[frozenset[str], frozenset[str]]:
     if not user or not getattr(user, "is_authenticated", False):
-        return set()
+        return frozenset(), frozenset()
 
     if is_admin(user):
-        perms = set(ALL_PERMS)
-        for fine in ROLE_PERMS_FINE.get("ADMIN", set()):
-            perms.add(fine)
-            m = _macro_from_fine(fine)
-            if m:
-                perms.add(m)
-        return perms
+        return compile_role_perms("ADMIN")
 
     p = get_profile(user)
     if not p or not getattr(p, "ativo", True):
-        return set()
+        return frozenset(), frozenset()
 
-    role = normalize_role(getattr(p, "role", None))
-    perm_role = _resolve_perm_role(role)
+    return compile_role_perms(normalize_role(getattr(p, "role", None)))
 
-    perms = set(ROLE_PERMS.get(perm_role, set()))
 
-    fine_perms = set(ROLE_PERMS_FINE.get(perm_role, set()))
-    if role != perm_role:
-        fine_perms |= set(ROLE_PERMS_FINE.get(role, set()))
+def get_user_perms(user) -> set[str]:
+    perms, _macros = get_user_perm_index(user)
+    return set(perms)
 
-    perms |= fine_perms
 
-    for fp in fine_perms:
-        m = _macro_from_fine(fp)
-        if m:
-            perms.add(m)
-
-    return perms
+def perm_allowed(perms: frozenset[str], macros: frozenset[str], perm: str) -> bool:
+    if perm in perms:
+        return True
+    if "." in perm:
+        return False
+    return perm in macros
 
 
 def can(user, perm: str) -> bool:
@@ -824,16 +843,8 @@ def can(user, perm: str) -> bool:
         role = normalize_role(getattr(profile, "role", None) if profile else None)
         return role == "ADMIN"
 
-    perms = get_user_perms(user)
-
-    if perm in perms:
-        return True
-
-    if "." in perm:
-        return False
-
-    prefix = perm + "."
-    return any(p.startswith(prefix) for p in perms)
+    perms, macros = get_user_perm_index(user)
+    return perm_allowed(perms, macros, perm)
 
 
 # =========================
@@ -858,9 +869,9 @@ def _resolve_secretaria_id_from_profile(profile) -> int | None:
         return None
 
     try:
-        from apps.org.models import Unidade
+        from apps.core.module_access import unidade_secretaria_id
 
-        return Unidade.objects.filter(pk=unidade_id).values_list("secretaria_id", flat=True).first()
+        return unidade_secretaria_id(unidade_id)
     except Exception:
         return None
 
@@ -933,29 +944,23 @@ def scope_filter_unidades(user, qs):
         return qs.none()
 
     if getattr(p, "municipio_id", None):
-        return qs.filter(secretaria__municipio_id=p.municipio_id)
+        return qs.filter(id__in=_user_scope(user).unidade_ids)
 
     return qs.none()
 
 
+def _user_scope(user):
+    from apps.core.user_scope import get_user_scope  # evita import circular
+
+    return get_user_scope(user)
+
+
 def _collect_local_estrutural_descendants_ids(local_id: int) -> set[int]:
-    try:
-        from apps.org.models import LocalEstrutural
-    except Exception:
-        return {int(local_id)}
-
-    visited: set[int] = {int(local_id)}
-    frontier: set[int] = {int(local_id)}
-    while frontier:
-        child_ids = set(
-            LocalEstrutural.objects.filter(local_pai_id__in=frontier).values_list("id", flat=True)
-        )
-        child_ids -= visited
-        if not child_ids:
-            break
-        visited |= child_ids
-        frontier = child_ids
-    return visited
+    from apps.org.services.locais_closure import local_estrutural_descendants_qs
+
+    ids = set(local_estrutural_descendants_qs(int(local_id)).values_list("descendant_id", flat=True))
+    ids.add(int(local_id))
+    return ids
 
 
 def scope_filter_locais_estruturais(user, qs):
@@ -971,8 +976,9 @@ def scope_filter_locais_estruturais(user, qs):
     base = role_scope_base(getattr(p, "role", None))
 
     if getattr(p, "local_estrutural_id", None):
-        local_ids = _collect_local_estrutural_descendants_ids(int(p.local_estrutural_id))
-        return qs.filter(id__in=local_ids)
+        from apps.org.services.locais_closure import local_estrutural_descendants_qs
+
+        return qs.filter(id__in=local_estrutural_descendants_qs(int(p.local_estrutural_id)))
 
     if base == "UNIDADE" and getattr(p, "unidade_id", None):
         return qs.filter(unidade_id=p.unidade_id)
@@ -1009,7 +1015,7 @@ def scope_filter_turmas(user, qs):
     base = role_scope_base(getattr(p, "role", None))
 
     if base == "PROFESSOR":
-        return qs.filter(professores=user).distinct()
+        return qs.filter(id__in=_user_scope(user).turma_ids)
 
     if base == "UNIDADE" and getattr(p, "unidade_id", None):
         return qs.filter(unidade_id=p.unidade_id)
@@ -1017,14 +1023,14 @@ def scope_filter_turmas(user, qs):
     if base == "SECRETARIA":
         secretaria_id = _resolve_secretaria_id_from_profile(p)
         if secretaria_id:
-            return qs.filter(unidade__secretaria_id=secretaria_id)
+            return qs.filter(unidade_id__in=_user_scope(user).unidade_ids)
         return qs.none()
 
     if base == "ALUNO":
         return qs.none()
 
     if getattr(p, "municipio_id", None):
-        return qs.filter(unidade__secretaria__municipio_id=p.municipio_id)
+        return qs.filter(unidade_id__in=_user_scope(user).unidade_ids)
 
     return qs.none()
 
@@ -1043,7 +1049,7 @@ def scope_filter_matriculas(user, qs):
     base = role_scope_base(getattr(p, "role", None))
 
     if base == "PROFESSOR":
-        return qs.filter(turma__professores=user).distinct()
+        return qs.filter(turma_id__in=_user_scope(user).turma_ids)
 
     if base == "UNIDADE" and getattr(p, "unidade_id", None):
         return qs.filter(turma__unidade_id=p.unidade_id)
@@ -1051,7 +1057,7 @@ def scope_filter_matriculas(user, qs):
     if base == "SECRETARIA":
         secretaria_id = _resolve_secretaria_id_from_profile(p)
         if secretaria_id:
-            return qs.filter(turma__unidade__secretaria_id=secretaria_id)
+            return qs.filter(turma__unidade_id__in=_user_scope(user).unidade_ids)
         return qs.none()
 
     if base == "ALUNO":
@@ -1060,7 +1066,7 @@ def scope_filter_matriculas(user, qs):
         return qs.none()
 
     if getattr(p, "municipio_id", None):
-        return qs.filter(turma__unidade__secretaria__municipio_id=p.municipio_id)
+        return qs.filter(turma__unidade_id__in=_user_scope(user).unidade_ids)
 
     return qs.none()
 
@@ -1085,15 +1091,15 @@ def scope_filter_alunos(user, qs):
     base = role_scope_base(getattr(p, "role", None))
 
     if base == "PROFESSOR":
-        matriculas = matriculas.filter(turma__professores=user)
-        return qs.annotate(_has_scope=Exists(matriculas)).filter(_has_scope=True).distinct()
+        matriculas = matriculas.filter(turma_id__in=_user_scope(user).turma_ids)
+        return qs.annotate(_has_scope=Exists(matriculas)).filter(_has_scope=True)
 
     if base == "UNIDADE" and getattr(p, "unidade_id", None):
         matriculas = matriculas.filter(turma__unidade_id=p.unidade_id)
     elif base == "SECRETARIA":
         secretaria_id = _resolve_secretaria_id_from_profile(p)
         if secretaria_id:
-            matriculas = matriculas.filter(turma__unidade__secretaria_id=secretaria_id)
+            matriculas = matriculas.filter(turma__unidade_id__in=_user_scope(user).unidade_ids)
         else:
             return qs.none()
     elif base == "ALUNO":
@@ -1101,7 +1107,7 @@ def scope_filter_alunos(user, qs):
             return qs.filter(pk=p.aluno_id)
         return qs.none()
     elif getattr(p, "municipio_id", None):
-        matriculas = matriculas.filter(turma__unidade__secretaria__municipio_id=p.municipio_id)
+        matriculas = matriculas.filter(turma__unidade_id__in=_user_scope(user).unidade_ids)
     else:
         return qs.none()
 
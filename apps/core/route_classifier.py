@@ -0,0 +1,107 @@
+# apps/core/route_classifier.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.urls import resolve
+
+
+ROUTE_STATIC = "static"
+ROUTE_ADMIN = "admin"
+ROUTE_APP = "app"
+
+_UNRESOLVED = object()
+
+
+@lru_cache(maxsize=8)
+def _static_prefixes(static_url: str, media_url: str) -> tuple[str, ...]:
+    return tuple(p for p in (static_url, media_url) if p)
+
+
+def is_static_path(path: str) -> bool:
+    """Arquivos estáticos/mídia: nenhuma regra de tenant, simulação ou RBAC se aplica."""
+    prefixes = _static_prefixes(
+        getattr(settings, "STATIC_URL", "/static/") or "",
+        getattr(settings, "MEDIA_URL", "/media/") or "",
+    )
+    return path.startswith(prefixes)
+
+
+class PublicPathIndex:
+    """
+    Índice de rotas públicas por primeiro segmento do caminho.
+
+    Em vez de testar todos os prefixos a cada requisição, cada prefixo é
+    registrado no balde do seu primeiro segmento ("/noticias/" -> "noticias"),
+    então a consulta testa só os poucos prefixos do balde correspondente.
+    """
+
+    def __init__(self, prefixes, exact_paths):
+        self.exact = frozenset(exact_paths)
+        buckets: dict[str, list[str]] = {}
+        loose: list[str] = []
+        for prefix in prefixes:
+            segment = self._first_segment(prefix)
+            if "/" in prefix.lstrip("/"):
+                buckets.setdefault(segment, []).append(prefix)
+            else:
+                # "/foo" também casa "/foobar": sem segmento fechado, testa sempre.
+                loose.append(prefix)
+        self.buckets = {key: tuple(values) for key, values in buckets.items()}
+        self.loose = tuple(loose)
+
+    @staticmethod
+    def _first_segment(path: str) -> str:
+        return path.lstrip("/").split("/", 1)[0]
+
+    def matches(self, path: str) -> bool:
+        if path in self.exact:
+            return True
+        bucket = self.buckets.get(self._first_segment(path))
+        if bucket and path.startswith(bucket):
+            return True
+        return bool(self.loose) and path.startswith(self.loose)
+
+
+@dataclass(frozen=True)
+class NamespaceRule:
+    perm: str
+    module: str
+
+
+def compile_namespace_rules(ns_to_perm: dict[str, str], ns_to_module: dict[str, str]) -> dict[str, NamespaceRule]:
+    return {ns: NamespaceRule(perm=perm, module=ns_to_module.get(ns, "")) for ns, perm in ns_to_perm.items()}
+
+
+def resolve_route(request):
+    """
+    Resolve a rota uma única vez por requisição; middlewares seguintes reaproveitam
+    o ResolverMatch guardado em `request.gepub_route_match` (None quando 404).
+    """
+    cached = getattr(request, "gepub_route_match", _UNRESOLVED)
+    if cached is not _UNRESOLVED:
+        return cached
+    try:
+        match = resolve(request.path_info)
+    except Exception:
+        match = None
+    request.gepub_route_match = match
+    return match
+
+
+def route_kind(request) -> str:
+    """Classificação barata (sem resolve) usada no início da cadeia de middlewares."""
+    cached = getattr(request, "gepub_route_kind", None)
+    if cached:
+        return cached
+    path = request.path or ""
+    if is_static_path(path):
+        kind = ROUTE_STATIC
+    elif path.startswith("/admin/"):
+        kind = ROUTE_ADMIN
+    else:
+        kind = ROUTE_APP
+    request.gepub_route_kind = kind
+    return kind
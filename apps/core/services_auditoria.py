@@ -3,7 +3,7 @@ from __future__ import annotations
 from .models import AuditoriaEvento
 
 
-def registrar_auditoria(
+def build_auditoria_evento(
     *,
     municipio,
     modulo: str,
@@ -15,7 +15,8 @@ def registrar_auditoria(
     depois=None,
     observacao: str = "",
 ):
-    return AuditoriaEvento.objects.create(
+    """Instância não salva; use com bulk_create quando houver muitos eventos."""
+    return AuditoriaEvento(
         municipio=municipio,
         modulo=(modulo or "").upper()[:40],
         evento=(evento or "")[:80],
@@ -26,3 +27,30 @@ def registrar_auditoria(
         depois=depois or {},
         observacao=(observacao or "")[:200],
     )
+
+
+def registrar_auditoria(
+    *,
+    municipio,
+    modulo: str,
+    evento: str,
+    entidade: str,
+    entidade_id,
+    usuario=None,
+    antes=None,
+    depois=None,
+    observacao: str = "",
+):
+    evento_obj = build_auditoria_evento(
+        municipio=municipio,
+        modulo=modulo,
+        evento=evento,
+        entidade=entidade,
+        entidade_id=entidade_id,
+        usuario=usuario,
+        antes=antes,
+        depois=depois,
+        observacao=observacao,
+    )
+    evento_obj.save()
+    return evento_obj
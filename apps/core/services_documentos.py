@@ -2,18 +2,43 @@ from __future__ import annotations
 
 from apps.core.models import DocumentoEmitido
 
+DOCUMENTOS_EMITIDOS_BATCH_SIZE = 500
+
+
+def preparar_documento_emitido(
+    *, tipo: str, titulo: str, gerado_por=None, origem_url: str = "", ativo: bool = True
+) -> DocumentoEmitido:
+    """
+    Registro de validação pública ainda não salvo: o `codigo` já existe (pode ir
+    no QR do documento) e a assinatura do emissor já vem preenchida.
+    """
+    return DocumentoEmitido(
+        tipo=tipo,
+        titulo=titulo,
+        gerado_por=gerado_por,
+        assinatura_emitente=DocumentoEmitido._resolve_emitente_nome(gerado_por),
+        assinatura_cargo=DocumentoEmitido._resolve_emitente_cargo(gerado_por),
+        origem_url=origem_url,
+        ativo=ativo,
+    )
+
 
 def registrar_documento_emitido(*, tipo: str, titulo: str, gerado_por=None, origem_url: str = "", ativo: bool = True) -> DocumentoEmitido:
     """
     Cria um registro padrão de validação pública para documentos do GEPUB,
     preenchendo assinatura do emissor no momento da emissão.
     """
-    return DocumentoEmitido.objects.create(
+    documento = preparar_documento_emitido(
         tipo=tipo,
         titulo=titulo,
         gerado_por=gerado_por,
-        assinatura_emitente=DocumentoEmitido._resolve_emitente_nome(gerado_por),
-        assinatura_cargo=DocumentoEmitido._resolve_emitente_cargo(gerado_por),
         origem_url=origem_url,
         ativo=ativo,
     )
+    documento.save()
+    return documento
+
+
+def registrar_documentos_emitidos(documentos: list[DocumentoEmitido]) -> list[DocumentoEmitido]:
+    """Grava em lote (bulk insert) registros montados com `preparar_documento_emitido`."""
+    return DocumentoEmitido.objects.bulk_create(documentos, batch_size=DOCUMENTOS_EMITIDOS_BATCH_SIZE)
@@ -0,0 +1,1175 @@
+"""
+Snapshots de indicadores (KPIs) dos dashboards, por escopo.
+
+Cada painel registrado em `PAINEIS` calcula, para um escopo (global, município,
+secretaria ou unidade), um dicionário serializável com as contagens que os
+dashboards faziam a cada renderização. O resultado fica em `KpiSnapshot`: a
+página lê todos os painéis de que precisa numa única consulta (`ler_paineis`) e
+só recalcula, na própria requisição, o que estiver ausente, invalidado ou com
+mais de KPI_SNAPSHOT_TTL_SECONDS.
+
+Os sinais de `apps.core.signals` marcam `invalidado_em` nos snapshots dos
+painéis que dependem do modelo salvo/excluído (`modelos_monitorados`), só nos
+escopos que podem contar o registro (`filtro_escopos_afetados`), e a
+tarefa periódica `core.atualizar_kpis` recalcula os invalidados e os que estão
+perto de vencer. Modelos gravados em massa ou a todo instante (frequências,
+notas, usuários no login) não invalidam nada: ficam por conta do TTL.
+
+O escopo de cada usuário segue as mesmas regras dos `scope_filter_*`
+(`escopo_do_usuario`); professores e alunos continuam com consultas próprias.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, ProgrammingError
+from django.db.models import Avg, Count, Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from apps.accounts.models import Profile
+from apps.compras.models import RequisicaoCompra
+from apps.comunicacao.models import NotificationJob
+from apps.contratos.models import ContratoAdministrativo, MedicaoContrato
+from apps.educacao.models import (
+    Aluno,
+    AlunoCertificado,
+    AlunoDocumento,
+    CarteiraEstudantil,
+    Curso,
+    Matricula,
+    MatrizCurricular,
+    RenovacaoMatricula,
+    Turma,
+)
+from apps.educacao.models_assistencia import (
+    CardapioEscolar,
+    RegistroRefeicaoEscolar,
+    RegistroTransporteEscolar,
+    RotaTransporteEscolar,
+)
+from apps.educacao.models_beneficios import BeneficioCampanha, BeneficioEntrega, BeneficioTipo
+from apps.educacao.models_calendario import CalendarioEducacionalEvento
+from apps.educacao.models_diario import Aula, DiarioTurma, Frequencia, Nota
+from apps.org.models import Municipio, Secretaria, Setor, Unidade
+from apps.ouvidoria.models import OuvidoriaCadastro
+from apps.paineis.models import Dataset
+from apps.processos.models import ProcessoAdministrativo
+
+try:
+    from apps.nee.models import AcompanhamentoNEE, AlunoNecessidade, LaudoNEE
+except Exception:
+    AlunoNecessidade = None
+    AcompanhamentoNEE = None
+    LaudoNEE = None
+
+from .models import KpiSnapshot
+from .rbac import _resolve_secretaria_id_from_profile, get_profile, is_admin, role_scope_base
+
+GLOBAL = KpiSnapshot.EscopoTipo.GLOBAL
+MUNICIPIO = KpiSnapshot.EscopoTipo.MUNICIPIO
+SECRETARIA = KpiSnapshot.EscopoTipo.SECRETARIA
+UNIDADE = KpiSnapshot.EscopoTipo.UNIDADE
+
+
+@dataclass(frozen=True)
+class KpiEscopo:
+    """
+    Recorte territorial de um snapshot. Município/secretaria de origem e ids das
+    unidades são resolvidos sob demanda (só quando o painel é calculado).
+    O escopo vazio (`ESCOPO_VAZIO`) não enxerga nada e nunca é gravado.
+    """
+
+    tipo: str
+    id: int = 0
+    _memo: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def persistente(self) -> bool:
+        return self.tipo in KpiSnapshot.EscopoTipo.values
+
+    def _hierarquia(self) -> tuple[int | None, int | None, int | None]:
+        if "hierarquia" not in self._memo:
+            if self.tipo == UNIDADE:
+                municipio_id, secretaria_id = (
+                    Unidade.objects.filter(pk=self.id)
+                    .values_list("secretaria__municipio_id", "secretaria_id")
+                    .first()
+                ) or (None, None)
+                valor = (municipio_id, secretaria_id, self.id)
+            elif self.tipo == SECRETARIA:
+                municipio_id = Secretaria.objects.filter(pk=self.id).values_list("municipio_id", flat=True).first()
+                valor = (municipio_id, self.id, None)
+            elif self.tipo == MUNICIPIO:
+                valor = (self.id, None, None)
+            else:
+                valor = (None, None, None)
+            self._memo["hierarquia"] = valor
+        return self._memo["hierarquia"]
+
+    @property
+    def municipio_id(self) -> int | None:
+        return self._hierarquia()[0]
+
+    @property
+    def secretaria_id(self) -> int | None:
+        if self.tipo == SECRETARIA:
+            return self.id
+        return self._hierarquia()[1]
+
+    @property
+    def unidade_id(self) -> int | None:
+        return self.id if self.tipo == UNIDADE else None
+
+    def unidade_ids(self) -> list[int] | None:
+        """Unidades do escopo; None no escopo global (sem filtro)."""
+        if self.tipo == GLOBAL:
+            return None
+        if "unidade_ids" not in self._memo:
+            if self.tipo == UNIDADE:
+                ids = [self.id]
+            elif self.tipo == SECRETARIA:
+                ids = list(Unidade.objects.filter(secretaria_id=self.id).values_list("id", flat=True))
+            elif self.tipo == MUNICIPIO:
+                ids = list(Unidade.objects.filter(secretaria__municipio_id=self.id).values_list("id", flat=True))
+            else:
+                ids = []
+            self._memo["unidade_ids"] = ids
+        return self._memo["unidade_ids"]
+
+    def secretaria_ids(self) -> list[int] | None:
+        """Secretarias do escopo; None no escopo global (sem filtro)."""
+        if self.tipo == GLOBAL:
+            return None
+        if self.tipo == MUNICIPIO:
+            return list(Secretaria.objects.filter(municipio_id=self.id).values_list("id", flat=True))
+        return [self.secretaria_id] if self.secretaria_id else []
+
+    def filtrar(self, qs, campo: str = "unidade_id"):
+        """Restringe `qs` às unidades do escopo pelo campo informado."""
+        ids = self.unidade_ids()
+        if ids is None:
+            return qs
+        return qs.filter(**{f"{campo}__in": ids})
+
+
+ESCOPO_GLOBAL = KpiEscopo(GLOBAL)
+ESCOPO_VAZIO = KpiEscopo("")
+
+
+def escopo_do_usuario(user) -> KpiEscopo | None:
+    """
+    Escopo dos painéis territoriais do usuário, com as regras dos scope_filter_*.
+    None para perfis sem recorte territorial (professor, aluno) ou inativos.
+    """
+    if is_admin(user):
+        return ESCOPO_GLOBAL
+    profile = get_profile(user)
+    if not profile or not getattr(profile, "ativo", True):
+        return None
+    base = role_scope_base(getattr(profile, "role", None))
+    if base in {"PROFESSOR", "ALUNO"}:
+        return None
+    if base == "UNIDADE" and getattr(profile, "unidade_id", None):
+        return KpiEscopo(UNIDADE, int(profile.unidade_id))
+    if base == "SECRETARIA":
+        secretaria_id = _resolve_secretaria_id_from_profile(profile)
+        return KpiEscopo(SECRETARIA, secretaria_id) if secretaria_id else ESCOPO_VAZIO
+    if getattr(profile, "municipio_id", None):
+        return KpiEscopo(MUNICIPIO, int(profile.municipio_id))
+    return ESCOPO_VAZIO
+
+
+def escopo_pendencias(profile) -> KpiEscopo:
+    """Escopo da central de pendências: o vínculo mais específico do perfil (global se não houver)."""
+    if profile and getattr(profile, "unidade_id", None):
+        return KpiEscopo(UNIDADE, int(profile.unidade_id))
+    if profile and getattr(profile, "secretaria_id", None):
+        return KpiEscopo(SECRETARIA, int(profile.secretaria_id))
+    if profile and getattr(profile, "municipio_id", None):
+        return KpiEscopo(MUNICIPIO, int(profile.municipio_id))
+    return ESCOPO_GLOBAL
+
+
+# ---------------------------------------------------------------------------
+# Registro de painéis
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Painel:
+    nome: str
+    calcular: Callable[[KpiEscopo], dict]
+    # Modelos ("app_label.Modelo") cuja gravação invalida o painel.
+    modelos: tuple[str, ...]
+
+
+PAINEIS: dict[str, Painel] = {}
+
+
+def registrar_painel(nome: str, *, modelos: Iterable[str]):
+    def decorator(func):
+        PAINEIS[nome] = Painel(nome=nome, calcular=func, modelos=tuple(modelos))
+        return func
+
+    return decorator
+
+
+def modelos_monitorados() -> dict[str, set[str]]:
+    """"app_label.Modelo" -> nomes dos painéis que o modelo invalida."""
+    mapa: dict[str, set[str]] = {}
+    for painel in PAINEIS.values():
+        for modelo in painel.modelos:
+            mapa.setdefault(modelo, set()).add(painel.nome)
+    return mapa
+
+
+# ---------------------------------------------------------------------------
+# Armazenamento
+# ---------------------------------------------------------------------------
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=max(0, int(getattr(settings, "KPI_SNAPSHOT_TTL_SECONDS", 900))))
+
+
+def _vencido(snapshot: KpiSnapshot, limite) -> bool:
+    if snapshot.calculado_em < limite:
+        return True
+    return snapshot.invalidado_em is not None and snapshot.invalidado_em >= snapshot.calculado_em
+
+
+def calcular_snapshot(escopo: KpiEscopo, painel: str) -> dict:
+    """Calcula o painel para o escopo e grava o snapshot (exceto no escopo vazio)."""
+    # O instante é tomado antes do cálculo: uma invalidação que chegue durante
+    # ele deixa o snapshot já vencido.
+    inicio = timezone.now()
+    # Ida e volta pelo JSON: quem calcula recebe exatamente o que a leitura devolveria.
+    dados = json.loads(json.dumps(PAINEIS[painel].calcular(escopo), cls=DjangoJSONEncoder))
+    if escopo.persistente:
+        KpiSnapshot.objects.update_or_create(
+            escopo_tipo=escopo.tipo,
+            escopo_id=escopo.id,
+            painel=painel,
+            defaults={"dados": dados, "calculado_em": inicio, "invalidado_em": None},
+        )
+    return dados
+
+
+def ler_paineis(pedidos: Iterable[tuple[KpiEscopo, str]]) -> dict[str, dict]:
+    """
+    Dados dos painéis pedidos ([(escopo, painel), ...]) lidos numa única consulta.
+    Os ausentes, invalidados ou vencidos são recalculados na hora.
+    """
+    pedidos = list(pedidos)
+    filtro = Q()
+    for escopo, painel in pedidos:
+        if escopo.persistente:
+            filtro |= Q(escopo_tipo=escopo.tipo, escopo_id=escopo.id, painel=painel)
+    encontrados = {}
+    if filtro:
+        for snapshot in KpiSnapshot.objects.filter(filtro):
+            encontrados[(snapshot.escopo_tipo, snapshot.escopo_id, snapshot.painel)] = snapshot
+
+    limite = timezone.now() - _ttl()
+    dados = {}
+    for escopo, painel in pedidos:
+        snapshot = encontrados.get((escopo.tipo, escopo.id, painel))
+        if snapshot is not None and not _vencido(snapshot, limite):
+            dados[painel] = snapshot.dados
+        else:
+            dados[painel] = calcular_snapshot(escopo, painel)
+    return dados
+
+
+def ler_painel(escopo: KpiEscopo, painel: str) -> dict:
+    return ler_paineis([(escopo, painel)])[painel]
+
+
+def invalidar_paineis(paineis: Iterable[str], escopos: Q | None = None) -> int:
+    """
+    Marca como invalidados os snapshots (ainda válidos) dos painéis informados,
+    só nos escopos de `escopos` (filtro de `filtro_escopos_afetados`) quando dado.
+    """
+    qs = KpiSnapshot.objects.filter(painel__in=list(paineis))
+    if escopos is not None:
+        qs = qs.filter(escopos)
+    return qs.filter(Q(invalidado_em__isnull=True) | Q(invalidado_em__lt=F("calculado_em"))).update(
+        invalidado_em=timezone.now()
+    )
+
+
+# Campos pelos quais um registro monitorado se prende ao organograma.
+_CAMPOS_VINCULO = ("unidade_id", "secretaria_id", "municipio_id", "turma_id", "aluno_id")
+# Modelos que são eles próprios o vínculo.
+_VINCULO_PROPRIO = {
+    "org.Unidade": "unidade_id",
+    "org.Secretaria": "secretaria_id",
+    "org.Municipio": "municipio_id",
+    "educacao.Aluno": "aluno_id",
+}
+
+
+def _campos_vinculo(model) -> list[str]:
+    attnames = {f.attname for f in model._meta.concrete_fields}
+    return [campo for campo in _CAMPOS_VINCULO if campo in attnames]
+
+
+def vinculos_kpi(instance) -> dict | None:
+    """
+    Ids de unidade/secretaria/município/turma/aluno do registro. None quando o
+    modelo não tem nenhum desses vínculos (afeta todos os escopos).
+    """
+    valores = {campo: getattr(instance, campo) for campo in _campos_vinculo(type(instance))}
+    proprio = _VINCULO_PROPRIO.get(instance._meta.label)
+    if proprio:
+        valores[proprio] = instance.pk
+    return valores or None
+
+
+def vinculos_kpi_gravados(instance) -> dict | None:
+    """Vínculos do registro como estão no banco (antes de um save que pode movê-lo)."""
+    campos = _campos_vinculo(type(instance))
+    if instance._state.adding or instance.pk is None or not campos:
+        return None
+    return type(instance)._default_manager.filter(pk=instance.pk).values(*campos).first()
+
+
+def filtro_escopos_afetados(*vinculos: dict | None) -> Q | None:
+    """
+    Filtro de `KpiSnapshot` com os escopos cujos painéis podem contar um registro
+    com os vínculos dados: o global, o próprio nível, os níveis acima e, quando
+    o vínculo mais específico é uma secretaria ou um município, as unidades (e
+    secretarias) abaixo dele. None se algum dos vínculos não for conhecido.
+    """
+    unidades: set[int] = set()
+    secretarias: set[int] = set()
+    municipios: set[int] = set()
+    abaixo_secretarias: set[int] = set()
+    abaixo_municipios: set[int] = set()
+    for valores in vinculos:
+        if valores is None:
+            return None
+        ids = {valores.get("unidade_id")}
+        if valores.get("turma_id"):
+            ids.update(Turma.objects.filter(pk=valores["turma_id"]).values_list("unidade_id", flat=True))
+        if valores.get("aluno_id") and not ids - {None}:
+            ids.update(
+                Matricula.objects.filter(aluno_id=valores["aluno_id"]).values_list("turma__unidade_id", flat=True)
+            )
+        ids.discard(None)
+        unidades |= ids
+        secretaria_id = valores.get("secretaria_id")
+        municipio_id = valores.get("municipio_id")
+        if secretaria_id:
+            secretarias.add(secretaria_id)
+            if not ids:
+                abaixo_secretarias.add(secretaria_id)
+        if municipio_id:
+            municipios.add(municipio_id)
+            if not ids and not secretaria_id:
+                abaixo_municipios.add(municipio_id)
+
+    for secretaria_id, municipio_id in Unidade.objects.filter(pk__in=unidades).values_list(
+        "secretaria_id", "secretaria__municipio_id"
+    ):
+        secretarias.add(secretaria_id)
+        municipios.add(municipio_id)
+    municipios.update(Secretaria.objects.filter(pk__in=secretarias).values_list("municipio_id", flat=True))
+    municipios.discard(None)
+
+    filtro = (
+        Q(escopo_tipo=GLOBAL)
+        | Q(escopo_tipo=MUNICIPIO, escopo_id__in=municipios)
+        | Q(escopo_tipo=SECRETARIA, escopo_id__in=secretarias)
+        | Q(escopo_tipo=UNIDADE, escopo_id__in=unidades)
+    )
+    if abaixo_secretarias:
+        filtro |= Q(
+            escopo_tipo=UNIDADE,
+            escopo_id__in=Unidade.objects.filter(secretaria_id__in=abaixo_secretarias).values("id"),
+        )
+    if abaixo_municipios:
+        filtro |= Q(
+            escopo_tipo=SECRETARIA,
+            escopo_id__in=Secretaria.objects.filter(municipio_id__in=abaixo_municipios).values("id"),
+        ) | Q(
+            escopo_tipo=UNIDADE,
+            escopo_id__in=Unidade.objects.filter(secretaria__municipio_id__in=abaixo_municipios).values("id"),
+        )
+    return filtro
+
+
+def atualizar_snapshots() -> int:
+    """
+    Rotina periódica: recalcula os snapshots invalidados e os calculados há mais
+    de metade do TTL, para que a leitura raramente precise calcular. Só revisita
+    escopos já lidos alguma vez (mais o painel global do administrador).
+    """
+    limite = timezone.now() - _ttl() / 2
+    pendentes = set(
+        KpiSnapshot.objects.filter(
+            Q(calculado_em__lt=limite) | Q(invalidado_em__gte=F("calculado_em"))
+        ).values_list("escopo_tipo", "escopo_id", "painel")
+    )
+    if not KpiSnapshot.objects.filter(escopo_tipo=GLOBAL, escopo_id=0, painel="admin").exists():
+        pendentes.add((GLOBAL, 0, "admin"))
+    atualizados = 0
+    for tipo, escopo_id, painel in sorted(pendentes):
+        if painel not in PAINEIS:
+            continue
+        calcular_snapshot(KpiEscopo(tipo, int(escopo_id)), painel)
+        atualizados += 1
+    return atualizados
+
+
+# ---------------------------------------------------------------------------
+# Painéis
+# ---------------------------------------------------------------------------
+
+_MODELOS_ESCOLARES = ("org.Unidade", "educacao.Turma", "educacao.Matricula", "educacao.Aluno")
+
+
+def _alunos_do_escopo(escopo: KpiEscopo):
+    ids = escopo.unidade_ids()
+    if ids is None:
+        return Aluno.objects.all()
+    matriculas = Matricula.objects.filter(aluno_id=OuterRef("pk"), turma__unidade_id__in=ids)
+    return Aluno.objects.annotate(_has_scope=Exists(matriculas)).filter(_has_scope=True)
+
+
+def _eventos_escopo(escopo: KpiEscopo, ano_ref: int):
+    eventos_qs = CalendarioEducacionalEvento.objects.filter(ativo=True, ano_letivo=ano_ref)
+    if escopo.secretaria_id:
+        return eventos_qs.filter(secretaria_id=escopo.secretaria_id)
+    if escopo.municipio_id:
+        return eventos_qs.filter(secretaria__municipio_id=escopo.municipio_id)
+    return eventos_qs.none()
+
+
+def proximos_eventos_escopo(escopo: KpiEscopo) -> list:
+    """Próximos eventos do calendário (instâncias, fora do snapshot)."""
+    today = timezone.localdate()
+    return list(
+        _eventos_escopo(escopo, today.year).filter(data_inicio__gte=today).order_by("data_inicio", "titulo")[:8]
+    )
+
+
+@registrar_painel(
+    "admin",
+    modelos=("org.Municipio", "org.Secretaria", "org.Setor", "accounts.Profile", *_MODELOS_ESCOLARES),
+)
+def _painel_admin(escopo: KpiEscopo) -> dict:
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+
+    kpis = {
+        "municipios": Municipio.objects.count(),
+        "usuarios": User.objects.count(),
+        "secretarias": Secretaria.objects.count(),
+        "unidades": Unidade.objects.count(),
+        "setores": Setor.objects.count(),
+        "turmas": Turma.objects.count(),
+        "alunos": Aluno.objects.count(),
+        "matriculas": Matricula.objects.count(),
+    }
+
+    roles_qs = Profile.objects.values("role").annotate(total=Count("id")).order_by("-total")
+    role_labels = [r["role"] or "SEM_ROLE" for r in roles_qs]
+    role_values = [r["total"] for r in roles_qs]
+    chart_roles = {"labels": json.dumps(role_labels), "values": json.dumps(role_values)}
+
+    unidades_por_municipio = list(
+        Unidade.objects.values("secretaria__municipio_id", "secretaria__municipio__nome")
+        .annotate(unidades=Count("id"))
+        .order_by("-unidades")
+    )
+
+    secretarias_por_municipio = list(
+        Secretaria.objects.values("municipio_id", "municipio__nome")
+        .annotate(secretarias=Count("id"))
+        .order_by("-secretarias")
+    )
+
+    resumo_por_municipio: dict[int, dict] = {}
+    for row in secretarias_por_municipio:
+        mid = int(row["municipio_id"])
+        resumo_por_municipio[mid] = {
+            "id": mid,
+            "nome": row["municipio__nome"] or "—",
+            "secretarias": int(row["secretarias"] or 0),
+            "unidades": 0,
+        }
+
+    for row in unidades_por_municipio:
+        mid = int(row["secretaria__municipio_id"])
+        current = resumo_por_municipio.setdefault(
+            mid,
+            {
+                "id": mid,
+                "nome": row["secretaria__municipio__nome"] or "—",
+                "secretarias": 0,
+                "unidades": 0,
+            },
+        )
+        current["nome"] = current["nome"] or row["secretaria__municipio__nome"] or "—"
+        current["unidades"] = int(row["unidades"] or 0)
+
+    resumo_values = list(resumo_por_municipio.values())
+    max_secretarias = max((item["secretarias"] for item in resumo_values), default=0)
+    max_unidades = max((item["unidades"] for item in resumo_values), default=0)
+
+    for item in resumo_values:
+        sec_component = (item["secretarias"] / max_secretarias) if max_secretarias else 0
+        uni_component = (item["unidades"] / max_unidades) if max_unidades else 0
+        item["volume_score"] = round(((sec_component * 0.45) + (uni_component * 0.55)) * 100, 1)
+
+    top_municipios = sorted(
+        resumo_values,
+        key=lambda item: (item["volume_score"], item["unidades"], item["secretarias"]),
+        reverse=True,
+    )[:10]
+
+    top_unidades_raw = list(
+        Turma.objects.values("unidade_id", "unidade__nome")
+        .annotate(turmas=Count("id"))
+        .order_by("-turmas", "unidade__nome")[:10]
+    )
+    top_unidades = [
+        {"id": r["unidade_id"], "nome": r["unidade__nome"] or "—", "turmas": r["turmas"]} for r in top_unidades_raw
+    ]
+
+    chart_municipios = {
+        "labels": json.dumps([m["nome"] for m in top_municipios]),
+        "values": json.dumps([m["unidades"] for m in top_municipios]),
+    }
+
+    return {
+        "kpis": kpis,
+        "chart_roles": chart_roles,
+        "chart_municipios": chart_municipios,
+        "top_municipios": top_municipios,
+        "top_unidades": top_unidades,
+    }
+
+
+@registrar_painel("secretaria", modelos=_MODELOS_ESCOLARES)
+def _painel_secretaria(escopo: KpiEscopo) -> dict:
+    turmas_qs = escopo.filtrar(Turma.objects.all())
+    return {
+        "unidades_total": escopo.filtrar(Unidade.objects.all(), "id").count(),
+        "turmas_total": turmas_qs.count(),
+        "alunos_total": _alunos_do_escopo(escopo).count(),
+        "graf_turmas_por_unidade": list(
+            turmas_qs.values("unidade__nome").annotate(total=Count("id")).order_by("-total")[:8]
+        ),
+    }
+
+
+@registrar_painel("unidade", modelos=_MODELOS_ESCOLARES)
+def _painel_unidade(escopo: KpiEscopo) -> dict:
+    matriculas_qs = escopo.filtrar(Matricula.objects.all(), "turma__unidade_id")
+    return {
+        "turmas_total": escopo.filtrar(Turma.objects.all()).count(),
+        "alunos_total": _alunos_do_escopo(escopo).count(),
+        "matriculas_total": matriculas_qs.count(),
+        "graf_matriculas_por_turma": list(
+            matriculas_qs.values("turma__nome").annotate(total=Count("id")).order_by("-total")[:10]
+        ),
+    }
+
+
+@registrar_painel(
+    "educacao_index",
+    modelos=(*_MODELOS_ESCOLARES, "educacao.MatrizCurricular", "educacao.RenovacaoMatricula"),
+)
+def _painel_educacao_index(escopo: KpiEscopo) -> dict:
+    unidades_educacao_qs = escopo.filtrar(Unidade.objects.filter(tipo=Unidade.Tipo.EDUCACAO), "id")
+    turmas_educacao_qs = escopo.filtrar(Turma.objects.filter(unidade__tipo=Unidade.Tipo.EDUCACAO))
+    matriculas_educacao_qs = escopo.filtrar(
+        Matricula.objects.filter(turma__unidade__tipo=Unidade.Tipo.EDUCACAO),
+        "turma__unidade_id",
+    )
+
+    secretaria_ids = escopo.secretaria_ids()
+    renovacoes_qs = RenovacaoMatricula.objects.all()
+    if secretaria_ids is not None:
+        renovacoes_qs = renovacoes_qs.filter(secretaria_id__in=secretaria_ids)
+    hoje = timezone.localdate()
+    return {
+        "unidades_total": unidades_educacao_qs.count(),
+        "turmas_total": turmas_educacao_qs.count(),
+        "alunos_total": matriculas_educacao_qs.values("aluno_id").distinct().count(),
+        "matriculas_total": matriculas_educacao_qs.count(),
+        "matrizes_total": MatrizCurricular.objects.filter(unidade__in=unidades_educacao_qs, ativo=True).count(),
+        "renovacoes_total": renovacoes_qs.count(),
+        "renovacoes_agendadas": renovacoes_qs.filter(
+            ativo=True,
+            processado_em__isnull=True,
+            data_inicio__gt=hoje,
+        ).count(),
+        "renovacoes_abertas": renovacoes_qs.filter(
+            ativo=True,
+            processado_em__isnull=True,
+            data_inicio__lte=hoje,
+            data_fim__gte=hoje,
+        ).count(),
+        "renovacoes_pendentes_processamento": renovacoes_qs.filter(
+            ativo=True,
+            processado_em__isnull=True,
+            data_fim__lt=hoje,
+        ).count(),
+        "renovacoes_processadas": renovacoes_qs.filter(processado_em__isnull=False).count(),
+    }
+
+
+@registrar_painel(
+    "secretaria_educacao",
+    modelos=(
+        *_MODELOS_ESCOLARES,
+        "accounts.Profile",
+        "educacao.Curso",
+        "educacao.AlunoDocumento",
+        "educacao.AlunoCertificado",
+        "educacao.CarteiraEstudantil",
+        "educacao.CalendarioEducacionalEvento",
+        "educacao.DiarioTurma",
+        "educacao.CardapioEscolar",
+        "educacao.RotaTransporteEscolar",
+        "educacao.BeneficioTipo",
+        "educacao.BeneficioCampanha",
+        "educacao.BeneficioEntrega",
+        "nee.AlunoNecessidade",
+        "nee.LaudoNEE",
+        "nee.AcompanhamentoNEE",
+    ),
+)
+def _painel_secretaria_educacao(escopo: KpiEscopo) -> dict:
+    today = timezone.localdate()
+    ano_ref = today.year
+    secretaria_id = escopo.secretaria_id
+    municipio_id = escopo.municipio_id
+
+    unidades_qs = escopo.filtrar(Unidade.objects.filter(tipo=Unidade.Tipo.EDUCACAO), "id")
+    turmas_qs = escopo.filtrar(Turma.objects.filter(unidade__tipo=Unidade.Tipo.EDUCACAO))
+    alunos_qs = _alunos_do_escopo(escopo)
+    matriculas_qs = escopo.filtrar(
+        Matricula.objects.filter(turma__unidade__tipo=Unidade.Tipo.EDUCACAO),
+        "turma__unidade_id",
+    )
+
+    matriculas_ativas_qs = matriculas_qs.filter(situacao=Matricula.Situacao.ATIVA)
+    aluno_ids_matriculados = matriculas_qs.values_list("aluno_id", flat=True).distinct()
+
+    turmas_infantil_filter = Q(modalidade=Turma.Modalidade.EDUCACAO_INFANTIL) | Q(
+        etapa__in=[Turma.Etapa.CRECHE, Turma.Etapa.PRE_ESCOLA]
+    )
+    turmas_fundamental_filter = Q(
+        etapa__in=[Turma.Etapa.FUNDAMENTAL_ANOS_INICIAIS, Turma.Etapa.FUNDAMENTAL_ANOS_FINAIS]
+    )
+    turmas_regular_filter = Q(modalidade=Turma.Modalidade.REGULAR)
+    turmas_complementar_filter = Q(modalidade=Turma.Modalidade.ATIVIDADE_COMPLEMENTAR)
+
+    def _alunos_distintos_por_turma(turma_filter):
+        return (
+            matriculas_ativas_qs.filter(turma__in=turmas_qs.filter(turma_filter))
+            .values("aluno_id")
+            .distinct()
+            .count()
+        )
+
+    eventos_qs = _eventos_escopo(escopo, ano_ref)
+
+    unidade_ids = list(unidades_qs.values_list("id", flat=True))
+    unidades_destaque = list(
+        matriculas_ativas_qs.values("turma__unidade_id", "turma__unidade__nome")
+        .annotate(total=Count("aluno", distinct=True))
+        .order_by("-total", "turma__unidade__nome")[:8]
+    )
+    modalidades_destaque_raw = list(
+        matriculas_ativas_qs.values("turma__modalidade")
+        .annotate(total=Count("aluno", distinct=True))
+        .order_by("-total", "turma__modalidade")
+    )
+    modalidade_label_map = dict(Turma.Modalidade.choices)
+    modalidades_destaque = [
+        {
+            "codigo": row.get("turma__modalidade") or "",
+            "nome": modalidade_label_map.get(row.get("turma__modalidade"), row.get("turma__modalidade") or "—"),
+            "total": int(row.get("total") or 0),
+        }
+        for row in modalidades_destaque_raw
+    ]
+
+    cursos_catalogo_total = (
+        turmas_qs.exclude(curso_id__isnull=True).values("curso_id").distinct().count()
+    )
+    cursos_complementares_total = (
+        turmas_qs.filter(turmas_complementar_filter)
+        .exclude(curso_id__isnull=True)
+        .values("curso_id")
+        .distinct()
+        .count()
+    )
+    turmas_complementares_total = turmas_qs.filter(turmas_complementar_filter).count()
+    cursos_ativos_total = Curso.objects.filter(turmas__in=turmas_qs, ativo=True).distinct().count()
+    cursos_inativos_total = Curso.objects.filter(turmas__in=turmas_qs, ativo=False).distinct().count()
+
+    unidades_total = unidades_qs.count()
+    escolas_ativas_total = unidades_qs.filter(ativo=True).count()
+    escolas_inativas_total = max(0, unidades_total - escolas_ativas_total)
+    escolas_por_tipo_educacional = list(
+        unidades_qs.values("tipo_educacional")
+        .annotate(total=Count("id"))
+        .order_by("-total", "tipo_educacional")
+    )
+
+    turmas_por_turno_raw = list(
+        turmas_qs.values("turno")
+        .annotate(total=Count("id"))
+        .order_by("turno")
+    )
+    turno_label_map = dict(Turma.Turno.choices)
+    turmas_por_turno = [
+        {
+            "codigo": row.get("turno") or "",
+            "nome": turno_label_map.get(row.get("turno"), row.get("turno") or "—"),
+            "total": int(row.get("total") or 0),
+        }
+        for row in turmas_por_turno_raw
+    ]
+
+    matricula_indicadores = {
+        "transferidos_total": matriculas_qs.filter(situacao=Matricula.Situacao.TRANSFERIDO).count(),
+        "evadidos_total": matriculas_qs.filter(situacao=Matricula.Situacao.EVADIDO).count(),
+        "cancelados_total": matriculas_qs.filter(situacao=Matricula.Situacao.CANCELADO).count(),
+        "concluidos_total": matriculas_qs.filter(situacao=Matricula.Situacao.CONCLUIDO).count(),
+        "aprovados_total": matriculas_qs.filter(resultado_final__istartswith="APROV").count(),
+        "reprovados_total": matriculas_qs.filter(resultado_final__istartswith="REPROV").count(),
+        "abandono_total": matriculas_qs.filter(
+            Q(situacao=Matricula.Situacao.EVADIDO) | Q(resultado_final__istartswith="ABAND")
+        ).count(),
+    }
+
+    turma_ids = list(turmas_qs.values_list("id", flat=True))
+    frequencias_qs = Frequencia.objects.filter(aula__diario__turma_id__in=turma_ids)
+    freq_total = frequencias_qs.count()
+    freq_presentes = frequencias_qs.filter(status=Frequencia.Status.PRESENTE).count()
+    freq_justificadas = frequencias_qs.filter(status=Frequencia.Status.JUSTIFICADA).count()
+    freq_faltas = frequencias_qs.filter(status=Frequencia.Status.FALTA).count()
+    frequencia = {
+        "registros_total": freq_total,
+        "presentes_total": freq_presentes,
+        "justificadas_total": freq_justificadas,
+        "faltas_total": freq_faltas,
+        "taxa_presenca": round((freq_presentes / freq_total) * 100, 1) if freq_total else None,
+        "taxa_presenca_com_justificativa": round(
+            ((freq_presentes + freq_justificadas) / freq_total) * 100,
+            1,
+        )
+        if freq_total
+        else None,
+    }
+
+    notas_qs = Nota.objects.filter(avaliacao__diario__turma_id__in=turma_ids)
+    media_notas = notas_qs.aggregate(media=Avg("valor")).get("media")
+    pedagogico = {
+        "diarios_total": DiarioTurma.objects.filter(turma_id__in=turma_ids).count(),
+        "aulas_total": Aula.objects.filter(diario__turma_id__in=turma_ids).count(),
+        "avaliacoes_total": notas_qs.values("avaliacao_id").distinct().count(),
+        "notas_lancadas_total": notas_qs.count(),
+        "media_notas_geral": round(float(media_notas), 2) if media_notas is not None else None,
+    }
+
+    documentos = {
+        "documentos_total": AlunoDocumento.objects.filter(
+            aluno_id__in=aluno_ids_matriculados,
+            ativo=True,
+        ).count(),
+        "certificados_total": AlunoCertificado.objects.filter(
+            aluno_id__in=aluno_ids_matriculados,
+            ativo=True,
+        ).count(),
+        "carteiras_ativas_total": CarteiraEstudantil.objects.filter(
+            aluno_id__in=aluno_ids_matriculados,
+            ativa=True,
+        ).count(),
+    }
+
+    profiles_qs = Profile.objects.filter(ativo=True, bloqueado=False, user__is_active=True)
+    if secretaria_id:
+        profiles_qs = profiles_qs.filter(
+            Q(secretaria_id=secretaria_id) | Q(unidade__secretaria_id=secretaria_id)
+        )
+    elif municipio_id:
+        profiles_qs = profiles_qs.filter(
+            Q(municipio_id=municipio_id)
+            | Q(secretaria__municipio_id=municipio_id)
+            | Q(unidade__secretaria__municipio_id=municipio_id)
+        )
+    else:
+        profiles_qs = profiles_qs.none()
+
+    roles_educacao = {
+        "EDU_SECRETARIO",
+        "EDU_DIRETOR",
+        "EDU_COORD",
+        "EDU_PROF",
+        "EDU_SECRETARIA",
+        "EDU_TRANSPORTE",
+        "NEE",
+        "NEE_COORD_MUN",
+        "NEE_COORD_ESC",
+        "NEE_MEDIADOR",
+        "NEE_TECNICO",
+        "PROFESSOR",
+    }
+    profissionais_qs = profiles_qs.filter(role__in=roles_educacao)
+    profissionais = {
+        "total": profissionais_qs.count(),
+        "professores_total": profissionais_qs.filter(role__in=["EDU_PROF", "PROFESSOR"]).count(),
+        "coordenadores_total": profissionais_qs.filter(
+            role__in=["EDU_COORD", "NEE_COORD_ESC", "NEE_COORD_MUN"]
+        ).count(),
+        "gestores_total": profissionais_qs.filter(role__in=["EDU_SECRETARIO", "EDU_DIRETOR"]).count(),
+        "secretaria_escolar_total": profissionais_qs.filter(role="EDU_SECRETARIA").count(),
+        "nee_total": profissionais_qs.filter(
+            role__in=["NEE", "NEE_COORD_MUN", "NEE_COORD_ESC", "NEE_MEDIADOR", "NEE_TECNICO"]
+        ).count(),
+        "transporte_total": profissionais_qs.filter(role="EDU_TRANSPORTE").count(),
+    }
+
+    assistencia = {
+        "cardapios_total": 0,
+        "refeicoes_registradas_total": 0,
+        "rotas_total": 0,
+        "transporte_registros_total": 0,
+    }
+    if unidade_ids:
+        assistencia["cardapios_total"] = CardapioEscolar.objects.filter(
+            unidade_id__in=unidade_ids,
+            data__year=ano_ref,
+        ).count()
+        assistencia["refeicoes_registradas_total"] = int(
+            RegistroRefeicaoEscolar.objects.filter(
+                unidade_id__in=unidade_ids,
+                data__year=ano_ref,
+            ).aggregate(total=Sum("total_servidas"))["total"]
+            or 0
+        )
+        assistencia["rotas_total"] = RotaTransporteEscolar.objects.filter(
+            unidade_id__in=unidade_ids,
+            ativo=True,
+        ).count()
+        assistencia["transporte_registros_total"] = RegistroTransporteEscolar.objects.filter(
+            rota__unidade_id__in=unidade_ids,
+            data__year=ano_ref,
+        ).count()
+
+    beneficios_tipo_qs = BeneficioTipo.objects.filter(area=BeneficioTipo.Area.EDUCACAO)
+    beneficios_campanha_qs = BeneficioCampanha.objects.filter(area=BeneficioTipo.Area.EDUCACAO)
+    beneficios_entrega_qs = BeneficioEntrega.objects.filter(area=BeneficioTipo.Area.EDUCACAO)
+    if secretaria_id:
+        beneficios_tipo_qs = beneficios_tipo_qs.filter(
+            Q(secretaria_id=secretaria_id)
+            | Q(secretaria__isnull=True, municipio_id=municipio_id)
+        )
+        beneficios_campanha_qs = beneficios_campanha_qs.filter(
+            Q(secretaria_id=secretaria_id)
+            | Q(secretaria__isnull=True, municipio_id=municipio_id)
+        )
+        beneficios_entrega_qs = beneficios_entrega_qs.filter(
+            Q(secretaria_id=secretaria_id)
+            | Q(secretaria__isnull=True, municipio_id=municipio_id)
+        )
+    elif municipio_id:
+        beneficios_tipo_qs = beneficios_tipo_qs.filter(municipio_id=municipio_id)
+        beneficios_campanha_qs = beneficios_campanha_qs.filter(municipio_id=municipio_id)
+        beneficios_entrega_qs = beneficios_entrega_qs.filter(municipio_id=municipio_id)
+    else:
+        beneficios_tipo_qs = beneficios_tipo_qs.none()
+        beneficios_campanha_qs = beneficios_campanha_qs.none()
+        beneficios_entrega_qs = beneficios_entrega_qs.none()
+
+    beneficios = {
+        "tipos_total": beneficios_tipo_qs.count(),
+        "campanhas_ativas_total": beneficios_campanha_qs.filter(
+            status__in=[BeneficioCampanha.Status.RASCUNHO, BeneficioCampanha.Status.EM_EXECUCAO]
+        ).count(),
+        "campanhas_doacao_total": beneficios_campanha_qs.filter(
+            origem=BeneficioCampanha.Origem.DOACAO
+        ).count(),
+        "entregas_ano_total": beneficios_entrega_qs.filter(data_hora__year=ano_ref).count(),
+        "entregas_pendentes_total": beneficios_entrega_qs.filter(
+            status=BeneficioEntrega.Status.PENDENTE
+        ).count(),
+    }
+
+    nee = {
+        "alunos_nee_total": 0,
+        "necessidades_ativas_total": 0,
+        "laudos_vigentes_total": 0,
+        "acompanhamentos_mes_total": 0,
+    }
+    if AlunoNecessidade and LaudoNEE and AcompanhamentoNEE:
+        try:
+            necessidades_qs = AlunoNecessidade.objects.filter(
+                aluno_id__in=aluno_ids_matriculados,
+                ativo=True,
+            )
+            nee["necessidades_ativas_total"] = necessidades_qs.count()
+            nee["alunos_nee_total"] = necessidades_qs.values("aluno_id").distinct().count()
+            nee["laudos_vigentes_total"] = LaudoNEE.objects.filter(
+                aluno_id__in=aluno_ids_matriculados
+            ).filter(Q(validade__isnull=True) | Q(validade__gte=today)).count()
+            nee["acompanhamentos_mes_total"] = AcompanhamentoNEE.objects.filter(
+                aluno_id__in=aluno_ids_matriculados,
+                data__year=today.year,
+                data__month=today.month,
+            ).count()
+        except (ProgrammingError, OperationalError):
+            pass
+
+    return {
+        "ano_ref": ano_ref,
+        "unidades_total": unidades_total,
+        "escolas_total": unidades_total,
+        "escolas_ativas_total": escolas_ativas_total,
+        "escolas_inativas_total": escolas_inativas_total,
+        "escolas_por_tipo_educacional": escolas_por_tipo_educacional,
+        "turmas_total": turmas_qs.count(),
+        "turmas_ativas_total": turmas_qs.filter(ativo=True).count(),
+        "turmas_por_turno": turmas_por_turno,
+        "alunos_total": alunos_qs.count(),
+        "alunos_ativos_total": matriculas_ativas_qs.values("aluno_id").distinct().count(),
+        "matriculas_total": matriculas_qs.count(),
+        "matriculas_ativas_total": matriculas_ativas_qs.count(),
+        "matricula_indicadores": matricula_indicadores,
+        "segmentos": {
+            "infantil_turmas_total": turmas_qs.filter(turmas_infantil_filter).count(),
+            "infantil_alunos_total": _alunos_distintos_por_turma(turmas_infantil_filter),
+            "regular_turmas_total": turmas_qs.filter(turmas_regular_filter).count(),
+            "regular_alunos_total": _alunos_distintos_por_turma(turmas_regular_filter),
+            "fundamental_turmas_total": turmas_qs.filter(turmas_fundamental_filter).count(),
+            "fundamental_alunos_total": _alunos_distintos_por_turma(turmas_fundamental_filter),
+            "complementar_turmas_total": turmas_complementares_total,
+            "complementar_alunos_total": _alunos_distintos_por_turma(turmas_complementar_filter),
+        },
+        "cursos_catalogo_total": cursos_catalogo_total,
+        "cursos_complementares_total": cursos_complementares_total,
+        "cursos_ativos_total": cursos_ativos_total,
+        "cursos_inativos_total": cursos_inativos_total,
+        "modalidades_total": turmas_qs.values("modalidade").distinct().count(),
+        "profissionais": profissionais,
+        "frequencia": frequencia,
+        "pedagogico": pedagogico,
+        "documentos": documentos,
+        "eventos_total": eventos_qs.count(),
+        "eventos_letivos_total": eventos_qs.filter(dia_letivo=True).count(),
+        "feriados_total": eventos_qs.filter(tipo=CalendarioEducacionalEvento.Tipo.FERIADO).count(),
+        "recessos_total": eventos_qs.filter(tipo=CalendarioEducacionalEvento.Tipo.RECESSO).count(),
+        "unidades_destaque": unidades_destaque,
+        "modalidades_destaque": modalidades_destaque,
+        "assistencia": assistencia,
+        "beneficios": beneficios,
+        "nee": nee,
+    }
+
+
+def _scope_by_org(qs, escopo: KpiEscopo):
+    if escopo.municipio_id:
+        if "municipio_id" in [f.name for f in qs.model._meta.fields]:
+            qs = qs.filter(municipio_id=escopo.municipio_id)
+    if escopo.secretaria_id:
+        if "secretaria_id" in [f.name for f in qs.model._meta.fields]:
+            qs = qs.filter(secretaria_id=escopo.secretaria_id)
+    if escopo.unidade_id:
+        if "unidade_id" in [f.name for f in qs.model._meta.fields]:
+            qs = qs.filter(unidade_id=escopo.unidade_id)
+    return qs
+
+
+@registrar_painel(
+    "pendencias",
+    modelos=(
+        "processos.ProcessoAdministrativo",
+        "compras.RequisicaoCompra",
+        "contratos.ContratoAdministrativo",
+        "contratos.MedicaoContrato",
+        "ouvidoria.OuvidoriaCadastro",
+        "paineis.Dataset",
+        "comunicacao.NotificationJob",
+    ),
+)
+def _painel_pendencias(escopo: KpiEscopo) -> dict:
+    pendencias = []
+    hoje = timezone.localdate()
+    em_30 = hoje + timezone.timedelta(days=30)
+
+    try:
+        processos_qs = _scope_by_org(ProcessoAdministrativo.objects.all(), escopo)
+        atrasados = processos_qs.exclude(
+            status__in=[ProcessoAdministrativo.Status.CONCLUIDO, ProcessoAdministrativo.Status.ARQUIVADO]
+        ).filter(prazo_final__lt=hoje).count()
+        if atrasados:
+            pendencias.append(
+                {
+                    "titulo": "Processos em atraso",
+                    "valor": atrasados,
+                    "url": "/processos/",
+                    "nivel": "alto",
+                    "descricao": "Processos com prazo final vencido.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        req_qs = _scope_by_org(RequisicaoCompra.objects.all(), escopo)
+        em_aprovacao = req_qs.filter(status=RequisicaoCompra.Status.EM_APROVACAO).count()
+        if em_aprovacao:
+            pendencias.append(
+                {
+                    "titulo": "Requisições em aprovação",
+                    "valor": em_aprovacao,
+                    "url": "/compras/requisicoes/",
+                    "nivel": "medio",
+                    "descricao": "Requisições aguardando decisão.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        if escopo.municipio_id:
+            contrato_qs = ContratoAdministrativo.objects.filter(municipio_id=escopo.municipio_id)
+        else:
+            contrato_qs = ContratoAdministrativo.objects.all()
+
+        vencendo = contrato_qs.filter(
+            status=ContratoAdministrativo.Status.ATIVO,
+            vigencia_fim__gte=hoje,
+            vigencia_fim__lte=em_30,
+        ).count()
+        vencidos = contrato_qs.filter(
+            status=ContratoAdministrativo.Status.ATIVO,
+            vigencia_fim__lt=hoje,
+        ).count()
+
+        if vencidos:
+            pendencias.append(
+                {
+                    "titulo": "Contratos vencidos",
+                    "valor": vencidos,
+                    "url": "/contratos/",
+                    "nivel": "alto",
+                    "descricao": "Contratos ativos com vigência já encerrada.",
+                }
+            )
+        if vencendo:
+            pendencias.append(
+                {
+                    "titulo": "Contratos vencendo em 30 dias",
+                    "valor": vencendo,
+                    "url": "/contratos/",
+                    "nivel": "medio",
+                    "descricao": "Planejar aditivos/renovações.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        med_qs = MedicaoContrato.objects.select_related("contrato")
+        if escopo.municipio_id:
+            med_qs = med_qs.filter(contrato__municipio_id=escopo.municipio_id)
+        pendentes = med_qs.filter(status=MedicaoContrato.Status.PENDENTE).count()
+        if pendentes:
+            pendencias.append(
+                {
+                    "titulo": "Medições pendentes de atesto",
+                    "valor": pendentes,
+                    "url": "/contratos/",
+                    "nivel": "medio",
+                    "descricao": "Medições aguardando atesto/liquidação.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        ouv_qs = _scope_by_org(OuvidoriaCadastro.objects.all(), escopo)
+        ouv_atrasadas = ouv_qs.exclude(
+            status__in=[
+                OuvidoriaCadastro.Status.CONCLUIDO,
+                OuvidoriaCadastro.Status.CANCELADO,
+                OuvidoriaCadastro.Status.RESPONDIDO,
+            ]
+        ).filter(prazo_resposta__lt=hoje).count()
+        if ouv_atrasadas:
+            pendencias.append(
+                {
+                    "titulo": "Ouvidorias com SLA vencido",
+                    "valor": ouv_atrasadas,
+                    "url": "/ouvidoria/",
+                    "nivel": "alto",
+                    "descricao": "Chamados com prazo de resposta vencido.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        if escopo.municipio_id:
+            dataset_qs = Dataset.objects.filter(municipio_id=escopo.municipio_id)
+        else:
+            dataset_qs = Dataset.objects.all()
+        dataset_sensiveis = (
+            dataset_qs.exclude(status=Dataset.Status.PUBLICADO)
+            .filter(visibilidade=Dataset.Visibilidade.PUBLICO, versoes__colunas__sensivel=True)
+            .distinct()
+            .count()
+        )
+        if dataset_sensiveis:
+            pendencias.append(
+                {
+                    "titulo": "Datasets públicos com coluna sensível",
+                    "valor": dataset_sensiveis,
+                    "url": "/paineis/",
+                    "nivel": "medio",
+                    "descricao": "Revisar checklist LGPD antes da publicação.",
+                }
+            )
+    except Exception:
+        pass
+
+    try:
+        if escopo.municipio_id:
+            jobs_qs = NotificationJob.objects.filter(municipio_id=escopo.municipio_id)
+        else:
+            jobs_qs = NotificationJob.objects.all()
+        jobs_falhos = jobs_qs.filter(
+            status=NotificationJob.Status.FALHA,
+            created_at__date=hoje,
+        ).count()
+        if jobs_falhos:
+            pendencias.append(
+                {
+                    "titulo": "Falhas de comunicação hoje",
+                    "valor": jobs_falhos,
+                    "url": "/comunicacao/",
+                    "nivel": "medio",
+                    "descricao": "Jobs com erro no dia atual.",
+                }
+            )
+    except Exception:
+        pass
+
+    pendencias.sort(key=lambda item: (0 if item["nivel"] == "alto" else 1, -int(item["valor"])))
+    return {"itens": pendencias}
@@ -0,0 +1,314 @@
+"""
+Renderização de PDFs institucionais (WeasyPrint).
+
+- assets: URLs em STATIC_URL/MEDIA_URL são lidas do disco (finders do
+  staticfiles e MEDIA_ROOT) e mantidas em memória; o WeasyPrint não faz mais
+  requisições HTTP ao próprio servidor para buscar logo/CSS;
+- folhas de estilo compartilhadas (`pdf_stylesheet`) são parseadas uma vez por
+  processo e usadas com a mesma FontConfiguration e o mesmo cache de imagens;
+- com PDF_RENDER_WORKERS > 0, a renderização vai para um pool de processos
+  aquecidos (Django carregado, fontes e folhas de estilo prontas);
+- relatórios grandes podem sair em segundo plano: `enqueue_pdf_job` grava o
+  HTML num RelatorioPdfJob e a tarefa core.render_pdf_job gera o arquivo.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from urllib.parse import unquote, urljoin, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+TABLE_STYLESHEET = "css/pages/relatorio-pdf-tabela.css"
+PRELOADED_STYLESHEETS = (TABLE_STYLESHEET,)
+PDF_ASSET_CACHE_MAX_BYTES = 32 * 1024 * 1024
+PDF_IMAGE_CACHE_MAX_ENTRIES = 256
+PDF_REMOTE_FETCH_TIMEOUT = 10
+
+_assets: OrderedDict[str, tuple[int, bytes, str]] = OrderedDict()
+_assets_size = 0
+_assets_lock = threading.Lock()
+_image_cache: dict = {}
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def pdf_base_url() -> str:
+    """Base fixa dos documentos: assets relativos resolvem para ela e são servidos do disco."""
+    return getattr(settings, "PDF_RENDER_BASE_URL", "http://gepub.pdf/")
+
+
+def pdf_asset_url(path: str) -> str:
+    return urljoin(pdf_base_url(), path)
+
+
+def _url_path(setting_url: str | None) -> str:
+    return urlsplit(setting_url or "").path
+
+
+def _local_asset_path(url: str) -> str | None:
+    parts = urlsplit(url)
+    if parts.scheme not in {"http", "https"}:
+        return None
+    path = unquote(parts.path)
+    static_prefix = _url_path(settings.STATIC_URL)
+    media_prefix = _url_path(settings.MEDIA_URL)
+    candidate = None
+    try:
+        if static_prefix and path.startswith(static_prefix):
+            from django.contrib.staticfiles import finders
+
+            relative = path[len(static_prefix) :]
+            candidate = finders.find(relative)
+            if not candidate and settings.STATIC_ROOT:
+                candidate = safe_join(settings.STATIC_ROOT, relative)
+        elif media_prefix and path.startswith(media_prefix) and settings.MEDIA_ROOT:
+            candidate = safe_join(settings.MEDIA_ROOT, path[len(media_prefix) :])
+    except SuspiciousFileOperation:
+        return None
+    return candidate if candidate and os.path.isfile(candidate) else None
+
+
+def load_local_asset(url: str) -> tuple[bytes, str] | None:
+    """
+    Conteúdo e mime type de um asset local (static/media) referenciado por URL,
+    ou None para URLs externas. Arquivos trocados no disco são relidos (mtime).
+    """
+    global _assets_size
+
+    path = _local_asset_path(url)
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _assets_lock:
+        entry = _assets.get(path)
+        if entry is not None and entry[0] == mtime:
+            _assets.move_to_end(path)
+            return entry[1], entry[2]
+
+    with open(path, "rb") as fobj:
+        data = fobj.read()
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    with _assets_lock:
+        previous = _assets.pop(path, None)
+        if previous is not None:
+            _assets_size -= len(previous[1])
+        if len(data) <= PDF_ASSET_CACHE_MAX_BYTES:
+            _assets[path] = (mtime, data, mime_type)
+            _assets_size += len(data)
+        while _assets_size > PDF_ASSET_CACHE_MAX_BYTES:
+            _path, (_mtime, evicted, _mime) = _assets.popitem(last=False)
+            _assets_size -= len(evicted)
+    return data, mime_type
+
+
+def clear_pdf_asset_cache() -> None:
+    global _assets_size
+    with _assets_lock:
+        _assets.clear()
+        _assets_size = 0
+    _image_cache.clear()
+
+
+class PdfAssetFetcher:
+    """`url_fetcher` do WeasyPrint: static/media do disco (em memória), demais URLs pelo fetcher padrão."""
+
+    def __init__(self):
+        from weasyprint.urls import URLFetcher
+
+        self._remote = URLFetcher(timeout=PDF_REMOTE_FETCH_TIMEOUT)
+
+    def __call__(self, url: str):
+        from weasyprint.urls import URLFetcherResponse
+
+        asset = load_local_asset(url)
+        if asset is None:
+            return self._remote.fetch(url)
+        data, mime_type = asset
+        return URLFetcherResponse(url, data, {"Content-Type": mime_type})
+
+
+@lru_cache(maxsize=1)
+def _fetcher() -> PdfAssetFetcher:
+    return PdfAssetFetcher()
+
+
+@lru_cache(maxsize=1)
+def _font_config():
+    from weasyprint.text.fonts import FontConfiguration
+
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=32)
+def pdf_stylesheet(path: str):
+    """Folha de estilo estática (caminho relativo a STATIC_URL) parseada uma única vez por processo."""
+    from django.templatetags.static import static
+    from weasyprint import CSS
+
+    return CSS(url=pdf_asset_url(static(path)), url_fetcher=_fetcher(), font_config=_font_config())
+
+
+def _render(html: str, stylesheets: tuple[str, ...] = ()) -> tuple[bytes, int]:
+    from weasyprint import HTML
+
+    if len(_image_cache) > PDF_IMAGE_CACHE_MAX_ENTRIES:
+        _image_cache.clear()
+    document = HTML(string=html, base_url=pdf_base_url(), url_fetcher=_fetcher()).render(
+        font_config=_font_config(),
+        stylesheets=[pdf_stylesheet(path) for path in stylesheets],
+        cache=_image_cache,
+    )
+    return document.write_pdf(), len(document.pages)
+
+
+def _warm_worker(stylesheets: tuple[str, ...]) -> None:
+    """Inicializador dos processos do pool: Django, fontes e folhas de estilo carregados antes do 1º job."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    _render("<p>GEPUB</p>", stylesheets)
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+
+    workers = int(getattr(settings, "PDF_RENDER_WORKERS", 0))
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(PRELOADED_STYLESHEETS,),
+            )
+        return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def submit_pdf_render(html: str, *, stylesheets=()) -> Future:
+    """
+    Agenda a renderização e devolve um Future com (bytes do PDF, páginas). Sem
+    pool configurado, renderiza no próprio processo e devolve o Future pronto.
+    """
+    stylesheets = tuple(stylesheets)
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(_render, html, stylesheets)
+        except BrokenProcessPool:
+            shutdown_pdf_pool()
+
+    future: Future = Future()
+    try:
+        future.set_result(_render(html, stylesheets))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def render_pdf(html: str, *, stylesheets=()) -> bytes:
+    timeout = int(getattr(settings, "PDF_RENDER_TIMEOUT_SECONDS", 120))
+    pdf_bytes, _pages = submit_pdf_render(html, stylesheets=stylesheets).result(timeout=timeout)
+    return pdf_bytes
+
+
+def enqueue_pdf_job(request, *, html: str, filename: str, title: str, stylesheets=()):
+    """Grava o HTML do relatório e agenda a renderização em segundo plano."""
+    from django.core.files.base import ContentFile
+
+    from .models import RelatorioPdfJob
+    from .tasks import render_pdf_job_task
+
+    user = getattr(request, "user", None)
+    job = RelatorioPdfJob.objects.create(
+        titulo=title[:255],
+        nome_arquivo=filename[:255],
+        folhas_estilo=list(stylesheets),
+        solicitado_por=user if getattr(user, "is_authenticated", False) else None,
+    )
+    job.html.save(f"{job.codigo}.html", ContentFile(html.encode("utf-8")), save=True)
+    try:
+        render_pdf_job_task.delay(job.pk)
+    except Exception:
+        # Broker indisponível: gera na própria requisição para não perder o relatório.
+        process_pdf_job(job.pk)
+        job.refresh_from_db()
+    return job
+
+
+def process_pdf_job(job_id: int):
+    from django.core.files.base import ContentFile
+    from django.utils import timezone
+
+    from .models import RelatorioPdfJob
+
+    job = RelatorioPdfJob.objects.filter(pk=job_id).first()
+    if job is None or job.status == RelatorioPdfJob.Status.CONCLUIDO:
+        return job
+
+    job.status = RelatorioPdfJob.Status.PROCESSANDO
+    job.save(update_fields=["status"])
+    try:
+        with job.html.open("rb") as fobj:
+            html = fobj.read().decode("utf-8")
+        timeout = int(getattr(settings, "PDF_RENDER_TIMEOUT_SECONDS", 120))
+        pdf_bytes, pages = submit_pdf_render(html, stylesheets=job.folhas_estilo).result(timeout=timeout)
+        job.arquivo.save(f"{job.codigo}.pdf", ContentFile(pdf_bytes), save=False)
+        job.paginas = pages
+        job.status = RelatorioPdfJob.Status.CONCLUIDO
+        job.erro = ""
+    except Exception as exc:
+        job.status = RelatorioPdfJob.Status.ERRO
+        job.erro = str(exc)[:2000]
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["arquivo", "paginas", "status", "erro", "concluido_em"])
+    return job
+
+
+def pdf_job_response(request, job):
+    """202 com o id do job para chamadas JSON/XHR; nas demais, redireciona para a página de acompanhamento."""
+    from django.http import JsonResponse
+    from django.shortcuts import redirect
+    from django.urls import reverse
+
+    status_url = reverse("core:relatorio_pdf_job", args=[job.codigo])
+    if _wants_json(request):
+        return JsonResponse(
+            {"job_id": str(job.codigo), "status": job.status, "status_url": status_url},
+            status=202,
+        )
+    return redirect(status_url)
+
+
+def _wants_json(request) -> bool:
+    return (
+        request.headers.get("x-requested-with") == "XMLHttpRequest"
+        or "application/json" in (request.headers.get("accept") or "")
+    )
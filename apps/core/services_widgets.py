@@ -0,0 +1,455 @@
+"""
+Widgets do dashboard: blocos carregados à parte da página principal.
+
+A página do dashboard (a "casca") sai com os painéis baratos — os snapshots de
+`apps.core.services_kpis` — e um espaço reservado para cada widget. O navegador
+busca todos os widgets ao mesmo tempo na rota `core:dashboard_widget`, de modo
+que o bloco mais lento não atrasa mais o primeiro byte da página.
+
+Cada widget registrado (`registrar_widget`) tem:
+- uma fonte de dados: função do escopo (`KpiEscopo`) cujo resultado vai para o
+  cache com chave por fonte + escopo e TTL próprio (widgets da mesma fonte
+  compartilham a entrada);
+- um template de fragmento, renderizado com `dados`;
+- os perfis que podem vê-lo (administradores sempre podem).
+
+No modo completo (`?completo=1`, usado para impressão e cópias estáticas da
+página), `renderizar_widgets` calcula as fontes em paralelo num pool de threads
+(DASHBOARD_WIDGET_WORKERS) e devolve o HTML de todos os fragmentos.
+
+O tempo de cada renderização (cálculo + template) é acumulado por widget em
+`metricas_widgets`, exposto aos administradores; os contadores são
+aproximados (leitura e gravação no cache sem trava entre processos).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.educacao.models_informatica import (
+    InformaticaAlertaFrequencia,
+    InformaticaAulaDiario,
+    InformaticaCurso,
+    InformaticaFrequencia,
+    InformaticaLaboratorio,
+    InformaticaListaEspera,
+    InformaticaMatricula,
+    InformaticaSolicitacaoVaga,
+    InformaticaTurma,
+)
+
+from .rbac import get_profile, is_admin, role_scope_base
+from .services_kpis import (
+    ESCOPO_VAZIO,
+    SECRETARIA,
+    KpiEscopo,
+    escopo_do_usuario,
+    escopo_pendencias,
+    ler_painel,
+    proximos_eventos_escopo,
+)
+
+_KEY_PREFIX = "gepub:dashboard:widget"
+_METRICAS_KEY = "gepub:dashboard:widgets:metricas"
+_metricas_lock = threading.Lock()
+
+
+def escopo_vinculo(user) -> KpiEscopo:
+    """Vínculo mais específico do perfil (unidade, secretaria ou município)."""
+    return escopo_pendencias(get_profile(user))
+
+
+def escopo_territorial(user) -> KpiEscopo:
+    """Escopo dos painéis territoriais (`escopo_do_usuario`), vazio se não houver."""
+    return escopo_do_usuario(user) or ESCOPO_VAZIO
+
+
+@dataclass(frozen=True)
+class Widget:
+    nome: str
+    template: str
+    calcular: Callable[[KpiEscopo], dict]
+    fonte: str
+    # Segundos no cache; None usa DASHBOARD_WIDGET_TTL_SECONDS e 0 desliga o cache.
+    ttl: int | None
+    escopo: Callable[[object], KpiEscopo]
+    # Papéis (role ou base do role) que veem o widget; vazio libera qualquer perfil ativo.
+    perfis: tuple[str, ...]
+
+    @property
+    def ttl_segundos(self) -> int:
+        if self.ttl is not None:
+            return max(0, int(self.ttl))
+        return max(0, int(getattr(settings, "DASHBOARD_WIDGET_TTL_SECONDS", 120)))
+
+    def permitido(self, user) -> bool:
+        if is_admin(user):
+            return True
+        profile = get_profile(user)
+        if not profile or not getattr(profile, "ativo", True):
+            return False
+        role = (getattr(profile, "role", "") or "").upper()
+        return not self.perfis or role in self.perfis or role_scope_base(role) in self.perfis
+
+
+@dataclass(frozen=True)
+class WidgetRenderizado:
+    nome: str
+    html: str
+    ms: float
+    acerto: bool
+
+
+WIDGETS: dict[str, Widget] = {}
+
+
+def registrar_widget(
+    nome: str,
+    *,
+    template: str,
+    fonte: str | None = None,
+    ttl: int | None = None,
+    escopo: Callable[[object], KpiEscopo] = escopo_vinculo,
+    perfis: tuple[str, ...] = (),
+):
+    def decorator(func):
+        WIDGETS[nome] = Widget(
+            nome=nome,
+            template=template,
+            calcular=func,
+            fonte=fonte or nome,
+            ttl=ttl,
+            escopo=escopo,
+            perfis=tuple(perfis),
+        )
+        return func
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Cálculo, renderização e métricas
+# ---------------------------------------------------------------------------
+
+
+def _chave(fonte: str, escopo: KpiEscopo) -> str:
+    return f"{_KEY_PREFIX}:{fonte}:{escopo.tipo or '-'}:{escopo.id}"
+
+
+def dados_widget(widget: Widget, escopo: KpiEscopo) -> tuple[dict, bool]:
+    """Dados da fonte do widget no escopo e se vieram do cache."""
+    ttl = widget.ttl_segundos
+    if not ttl:
+        return widget.calcular(escopo), False
+    chave = _chave(widget.fonte, escopo)
+    dados = cache.get(chave)
+    if dados is not None:
+        return dados, True
+    dados = widget.calcular(escopo)
+    cache.set(chave, dados, ttl)
+    return dados, False
+
+
+def _registrar_metrica(nome: str, ms: float, acerto: bool) -> None:
+    with _metricas_lock:
+        metricas = cache.get(_METRICAS_KEY) or {}
+        item = metricas.get(nome) or {"chamadas": 0, "acertos": 0, "total_ms": 0.0, "max_ms": 0.0}
+        item["chamadas"] += 1
+        item["acertos"] += int(acerto)
+        item["total_ms"] += ms
+        item["max_ms"] = max(item["max_ms"], ms)
+        item["ultimo_ms"] = ms
+        item["atualizado_em"] = timezone.now().isoformat()
+        metricas[nome] = item
+        cache.set(_METRICAS_KEY, metricas, None)
+
+
+def metricas_widgets() -> list[dict]:
+    """Tempo acumulado por widget desde a última limpeza do cache."""
+    metricas = cache.get(_METRICAS_KEY) or {}
+    linhas = []
+    for nome in sorted(metricas):
+        item = metricas[nome]
+        chamadas = item["chamadas"] or 1
+        linhas.append(
+            {
+                "widget": nome,
+                "chamadas": item["chamadas"],
+                "acertos_cache": item["acertos"],
+                "media_ms": round(item["total_ms"] / chamadas, 1),
+                "max_ms": round(item["max_ms"], 1),
+                "ultimo_ms": round(item["ultimo_ms"], 1),
+                "atualizado_em": item["atualizado_em"],
+            }
+        )
+    return linhas
+
+
+def _renderizar(widget: Widget, dados: dict) -> str:
+    return render_to_string(widget.template, {"widget": widget.nome, "dados": dados})
+
+
+def renderizar_widget(nome: str, user) -> WidgetRenderizado:
+    widget = WIDGETS[nome]
+    inicio = time.perf_counter()
+    dados, acerto = dados_widget(widget, widget.escopo(user))
+    html = _renderizar(widget, dados)
+    ms = (time.perf_counter() - inicio) * 1000
+    _registrar_metrica(nome, ms, acerto)
+    return WidgetRenderizado(nome=nome, html=html, ms=ms, acerto=acerto)
+
+
+def renderizar_widgets(nomes, user) -> dict[str, WidgetRenderizado]:
+    """
+    Renderiza vários widgets de uma vez, calculando cada fonte uma única vez e
+    as fontes distintas em paralelo (threads com conexões próprias ao banco).
+    """
+    widgets = [(WIDGETS[nome], WIDGETS[nome].escopo(user)) for nome in dict.fromkeys(nomes)]
+    pedidos: dict[tuple[str, KpiEscopo], Widget] = {}
+    for widget, escopo in widgets:
+        pedidos.setdefault((widget.fonte, escopo), widget)
+
+    def calcular(item):
+        (_, escopo), widget = item
+        inicio = time.perf_counter()
+        dados, acerto = dados_widget(widget, escopo)
+        return dados, acerto, (time.perf_counter() - inicio) * 1000
+
+    def calcular_em_thread(item):
+        try:
+            return calcular(item)
+        finally:
+            connections.close_all()
+
+    workers = int(getattr(settings, "DASHBOARD_WIDGET_WORKERS", 4))
+    itens = list(pedidos.items())
+    if workers <= 1 or len(itens) <= 1:
+        resultados = [calcular(item) for item in itens]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(itens)), thread_name_prefix="dashboard") as pool:
+            resultados = list(pool.map(calcular_em_thread, itens))
+    por_fonte = {chave: resultado for (chave, _), resultado in zip(itens, resultados)}
+
+    renderizados = {}
+    for widget, escopo in widgets:
+        dados, acerto, calculo_ms = por_fonte[(widget.fonte, escopo)]
+        inicio = time.perf_counter()
+        html = _renderizar(widget, dados)
+        ms = calculo_ms + (time.perf_counter() - inicio) * 1000
+        _registrar_metrica(widget.nome, ms, acerto)
+        renderizados[widget.nome] = WidgetRenderizado(nome=widget.nome, html=html, ms=ms, acerto=acerto)
+    return renderizados
+
+
+# ---------------------------------------------------------------------------
+# Widgets
+# ---------------------------------------------------------------------------
+
+
+@registrar_widget(
+    "pendencias",
+    template="core/dashboards/widgets/pendencias.html",
+    # A central já vem do snapshot (invalidado por sinais): não passa pelo cache.
+    ttl=0,
+    perfis=("MUNICIPAL",),
+)
+def _widget_pendencias(escopo: KpiEscopo) -> dict:
+    return ler_painel(escopo, "pendencias")
+
+
+@registrar_widget(
+    "calendario",
+    template="core/dashboards/widgets/calendario.html",
+    ttl=10 * 60,
+    escopo=escopo_territorial,
+    perfis=("EDU_SECRETARIO",),
+)
+def _widget_calendario(escopo: KpiEscopo) -> dict:
+    return {"proximos_eventos": proximos_eventos_escopo(escopo)}
+
+
+@registrar_widget(
+    "informatica_coordenacao",
+    template="core/dashboards/widgets/informatica_coordenacao.html",
+    fonte="informatica",
+    perfis=("EDU_COORD",),
+)
+@registrar_widget(
+    "informatica_resumo",
+    template="core/dashboards/widgets/informatica_resumo.html",
+    fonte="informatica",
+    perfis=("EDU_SECRETARIO",),
+)
+@registrar_widget(
+    "informatica",
+    template="core/dashboards/widgets/informatica_secretaria.html",
+    perfis=("EDU_SECRETARIO",),
+)
+def _widget_informatica(escopo: KpiEscopo) -> dict:
+    today = timezone.localdate()
+    unidade_id = escopo.unidade_id
+    secretaria_id = escopo.id if escopo.tipo == SECRETARIA else None
+    municipio_id = None if unidade_id else escopo.municipio_id
+
+    turmas_qs = InformaticaTurma.objects.select_related(
+        "curso",
+        "laboratorio",
+        "laboratorio__unidade",
+        "instrutor",
+    ).all()
+    if unidade_id:
+        turmas_qs = turmas_qs.filter(laboratorio__unidade_id=unidade_id)
+    elif secretaria_id:
+        turmas_qs = turmas_qs.filter(laboratorio__unidade__secretaria_id=secretaria_id)
+    elif municipio_id:
+        turmas_qs = turmas_qs.filter(curso__municipio_id=municipio_id)
+
+    turmas_ativas_qs = turmas_qs.filter(
+        status__in=[InformaticaTurma.Status.PLANEJADA, InformaticaTurma.Status.ATIVA]
+    )
+    turma_ids = list(turmas_ativas_qs.values_list("id", flat=True))
+
+    cursos_qs = InformaticaCurso.objects.all()
+    labs_qs = InformaticaLaboratorio.objects.all()
+    if unidade_id:
+        labs_qs = labs_qs.filter(unidade_id=unidade_id)
+        cursos_qs = cursos_qs.filter(id__in=turmas_qs.values_list("curso_id", flat=True))
+    elif secretaria_id:
+        labs_qs = labs_qs.filter(unidade__secretaria_id=secretaria_id)
+        cursos_qs = cursos_qs.filter(municipio_id=municipio_id) if municipio_id else cursos_qs.none()
+    elif municipio_id:
+        labs_qs = labs_qs.filter(unidade__secretaria__municipio_id=municipio_id)
+        cursos_qs = cursos_qs.filter(municipio_id=municipio_id)
+    else:
+        cursos_qs = cursos_qs.none()
+        labs_qs = labs_qs.none()
+
+    matriculas_ativas_qs = InformaticaMatricula.objects.filter(
+        status=InformaticaMatricula.Status.MATRICULADO,
+        turma_id__in=turma_ids,
+    )
+    matriculados_total = matriculas_ativas_qs.count()
+    alunos_externos_total = matriculas_ativas_qs.filter(externo_laboratorio=True).count()
+    vagas_total = sum(int(v) for v in turmas_ativas_qs.values_list("max_vagas", flat=True))
+    vagas_livres_total = max(0, int(vagas_total) - int(matriculados_total))
+
+    aulas_qs = InformaticaAulaDiario.objects.select_related(
+        "turma",
+        "turma__laboratorio",
+        "encontro",
+    ).filter(turma_id__in=turma_ids)
+    aulas_previstas_total = aulas_qs.exclude(status=InformaticaAulaDiario.Status.CANCELADA).count()
+    aulas_realizadas_total = aulas_qs.filter(
+        status__in=[InformaticaAulaDiario.Status.REALIZADA, InformaticaAulaDiario.Status.REPOSTA]
+    ).count()
+    aulas_pendentes_total = aulas_qs.filter(
+        status=InformaticaAulaDiario.Status.PREVISTA,
+        data_aula__lte=today,
+    ).count()
+    proximas_aulas = list(
+        aulas_qs.exclude(status=InformaticaAulaDiario.Status.CANCELADA)
+        .filter(data_aula__gte=today)
+        .order_by("data_aula", "encontro__hora_inicio", "id")[:8]
+    )
+
+    frequencias_qs = InformaticaFrequencia.objects.filter(aula__turma_id__in=turma_ids)
+    freq_total = frequencias_qs.count()
+    freq_presentes = frequencias_qs.filter(presente=True).count()
+    taxa_frequencia_media = round((freq_presentes / freq_total) * 100, 1) if freq_total else None
+
+    alertas_ativos_total = InformaticaAlertaFrequencia.objects.filter(
+        ativo=True,
+        matricula__turma_id__in=turma_ids,
+        matricula__status=InformaticaMatricula.Status.MATRICULADO,
+    ).count()
+
+    solicitacoes_pendentes_qs = InformaticaSolicitacaoVaga.objects.filter(
+        status=InformaticaSolicitacaoVaga.Status.PENDENTE
+    )
+    lista_espera_qs = InformaticaListaEspera.objects.filter(status=InformaticaListaEspera.Status.ATIVA)
+    if unidade_id:
+        solicitacoes_pendentes_qs = solicitacoes_pendentes_qs.filter(escola_origem_id=unidade_id)
+        lista_espera_qs = lista_espera_qs.filter(escola_origem_id=unidade_id)
+    elif secretaria_id:
+        solicitacoes_pendentes_qs = solicitacoes_pendentes_qs.filter(escola_origem__secretaria_id=secretaria_id)
+        lista_espera_qs = lista_espera_qs.filter(escola_origem__secretaria_id=secretaria_id)
+    elif municipio_id:
+        solicitacoes_pendentes_qs = solicitacoes_pendentes_qs.filter(curso__municipio_id=municipio_id)
+        lista_espera_qs = lista_espera_qs.filter(curso__municipio_id=municipio_id)
+    else:
+        solicitacoes_pendentes_qs = solicitacoes_pendentes_qs.none()
+        lista_espera_qs = lista_espera_qs.none()
+
+    turmas_ocupacao = list(
+        turmas_ativas_qs.annotate(
+            matriculados=Count(
+                "matriculas",
+                filter=Q(matriculas__status=InformaticaMatricula.Status.MATRICULADO),
+            )
+        )
+        .order_by("-matriculados", "codigo")[:10]
+    )
+    turmas_ocupacao_rows = []
+    for turma in turmas_ocupacao:
+        ocupacao_pct = round((int(turma.matriculados) / int(turma.max_vagas)) * 100, 1) if turma.max_vagas else 0
+        turmas_ocupacao_rows.append(
+            {
+                "id": turma.id,
+                "codigo": turma.codigo,
+                "curso": turma.curso.nome,
+                "laboratorio": turma.laboratorio.nome,
+                "matriculados": int(turma.matriculados),
+                "vagas": int(turma.max_vagas),
+                "ocupacao_pct": ocupacao_pct,
+            }
+        )
+
+    censo_por_escola = list(
+        matriculas_ativas_qs.values("escola_origem__nome")
+        .annotate(
+            total=Count("id"),
+            externos=Count("id", filter=Q(externo_laboratorio=True)),
+        )
+        .order_by("-total", "escola_origem__nome")[:10]
+    )
+    censo_por_laboratorio = list(
+        matriculas_ativas_qs.values("turma__laboratorio__nome", "turma__laboratorio__unidade__nome")
+        .annotate(total=Count("id"))
+        .order_by("-total", "turma__laboratorio__nome")[:10]
+    )
+
+    taxa_ocupacao_media = round((matriculados_total / vagas_total) * 100, 1) if vagas_total else None
+
+    return {
+        "cursos_total": cursos_qs.distinct().count(),
+        "laboratorios_total": labs_qs.distinct().count(),
+        "turmas_total": turmas_qs.count(),
+        "turmas_ativas_total": turmas_ativas_qs.count(),
+        "matriculados_total": matriculados_total,
+        "vagas_total": int(vagas_total),
+        "vagas_livres_total": int(vagas_livres_total),
+        "alunos_externos_total": alunos_externos_total,
+        "lista_espera_total": lista_espera_qs.count(),
+        "solicitacoes_pendentes_total": solicitacoes_pendentes_qs.count(),
+        "aulas_previstas_total": aulas_previstas_total,
+        "aulas_realizadas_total": aulas_realizadas_total,
+        "aulas_pendentes_total": aulas_pendentes_total,
+        "alertas_ativos_total": alertas_ativos_total,
+        "taxa_frequencia_media": taxa_frequencia_media,
+        "taxa_ocupacao_media": taxa_ocupacao_media,
+        "proximas_aulas": proximas_aulas,
+        "turmas_ocupacao_rows": turmas_ocupacao_rows,
+        "censo_por_escola": censo_por_escola,
+        "censo_por_laboratorio": censo_por_laboratorio,
+    }
@@ -0,0 +1,165 @@
+from django.apps import apps as django_apps
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Profile
+from apps.billing.models import AssinaturaMunicipio, PlanoMunicipal
+from apps.educacao.models import Turma
+from apps.org.models import Municipio, MunicipioModuloAtivo, Secretaria, SecretariaModuloAtivo, Unidade
+
+from .catalog_cache import (
+    SCOPE_MUNICIPIO,
+    SCOPE_ORG_TREE,
+    SCOPE_PLANOS,
+    SCOPE_SECRETARIA,
+    SCOPE_TENANT_HOSTS,
+    SCOPE_UNIDADE,
+    SCOPE_USER,
+    invalidate_catalog_scope,
+)
+from .services_kpis import (
+    filtro_escopos_afetados,
+    invalidar_paineis,
+    modelos_monitorados,
+    vinculos_kpi,
+    vinculos_kpi_gravados,
+)
+from .user_scope import org_tree_scope_id
+
+
+@receiver(post_save, sender=MunicipioModuloAtivo)
+@receiver(post_delete, sender=MunicipioModuloAtivo)
+@receiver(post_save, sender=AssinaturaMunicipio)
+@receiver(post_delete, sender=AssinaturaMunicipio)
+def invalidate_municipio_catalog(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_MUNICIPIO, instance.municipio_id)
+
+
+@receiver(post_save, sender=Municipio)
+@receiver(post_delete, sender=Municipio)
+def invalidate_municipio(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_MUNICIPIO, instance.pk)
+    # Slug/domínio/ativo podem ter mudado: descarta o mapa host→município (inclusive negativos).
+    invalidate_catalog_scope(SCOPE_TENANT_HOSTS, 0)
+
+
+@receiver(post_save, sender=SecretariaModuloAtivo)
+@receiver(post_delete, sender=SecretariaModuloAtivo)
+def invalidate_secretaria_catalog(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_SECRETARIA, instance.secretaria_id)
+
+
+def _pai_gravado(sender, instance, campo: str, **kwargs):
+    """Valor de `campo` (FK do pai) ainda no banco, antes do save; None para registros novos."""
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or instance.pk is None or (update_fields is not None and campo not in update_fields):
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(f"{campo}_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Secretaria)
+def capture_secretaria_municipio(sender, instance, **kwargs):
+    # Secretaria movida de município: a árvore do município antigo também fica obsoleta.
+    instance._gepub_municipio_anterior = _pai_gravado(sender, instance, "municipio", **kwargs)
+
+
+@receiver(post_save, sender=Secretaria)
+@receiver(post_delete, sender=Secretaria)
+def invalidate_secretaria(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_SECRETARIA, instance.pk)
+    invalidate_catalog_scope(SCOPE_ORG_TREE, org_tree_scope_id(municipio_id=instance.municipio_id))
+    anterior = getattr(instance, "_gepub_municipio_anterior", None)
+    if anterior and anterior != instance.municipio_id:
+        invalidate_catalog_scope(SCOPE_ORG_TREE, org_tree_scope_id(municipio_id=anterior))
+    invalidate_catalog_scope(SCOPE_ORG_TREE, org_tree_scope_id(secretaria_id=instance.pk))
+
+
+@receiver(pre_save, sender=Unidade)
+def capture_unidade_secretaria(sender, instance, **kwargs):
+    # Unidade movida de secretaria: invalida também a secretaria (e o município) de origem.
+    instance._gepub_secretaria_anterior = _pai_gravado(sender, instance, "secretaria", **kwargs)
+
+
+@receiver(post_save, sender=Unidade)
+@receiver(post_delete, sender=Unidade)
+def invalidate_unidade(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_UNIDADE, instance.pk)
+    # Escopos materializados (ids de unidades) da secretaria e do município, atuais e anteriores.
+    secretaria_ids = {instance.secretaria_id}
+    anterior = getattr(instance, "_gepub_secretaria_anterior", None)
+    if anterior:
+        secretaria_ids.add(anterior)
+    municipio_ids = set(
+        Secretaria.objects.filter(pk__in=secretaria_ids).values_list("municipio_id", flat=True)
+    )
+    for secretaria_id in secretaria_ids:
+        invalidate_catalog_scope(SCOPE_ORG_TREE, org_tree_scope_id(secretaria_id=secretaria_id))
+    for municipio_id in municipio_ids or {None}:
+        invalidate_catalog_scope(SCOPE_ORG_TREE, org_tree_scope_id(municipio_id=municipio_id))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_user_scope(sender, instance, **kwargs):
+    invalidate_catalog_scope(SCOPE_USER, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Turma.professores.through)
+def invalidate_professor_scope(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "pre_clear", "post_clear"}:
+        return
+    if reverse:
+        # instance é o usuário (user.turmas_ministradas.add(...)).
+        user_ids = {instance.pk}
+    elif action == "pre_clear":
+        # Em clear() o pk_set não é informado: captura os professores antes da remoção.
+        instance._gepub_professores_cleared = set(instance.professores.values_list("id", flat=True))
+        return
+    elif action == "post_clear":
+        user_ids = getattr(instance, "_gepub_professores_cleared", set())
+    else:
+        user_ids = set(pk_set or ())
+    for user_id in user_ids:
+        invalidate_catalog_scope(SCOPE_USER, user_id)
+
+
+@receiver(post_save, sender=PlanoMunicipal)
+@receiver(post_delete, sender=PlanoMunicipal)
+def invalidate_planos(sender, instance, **kwargs):
+    # Flags do plano valem para todas as assinaturas que o utilizam.
+    invalidate_catalog_scope(SCOPE_PLANOS, 0)
+
+
+# Snapshots de KPIs: cada modelo monitorado invalida os painéis que dependem dele.
+KPI_PAINEIS_POR_MODELO = modelos_monitorados()
+
+
+def capture_kpi_vinculos(sender, instance, **kwargs):
+    # Guarda os vínculos gravados: um registro movido de unidade invalida também a antiga.
+    if kwargs.get("raw"):
+        return
+    instance._gepub_kpi_vinculos = vinculos_kpi_gravados(instance)
+
+
+def invalidate_kpi_snapshots(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    paineis = KPI_PAINEIS_POR_MODELO.get(sender._meta.label)
+    if not paineis:
+        return
+    vinculos = [vinculos_kpi(instance)]
+    anteriores = getattr(instance, "_gepub_kpi_vinculos", None)
+    if anteriores is not None:
+        vinculos.append({**vinculos[0], **anteriores})
+    invalidar_paineis(paineis, filtro_escopos_afetados(*vinculos))
+
+
+for _label in KPI_PAINEIS_POR_MODELO:
+    try:
+        _model = django_apps.get_model(_label)
+    except LookupError:
+        # App opcional fora de INSTALLED_APPS.
+        continue
+    pre_save.connect(capture_kpi_vinculos, sender=_model, dispatch_uid=f"kpi_snapshot_pre_save_{_label}")
+    post_save.connect(invalidate_kpi_snapshots, sender=_model, dispatch_uid=f"kpi_snapshot_save_{_label}")
+    post_delete.connect(invalidate_kpi_snapshots, sender=_model, dispatch_uid=f"kpi_snapshot_delete_{_label}")
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from celery import shared_task
+
+from .services_kpis import atualizar_snapshots
+from .services_pdf import process_pdf_job
+
+
+@shared_task(name="core.render_pdf_job")
+def render_pdf_job_task(job_id: int):
+    job = process_pdf_job(job_id)
+    return job.status if job else None
+
+
+@shared_task(name="core.atualizar_kpis")
+def atualizar_kpis_task():
+    return atualizar_snapshots()
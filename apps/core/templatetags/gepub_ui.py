@@ -1,5 +1,9 @@
 from django import template
+from django.urls import reverse
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from apps.core.services_widgets import renderizar_widget
 
 register = template.Library()
 
@@ -34,3 +38,25 @@ def get_item(obj, key):
     except Exception:
         return ""
     return ""
+
+
+@register.simple_tag(takes_context=True)
+def dashboard_widget(context, nome):
+    """
+    Espaço de um widget do dashboard (apps.core.services_widgets).
+    - modo normal: marcador que o dashboard.html preenche buscando o fragmento;
+    - modo completo (`widgets_prontos` no contexto): o HTML já renderizado.
+    """
+    prontos = context.get("widgets_prontos")
+    if prontos is not None:
+        if nome not in prontos:
+            prontos[nome] = renderizar_widget(nome, context.request.user)
+        return mark_safe(prontos[nome].html)
+    return format_html(
+        '<div class="dash-widget" data-dashboard-widget="{}" data-dashboard-widget-nome="{}" aria-busy="true">'
+        '<div class="gp-loading-bar"></div>'
+        '<noscript><a href="?completo=1">Carregar o painel completo</a></noscript>'
+        "</div>",
+        reverse("core:dashboard_widget", args=[nome]),
+        nome,
+    )
@@ -1,29 +1,71 @@
+import json
+import shutil
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.template import Context, Template
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.http import HttpResponse
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import Http404, HttpResponse
 from django.test import RequestFactory
-from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, reverse
 from django.utils import timezone
 
 from apps.accounts.models import Profile
 from apps.billing.models import PlanoMunicipal
 from apps.billing.services import get_assinatura_ativa
-from apps.core.middleware import RBACMiddleware, _build_app_url
+from apps.core.auth_context import get_auth_context
+from apps.core.catalog_cache import clear_local_catalog_cache
+from apps.core.context_processors import permissions as permissions_context
+from apps.core.exports import export_pdf_table, stream_csv, stream_xlsx
+from apps.core.middleware import RBACMiddleware, TenantHostMiddleware, _build_app_url
+from apps.core.module_access import module_enabled_for_user
 from apps.core.models import (
     DocumentoEmitido,
+    KpiSnapshot,
     PortalBanner,
     PortalHomeBloco,
     PortalMenuPublico,
     PortalMunicipalConfig,
     PortalPaginaPublica,
     PortalNoticia,
+    RelatorioPdfJob,
     TransparenciaEventoPublico,
 )
-from apps.core.rbac import allowed_roles_for_manager_role, can, role_scope_base
+from apps.core.rbac import (
+    allowed_roles_for_manager_role,
+    can,
+    get_user_perms,
+    role_scope_base,
+    scope_filter_alunos,
+    scope_filter_matriculas,
+    scope_filter_turmas,
+)
+from apps.core.route_classifier import (
+    ROUTE_ADMIN,
+    ROUTE_APP,
+    ROUTE_STATIC,
+    PublicPathIndex,
+    resolve_route,
+    route_kind,
+)
+from apps.core.services_kpis import PAINEIS, KpiEscopo, atualizar_snapshots, escopo_do_usuario, ler_painel
+from apps.core.services_pdf import clear_pdf_asset_cache, load_local_asset, pdf_asset_url
+from apps.core.services_widgets import metricas_widgets
 from apps.core.services_portal_seed import ensure_portal_seed_for_municipio
+from apps.core.views_relatorios import relatorio_pdf_job
 from apps.core.views_codes import _resolve_code_to_url, get_code_routes
+from apps.educacao.models import Aluno, Matricula, RenovacaoMatricula, Turma
+from apps.educacao.models_informatica import InformaticaLaboratorio
 from apps.org.models import (
     Municipio,
     MunicipioModuloAtivo,
@@ -32,6 +74,7 @@ from apps.org.models import (
     OnboardingStep,
     Secretaria,
     SecretariaModuloAtivo,
+    Unidade,
 )
 from apps.processos.models import ProcessoAdministrativo
 
@@ -190,6 +233,65 @@ class RBACTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class AuthContextTestCase(TestCase):
+    def _make_user(self, username: str, role: str, municipio=None):
+        user = User.objects.create_user(username=username, password="x")
+        profile = getattr(user, "profile", None)
+        if not profile:
+            profile = Profile.objects.create(user=user, role=role, ativo=True)
+        else:
+            profile.role = role
+            profile.ativo = True
+        profile.must_change_password = False
+        profile.municipio = municipio
+        profile.save(update_fields=["role", "ativo", "must_change_password", "municipio"])
+        return user
+
+    def test_context_matches_rbac_can_for_macro_and_fine_perms(self):
+        user = self._make_user("auth_ctx_sec", "EDU_SECRETARIO")
+        ctx = get_auth_context(user)
+        for perm in sorted(get_user_perms(user)) + ["saude", "billing.admin", "financeiro.view", "inexistente"]:
+            self.assertEqual(ctx.can(perm), can(user, perm), msg=perm)
+        self.assertTrue(ctx.can("educacao"))
+        self.assertIsInstance(ctx.perms, frozenset)
+
+    def test_context_is_memoized_and_rebuilt_when_profile_changes(self):
+        user = self._make_user("auth_ctx_prof", "PROFESSOR")
+        ctx = get_auth_context(user)
+        self.assertIs(get_auth_context(user), ctx)
+        self.assertFalse(ctx.can("saude"))
+
+        user.profile.role = "NEE"
+        rebuilt = get_auth_context(user)
+        self.assertIsNot(rebuilt, ctx)
+        self.assertTrue(rebuilt.can("saude"))
+
+    def test_permissions_context_processor_resolves_catalogs_once(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        municipio = Municipio.objects.create(nome="Cidade Contexto", uf="MA", ativo=True)
+        get_assinatura_ativa(municipio)
+        MunicipioModuloAtivo.objects.create(municipio=municipio, modulo="financeiro", ativo=True)
+        user = self._make_user("auth_ctx_mun", "MUNICIPAL", municipio=municipio)
+        user = User.objects.select_related("profile", "profile__municipio").get(pk=user.pk)
+
+        request = RequestFactory().get("/")
+        request.user = user
+        request.session = {}
+        with CaptureQueriesContext(connection) as captured:
+            data = permissions_context(request)
+        catalog_queries = [
+            q["sql"]
+            for q in captured.captured_queries
+            if "modulo" in q["sql"].lower() or "assinatura" in q["sql"].lower()
+        ]
+        # uma leitura do catálogo de módulos + uma leitura da assinatura.
+        self.assertEqual(len(catalog_queries), 2, msg=catalog_queries)
+        self.assertTrue(data["can_financeiro"])
+        self.assertFalse(data["can_processos"])
+        self.assertIs(data["gepub_auth"], request.gepub_auth)
+
+
 class GoCodeTestCase(TestCase):
     def _make_user(self, username: str, role: str):
         user = User.objects.create_user(username=username, password="x")
@@ -614,10 +716,293 @@ class DashboardPendenciasTestCase(TestCase):
         self.client.force_login(user)
         response = self.client.get(reverse("core:dashboard"))
         self.assertEqual(response.status_code, 200)
+        # A central é um widget: a casca traz o marcador e o fragmento vem à parte.
+        self.assertContains(response, reverse("core:dashboard_widget", args=["pendencias"]))
+
+        response = self.client.get(reverse("core:dashboard_widget", args=["pendencias"]))
+        self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Central de pendências")
         self.assertContains(response, "Processos em atraso")
 
 
+class KpiSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        self.municipio = Municipio.objects.create(nome="Cidade KPI", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="Educação")
+        self.unidade = Unidade.objects.create(secretaria=self.secretaria, nome="Escola KPI", tipo=Unidade.Tipo.EDUCACAO)
+        outra = Unidade.objects.create(secretaria=self.secretaria, nome="Escola Vizinha", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma = Turma.objects.create(unidade=self.unidade, nome="Turma KPI", ano_letivo=2026)
+        turma_vizinha = Turma.objects.create(unidade=outra, nome="Turma Vizinha", ano_letivo=2026)
+        aluno = Aluno.objects.create(nome="Aluno KPI")
+        Matricula.objects.create(aluno=aluno, turma=self.turma)
+        Matricula.objects.create(aluno=Aluno.objects.create(nome="Aluno Vizinho"), turma=turma_vizinha)
+
+    def _user(self, username, role, **vinculos):
+        user = User.objects.create_user(username=username, password="x")
+        profile = user.profile
+        profile.role = role
+        profile.ativo = True
+        profile.must_change_password = False
+        profile.municipio = self.municipio
+        for campo, valor in vinculos.items():
+            setattr(profile, campo, valor)
+        profile.save()
+        return User.objects.select_related("profile").get(pk=user.pk)
+
+    def test_escopo_do_usuario_follows_scope_rules(self):
+        admin = User.objects.create_superuser(username="kpi_admin", password="x", email="kpi@example.com")
+        self.assertEqual(escopo_do_usuario(admin), KpiEscopo(KpiSnapshot.EscopoTipo.GLOBAL))
+        unidade = self._user("kpi_unidade", "UNIDADE", unidade=self.unidade)
+        self.assertEqual(escopo_do_usuario(unidade), KpiEscopo(KpiSnapshot.EscopoTipo.UNIDADE, self.unidade.pk))
+        # Vínculo só com a unidade: a secretaria vem dela, como nos scope_filter_*.
+        secretaria = self._user("kpi_secretaria", "SECRETARIA", unidade=self.unidade)
+        self.assertEqual(
+            escopo_do_usuario(secretaria), KpiEscopo(KpiSnapshot.EscopoTipo.SECRETARIA, self.secretaria.pk)
+        )
+        self.assertIsNone(escopo_do_usuario(self._user("kpi_prof", "PROFESSOR")))
+
+    def test_paineis_match_scope_filters(self):
+        for role, painel, vinculos in (
+            ("UNIDADE", "unidade", {"unidade": self.unidade}),
+            ("SECRETARIA", "secretaria", {"secretaria": self.secretaria}),
+        ):
+            user = self._user(f"kpi_{painel}", role, **vinculos)
+            dados = ler_painel(escopo_do_usuario(user), painel)
+            self.assertEqual(dados["turmas_total"], scope_filter_turmas(user, Turma.objects.all()).count())
+            self.assertEqual(dados["alunos_total"], scope_filter_alunos(user, Aluno.objects.all()).count())
+
+    def test_dashboard_reads_snapshot_and_follows_invalidation(self):
+        user = self._user("kpi_dash", "UNIDADE", unidade=self.unidade)
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(response.context["matriculas_total"], 1)
+        snapshot = KpiSnapshot.objects.get(
+            escopo_tipo=KpiSnapshot.EscopoTipo.UNIDADE, escopo_id=self.unidade.pk, painel="unidade"
+        )
+
+        with mock.patch.dict(PAINEIS, {"unidade": mock.Mock(side_effect=AssertionError("recalculou"))}):
+            response = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(response.context["matriculas_total"], 1)
+
+        Matricula.objects.create(aluno=Aluno.objects.create(nome="Aluno Novo"), turma=self.turma)
+        snapshot.refresh_from_db()
+        self.assertIsNotNone(snapshot.invalidado_em)
+
+        response = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(response.context["matriculas_total"], 2)
+        snapshot.refresh_from_db()
+        self.assertIsNone(snapshot.invalidado_em)
+
+    def test_atualizar_snapshots_refreshes_stale_and_expired(self):
+        escopo = KpiEscopo(KpiSnapshot.EscopoTipo.SECRETARIA, self.secretaria.pk)
+        self.assertEqual(ler_painel(escopo, "secretaria")["turmas_total"], 2)
+        Turma.objects.create(unidade=self.unidade, nome="Turma Extra", ano_letivo=2026)
+
+        self.assertEqual(atualizar_snapshots(), 2)  # o invalidado + o painel global do administrador
+        snapshot = KpiSnapshot.objects.get(escopo_tipo=escopo.tipo, escopo_id=escopo.id, painel="secretaria")
+        self.assertEqual(snapshot.dados["turmas_total"], 3)
+        self.assertEqual(atualizar_snapshots(), 0)
+
+        KpiSnapshot.objects.update(calculado_em=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(atualizar_snapshots(), 2)
+
+    def test_invalidation_is_limited_to_affected_scopes(self):
+        vizinha = Unidade.objects.get(nome="Escola Vizinha")
+        outra_secretaria = Secretaria.objects.create(municipio=self.municipio, nome="Saúde")
+        escopos = {
+            "unidade": KpiEscopo(KpiSnapshot.EscopoTipo.UNIDADE, self.unidade.pk),
+            "vizinha": KpiEscopo(KpiSnapshot.EscopoTipo.UNIDADE, vizinha.pk),
+            "secretaria": KpiEscopo(KpiSnapshot.EscopoTipo.SECRETARIA, self.secretaria.pk),
+            "outra_secretaria": KpiEscopo(KpiSnapshot.EscopoTipo.SECRETARIA, outra_secretaria.pk),
+            "municipio": KpiEscopo(KpiSnapshot.EscopoTipo.MUNICIPIO, self.municipio.pk),
+            "global": KpiEscopo(KpiSnapshot.EscopoTipo.GLOBAL),
+        }
+
+        def invalidados_por(alteracao):
+            for escopo in escopos.values():
+                ler_painel(escopo, "educacao_index")
+            alteracao()
+            marcados = set(
+                KpiSnapshot.objects.filter(painel="educacao_index", invalidado_em__isnull=False).values_list(
+                    "escopo_tipo", "escopo_id"
+                )
+            )
+            return {nome for nome, escopo in escopos.items() if (escopo.tipo, escopo.id) in marcados}
+
+        self.assertEqual(
+            invalidados_por(
+                lambda: Matricula.objects.create(aluno=Aluno.objects.create(nome="Aluno Escopo"), turma=self.turma)
+            ),
+            {"unidade", "secretaria", "municipio", "global"},
+        )
+
+        # Turma movida de unidade: a de origem também deixa de valer.
+        def mover_turma():
+            self.turma.unidade = vizinha
+            self.turma.save()
+
+        self.assertEqual(invalidados_por(mover_turma), {"unidade", "vizinha", "secretaria", "municipio", "global"})
+
+        # Vínculo só com a secretaria: vale para ela e para as unidades abaixo dela.
+        self.assertEqual(
+            invalidados_por(
+                lambda: RenovacaoMatricula.objects.create(
+                    secretaria=self.secretaria,
+                    descricao="Renovação",
+                    ano_letivo=2027,
+                    data_inicio=timezone.localdate(),
+                    data_fim=timezone.localdate(),
+                )
+            ),
+            {"unidade", "vizinha", "secretaria", "municipio", "global"},
+        )
+        self.assertNotIn(
+            "outra_secretaria",
+            invalidados_por(lambda: Turma.objects.create(unidade=vizinha, nome="Turma Nova", ano_letivo=2026)),
+        )
+
+
+class DashboardWidgetsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        self.municipio = Municipio.objects.create(nome="Cidade Widgets", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="Educação")
+        self.unidade = Unidade.objects.create(
+            secretaria=self.secretaria, nome="Escola Widgets", tipo=Unidade.Tipo.EDUCACAO
+        )
+        InformaticaLaboratorio.objects.create(nome="Lab Widgets", unidade=self.unidade)
+
+    def _user(self, username, role, **vinculos):
+        user = User.objects.create_user(username=username, password="x")
+        profile = user.profile
+        profile.role = role
+        profile.ativo = True
+        profile.must_change_password = False
+        profile.municipio = self.municipio
+        for campo, valor in vinculos.items():
+            setattr(profile, campo, valor)
+        profile.save()
+        return user
+
+    def test_shell_defers_widget_and_fragment_is_cached_by_scope(self):
+        self.client.force_login(self._user("widget_coord", "EDU_COORD", unidade=self.unidade))
+        url = reverse("core:dashboard_widget", args=["informatica_coordenacao"])
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("core:dashboard"))
+        self.assertContains(response, f'data-dashboard-widget="{url}"')
+        self.assertFalse([q for q in captured.captured_queries if "informatica" in q["sql"].lower()])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Turmas ativas/planejadas")
+        self.assertIn("calculado", response["Server-Timing"])
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertIn("cache", response["Server-Timing"])
+        self.assertFalse([q for q in captured.captured_queries if "informatica" in q["sql"].lower()])
+
+        metricas = {m["widget"]: m for m in metricas_widgets()}
+        self.assertEqual(metricas["informatica_coordenacao"]["chamadas"], 2)
+        self.assertEqual(metricas["informatica_coordenacao"]["acertos_cache"], 1)
+
+    def test_widget_access_follows_profile(self):
+        self.client.force_login(self._user("widget_unidade", "UNIDADE", unidade=self.unidade))
+        response = self.client.get(reverse("core:dashboard_widget", args=["informatica_coordenacao"]))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse("core:dashboard_widget", args=["inexistente"]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse("core:dashboard_widgets_metricas"))
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create_superuser(username="widget_admin", password="x", email="widget@example.com")
+        admin.profile.must_change_password = False
+        admin.profile.save(update_fields=["must_change_password"])
+        self.client.force_login(admin)
+        response = self.client.get(reverse("core:dashboard_widgets_metricas"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"widgets": []})
+
+    @override_settings(DASHBOARD_WIDGET_WORKERS=1)
+    def test_completo_renders_widgets_inline(self):
+        self.client.force_login(self._user("widget_sec", "EDU_SECRETARIO", secretaria=self.secretaria))
+        response = self.client.get(reverse("core:dashboard"), {"completo": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "data-dashboard-widget=")
+        self.assertContains(response, "Curso de Informática — visão executiva")
+        self.assertContains(response, '<div class="admin-kpi__label">Curso de Informática</div>')
+        self.assertEqual(
+            {m["widget"] for m in metricas_widgets()}, {"informatica", "informatica_resumo", "calendario"}
+        )
+
+def _catalog_queries(captured) -> list[str]:
+    sql_list = []
+    for query in captured.captured_queries:
+        sql = query["sql"].lower()
+        if ("moduloativo" in sql or "assinaturamunicipio" in sql) and "count(" not in sql:
+            sql_list.append(query["sql"])
+    return sql_list
+
+
+class CatalogCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        self.municipio = Municipio.objects.create(nome="Cidade Cache", uf="MA", ativo=True)
+        get_assinatura_ativa(self.municipio)
+        MunicipioModuloAtivo.objects.create(municipio=self.municipio, modulo="financeiro", ativo=True)
+        self.user = User.objects.create_user(username="muni_cache", password="Senha@123")
+        profile = self.user.profile
+        profile.role = "MUNICIPAL"
+        profile.municipio = self.municipio
+        profile.ativo = True
+        profile.must_change_password = False
+        profile.save(update_fields=["role", "municipio", "ativo", "must_change_password"])
+        _mark_onboarding_completed(self.user, municipio=self.municipio)
+
+    def _fresh_user(self):
+        return User.objects.select_related("profile", "profile__municipio").get(pk=self.user.pk)
+
+    def test_dashboard_get_in_steady_state_performs_no_catalog_queries(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("core:dashboard"))
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_catalog_queries(captured), [])
+
+    def test_catalog_is_shared_across_requests_and_invalidated_by_signals(self):
+        self.assertTrue(module_enabled_for_user(self._fresh_user(), "financeiro"))
+        self.assertFalse(module_enabled_for_user(self._fresh_user(), "processos"))
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertFalse(module_enabled_for_user(self._fresh_user(), "processos"))
+        self.assertEqual(_catalog_queries(captured), [])
+
+        MunicipioModuloAtivo.objects.create(municipio=self.municipio, modulo="processos", ativo=True)
+        self.assertTrue(module_enabled_for_user(self._fresh_user(), "processos"))
+
+        MunicipioModuloAtivo.objects.filter(municipio=self.municipio, modulo="processos").delete()
+        self.assertFalse(module_enabled_for_user(self._fresh_user(), "processos"))
+
+    def test_plan_catalog_follows_subscription_changes(self):
+        auth = get_auth_context(self._fresh_user())
+        self.assertTrue(auth.plan_catalog[2])
+
+        assinatura = get_assinatura_ativa(self.municipio, criar_default=False)
+        assinatura.plano = PlanoMunicipal.objects.get(codigo=PlanoMunicipal.Codigo.CONSORCIO)
+        assinatura.save(update_fields=["plano", "atualizado_em"])
+
+        auth = get_auth_context(self._fresh_user())
+        self.assertTrue(auth.has_plan_app("CAMARA"))
+
+
 @override_settings(
     GEPUB_PUBLIC_ROOT_DOMAIN="gepub.com.br",
     GEPUB_APP_HOSTS=["app.gepub.com.br", "127.0.0.1", "localhost"],
@@ -687,6 +1072,283 @@ class PublicTenantHostRoutingTestCase(TestCase):
     GEPUB_APP_CANONICAL_HOST="",
     ALLOWED_HOSTS=["testserver", "localhost", "127.0.0.1", "159.203.135.83"],
 )
+@override_settings(
+    GEPUB_PUBLIC_ROOT_DOMAIN="gepub.com.br",
+    GEPUB_APP_HOSTS=["app.gepub.com.br", "127.0.0.1", "localhost"],
+    ALLOWED_HOSTS=[".gepub.com.br", "prefeitura.exemplo.gov.br", "testserver"],
+)
+class TenantHostResolutionCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        self.municipio = Municipio.objects.create(
+            nome="Cidade Host",
+            uf="MA",
+            slug_site="cidade-host",
+            dominio_personalizado="prefeitura.exemplo.gov.br",
+        )
+        self.middleware = TenantHostMiddleware(lambda request: HttpResponse("ok"))
+
+    def _call(self, host: str):
+        request = RequestFactory().get("/", HTTP_HOST=host)
+        self.middleware(request)
+        return request
+
+    def test_slug_lookup_is_cached_between_requests(self):
+        request = self._call("cidade-host.gepub.com.br")
+        self.assertEqual(request.current_municipio.pk, self.municipio.pk)
+        self.assertEqual(request.gepub_host_kind, "tenant_public")
+
+        with self.assertNumQueries(0):
+            request = self._call("cidade-host.gepub.com.br")
+        self.assertEqual(request.current_municipio.nome, "Cidade Host")
+
+    def test_unknown_slug_is_negatively_cached_until_municipio_saved(self):
+        request = self._call("nova-cidade.gepub.com.br")
+        self.assertTrue(request.tenant_lookup_failed)
+        with self.assertNumQueries(0):
+            self._call("nova-cidade.gepub.com.br")
+
+        Municipio.objects.create(nome="Nova Cidade", uf="MA", slug_site="nova-cidade")
+        request = self._call("nova-cidade.gepub.com.br")
+        self.assertTrue(request.is_public_tenant)
+        self.assertEqual(request.current_municipio.slug_site, "nova-cidade")
+
+    def test_custom_domain_resolves_tenant(self):
+        request = self._call("prefeitura.exemplo.gov.br")
+        self.assertTrue(request.is_public_tenant)
+        self.assertEqual(request.current_municipio.pk, self.municipio.pk)
+        self.assertEqual(request.current_municipio_slug, "cidade-host")
+
+        self.municipio.ativo = False
+        self.municipio.save()
+        request = self._call("prefeitura.exemplo.gov.br")
+        self.assertIsNone(request.current_municipio)
+
+
+class RouteClassifierTestCase(TestCase):
+    def test_public_index_matches_same_paths_as_prefix_scan(self):
+        index = PublicPathIndex(RBACMiddleware.PUBLIC_PATH_PREFIXES, RBACMiddleware.PUBLIC_EXACT_PATHS)
+        samples = [
+            "/",
+            "/noticias",
+            "/noticias/2024/",
+            "/accounts/login/",
+            "/accounts/logout/",
+            "/avaliacoes/validar/prova/abc/",
+            "/avaliacoes/",
+            "/educacao/",
+            "/transparencia/despesas/",
+        ]
+        for path in samples:
+            expected = path in RBACMiddleware.PUBLIC_EXACT_PATHS or any(
+                path.startswith(prefix) for prefix in RBACMiddleware.PUBLIC_PATH_PREFIXES
+            )
+            self.assertEqual(index.matches(path), expected, path)
+
+        loose = PublicPathIndex(("/foo",), ())
+        self.assertTrue(loose.matches("/foobar/"))
+
+    def test_route_kind_classifies_static_and_admin(self):
+        factory = RequestFactory()
+        self.assertEqual(route_kind(factory.get("/static/css/app.css")), ROUTE_STATIC)
+        self.assertEqual(route_kind(factory.get("/admin/")), ROUTE_ADMIN)
+        self.assertEqual(route_kind(factory.get("/educacao/")), ROUTE_APP)
+
+    def test_resolve_route_runs_once_per_request(self):
+        request = RequestFactory().get("/rota-que-nao-existe/")
+        with mock.patch("apps.core.route_classifier.resolve", side_effect=Resolver404) as resolver:
+            self.assertIsNone(resolve_route(request))
+            self.assertIsNone(resolve_route(request))
+        self.assertEqual(resolver.call_count, 1)
+
+
+class MaterializedUserScopeTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_catalog_cache()
+        self.municipio = Municipio.objects.create(nome="Cidade Escopo", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="Educação")
+        self.unidade = Unidade.objects.create(secretaria=self.secretaria, nome="Escola A", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma_a = Turma.objects.create(unidade=self.unidade, nome="Turma A", ano_letivo=2026)
+        self.turma_b = Turma.objects.create(unidade=self.unidade, nome="Turma B", ano_letivo=2026)
+        aluno = Aluno.objects.create(nome="Aluno Escopo")
+        Matricula.objects.create(aluno=aluno, turma=self.turma_a)
+        Matricula.objects.create(aluno=aluno, turma=self.turma_b)
+
+    def _user(self, username, role):
+        user = User.objects.create_user(username=username, password="x")
+        user.profile.role = role
+        user.profile.ativo = True
+        user.profile.municipio = self.municipio
+        user.profile.save()
+        return User.objects.select_related("profile").get(pk=user.pk)
+
+    def test_professor_scope_follows_turma_links_without_distinct(self):
+        professor = self._user("prof_escopo", "PROFESSOR")
+        self.turma_a.professores.add(professor)
+        self.turma_b.professores.add(professor)
+
+        professor = User.objects.select_related("profile").get(pk=professor.pk)
+        alunos = scope_filter_alunos(professor, Aluno.objects.all())
+        self.assertFalse(alunos.query.distinct)
+        self.assertEqual(alunos.count(), 1)
+        self.assertEqual(scope_filter_matriculas(professor, Matricula.objects.all()).count(), 2)
+
+        self.turma_b.professores.remove(professor)
+        professor = User.objects.select_related("profile").get(pk=professor.pk)
+        self.assertEqual(
+            list(scope_filter_turmas(professor, Turma.objects.all()).values_list("nome", flat=True)),
+            ["Turma A"],
+        )
+
+    def test_municipal_scope_is_cached_and_sees_new_unidades(self):
+        gestor = self._user("gestor_escopo", "MUNICIPAL")
+        self.assertEqual(scope_filter_turmas(gestor, Turma.objects.all()).count(), 2)
+
+        gestor = User.objects.select_related("profile").get(pk=gestor.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(scope_filter_turmas(gestor, Turma.objects.all()).count(), 2)
+
+        nova = Unidade.objects.create(secretaria=self.secretaria, nome="Escola B", tipo=Unidade.Tipo.EDUCACAO)
+        Turma.objects.create(unidade=nova, nome="Turma C", ano_letivo=2026)
+        gestor = User.objects.select_related("profile").get(pk=gestor.pk)
+        self.assertEqual(scope_filter_turmas(gestor, Turma.objects.all()).count(), 3)
+
+    def test_moving_unidade_or_secretaria_invalidates_the_old_parent(self):
+        gestor = self._user("gestor_mudanca", "MUNICIPAL")
+        outro_municipio = Municipio.objects.create(nome="Cidade Vizinha", uf="MA")
+        outra_secretaria = Secretaria.objects.create(municipio=outro_municipio, nome="Educação Vizinha")
+
+        def turmas_visiveis():
+            user = User.objects.select_related("profile").get(pk=gestor.pk)
+            return scope_filter_turmas(user, Turma.objects.all()).count()
+
+        self.assertEqual(turmas_visiveis(), 2)
+        self.unidade.secretaria = outra_secretaria
+        self.unidade.save()
+        self.assertEqual(turmas_visiveis(), 0)
+
+        self.unidade.secretaria = self.secretaria
+        self.unidade.save(update_fields=["secretaria"])
+        self.assertEqual(turmas_visiveis(), 2)
+        self.secretaria.municipio = outro_municipio
+        self.secretaria.save()
+        self.assertEqual(turmas_visiveis(), 0)
+
+
+class StreamingExportTestCase(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        for idx in range(5):
+            User.objects.create_user(username=f"export_{idx}", password="x", first_name=f"Nome;{idx}")
+
+    def _qs(self):
+        return get_user_model().objects.filter(username__startswith="export_").order_by("username")
+
+    def test_stream_csv_writes_header_first_and_maps_queryset_rows(self):
+        qs = self._qs()
+        response = stream_csv("usuarios.csv", ["Username", "Nome"], qs, row_mapper=lambda u: [u.username, u.first_name])
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="usuarios.csv"')
+
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), "\ufeffUsername;Nome\r\n".encode("utf-8"))
+        body = b"".join(chunks).decode("utf-8")
+        self.assertEqual(body.splitlines()[0], 'export_0;"Nome;0"')
+        self.assertEqual(len(body.splitlines()), 5)
+        # Lido via iterator(): nada fica no cache do QuerySet.
+        self.assertIsNone(qs._result_cache)
+
+    def test_stream_xlsx_uses_same_interface(self):
+        from openpyxl import load_workbook
+
+        response = stream_xlsx(
+            "usuarios.xlsx",
+            ["Username"],
+            self._qs().values_list("username", flat=True),
+            row_mapper=lambda username: [username],
+            sheet_title="Usuarios",
+            leading_rows=[["Relatório"]],
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn("usuarios.xlsx", response["Content-Disposition"])
+        chunks = iter(response.streaming_content)
+        # Partes fixas e cabeçalho saem antes de consultar o banco.
+        with self.assertNumQueries(0):
+            first = next(chunks)
+        wb = load_workbook(BytesIO(first + b"".join(chunks)), read_only=True)
+        values = [row[0] for row in wb["Usuarios"].iter_rows(values_only=True)]
+        self.assertEqual(values, ["Relatório", "Username", "export_0", "export_1", "export_2", "export_3", "export_4"])
+
+    def test_stream_xlsx_keeps_cell_types(self):
+        from openpyxl import load_workbook
+
+        rows = [["a&<b>\x01", 7, Decimal("2.50"), True, date(2026, 3, 2), datetime(2026, 3, 2, 14, 30), None]]
+        response = stream_xlsx("tipos.xlsx", ["Texto", "Int", "Dec", "Bool", "Data", "DataHora", "Vazio"], rows)
+        wb = load_workbook(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            [cell.value for cell in wb["Dados"][2]],
+            ["a&<b>", 7, 2.5, True, datetime(2026, 3, 2), datetime(2026, 3, 2, 14, 30), None],
+        )
+
+
+class PdfRenderingTestCase(TestCase):
+    def setUp(self):
+        clear_pdf_asset_cache()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_static_assets_are_read_from_disk_without_http(self):
+        url = pdf_asset_url("/static/img/logo_prefeitura.png")
+        data, mime_type = load_local_asset(url)
+        with open(settings.BASE_DIR / "static" / "img" / "logo_prefeitura.png", "rb") as fobj:
+            self.assertEqual(data, fobj.read())
+        self.assertEqual(mime_type, "image/png")
+
+        with mock.patch("builtins.open", side_effect=AssertionError("asset deveria vir do cache")):
+            self.assertEqual(load_local_asset(url)[0], data)
+
+        self.assertIsNone(load_local_asset("https://exemplo.gov.br/static/img/inexistente.png"))
+        self.assertIsNone(load_local_asset(pdf_asset_url("/static/../config/settings.py")))
+        self.assertIsNone(load_local_asset("data:image/png;base64,AAAA"))
+
+    def test_large_table_export_runs_in_background_job(self):
+        owner = User.objects.create_user(username="pdf_owner", password="x")
+        other = User.objects.create_user(username="pdf_other", password="x")
+        factory = RequestFactory()
+        request = factory.get("/relatorio/", HTTP_ACCEPT="application/json")
+        request.user = owner
+        request.session = SessionStore()
+
+        with override_settings(MEDIA_ROOT=self.media_root, PDF_ASYNC_MIN_ROWS=3), mock.patch(
+            "apps.core.services_pdf._render", return_value=(b"%PDF-1.7 teste", 2)
+        ) as render:
+            response = export_pdf_table(
+                request,
+                filename="alunos.pdf",
+                title="Alunos",
+                headers=["Nome"],
+                rows=[["A"], ["B"], ["C"]],
+            )
+            self.assertEqual(response.status_code, 202)
+            job = RelatorioPdfJob.objects.get(codigo=json.loads(response.content)["job_id"])
+            self.assertEqual(job.status, RelatorioPdfJob.Status.CONCLUIDO)
+            self.assertEqual(job.paginas, 2)
+            self.assertEqual(render.call_args.args[1], ("css/pages/relatorio-pdf-tabela.css",))
+
+            download = factory.get("/")
+            download.user = owner
+            response = relatorio_pdf_job(download, codigo=job.codigo)
+            self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7 teste")
+            self.assertIn('filename="alunos.pdf"', response["Content-Disposition"])
+
+            forbidden = factory.get("/")
+            forbidden.user = other
+            with self.assertRaises(Http404):
+                relatorio_pdf_job(forbidden, codigo=job.codigo)
+
+
 class BuildAppUrlFallbackTestCase(TestCase):
     def test_fallback_uses_current_host_when_app_host_is_local(self):
         factory = RequestFactory()
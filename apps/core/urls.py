@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 from . import views_codes
 from . import views_operacao
+from . import views_relatorios
 
 app_name = "core"
 
@@ -34,6 +35,8 @@ urlpatterns = [
     path("transparencia/", views.transparencia_public, name="transparencia_public"),
     path("", views.institucional_public, name="home"),
     path("dashboard/", views.dashboard_view, name="dashboard"),
+    path("dashboard/widgets/metricas/", views.dashboard_widgets_metricas, name="dashboard_widgets_metricas"),
+    path("dashboard/widgets/<slug:nome>/", views.dashboard_widget, name="dashboard_widget"),
     path("sistema/explorar-modulos/", views.portal, name="portal"),
     path(
         "dashboard/educacao/secretaria/visao-geral/",
@@ -156,4 +159,5 @@ urlpatterns = [
     path("sistema/registro/tags/adicionar/", views_operacao.registro_tag_create, name="registro_tag_create"),
     path("sistema/registro/comentarios/adicionar/", views_operacao.registro_comentario_create, name="registro_comentario_create"),
     path("sistema/registro/anexos/adicionar/", views_operacao.registro_anexo_create, name="registro_anexo_create"),
+    path("sistema/relatorios/pdf/<uuid:codigo>/", views_relatorios.relatorio_pdf_job, name="relatorio_pdf_job"),
 ]
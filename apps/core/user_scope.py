@@ -0,0 +1,101 @@
+# apps/core/user_scope.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from apps.core.catalog_cache import SCOPE_ORG_TREE, SCOPE_USER, cached_catalog
+from apps.core.rbac import _resolve_secretaria_id_from_profile, get_profile, role_scope_base
+
+
+@dataclass(frozen=True)
+class UserScope:
+    """
+    Escopo materializado do usuário: ids de secretarias, unidades e (para
+    docentes) turmas permitidos. Os filtros scope_filter_* passam a usar
+    `id__in` em colunas indexadas em vez de joins até o município.
+    """
+
+    base: str
+    secretaria_ids: frozenset[int]
+    unidade_ids: frozenset[int]
+    turma_ids: frozenset[int]
+
+
+EMPTY_USER_SCOPE = UserScope(base="", secretaria_ids=frozenset(), unidade_ids=frozenset(), turma_ids=frozenset())
+
+
+def org_tree_scope_id(*, municipio_id=None, secretaria_id=None) -> str:
+    """Identificador do escopo SCOPE_ORG_TREE (árvore secretaria/unidade) por município ou secretaria."""
+    if secretaria_id:
+        return f"s{secretaria_id}"
+    return f"m{municipio_id or 0}"
+
+
+def _load_user_scope(user_id: int, base: str, municipio_id, secretaria_id, unidade_id) -> dict:
+    from apps.educacao.models import Turma
+    from apps.org.models import Secretaria, Unidade
+
+    secretaria_ids: list[int] = []
+    unidade_ids: list[int] = []
+    turma_ids: list[int] = []
+
+    if base == "PROFESSOR":
+        turma_ids = list(Turma.objects.filter(professores__id=user_id).values_list("id", flat=True))
+    elif base == "UNIDADE" and unidade_id:
+        unidade_ids = [unidade_id]
+        if secretaria_id:
+            secretaria_ids = [secretaria_id]
+    elif base == "SECRETARIA":
+        if secretaria_id:
+            secretaria_ids = [secretaria_id]
+            unidade_ids = list(Unidade.objects.filter(secretaria_id=secretaria_id).values_list("id", flat=True))
+    elif base != "ALUNO" and municipio_id:
+        secretaria_ids = list(Secretaria.objects.filter(municipio_id=municipio_id).values_list("id", flat=True))
+        unidade_ids = list(Unidade.objects.filter(secretaria_id__in=secretaria_ids).values_list("id", flat=True))
+
+    return {
+        "secretaria_ids": tuple(secretaria_ids),
+        "unidade_ids": tuple(unidade_ids),
+        "turma_ids": tuple(turma_ids),
+    }
+
+
+def get_user_scope(user) -> UserScope:
+    """
+    Retorna o escopo materializado do usuário autenticado e ativo.
+    Cache em duas camadas: no próprio usuário (requisição) e no catalog_cache,
+    invalidado por Profile, vínculo professor⇄turma e mudanças na árvore
+    secretaria/unidade do município.
+    """
+    profile = get_profile(user)
+    if not profile:
+        return EMPTY_USER_SCOPE
+
+    base = role_scope_base(getattr(profile, "role", None))
+    municipio_id = getattr(profile, "municipio_id", None)
+    unidade_id = getattr(profile, "unidade_id", None)
+    secretaria_id = _resolve_secretaria_id_from_profile(profile) if base in {"SECRETARIA", "UNIDADE"} else None
+    key = (id(profile), base, municipio_id, secretaria_id, unidade_id)
+
+    cached = getattr(user, "_gepub_user_scope", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    data = cached_catalog(
+        "user_scope",
+        (
+            (SCOPE_USER, user.pk),
+            (SCOPE_ORG_TREE, org_tree_scope_id(municipio_id=municipio_id)),
+            (SCOPE_ORG_TREE, org_tree_scope_id(secretaria_id=secretaria_id)),
+        ),
+        lambda: _load_user_scope(user.pk, base, municipio_id, secretaria_id, unidade_id),
+        entry=f"{base}:{municipio_id or 0}:{secretaria_id or 0}:{unidade_id or 0}",
+    )
+    scope = UserScope(
+        base=base,
+        secretaria_ids=frozenset(data["secretaria_ids"]),
+        unidade_ids=frozenset(data["unidade_ids"]),
+        turma_ids=frozenset(data["turma_ids"]),
+    )
+    user._gepub_user_scope = (key, scope)
+    return scope
@@ -1,5 +1,7 @@
 from .views_dashboard import (
     dashboard_view,
+    dashboard_widget,
+    dashboard_widgets_metricas,
     dashboard_aluno,
     aviso_create,
     arquivo_create,
@@ -106,6 +108,8 @@ from .views_exclusoes import (
 
 __all__ = [
     "dashboard_view",
+    "dashboard_widget",
+    "dashboard_widgets_metricas",
     "dashboard_aluno",
     "aviso_create",
     "arquivo_create",
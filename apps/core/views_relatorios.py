@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from apps.core.models import RelatorioPdfJob
+from apps.core.services_pdf import _wants_json
+
+
+@login_required
+def relatorio_pdf_job(request, codigo):
+    """Acompanhamento de um relatório PDF em segundo plano; entrega o arquivo quando concluído."""
+    job = get_object_or_404(RelatorioPdfJob, codigo=codigo, solicitado_por=request.user)
+    concluido = job.status == RelatorioPdfJob.Status.CONCLUIDO and bool(job.arquivo)
+
+    if _wants_json(request):
+        return JsonResponse(
+            {
+                "job_id": str(job.codigo),
+                "status": job.status,
+                "paginas": job.paginas,
+                "erro": job.erro,
+                "download_url": reverse("core:relatorio_pdf_job", args=[job.codigo]) if concluido else "",
+            }
+        )
+
+    if concluido:
+        return FileResponse(job.arquivo.open("rb"), as_attachment=True, filename=job.nome_arquivo)
+
+    return render(
+        request,
+        "core/relatorio_pdf_job.html",
+        {
+            "title": job.titulo,
+            "subtitle": "Relatório PDF em preparação",
+            "job": job,
+            "em_andamento": job.status in {RelatorioPdfJob.Status.PENDENTE, RelatorioPdfJob.Status.PROCESSANDO},
+        },
+    )
@@ -4,3 +4,6 @@ class EducacaoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.educacao"
     label = "educacao"
+
+    def ready(self):
+        from . import signals  # noqa
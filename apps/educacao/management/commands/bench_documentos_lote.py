@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.core.services_pdf import shutdown_pdf_pool, submit_pdf_render
+from apps.educacao.models import Turma
+from apps.educacao.services_documentos_lote import TIPOS, gerar_documentos_lote, matriculas_lote
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede documentos/minuto da emissão em lote de uma turma contra a emissão um a um "
+        "(consultas e renderização por aluno). Tudo roda numa transação desfeita no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turma", type=int, default=0, help="ID da turma (padrão: a com mais matrículas).")
+        parser.add_argument("--tipo", choices=sorted(TIPOS), default="carteira")
+        parser.add_argument("--amostra", type=int, default=20, help="Documentos emitidos um a um no cenário antigo.")
+        parser.add_argument("--workers", type=int, default=4, help="Processos do pool (0 para pular).")
+
+    def handle(self, *args, **options):
+        turmas = Turma.objects.annotate(total=Count("matriculas")).filter(total__gt=0)
+        turma = (
+            turmas.filter(pk=options["turma"]).first() if options["turma"] else turmas.order_by("-total", "id").first()
+        )
+        if turma is None:
+            raise CommandError("Nenhuma turma com matrículas encontrada.")
+
+        tipo = options["tipo"]
+        matriculas = matriculas_lote(None, turma=turma, incluir_inativos=True)
+        self.stdout.write(f"Turma {turma} ({turma.pk}): {len(matriculas)} aluno(s), tipo={tipo}")
+
+        submit_pdf_render("<p>aquecimento</p>", stylesheets=[TIPOS[tipo]["folha"]]).result()
+        with transaction.atomic():
+            amostra = matriculas[: max(1, options["amostra"])]
+            self._run("um a um", lambda: [gerar_documentos_lote([m], tipo=tipo) for m in amostra], len(amostra))
+            self._run("lote", lambda: gerar_documentos_lote(matriculas, tipo=tipo), len(matriculas))
+
+            workers = options["workers"]
+            if workers > 0:
+                shutdown_pdf_pool()
+                with override_settings(PDF_RENDER_WORKERS=workers):
+                    try:
+                        for future in [submit_pdf_render("<p>aquecimento</p>") for _ in range(workers)]:
+                            future.result()
+                        self._run(
+                            f"lote pool x{workers}",
+                            lambda: gerar_documentos_lote(matriculas, tipo=tipo),
+                            len(matriculas),
+                        )
+                    finally:
+                        shutdown_pdf_pool()
+            transaction.set_rollback(True)
+
+    def _run(self, label: str, func, documentos: int):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<16} documentos={documentos:<5} consultas={len(queries):<6} tempo={elapsed:.2f}s  "
+            f"{documentos * 60 / elapsed if elapsed else 0:.0f} documentos/min"
+        )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import date, timedelta
+from datetime import time as dtime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.educacao.models import Aluno
+from apps.educacao.models_informatica import (
+    InformaticaAlertaFrequencia,
+    InformaticaAulaDiario,
+    InformaticaCurso,
+    InformaticaFrequencia,
+    InformaticaGradeHorario,
+    InformaticaLaboratorio,
+    InformaticaMatricula,
+    InformaticaTurma,
+)
+from apps.educacao.services_informatica_alertas import recalcular_alertas_turmas
+from apps.org.models import Municipio, Secretaria, Unidade
+
+
+def _legado_upsert(matricula, tipo, ativo, percentual, faltas):
+    alerta, _ = InformaticaAlertaFrequencia.objects.get_or_create(
+        matricula=matricula,
+        tipo=tipo,
+        defaults={"percentual_frequencia": percentual, "faltas_consecutivas": faltas, "ativo": ativo},
+    )
+    if (
+        alerta.ativo != ativo
+        or float(alerta.percentual_frequencia or 0) != float(percentual)
+        or int(alerta.faltas_consecutivas or 0) != int(faltas)
+    ):
+        alerta.ativo = ativo
+        alerta.percentual_frequencia = percentual
+        alerta.faltas_consecutivas = faltas
+        if not ativo and not alerta.resolvido_em:
+            alerta.resolvido_em = timezone.now()
+        if ativo:
+            alerta.resolvido_em = None
+        alerta.save(update_fields=["ativo", "percentual_frequencia", "faltas_consecutivas", "resolvido_em"])
+
+
+def _legado(turma_ids: list[int]) -> None:
+    """Recálculo anterior: COUNT, COUNT filtrado e varredura por aluno, dois upserts por matrícula."""
+    for turma_id in turma_ids:
+        matriculas = InformaticaMatricula.objects.filter(
+            turma_id=turma_id, status=InformaticaMatricula.Status.MATRICULADO
+        ).select_related("aluno")
+        for m in matriculas:
+            freq_qs = InformaticaFrequencia.objects.filter(aula__turma_id=turma_id, aluno_id=m.aluno_id).order_by(
+                "aula__data_aula", "id"
+            )
+            total = freq_qs.count()
+            presencas = freq_qs.filter(presente=True).count()
+            percentual = round((presencas / total) * 100, 2) if total > 0 else 100.0
+            consecutivas = maior = 0
+            for item in freq_qs:
+                consecutivas = 0 if item.presente else consecutivas + 1
+                maior = max(maior, consecutivas)
+            _legado_upsert(m, InformaticaAlertaFrequencia.Tipo.BAIXA_FREQUENCIA, percentual < 75, percentual, maior)
+            _legado_upsert(m, InformaticaAlertaFrequencia.Tipo.FALTAS_CONSECUTIVAS, maior >= 3, percentual, maior)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o recálculo de alertas de frequência da informática por aluno com o cálculo "
+        "em conjunto, sobre turmas sintéticas. Tudo é desfeito no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turmas", type=int, default=20)
+        parser.add_argument("--alunos", type=int, default=20, help="Matrículas por turma.")
+        parser.add_argument("--aulas", type=int, default=40, help="Aulas por turma.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            turma_ids = self._seed(options)
+            self.stdout.write(
+                f"{len(turma_ids)} turma(s), {options['alunos']} aluno(s) por turma, {options['aulas']} aula(s)"
+            )
+            with transaction.atomic():
+                self._run("por aluno", lambda: _legado(turma_ids))
+                legado = self._snapshot(turma_ids)
+                transaction.set_rollback(True)
+            with transaction.atomic():
+                self._run("em conjunto", lambda: recalcular_alertas_turmas(turma_ids))
+                conjunto = self._snapshot(turma_ids)
+                transaction.set_rollback(True)
+            transaction.set_rollback(True)
+        self.stdout.write(f"Divergências: {len(legado ^ conjunto)}")
+
+    def _seed(self, options) -> list[int]:
+        rng = random.Random(42)
+        marca = rng.randrange(10**9)
+        prof = get_user_model().objects.create(username=f"bench_info_alertas_{marca}")
+        municipio = Municipio.objects.create(nome=f"Bench Alertas {marca}", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SEMED")
+        unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola", tipo=Unidade.Tipo.EDUCACAO)
+        curso = InformaticaCurso.objects.create(municipio=municipio, nome="Informática Bench")
+        laboratorio = InformaticaLaboratorio.objects.create(nome="Lab Bench", unidade=unidade)
+        turma_ids = []
+        for idx in range(max(1, options["turmas"])):
+            grade = InformaticaGradeHorario.objects.create(
+                nome=f"Grade {idx}",
+                codigo=f"BENCH-{marca}-{idx}",
+                laboratorio=laboratorio,
+                dia_semana_1=InformaticaGradeHorario.DiaSemana.SEGUNDA,
+                dia_semana_2=InformaticaGradeHorario.DiaSemana.QUARTA,
+                hora_inicio=dtime(8, 0),
+                hora_fim=dtime(9, 0),
+                professor_principal=prof,
+            )
+            turma = InformaticaTurma.objects.create(
+                curso=curso, grade_horario=grade, laboratorio=laboratorio, codigo=f"B{marca}-{idx}", ano_letivo=2026
+            )
+            aulas = InformaticaAulaDiario.objects.bulk_create(
+                [
+                    InformaticaAulaDiario(turma=turma, data_aula=date(2026, 2, 2) + timedelta(days=n))
+                    for n in range(max(1, options["aulas"]))
+                ]
+            )
+            alunos = Aluno.objects.bulk_create(
+                [Aluno(nome=f"Aluno {idx}-{n}") for n in range(max(1, options["alunos"]))]
+            )
+            InformaticaMatricula.objects.bulk_create(
+                [
+                    InformaticaMatricula(
+                        aluno=aluno,
+                        escola_origem=unidade,
+                        curso=curso,
+                        turma=turma,
+                        status=InformaticaMatricula.Status.MATRICULADO,
+                    )
+                    for aluno in alunos
+                ]
+            )
+            assiduidade = {aluno.id: rng.uniform(0.5, 1.0) for aluno in alunos}
+            InformaticaFrequencia.objects.bulk_create(
+                [
+                    InformaticaFrequencia(aula=aula, aluno=aluno, presente=rng.random() < assiduidade[aluno.id])
+                    for aula in aulas
+                    for aluno in alunos
+                ],
+                batch_size=1000,
+            )
+            turma_ids.append(turma.id)
+        return turma_ids
+
+    def _snapshot(self, turma_ids: list[int]) -> set:
+        return set(
+            InformaticaAlertaFrequencia.objects.filter(matricula__turma_id__in=turma_ids).values_list(
+                "matricula_id", "tipo", "ativo", "percentual_frequencia", "faltas_consecutivas"
+            )
+        )
+
+    def _run(self, label: str, func):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<14} consultas={len(queries):<7} tempo={elapsed * 1000:.1f} ms")
+        return result
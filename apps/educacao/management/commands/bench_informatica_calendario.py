@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import date, timedelta
+from datetime import time as dtime
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.educacao.models_calendario import CalendarioEducacionalEvento
+from apps.educacao.models_informatica import (
+    InformaticaAulaDiario,
+    InformaticaCurso,
+    InformaticaEncontroSemanal,
+    InformaticaGradeHorario,
+    InformaticaLaboratorio,
+    InformaticaTurma,
+)
+from apps.educacao.models_periodos import PeriodoLetivo
+from apps.educacao.services_informatica_calendario import (
+    datas_bloqueadas_turma,
+    periodo_datas_turma,
+    sincronizar_turmas,
+)
+from apps.org.models import Municipio, Secretaria, Unidade
+
+
+def _legado_encontros(turma):
+    grade = turma.grade_horario
+    especial = grade.tipo_grade == InformaticaGradeHorario.TipoGrade.ESPECIAL_SEXTA
+    existentes = list(turma.encontros.all())
+    by_day = {int(e.dia_semana): e for e in existentes}
+    for day in grade.dias_semana:
+        payload = {
+            "turma": turma,
+            "grade_horario": grade,
+            "dia_semana": int(day),
+            "hora_inicio": grade.hora_inicio,
+            "hora_fim": grade.hora_fim,
+            "minutos_aula_efetiva": grade.duracao_aula_minutos,
+            "minutos_intervalo_tecnico": grade.duracao_intervalo_minutos,
+            "tipo_encontro": "ESPECIAL_SEXTA" if especial else "REGULAR",
+            "formato_especial": bool(especial),
+            "ativo": True,
+        }
+        encontro = by_day.get(int(day))
+        if encontro:
+            for key, value in payload.items():
+                setattr(encontro, key, value)
+        else:
+            encontro = InformaticaEncontroSemanal(**payload)
+        encontro.full_clean()
+        encontro.save()
+    for item in existentes:
+        if int(item.dia_semana) not in grade.dias_semana:
+            item.ativo = False
+            item.save(update_fields=["ativo"])
+
+
+def _legado_calendario(turma):
+    """Sincronização anterior: get_or_create por dia do período e cancelamento aula a aula."""
+    encontros = list(turma.encontros_ativos_qs)
+    inicio, fim = periodo_datas_turma(turma)
+    bloqueios = datas_bloqueadas_turma(turma, inicio, fim)
+    encontros_por_dia = {int(e.dia_semana): e for e in encontros}
+    cursor = inicio
+    datas_validas = set()
+    while cursor <= fim:
+        encontro = encontros_por_dia.get(int(cursor.weekday()))
+        if encontro and cursor not in bloqueios:
+            datas_validas.add(cursor)
+            defaults = {
+                "encontro": encontro,
+                "professor_id": turma.instrutor_id,
+                "status": InformaticaAulaDiario.Status.PREVISTA,
+                "tipo_encontro": InformaticaAulaDiario.TipoEncontro.REGULAR,
+                "duracao_total_minutos": turma.grade_horario.duracao_total_minutos,
+                "pausa_interna_minutos": turma.grade_horario.pausa_interna_opcional_minutos,
+                "formato_especial": False,
+            }
+            aula, created = InformaticaAulaDiario.objects.get_or_create(
+                turma_id=turma.id, data_aula=cursor, defaults=defaults
+            )
+            if not created and aula.status == InformaticaAulaDiario.Status.PREVISTA:
+                changed = False
+                for key, value in defaults.items():
+                    if getattr(aula, key) != value:
+                        setattr(aula, key, value)
+                        changed = True
+                if changed:
+                    aula.save()
+        cursor = cursor + timedelta(days=1)
+    for aula in InformaticaAulaDiario.objects.filter(turma_id=turma.id, status=InformaticaAulaDiario.Status.PREVISTA):
+        if aula.data_aula not in datas_validas:
+            aula.status = InformaticaAulaDiario.Status.CANCELADA
+            aula.observacoes = (aula.observacoes or "") + "\nCancelada por ajuste de grade/calendário."
+            aula.save(update_fields=["status", "observacoes"])
+
+
+def _legado(turmas) -> None:
+    for turma in turmas:
+        turma.save()
+        _legado_encontros(turma)
+        _legado_calendario(turma)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a sincronização de encontros/aulas da informática dia a dia com a sincronização "
+        "por diferença, para a criação das turmas e para uma troca de dias da grade. Tudo é "
+        "desfeito no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turmas", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            grade_ids = self._seed(max(1, options["turmas"]))
+            self.stdout.write(f"{len(grade_ids)} turma(s), ano letivo completo")
+            resultados = {}
+            for label, func in (("dia a dia", _legado), ("diferença", sincronizar_turmas)):
+                with transaction.atomic():
+                    self._run(f"{label} (criação)", lambda: func(self._turmas(grade_ids)))
+                    InformaticaGradeHorario.objects.filter(pk__in=grade_ids).update(
+                        dia_semana_1=InformaticaGradeHorario.DiaSemana.TERCA,
+                        dia_semana_2=InformaticaGradeHorario.DiaSemana.QUINTA,
+                    )
+                    self._run(f"{label} (troca)", lambda: func(self._turmas(grade_ids)))
+                    resultados[label] = set(
+                        InformaticaAulaDiario.objects.filter(turma__grade_horario_id__in=grade_ids).values_list(
+                            "turma_id", "data_aula", "status", "encontro__dia_semana"
+                        )
+                    )
+                    transaction.set_rollback(True)
+            transaction.set_rollback(True)
+        self.stdout.write(f"Divergências: {len(resultados['dia a dia'] ^ resultados['diferença'])}")
+
+    def _seed(self, quantidade: int) -> list[int]:
+        marca = uuid.uuid4().hex[:8]
+        municipio = Municipio.objects.create(nome=f"Bench Calendário {marca}", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SEMED")
+        unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola", tipo=Unidade.Tipo.EDUCACAO)
+        curso = InformaticaCurso.objects.create(municipio=municipio, nome="Informática Bench")
+        if not PeriodoLetivo.objects.filter(ano_letivo=2026, ativo=True).exists():
+            PeriodoLetivo.objects.create(
+                ano_letivo=2026,
+                tipo=PeriodoLetivo.Tipo.BIMESTRE,
+                numero=1,
+                inicio=date(2026, 2, 2),
+                fim=date(2026, 12, 15),
+            )
+        CalendarioEducacionalEvento.objects.create(
+            ano_letivo=2026,
+            secretaria=secretaria,
+            titulo="Recesso",
+            tipo=CalendarioEducacionalEvento.Tipo.RECESSO,
+            data_inicio=date(2026, 7, 1),
+            data_fim=date(2026, 7, 31),
+        )
+        grade_ids = []
+        for idx in range(quantidade):
+            # Um laboratório por turma: nenhuma troca de grade gera conflito de horário.
+            laboratorio = InformaticaLaboratorio.objects.create(nome=f"Lab {marca} {idx}", unidade=unidade)
+            grade = InformaticaGradeHorario.objects.create(
+                nome=f"Grade {idx}",
+                codigo=f"BENCH-{marca}-{idx}",
+                laboratorio=laboratorio,
+                dia_semana_1=InformaticaGradeHorario.DiaSemana.SEGUNDA,
+                dia_semana_2=InformaticaGradeHorario.DiaSemana.QUARTA,
+                hora_inicio=dtime(8, 0),
+                hora_fim=dtime(9, 0),
+                duracao_total_minutos=60,
+                duracao_aula_minutos=45,
+                duracao_intervalo_minutos=15,
+                ano_letivo=2026,
+            )
+            InformaticaTurma.objects.create(
+                curso=curso, grade_horario=grade, laboratorio=laboratorio, codigo=f"B{marca}-{idx}", ano_letivo=2026
+            )
+            grade_ids.append(grade.id)
+        return grade_ids
+
+    def _turmas(self, grade_ids: list[int]) -> list[InformaticaTurma]:
+        return list(
+            InformaticaTurma.objects.filter(grade_horario_id__in=grade_ids)
+            .select_related("grade_horario", "laboratorio__unidade", "curso__municipio")
+            .order_by("id")
+        )
+
+    def _run(self, label: str, func):
+        # O log de consultas é limitado; a rodada anterior pode tê-lo enchido.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<22} consultas={len(queries):<7} tempo={elapsed * 1000:.1f} ms")
+        return result
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.educacao.models import Aluno, Turma
+from apps.educacao.models_diario import Aula, Avaliacao, DiarioTurma, Frequencia, Nota
+from apps.educacao.services_lancamentos import salvar_frequencias, salvar_notas
+from apps.educacao.services_resumo_diario import invalidar_diarios, materializar_diarios, resumos_adiados
+from apps.org.models import Municipio, Secretaria, Unidade
+
+
+def _legado(aula, avaliacao, chamada: dict, notas: dict) -> None:
+    """Gravação anterior ao lote: um update_or_create por aluno."""
+    with transaction.atomic(), resumos_adiados():
+        for aluno_id, status in chamada.items():
+            Frequencia.objects.update_or_create(aula=aula, aluno_id=aluno_id, defaults={"status": status})
+        for aluno_id, (valor, conceito) in notas.items():
+            Nota.objects.update_or_create(
+                avaliacao=avaliacao, aluno_id=aluno_id, defaults={"valor": valor, "conceito": conceito}
+            )
+
+
+def _lote(aula, avaliacao, chamada: dict, notas: dict) -> None:
+    salvar_frequencias(aula, chamada)
+    salvar_notas(avaliacao, notas)
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga concorrente de lançamentos: N professores salvando chamada e notas de uma turma "
+        "ao mesmo tempo, com update_or_create por aluno e com a gravação em lote. Os dados "
+        "sintéticos são gravados (as threads usam conexões próprias) e removidos no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--professores", type=int, default=200)
+        parser.add_argument("--alunos", type=int, default=45, help="Alunos por turma.")
+        parser.add_argument("--concorrencia", type=int, default=200, help="Threads simultâneas.")
+
+    def handle(self, *args, **options):
+        professores = max(1, options["professores"])
+        por_turma = max(1, options["alunos"])
+        cenarios = self._seed(professores, por_turma)
+        try:
+            self.stdout.write(f"{professores} professor(es), {por_turma} aluno(s) por turma")
+            for label, func in (("update_or_create", _legado), ("lote", _lote)):
+                # Cada rodada parte de diários materializados e sem lançamentos.
+                Frequencia.objects.filter(aula__in=[c[0] for c in cenarios]).delete()
+                Nota.objects.filter(avaliacao__in=[c[1] for c in cenarios]).delete()
+                materializar_diarios([c[0].diario_id for c in cenarios])
+                self._consultas(label, func, cenarios[0])
+                self._carga(label, func, cenarios[1:], options["concorrencia"])
+        finally:
+            self._limpar(cenarios)
+
+    def _seed(self, professores: int, por_turma: int) -> list[tuple]:
+        rng = random.Random(42)
+        marca = uuid.uuid4().hex[:8]
+        user_model = get_user_model()
+        municipio = Municipio.objects.create(nome=f"Bench Lançamentos {marca}", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SEMED")
+        unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola", tipo=Unidade.Tipo.EDUCACAO)
+        cenarios = []
+        # Um professor extra só para contar as consultas de um salvamento isolado.
+        for idx in range(professores + 1):
+            professor = user_model.objects.create(username=f"bench_lanc_{marca}_{idx}")
+            turma = Turma.objects.create(unidade=unidade, nome=f"T{idx}", ano_letivo=2026)
+            alunos = Aluno.objects.bulk_create([Aluno(nome=f"Aluno {idx}-{n}") for n in range(por_turma)])
+            diario = DiarioTurma.objects.create(turma=turma, professor=professor, ano_letivo=2026)
+            aula = Aula.objects.create(diario=diario, data=date(2026, 3, 2))
+            avaliacao = Avaliacao.objects.create(diario=diario, titulo="Prova", data=date(2026, 3, 2))
+            chamada = {a.id: rng.choice("PPPF") for a in alunos}
+            notas = {a.id: (Decimal(rng.randrange(0, 1001)) / 100, "") for a in alunos}
+            cenarios.append((aula, avaliacao, chamada, notas))
+        return cenarios
+
+    def _consultas(self, label: str, func, cenario: tuple) -> None:
+        # O log de consultas é limitado; a materialização anterior pode tê-lo enchido.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            func(*cenario)
+        self.stdout.write(f"{label:<18} consultas por salvamento={len(queries)}")
+
+    def _carga(self, label: str, func, cenarios: list[tuple], concorrencia: int) -> None:
+        def salvar(cenario):
+            started = time.perf_counter()
+            try:
+                func(*cenario)
+                return time.perf_counter() - started, None
+            except Exception as exc:
+                return time.perf_counter() - started, exc
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as pool:
+            resultados = list(pool.map(salvar, cenarios))
+        total = time.perf_counter() - started
+        tempos = sorted(tempo * 1000 for tempo, erro in resultados if erro is None)
+        erros = [erro for _, erro in resultados if erro is not None]
+        p95 = tempos[int(len(tempos) * 0.95) - 1] if tempos else 0
+        self.stdout.write(
+            f"{label:<18} total={total * 1000:.0f} ms p50={statistics.median(tempos) if tempos else 0:.1f} ms "
+            f"p95={p95:.1f} ms erros={len(erros)}"
+        )
+        if erros:
+            self.stdout.write(f"  primeiro erro: {erros[0]!r}")
+
+    def _limpar(self, cenarios: list[tuple]) -> None:
+        diario_ids = [aula.diario_id for aula, *_ in cenarios]
+        aluno_ids = {aluno_id for *_, chamada, _ in cenarios for aluno_id in chamada}
+        diarios = DiarioTurma.objects.filter(pk__in=diario_ids)
+        turma = Turma.objects.filter(diarios__in=diarios).select_related("unidade__secretaria__municipio").first()
+        invalidar_diarios(diario_ids)
+        Frequencia.objects.filter(aula__diario_id__in=diario_ids).delete()
+        Nota.objects.filter(avaliacao__diario_id__in=diario_ids).delete()
+        professores = list(diarios.values_list("professor_id", flat=True))
+        turmas = list(diarios.values_list("turma_id", flat=True))
+        diarios.delete()
+        Turma.objects.filter(pk__in=turmas).delete()
+        Aluno.objects.filter(pk__in=aluno_ids).delete()
+        get_user_model().objects.filter(pk__in=professores).delete()
+        if turma is not None:
+            unidade = turma.unidade
+            Unidade.objects.filter(pk=unidade.pk).delete()
+            Secretaria.objects.filter(pk=unidade.secretaria_id).delete()
+            Municipio.objects.filter(pk=unidade.secretaria.municipio_id).delete()
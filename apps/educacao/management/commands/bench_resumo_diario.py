@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from apps.educacao.models import Matricula, Turma
+from apps.educacao.models_diario import Aula, Avaliacao, Frequencia, Nota
+from apps.educacao.models_periodos import PeriodoLetivo
+from apps.educacao.services_academico import calc_historico_resumos, calc_periodo_metrics_by_aluno
+from apps.educacao.services_resumo_diario import invalidar_diarios, materializar_diarios
+
+
+def _legado_periodo(turma, periodo, aluno_ids):
+    """Cálculo anterior ao boletim materializado: varre avaliações, notas, aulas e frequências."""
+    diarios = list(turma.diarios.values_list("id", flat=True))
+    avals = Avaliacao.objects.filter(diario_id__in=diarios, data__gte=periodo.inicio, data__lte=periodo.fim)
+    pesos = {a.id: Decimal(str(a.peso or 1)) for a in avals.only("id", "peso")}
+    soma = {aid: Decimal("0") for aid in aluno_ids}
+    soma_peso = {aid: Decimal("0") for aid in aluno_ids}
+    for n in Nota.objects.filter(avaliacao_id__in=list(pesos), aluno_id__in=aluno_ids).values(
+        "avaliacao_id", "aluno_id", "valor"
+    ):
+        if n["valor"] is None:
+            continue
+        soma[n["aluno_id"]] += Decimal(str(n["valor"])) * pesos[n["avaliacao_id"]]
+        soma_peso[n["aluno_id"]] += pesos[n["avaliacao_id"]]
+    medias = {
+        aid: (soma[aid] / soma_peso[aid]).quantize(Decimal("0.01")) if soma_peso[aid] else None for aid in aluno_ids
+    }
+
+    aulas = list(
+        Aula.objects.filter(diario_id__in=diarios, data__gte=periodo.inicio, data__lte=periodo.fim).values_list(
+            "id", flat=True
+        )
+    )
+    if not aulas:
+        return medias, {aid: None for aid in aluno_ids}, 0
+    presentes = {aid: 0 for aid in aluno_ids}
+    for f in Frequencia.objects.filter(aula_id__in=aulas, aluno_id__in=aluno_ids).values("aluno_id", "status"):
+        if f["status"] == Frequencia.Status.PRESENTE:
+            presentes[f["aluno_id"]] += 1
+    return medias, {aid: round(presentes[aid] / len(aulas) * 100, 1) for aid in aluno_ids}, len(aulas)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara consultas e latência do fechamento/histórico lendo o boletim materializado "
+        "contra a varredura de notas e frequências. Tudo roda numa transação desfeita no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turma", type=int, default=0, help="ID da turma (padrão: a com mais matrículas).")
+        parser.add_argument("--repeticoes", type=int, default=5)
+
+    def handle(self, *args, **options):
+        turmas = Turma.objects.annotate(total=Count("matriculas")).filter(total__gt=0)
+        turma = (
+            turmas.filter(pk=options["turma"]).first() if options["turma"] else turmas.order_by("-total", "id").first()
+        )
+        if turma is None:
+            raise CommandError("Nenhuma turma com matrículas encontrada.")
+
+        periodos = list(PeriodoLetivo.objects.filter(ano_letivo=turma.ano_letivo, ativo=True).order_by("numero"))
+        if not periodos:
+            raise CommandError(f"Nenhum período letivo ativo em {turma.ano_letivo}.")
+        matriculas = list(Matricula.objects.filter(turma=turma).select_related("turma"))
+        aluno_ids = [m.aluno_id for m in matriculas]
+        diario_ids = list(turma.diarios.values_list("id", flat=True))
+        repeticoes = max(1, options["repeticoes"])
+        self.stdout.write(
+            f"Turma {turma} ({turma.pk}): {len(aluno_ids)} aluno(s), {len(diario_ids)} diário(s), "
+            f"{len(periodos)} período(s)"
+        )
+
+        with transaction.atomic():
+            invalidar_diarios(diario_ids)
+            self._run("materializar", lambda: materializar_diarios(diario_ids), 1)
+
+            def fechamento_legado():
+                return [_legado_periodo(turma, p, aluno_ids) for p in periodos]
+
+            def fechamento():
+                return [calc_periodo_metrics_by_aluno(turma=turma, periodo=p, aluno_ids=aluno_ids) for p in periodos]
+
+            self._run("fechamento varredura", fechamento_legado, repeticoes)
+            self._run("fechamento resumo", fechamento, repeticoes)
+            divergencias = sum(1 for antigo, novo in zip(fechamento_legado(), fechamento()) if antigo != novo)
+
+            def historico_legado():
+                for aluno_id in aluno_ids:
+                    for periodo in periodos:
+                        _legado_periodo(turma, periodo, [aluno_id])
+
+            def historico():
+                for aluno_id in aluno_ids:
+                    calc_historico_resumos(turmas=[turma], aluno_id=aluno_id)
+
+            self._run("histórico varredura", historico_legado, 1)
+            self._run("histórico resumo", historico, 1)
+
+            nota = Nota.objects.filter(avaliacao__diario_id__in=diario_ids, valor__isnull=False).first()
+            if nota is not None:
+                self._run("salvar nota", nota.save, repeticoes)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Períodos com resultado divergente: {divergencias}")
+
+    def _run(self, label: str, func, repeticoes: int):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(repeticoes):
+                func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<22} consultas={len(queries) // repeticoes:<6} tempo={elapsed * 1000 / repeticoes:.1f} ms"
+        )
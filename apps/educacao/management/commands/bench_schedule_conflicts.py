@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext
+
+from apps.educacao.models import Matricula, Turma
+from apps.educacao.models_informatica import InformaticaGradeHorario, InformaticaMatricula, InformaticaTurma
+from apps.educacao.services_schedule_conflicts import ScheduleConflictService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara consultas e latência da análise de impacto de edição de grade validando "
+        "aluno a aluno contra o motor em lote. Tudo roda numa transação desfeita no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turma", type=int, default=0, help="ID da turma (padrão: a com mais matrículas).")
+        parser.add_argument("--grade", type=int, default=0, help="ID da grade de informática (padrão: mais turmas).")
+        parser.add_argument("--repeticoes", type=int, default=3)
+
+    def handle(self, *args, **options):
+        repeticoes = max(1, options["repeticoes"])
+        service = ScheduleConflictService
+        with transaction.atomic():
+            turma = self._turma(options["turma"])
+            if turma is not None:
+                self._bench_turma(service, turma, repeticoes)
+            grade = self._grade(options["grade"])
+            if grade is not None:
+                self._bench_grade(service, grade, repeticoes)
+            if turma is None and grade is None:
+                raise CommandError("Nenhuma turma ou grade de informática com matrículas ativas encontrada.")
+            transaction.set_rollback(True)
+
+    def _turma(self, turma_id: int):
+        turmas = Turma.objects.annotate(
+            total=Count("matriculas", filter=Q(matriculas__situacao=Matricula.Situacao.ATIVA))
+        ).filter(total__gt=0, grade_horario__aulas__isnull=False)
+        if turma_id:
+            return turmas.filter(pk=turma_id).first()
+        return turmas.distinct().order_by("-total", "id").first()
+
+    def _grade(self, grade_id: int):
+        grades = InformaticaGradeHorario.objects.annotate(total=Count("turmas", distinct=True)).filter(total__gt=0)
+        if grade_id:
+            return grades.filter(pk=grade_id).first()
+        return grades.order_by("-total", "id").first()
+
+    def _bench_turma(self, service, turma, repeticoes: int):
+        aula = turma.grade_horario.aulas.order_by("dia", "inicio").first()
+        matriculas = list(Matricula.objects.filter(turma=turma, situacao=Matricula.Situacao.ATIVA))
+        self.stdout.write(f"Turma {turma} ({turma.pk}): {len(matriculas)} matrícula(s) ativa(s)")
+        slots = service._slots_from_regular_turma(turma)[:1]
+        exclude = {"offer_keys": {("TURMA", turma.id), ("ATIVIDADE_COMPLEMENTAR", turma.id)}}
+
+        def por_aluno():
+            return [
+                service._validate_candidate(
+                    aluno_id=matricula.aluno_id,
+                    candidate=service._candidate_from_regular_turma(
+                        turma=turma, data_inicio=matricula.data_matricula, slots_override=slots
+                    ),
+                    exclude=exclude,
+                ).has_conflict
+                for matricula in matriculas
+            ]
+
+        def lote():
+            return service.validate_regular_turma_slot_change(
+                turma=turma, dia_semana_codigo=aula.dia, hora_inicio=aula.inicio, hora_fim=aula.fim
+            )
+
+        self._run("turma por aluno", por_aluno, repeticoes)
+        self._run("turma lote", lote, repeticoes)
+        self.stdout.write(
+            f"Alunos com conflito: por aluno={sum(por_aluno())} lote={len(lote().impacted_students)}"
+        )
+
+    def _bench_grade(self, service, grade, repeticoes: int):
+        turmas = list(
+            grade.turmas.filter(status__in=[InformaticaTurma.Status.PLANEJADA, InformaticaTurma.Status.ATIVA])
+        )
+        matriculas = list(
+            InformaticaMatricula.objects.filter(
+                turma_id__in=[t.id for t in turmas], status__in=InformaticaMatricula.statuses_ativos()
+            )
+        )
+        self.stdout.write(
+            f"Grade {grade} ({grade.pk}): {len(turmas)} turma(s), {len(matriculas)} matrícula(s) ativa(s)"
+        )
+        slots = service._slots_from_informatica_grade(grade)
+        turmas_por_id = {t.id: t for t in turmas}
+
+        def por_aluno():
+            return [
+                service._validate_candidate(
+                    aluno_id=matricula.aluno_id,
+                    candidate=service._candidate_from_informatica_turma(
+                        turma=turmas_por_id[matricula.turma_id],
+                        data_inicio=matricula.data_matricula,
+                        slots_override=slots,
+                    ),
+                    exclude={"offer_keys": {("INFORMATICA_TURMA", matricula.turma_id)}},
+                ).has_conflict
+                for matricula in matriculas
+            ]
+
+        def lote():
+            return service.validate_informatica_grade_change(grade=grade)
+
+        self._run("grade por aluno", por_aluno, repeticoes)
+        self._run("grade lote", lote, repeticoes)
+        self.stdout.write(
+            f"Matrículas com conflito: por aluno={sum(por_aluno())} lote={len(lote().impacted_students)}"
+        )
+
+    def _run(self, label: str, func, repeticoes: int):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(repeticoes):
+                func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<22} consultas={len(queries) // repeticoes:<6} tempo={elapsed * 1000 / repeticoes:.1f} ms"
+        )
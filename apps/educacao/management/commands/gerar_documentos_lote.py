@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.educacao.models import Turma
+from apps.educacao.services_documentos_lote import FORMATO_PDF, FORMATOS, TIPOS, gerar_documentos_lote, matriculas_lote
+from apps.org.models import Unidade
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera carteiras, declarações de vínculo ou boletins de uma turma/unidade em um único "
+        "PDF ou ZIP, registrando um DocumentoEmitido por aluno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tipo", choices=sorted(TIPOS), required=True)
+        parser.add_argument("--turma", type=int, default=0, help="ID da turma.")
+        parser.add_argument("--unidade", type=int, default=0, help="ID da unidade (todas as turmas).")
+        parser.add_argument("--formato", choices=[valor for valor, _rotulo in FORMATOS], default=FORMATO_PDF)
+        parser.add_argument("--incluir-inativos", action="store_true", help="Inclui matrículas não ativas.")
+        parser.add_argument("--usuario", default="", help="Username do emissor (aplica o escopo dele).")
+        parser.add_argument("--base-url", default="", help="URL pública do GEPUB usada nos QR de validação.")
+        parser.add_argument("--saida", required=True, help="Arquivo de saída.")
+
+    def handle(self, *args, **options):
+        turma = unidade = None
+        if options["turma"]:
+            turma = Turma.objects.filter(pk=options["turma"]).first()
+            if turma is None:
+                raise CommandError(f"Turma {options['turma']} não encontrada.")
+        elif options["unidade"]:
+            unidade = Unidade.objects.filter(pk=options["unidade"]).first()
+            if unidade is None:
+                raise CommandError(f"Unidade {options['unidade']} não encontrada.")
+        else:
+            raise CommandError("Informe --turma ou --unidade.")
+
+        user = None
+        if options["usuario"]:
+            user = get_user_model().objects.filter(username=options["usuario"]).first()
+            if user is None:
+                raise CommandError(f"Usuário {options['usuario']} não encontrado.")
+
+        matriculas = matriculas_lote(
+            user,
+            turma=turma,
+            unidade=unidade,
+            incluir_inativos=options["incluir_inativos"],
+        )
+        if not matriculas:
+            raise CommandError("Nenhuma matrícula encontrada para a seleção.")
+
+        resultado = gerar_documentos_lote(
+            matriculas,
+            tipo=options["tipo"],
+            formato=options["formato"],
+            user=user,
+            base_url=options["base_url"],
+        )
+        Path(options["saida"]).write_bytes(resultado["conteudo"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['documentos']} documento(s), {resultado['paginas']} página(s) em {options['saida']}."
+            )
+        )
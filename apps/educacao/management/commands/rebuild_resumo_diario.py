@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.educacao.models_diario import DiarioResumoPeriodo, DiarioTurma
+from apps.educacao.services_resumo_diario import materializar_diarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Remonta o boletim materializado (somas de notas/pesos, presenças e total de aulas "
+        "por diário, aluno e período) a partir das notas e frequências. Por padrão só "
+        "materializa diários que ainda não têm resumo; --todos recalcula também os demais."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turma", type=int, default=0, help="Restringe aos diários de uma turma.")
+        parser.add_argument("--ano", type=int, default=0, help="Restringe ao ano letivo do diário.")
+        parser.add_argument("--todos", action="store_true", help="Recalcula também diários já materializados.")
+
+    def handle(self, *args, **options):
+        diarios = DiarioTurma.objects.all()
+        if options["turma"]:
+            diarios = diarios.filter(turma_id=options["turma"])
+        if options["ano"]:
+            diarios = diarios.filter(ano_letivo=options["ano"])
+        diario_ids = list(diarios.order_by("id").values_list("id", flat=True))
+        if not options["todos"]:
+            prontos = set(
+                DiarioResumoPeriodo.objects.filter(diario__in=diarios, periodo__isnull=True).values_list(
+                    "diario_id", flat=True
+                )
+            )
+            diario_ids = [diario_id for diario_id in diario_ids if diario_id not in prontos]
+
+        alteradas = materializar_diarios(diario_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Diários materializados: {len(diario_ids)}; linhas gravadas/removidas: {alteradas}.")
+        )
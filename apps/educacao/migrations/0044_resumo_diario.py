@@ -0,0 +1,44 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educacao', '0043_programacomplementar_programacomplementaroferta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiarioResumoAluno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('soma_ponderada', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('soma_pesos', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('presencas', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diario', to='educacao.aluno')),
+                ('diario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_alunos', to='educacao.diarioturma')),
+                ('periodo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_alunos', to='educacao.periodoletivo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['aluno', 'periodo'], name='educacao_di_aluno_i_a729b0_idx'), models.Index(fields=['diario', 'periodo'], name='educacao_di_diario__8409da_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('periodo__isnull', False)), fields=('diario', 'aluno', 'periodo'), name='uniq_resumo_aluno_diario_periodo'), models.UniqueConstraint(condition=models.Q(('periodo__isnull', True)), fields=('diario', 'aluno'), name='uniq_resumo_aluno_diario_total')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DiarioResumoPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_aulas', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('diario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_periodos', to='educacao.diarioturma')),
+                ('periodo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='educacao.periodoletivo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('periodo__isnull', False)), fields=('diario', 'periodo'), name='uniq_resumo_periodo_diario_periodo'), models.UniqueConstraint(condition=models.Q(('periodo__isnull', True)), fields=('diario',), name='uniq_resumo_periodo_diario_total')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:39
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educacao', '0044_resumo_diario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FechamentoPeriodoLoteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('turma_ids', models.JSONField(blank=True, default=list)),
+                ('media_corte', models.DecimalField(decimal_places=2, default=Decimal('6.00'), max_digits=5)),
+                ('frequencia_corte', models.DecimalField(decimal_places=2, default=Decimal('75.00'), max_digits=5)),
+                ('observacao', models.TextField(blank=True, default='')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=14)),
+                ('total_turmas', models.PositiveIntegerField(default=0)),
+                ('turmas_processadas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fechamentos_lote', to='educacao.periodoletivo')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fechamentos_lote_educacao', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Fechamento do período em lote',
+                'verbose_name_plural': 'Fechamentos do período em lote',
+                'ordering': ['-criado_em', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educacao', '0045_fechamento_lote_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InformaticaAlertaRecalculo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marca', models.DateTimeField()),
+                ('turmas_processadas', models.PositiveIntegerField(default=0)),
+                ('alertas_alterados', models.PositiveIntegerField(default=0)),
+                ('iniciado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Recálculo de alertas de frequência (informática)',
+                'verbose_name_plural': 'Recálculos de alertas de frequência (informática)',
+                'ordering': ['-marca', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='informaticafrequencia',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.12 on 2026-10-17 01:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('educacao', '0046_informatica_alerta_recalculo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InformaticaGradeSincronizacaoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=14)),
+                ('total_turmas', models.PositiveIntegerField(default=0)),
+                ('turmas_processadas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('grade_horario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sincronizacoes', to='educacao.informaticagradehorario')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sincronizacoes_grade_informatica', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sincronização de grade (informática)',
+                'verbose_name_plural': 'Sincronizações de grade (informática)',
+                'ordering': ['-criado_em', '-id'],
+            },
+        ),
+    ]
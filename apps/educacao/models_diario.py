@@ -462,3 +462,80 @@ class MaterialAulaProfessor(models.Model):
 
     def __str__(self) -> str:
         return f"{self.titulo} • {self.professor}"
+
+
+class DiarioResumoAluno(models.Model):
+    """Agregado materializado de notas e presenças do aluno no diário.
+
+    Uma linha por (diário, aluno, período); `periodo` nulo é o diário inteiro.
+    O período é resolvido pela data da avaliação/aula (inicio <= data <= fim),
+    como nos cálculos de fechamento. Mantido por `services_resumo_diario`.
+    """
+    diario = models.ForeignKey(DiarioTurma, on_delete=models.CASCADE, related_name="resumos_alunos")
+    aluno = models.ForeignKey("educacao.Aluno", on_delete=models.CASCADE, related_name="resumos_diario")
+    periodo = models.ForeignKey(
+        "educacao.PeriodoLetivo",
+        on_delete=models.CASCADE,
+        related_name="resumos_alunos",
+        null=True,
+        blank=True,
+    )
+    soma_ponderada = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    soma_pesos = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    presencas = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["diario", "aluno", "periodo"],
+                condition=models.Q(periodo__isnull=False),
+                name="uniq_resumo_aluno_diario_periodo",
+            ),
+            models.UniqueConstraint(
+                fields=["diario", "aluno"],
+                condition=models.Q(periodo__isnull=True),
+                name="uniq_resumo_aluno_diario_total",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["aluno", "periodo"]),
+            models.Index(fields=["diario", "periodo"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.diario_id} • {self.aluno_id} • {self.periodo_id or 'total'}"
+
+
+class DiarioResumoPeriodo(models.Model):
+    """Total de aulas do diário por período (`periodo` nulo = diário inteiro).
+
+    A linha do diário inteiro também marca o diário como materializado.
+    """
+    diario = models.ForeignKey(DiarioTurma, on_delete=models.CASCADE, related_name="resumos_periodos")
+    periodo = models.ForeignKey(
+        "educacao.PeriodoLetivo",
+        on_delete=models.CASCADE,
+        related_name="resumos_diarios",
+        null=True,
+        blank=True,
+    )
+    total_aulas = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["diario", "periodo"],
+                condition=models.Q(periodo__isnull=False),
+                name="uniq_resumo_periodo_diario_periodo",
+            ),
+            models.UniqueConstraint(
+                fields=["diario"],
+                condition=models.Q(periodo__isnull=True),
+                name="uniq_resumo_periodo_diario_total",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.diario_id} • {self.periodo_id or 'total'} • {self.total_aulas} aula(s)"
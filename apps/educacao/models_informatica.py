@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import uuid
 from datetime import time
 
 from django.conf import settings
@@ -1256,6 +1257,7 @@ class InformaticaFrequencia(models.Model):
     justificativa = models.CharField(max_length=220, blank=True, default="")
     observacao = models.TextField(blank=True, default="")
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Frequência da aula de informática"
@@ -1361,3 +1363,72 @@ class InformaticaAlertaFrequencia(models.Model):
 
     def __str__(self) -> str:
         return f"{self.matricula} • {self.get_tipo_display()}"
+
+
+class InformaticaAlertaRecalculo(models.Model):
+    """
+    Execução do recálculo periódico dos alertas de frequência (tarefa
+    educacao.recalcular_alertas_informatica). `marca` é o instante a partir do qual
+    a próxima execução procura frequências/matrículas alteradas.
+    """
+
+    marca = models.DateTimeField()
+    turmas_processadas = models.PositiveIntegerField(default=0)
+    alertas_alterados = models.PositiveIntegerField(default=0)
+    iniciado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Recálculo de alertas de frequência (informática)"
+        verbose_name_plural = "Recálculos de alertas de frequência (informática)"
+        ordering = ["-marca", "-id"]
+
+    def __str__(self) -> str:
+        return f"Recálculo {self.marca:%d/%m/%Y %H:%M}"
+
+
+class InformaticaGradeSincronizacaoJob(models.Model):
+    """
+    Sincronização de encontros e aulas de todas as turmas de uma grade, executada em
+    segundo plano (tarefa educacao.sincronizar_grade_informatica), com progresso por turma.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        PROCESSANDO = "PROCESSANDO", "Processando"
+        CONCLUIDO = "CONCLUIDO", "Concluído"
+        ERRO = "ERRO", "Erro"
+
+    codigo = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    grade_horario = models.ForeignKey(
+        InformaticaGradeHorario,
+        on_delete=models.CASCADE,
+        related_name="sincronizacoes",
+    )
+    status = models.CharField(max_length=14, choices=Status.choices, default=Status.PENDENTE)
+    total_turmas = models.PositiveIntegerField(default=0)
+    turmas_processadas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sincronizacoes_grade_informatica",
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em", "-id"]
+        verbose_name = "Sincronização de grade (informática)"
+        verbose_name_plural = "Sincronizações de grade (informática)"
+
+    @property
+    def progresso(self) -> int:
+        if not self.total_turmas:
+            return 100 if self.status == self.Status.CONCLUIDO else 0
+        return min(100, int(self.turmas_processadas * 100 / self.total_turmas))
+
+    def __str__(self) -> str:
+        return f"{self.grade_horario} • {self.turmas_processadas}/{self.total_turmas} turma(s)"
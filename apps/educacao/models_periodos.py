@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from decimal import Decimal
@@ -130,3 +132,55 @@ class FechamentoPeriodoTurma(models.Model):
 
     def __str__(self):
         return f"{self.turma} • {self.periodo}"
+
+
+class FechamentoPeriodoLoteJob(models.Model):
+    """
+    Fechamento de período em lote executado em segundo plano (tarefa
+    educacao.fechar_periodo_lote), com progresso por turmas processadas.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        PROCESSANDO = "PROCESSANDO", "Processando"
+        CONCLUIDO = "CONCLUIDO", "Concluído"
+        ERRO = "ERRO", "Erro"
+
+    codigo = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    periodo = models.ForeignKey(
+        "educacao.PeriodoLetivo",
+        on_delete=models.CASCADE,
+        related_name="fechamentos_lote",
+    )
+    turma_ids = models.JSONField(default=list, blank=True)
+    media_corte = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("6.00"))
+    frequencia_corte = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("75.00"))
+    observacao = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=14, choices=Status.choices, default=Status.PENDENTE)
+    total_turmas = models.PositiveIntegerField(default=0)
+    turmas_processadas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="fechamentos_lote_educacao",
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em", "-id"]
+        verbose_name = "Fechamento do período em lote"
+        verbose_name_plural = "Fechamentos do período em lote"
+
+    @property
+    def progresso(self) -> int:
+        if not self.total_turmas:
+            return 100 if self.status == self.Status.CONCLUIDO else 0
+        return min(100, int(self.turmas_processadas * 100 / self.total_turmas))
+
+    def __str__(self):
+        return f"{self.periodo} • {self.turmas_processadas}/{self.total_turmas} turma(s)"
+
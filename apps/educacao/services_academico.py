@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 
-from .models_diario import Aula, Avaliacao, Frequencia, Nota
+from .models_diario import DiarioTurma
+from .models_periodos import PeriodoLetivo
+from .services_resumo_diario import carregar_resumos, media_ponderada
 
 
 def _mean_decimal(values: list[Decimal]) -> Decimal | None:
@@ -17,9 +19,34 @@ def _mean_float(values: list[float]) -> float | None:
     return round(sum(values) / float(len(values)), 1)
 
 
+def metricas_periodo_aluno(celula, total_aulas: int) -> tuple[Decimal | None, float | None]:
+    """(média ponderada, frequência %) a partir da soma das células dos diários."""
+    soma, soma_peso, presentes = celula or (Decimal("0"), Decimal("0"), 0)
+    media = media_ponderada(soma, soma_peso)
+    freq = round((presentes / total_aulas) * 100, 1) if total_aulas else None
+    return media, freq
+
+
+def _somar_diarios(celulas: dict, totais: dict) -> tuple[dict, dict]:
+    """Soma as células dos diários: (periodo_id, aluno_id) -> (soma, pesos, presenças); periodo_id -> aulas."""
+    por_aluno: dict = {}
+    for (_diario_id, periodo_id, aluno_id), (soma, pesos, presencas) in celulas.items():
+        atual = por_aluno.get((periodo_id, aluno_id))
+        if atual is None:
+            por_aluno[(periodo_id, aluno_id)] = (soma, pesos, presencas)
+        else:
+            por_aluno[(periodo_id, aluno_id)] = (atual[0] + soma, atual[1] + pesos, atual[2] + presencas)
+    aulas: dict = {}
+    for (_diario_id, periodo_id), total in totais.items():
+        aulas[periodo_id] = aulas.get(periodo_id, 0) + total
+    return por_aluno, aulas
+
+
 def calc_periodo_metrics_by_aluno(*, turma, periodo, aluno_ids: list[int]) -> tuple[dict[int, Decimal | None], dict[int, float | None], int]:
     """
     Retorna (media_map, freq_map, total_aulas_periodo) para os alunos informados.
+
+    Lê o boletim materializado (`services_resumo_diario`) em vez de notas/frequências.
     """
     if not aluno_ids:
         return {}, {}, 0
@@ -28,52 +55,14 @@ def calc_periodo_metrics_by_aluno(*, turma, periodo, aluno_ids: list[int]) -> tu
     if not diarios:
         return {aid: None for aid in aluno_ids}, {aid: None for aid in aluno_ids}, 0
 
-    avals = Avaliacao.objects.filter(
-        diario_id__in=diarios,
-        data__gte=periodo.inicio,
-        data__lte=periodo.fim,
-    ).only("id", "peso")
-    aval_ids = list(avals.values_list("id", flat=True))
-    pesos_map = {a.id: Decimal(str(a.peso or 1)) for a in avals}
-
-    soma = {aid: Decimal("0") for aid in aluno_ids}
-    soma_peso = {aid: Decimal("0") for aid in aluno_ids}
-
-    notas_qs = Nota.objects.filter(avaliacao_id__in=aval_ids, aluno_id__in=aluno_ids).values("avaliacao_id", "aluno_id", "valor")
-    for n in notas_qs:
-        aluno_id = n["aluno_id"]
-        valor = n["valor"]
-        if valor is None:
-            continue
-        try:
-            peso = pesos_map.get(n["avaliacao_id"], Decimal("1"))
-            soma[aluno_id] += Decimal(str(valor)) * peso
-            soma_peso[aluno_id] += peso
-        except (InvalidOperation, ValueError):
-            continue
+    celulas, totais = carregar_resumos(diario_ids=diarios, periodo_ids=[periodo.pk], aluno_ids=aluno_ids)
+    por_aluno, aulas = _somar_diarios(celulas, totais)
+    total_aulas = aulas.get(periodo.pk, 0)
 
     media_map: dict[int, Decimal | None] = {}
+    freq_map: dict[int, float | None] = {}
     for aluno_id in aluno_ids:
-        media_map[aluno_id] = (soma[aluno_id] / soma_peso[aluno_id]).quantize(Decimal("0.01")) if soma_peso[aluno_id] else None
-
-    aulas_ids = list(
-        Aula.objects.filter(
-            diario_id__in=diarios,
-            data__gte=periodo.inicio,
-            data__lte=periodo.fim,
-        ).values_list("id", flat=True)
-    )
-    total_aulas = len(aulas_ids)
-    if total_aulas == 0:
-        return media_map, {aid: None for aid in aluno_ids}, 0
-
-    presentes = {aid: 0 for aid in aluno_ids}
-    freq_qs = Frequencia.objects.filter(aula_id__in=aulas_ids, aluno_id__in=aluno_ids).values("aluno_id", "status")
-    for f in freq_qs:
-        if f["status"] == Frequencia.Status.PRESENTE:
-            presentes[f["aluno_id"]] += 1
-
-    freq_map = {aid: round((presentes[aid] / total_aulas) * 100, 1) for aid in aluno_ids}
+        media_map[aluno_id], freq_map[aluno_id] = metricas_periodo_aluno(por_aluno.get((periodo.pk, aluno_id)), total_aulas)
     return media_map, freq_map, total_aulas
 
 
@@ -90,19 +79,7 @@ def classify_resultado(*, media: Decimal | None, frequencia: float | None, media
     return "Reprovado"
 
 
-def calc_historico_resumo(*, turma, periodos, aluno_id: int, media_corte: Decimal = Decimal("6.00"), frequencia_corte: Decimal = Decimal("75.00")):
-    medias: list[Decimal] = []
-    freqs: list[float] = []
-
-    for periodo in periodos:
-        media_map, freq_map, _ = calc_periodo_metrics_by_aluno(turma=turma, periodo=periodo, aluno_ids=[aluno_id])
-        media = media_map.get(aluno_id)
-        freq = freq_map.get(aluno_id)
-        if media is not None:
-            medias.append(media)
-        if freq is not None:
-            freqs.append(freq)
-
+def _resumo_final(medias: list[Decimal], freqs: list[float], media_corte: Decimal, frequencia_corte: Decimal):
     media_final = _mean_decimal(medias)
     freq_final = _mean_float(freqs)
     resultado = classify_resultado(
@@ -112,3 +89,67 @@ def calc_historico_resumo(*, turma, periodos, aluno_id: int, media_corte: Decima
         frequencia_corte=frequencia_corte,
     )
     return media_final, freq_final, resultado
+
+
+def calc_historico_resumo(*, turma, periodos, aluno_id: int, media_corte: Decimal = Decimal("6.00"), frequencia_corte: Decimal = Decimal("75.00")):
+    medias: list[Decimal] = []
+    freqs: list[float] = []
+
+    periodos = list(periodos)
+    diarios = list(turma.diarios.values_list("id", flat=True))
+    if diarios and periodos:
+        celulas, totais = carregar_resumos(
+            diario_ids=diarios,
+            periodo_ids=[p.pk for p in periodos],
+            aluno_ids=[aluno_id],
+        )
+        por_aluno, aulas = _somar_diarios(celulas, totais)
+        for periodo in periodos:
+            media, freq = metricas_periodo_aluno(por_aluno.get((periodo.pk, aluno_id)), aulas.get(periodo.pk, 0))
+            if media is not None:
+                medias.append(media)
+            if freq is not None:
+                freqs.append(freq)
+
+    return _resumo_final(medias, freqs, media_corte, frequencia_corte)
+
+
+def calc_historico_resumos(*, turmas, aluno_id: int, media_corte: Decimal = Decimal("6.00"), frequencia_corte: Decimal = Decimal("75.00")) -> dict:
+    """
+    `calc_historico_resumo` para várias turmas do aluno de uma vez (períodos ativos do
+    ano letivo de cada turma), com um número fixo de consultas. Retorna {turma_id: (media, freq, resultado)}.
+    """
+    turmas = {t.pk: t for t in turmas}
+    if not turmas:
+        return {}
+
+    periodos_por_ano: dict[int, list] = {}
+    anos = {t.ano_letivo for t in turmas.values()}
+    for periodo in PeriodoLetivo.objects.filter(ano_letivo__in=anos, ativo=True).order_by("numero"):
+        periodos_por_ano.setdefault(periodo.ano_letivo, []).append(periodo)
+
+    diarios_por_turma: dict[int, list[int]] = {}
+    for diario_id, turma_id in DiarioTurma.objects.filter(turma_id__in=turmas).values_list("id", "turma_id"):
+        diarios_por_turma.setdefault(turma_id, []).append(diario_id)
+
+    periodo_ids = [p.pk for periodos in periodos_por_ano.values() for p in periodos]
+    diario_ids = [d for ids in diarios_por_turma.values() for d in ids]
+    celulas, totais = carregar_resumos(diario_ids=diario_ids, periodo_ids=periodo_ids, aluno_ids=[aluno_id])
+
+    resultado = {}
+    for turma_id, turma in turmas.items():
+        ids = set(diarios_por_turma.get(turma_id, ()))
+        por_aluno, aulas = _somar_diarios(
+            {chave: valor for chave, valor in celulas.items() if chave[0] in ids},
+            {chave: valor for chave, valor in totais.items() if chave[0] in ids},
+        )
+        medias: list[Decimal] = []
+        freqs: list[float] = []
+        for periodo in periodos_por_ano.get(turma.ano_letivo, []) if ids else []:
+            media, freq = metricas_periodo_aluno(por_aluno.get((periodo.pk, aluno_id)), aulas.get(periodo.pk, 0))
+            if media is not None:
+                medias.append(media)
+            if freq is not None:
+                freqs.append(freq)
+        resultado[turma_id] = _resumo_final(medias, freqs, media_corte, frequencia_corte)
+    return resultado
@@ -0,0 +1,709 @@
+"""
+Emissão em lote de documentos dos alunos de uma turma ou unidade: carteira
+estudantil, declaração de vínculo e boletim.
+
+- os dados de todos os alunos saem de poucas consultas em bloco (matrículas,
+  cursos complementares, necessidades, brasões, gestores, diários e notas),
+  em vez das consultas por aluno das emissões individuais;
+- cada documento usa o mesmo corpo (partial) e a mesma folha de estilo da
+  emissão individual; a folha é parseada uma vez por processo;
+- os documentos vão em blocos para o pool de PDFs (apps.core.services_pdf) e
+  saem num único PDF (blocos unidos com pypdf) ou num ZIP com um PDF por aluno;
+- cada documento ganha um DocumentoEmitido, gravado em bulk insert, cujo
+  código vai no QR de validação pública.
+"""
+
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.accounts.models import Profile
+from apps.core.exports import _try_make_qr_data_uri
+from apps.core.rbac import scope_filter_matriculas
+from apps.core.services_documentos import preparar_documento_emitido, registrar_documentos_emitidos
+from apps.core.services_pdf import TABLE_STYLESHEET, pdf_asset_url, submit_pdf_render
+
+from .models import CarteiraEstudantil, CoordenacaoEnsino, Matricula, MatriculaCurso
+from .models_diario import Avaliacao, DiarioTurma, Nota
+
+try:
+    from apps.nee.models import AlunoNecessidade
+except Exception:  # pragma: no cover
+    AlunoNecessidade = None  # type: ignore
+
+try:
+    from apps.core.models import PortalMunicipalConfig
+except Exception:  # pragma: no cover
+    PortalMunicipalConfig = None  # type: ignore
+
+CARTEIRA_STYLESHEET = "css/pages/carteira-estudantil-pdf.css"
+DECLARACAO_STYLESHEET = "css/pages/declaracao-vinculo-pdf.css"
+LOTE_TEMPLATE = "educacao/pdf/documentos_lote.html"
+LOTE_BULK_BATCH_SIZE = 500
+
+TIPO_CARTEIRA = "carteira"
+TIPO_DECLARACAO = "declaracao"
+TIPO_BOLETIM = "boletim"
+TIPOS = {
+    TIPO_CARTEIRA: {
+        "rotulo": "Carteiras estudantis",
+        "titulo": "Carteira Estudantil",
+        "corpo": "educacao/pdf/partials/carteira_estudantil_corpo.html",
+        "folha": CARTEIRA_STYLESHEET,
+        "documento": "EDUCACAO.CARTEIRA_ESTUDANTIL",
+        "arquivo": "carteira_estudantil",
+        # A carteira já traz o QR da própria validação (carteira_verificar_public).
+        "qr_documento": False,
+    },
+    TIPO_DECLARACAO: {
+        "rotulo": "Declarações de vínculo",
+        "titulo": "Declaração de Vínculo Escolar",
+        "corpo": "educacao/pdf/partials/declaracao_vinculo_corpo.html",
+        "folha": DECLARACAO_STYLESHEET,
+        "documento": "EDUCACAO.DECLARACAO_VINCULO",
+        "arquivo": "declaracao_vinculo",
+        "qr_documento": True,
+    },
+    TIPO_BOLETIM: {
+        "rotulo": "Boletins",
+        "titulo": "Boletim — Aluno",
+        "corpo": "core/relatorios/pdf/partials/table_corpo.html",
+        "folha": TABLE_STYLESHEET,
+        "documento": "EDUCACAO.BOLETIM",
+        "arquivo": "boletim",
+        "qr_documento": True,
+    },
+}
+
+FORMATO_PDF = "pdf"
+FORMATO_ZIP = "zip"
+FORMATOS = [
+    (FORMATO_PDF, "PDF único (documentos em sequência)"),
+    (FORMATO_ZIP, "ZIP com um PDF por aluno"),
+]
+
+BOLETIM_HEADERS = ["Professor", "Avaliação", "Peso", "Data", "Nota"]
+
+MESES_PTBR = [
+    "janeiro",
+    "fevereiro",
+    "março",
+    "abril",
+    "maio",
+    "junho",
+    "julho",
+    "agosto",
+    "setembro",
+    "outubro",
+    "novembro",
+    "dezembro",
+]
+
+
+def validade_padrao_carteira() -> date:
+    today = timezone.localdate()
+    return date(today.year, 12, 31)
+
+
+def snapshot_carteira(aluno, matricula: Matricula | None, *, cursos, necessidades) -> dict:
+    """Dados impressos na carteira; `cursos` são pares (nome, situação) e `necessidades`, nomes."""
+    unidade = getattr(getattr(matricula, "turma", None), "unidade", None)
+    secretaria = getattr(unidade, "secretaria", None)
+    municipio = getattr(secretaria, "municipio", None)
+    turma = getattr(matricula, "turma", None)
+
+    cursos_resumo = [f"{nome} ({situacao.replace('_', ' ').title()})" for nome, situacao in cursos if nome]
+    nee_resumo = [str(nome) for nome in necessidades if nome]
+
+    return {
+        "aluno_nome": aluno.nome,
+        "nome_mae": aluno.nome_mae or "",
+        "nome_pai": aluno.nome_pai or "",
+        "cpf": aluno.cpf or "",
+        "nis": aluno.nis or "",
+        "data_nascimento": aluno.data_nascimento.strftime("%d/%m/%Y") if aluno.data_nascimento else "",
+        "escola": getattr(unidade, "nome", "") or "",
+        "secretaria": getattr(secretaria, "nome", "") or "",
+        "municipio": getattr(municipio, "nome", "") or "",
+        "turma": getattr(turma, "nome", "") or "",
+        "ano_letivo": str(getattr(turma, "ano_letivo", "") or ""),
+        "turno": turma.get_turno_display() if turma else "",
+        "situacao_matricula": matricula.get_situacao_display() if matricula else "",
+        "modalidade": turma.get_modalidade_display() if turma else "",
+        "etapa": turma.get_etapa_display() if turma else "",
+        "cursos_complementares": cursos_resumo,
+        "possui_nee": bool(nee_resumo),
+        "necessidades_especiais": nee_resumo,
+    }
+
+
+def data_extenso_ptbr(data) -> str:
+    return f"{data.day:02d} de {MESES_PTBR[data.month - 1]} de {data.year}"
+
+
+def _nome_usuario(user) -> str:
+    return user.get_full_name().strip() or user.get_username()
+
+
+def resolver_gestor_unidade(unidade) -> tuple[str, str]:
+    """(nome, cargo) de quem assina as declarações da unidade."""
+    if unidade is None:
+        return "Gestor(a) da unidade não informado", "Gestão Escolar"
+
+    coordenacao = (
+        CoordenacaoEnsino.objects.select_related("coordenador")
+        .filter(unidade=unidade, ativo=True)
+        .order_by("-inicio", "-id")
+        .first()
+    )
+    if coordenacao and coordenacao.coordenador_id:
+        return _nome_usuario(coordenacao.coordenador), "Coordenação de Ensino"
+
+    user_model = get_user_model()
+    perfis_unidade = (
+        user_model.objects.select_related("profile")
+        .filter(
+            profile__ativo=True,
+            profile__unidade=unidade,
+            profile__role__in=[
+                Profile.Role.EDU_DIRETOR,
+                Profile.Role.UNIDADE,
+                Profile.Role.EDU_COORD,
+            ],
+        )
+        .order_by("first_name", "username")
+    )
+    gestor_unidade = perfis_unidade.first()
+    if gestor_unidade and getattr(gestor_unidade, "profile", None):
+        return _nome_usuario(gestor_unidade), gestor_unidade.profile.get_role_display()
+
+    if unidade.secretaria_id:
+        perfis_secretaria = (
+            user_model.objects.select_related("profile")
+            .filter(
+                profile__ativo=True,
+                profile__secretaria_id=unidade.secretaria_id,
+                profile__role__in=[Profile.Role.EDU_SECRETARIO, Profile.Role.SECRETARIA],
+            )
+            .order_by("first_name", "username")
+        )
+        gestor_secretaria = perfis_secretaria.first()
+        if gestor_secretaria and getattr(gestor_secretaria, "profile", None):
+            return _nome_usuario(gestor_secretaria), gestor_secretaria.profile.get_role_display()
+
+    return "Gestor(a) da unidade não informado", "Gestão Escolar"
+
+
+def dados_declaracao(aluno, matricula: Matricula | None) -> dict:
+    """Vínculo, situação e responsáveis do aluno para o texto da declaração."""
+    matricula = matricula if matricula is not None else Matricula(aluno=aluno)
+    turma = getattr(matricula, "turma", None)
+    unidade = getattr(turma, "unidade", None)
+    secretaria = getattr(unidade, "secretaria", None)
+    municipio = getattr(secretaria, "municipio", None)
+
+    status_ativa = bool(matricula and getattr(matricula, "situacao", None) == Matricula.Situacao.ATIVA and aluno.ativo)
+    situacao_texto = "regularmente matriculado(a) e frequentando as aulas"
+    if not status_ativa:
+        status_display = matricula.get_situacao_display().lower() if getattr(matricula, "situacao", None) else "não informada"
+        situacao_texto = f"matriculado(a) nesta unidade, com situação {status_display}"
+
+    responsaveis = "genitores não informados"
+    if aluno.nome_mae or aluno.nome_pai:
+        mae = aluno.nome_mae or "mãe não informada"
+        pai = aluno.nome_pai or "pai não informado"
+        responsaveis = f"{mae} e {pai}"
+
+    return {
+        "aluno": aluno,
+        "matricula": matricula,
+        "turma": turma,
+        "unidade": unidade,
+        "secretaria": secretaria,
+        "municipio": municipio,
+        "responsaveis": responsaveis,
+        "situacao_texto": situacao_texto,
+        "status_ativa": status_ativa,
+    }
+
+
+def linhas_boletim(diarios, avaliacoes_por_diario: dict, notas: dict) -> list[dict]:
+    """Avaliações e média ponderada por diário; `notas` mapeia avaliação → valor do aluno."""
+    linhas = []
+    for d in diarios:
+        avals = avaliacoes_por_diario.get(d.id, [])
+        soma = Decimal("0")
+        soma_pesos = Decimal("0")
+
+        aval_rows = []
+        for av in avals:
+            valor = notas.get(av.id, None)
+            aval_rows.append({
+                "titulo": av.titulo,
+                "peso": av.peso,
+                "data": av.data,
+                "nota": valor,
+            })
+            if valor is None:
+                continue
+            peso = Decimal(str(av.peso or 1))
+            soma += Decimal(str(valor)) * peso
+            soma_pesos += peso
+
+        media = (soma / soma_pesos).quantize(Decimal("0.01")) if soma_pesos else None
+        linhas.append({
+            "diario": d,
+            "avaliacoes": aval_rows,
+            "media": media,
+        })
+    return linhas
+
+
+def linhas_boletim_pdf(linhas: list[dict]) -> list[list[str]]:
+    rows = []
+    for bloco in linhas:
+        prof = getattr(getattr(bloco["diario"], "professor", None), "username", "—")
+        if not bloco["avaliacoes"]:
+            rows.append([prof, "—", "—", "—", "—"])
+            continue
+        for av in bloco["avaliacoes"]:
+            rows.append([
+                prof,
+                av["titulo"],
+                str(av["peso"]),
+                av["data"].strftime("%d/%m/%Y") if av["data"] else "—",
+                str(av["nota"]) if av["nota"] is not None else "—",
+            ])
+    return rows
+
+
+def matriculas_lote(user, *, turma=None, unidade=None, incluir_inativos: bool = False) -> list[Matricula]:
+    """
+    Uma matrícula por aluno (a mais recente da seleção), ordenadas por turma e
+    nome. Com `user`, respeita o escopo dele.
+    """
+    if turma is None and unidade is None:
+        raise ValueError("Informe a turma ou a unidade do lote.")
+
+    qs = Matricula.objects.select_related(
+        "aluno",
+        "turma",
+        "turma__unidade",
+        "turma__unidade__secretaria",
+        "turma__unidade__secretaria__municipio",
+    )
+    qs = qs.filter(turma=turma) if turma is not None else qs.filter(turma__unidade=unidade)
+    if user is not None:
+        qs = scope_filter_matriculas(user, qs)
+    if not incluir_inativos:
+        qs = qs.filter(situacao=Matricula.Situacao.ATIVA)
+
+    por_aluno: dict[int, Matricula] = {}
+    for matricula in qs.order_by("-id"):
+        por_aluno.setdefault(matricula.aluno_id, matricula)
+    return sorted(por_aluno.values(), key=lambda m: (m.turma.nome, m.turma_id, m.aluno.nome, m.id))
+
+
+def _cursos_por_aluno(aluno_ids) -> dict[int, list[tuple[str, str]]]:
+    cursos: dict[int, list[tuple[str, str]]] = {}
+    rows = (
+        MatriculaCurso.objects.filter(aluno_id__in=aluno_ids)
+        .order_by("aluno_id", "-data_matricula", "-id")
+        .values_list("aluno_id", "curso__nome", "situacao")
+    )
+    for aluno_id, nome, situacao in rows:
+        lista = cursos.setdefault(aluno_id, [])
+        if len(lista) < 6:
+            lista.append((nome, situacao))
+    return cursos
+
+
+def _necessidades_por_aluno(aluno_ids) -> dict[int, list[str]]:
+    if AlunoNecessidade is None:
+        return {}
+    necessidades: dict[int, list[str]] = {}
+    rows = (
+        AlunoNecessidade.objects.filter(aluno_id__in=aluno_ids, ativo=True)
+        .order_by("aluno_id", "-id")
+        .values_list("aluno_id", "tipo__nome")
+    )
+    for aluno_id, nome in rows:
+        lista = necessidades.setdefault(aluno_id, [])
+        if len(lista) < 6:
+            lista.append(nome)
+    return necessidades
+
+
+def _configs_portal(matriculas) -> dict:
+    if PortalMunicipalConfig is None:
+        return {}
+    municipio_ids = {m.turma.unidade.secretaria.municipio_id for m in matriculas}
+    return {
+        cfg.municipio_id: cfg
+        for cfg in PortalMunicipalConfig.objects.filter(municipio_id__in=municipio_ids).only(
+            "municipio_id", "logo", "brasao"
+        )
+    }
+
+
+def _asset_url(fieldfile) -> str:
+    """Arquivo de media como URL da base dos PDFs (lido do disco, sem HTTP)."""
+    if not fieldfile:
+        return ""
+    try:
+        return pdf_asset_url(fieldfile.url)
+    except Exception:
+        return ""
+
+
+def _contextos_carteira(matriculas, *, user, base_url: str) -> list[dict]:
+    aluno_ids = [m.aluno_id for m in matriculas]
+    cursos = _cursos_por_aluno(aluno_ids)
+    necessidades = _necessidades_por_aluno(aluno_ids)
+    configs = _configs_portal(matriculas)
+
+    existentes: dict[tuple, CarteiraEstudantil] = {}
+    for carteira in CarteiraEstudantil.objects.filter(aluno_id__in=aluno_ids, ativa=True).order_by("-emitida_em", "-id"):
+        existentes.setdefault((carteira.aluno_id, carteira.matricula_id), carteira)
+
+    validade = validade_padrao_carteira()
+    novas, atualizadas, carteiras = [], [], []
+    for m in matriculas:
+        snapshot = snapshot_carteira(
+            m.aluno,
+            m,
+            cursos=cursos.get(m.aluno_id, []),
+            necessidades=necessidades.get(m.aluno_id, []),
+        )
+        carteira = existentes.get((m.aluno_id, m.id))
+        if carteira is None:
+            carteira = CarteiraEstudantil(aluno=m.aluno, matricula=m, validade=validade)
+            # Mesma regra de CarteiraEstudantil.save(), que o bulk_create não chama.
+            carteira.codigo_estudante = f"MAT-{m.id:06d}"
+            novas.append(carteira)
+        else:
+            carteira.validade = carteira.validade or validade
+            atualizadas.append(carteira)
+        carteira.emitida_por = user
+        carteira.dados_snapshot = snapshot
+        carteiras.append(carteira)
+    CarteiraEstudantil.objects.bulk_create(novas, batch_size=LOTE_BULK_BATCH_SIZE)
+    CarteiraEstudantil.objects.bulk_update(
+        atualizadas, ["emitida_por", "validade", "dados_snapshot"], batch_size=LOTE_BULK_BATCH_SIZE
+    )
+
+    contextos = []
+    data_emissao = timezone.localdate()
+    for m, carteira in zip(matriculas, carteiras):
+        validation_url = urljoin(
+            base_url, reverse("educacao:carteira_verificar_public", args=[carteira.codigo_verificacao])
+        )
+        cfg = configs.get(m.turma.unidade.secretaria.municipio_id)
+        snapshot = carteira.dados_snapshot
+        contextos.append(
+            {
+                "carteira": carteira,
+                "aluno": m.aluno,
+                "snapshot": snapshot,
+                "foto_url": _asset_url(getattr(m.aluno, "foto", None)),
+                "brasao_url": _asset_url(cfg.brasao) if cfg else "",
+                "validation_url": validation_url,
+                "qr_validacao": _try_make_qr_data_uri(validation_url),
+                "cursos": snapshot.get("cursos_complementares") or [],
+                "nee_labels": snapshot.get("necessidades_especiais") or [],
+                "possui_nee": bool(snapshot.get("possui_nee")),
+                "data_emissao": data_emissao,
+                "origem_url": reverse("educacao:carteira_emitir_pdf", args=[m.aluno_id]),
+            }
+        )
+    return contextos
+
+
+def _contextos_declaracao(matriculas, *, user, base_url: str) -> list[dict]:
+    configs = _configs_portal(matriculas)
+    gestores: dict[int, tuple[str, str]] = {}
+    data_emissao = timezone.localdate()
+
+    contextos = []
+    for m in matriculas:
+        unidade = m.turma.unidade
+        if unidade.pk not in gestores:
+            gestores[unidade.pk] = resolver_gestor_unidade(unidade)
+        gestor_nome, gestor_cargo = gestores[unidade.pk]
+        cfg = configs.get(unidade.secretaria.municipio_id)
+        contextos.append(
+            {
+                **dados_declaracao(m.aluno, m),
+                "gestor_nome": gestor_nome,
+                "gestor_cargo": gestor_cargo,
+                "data_emissao": data_emissao,
+                "data_emissao_extenso": data_extenso_ptbr(data_emissao),
+                "brasao_url": _asset_url(cfg.brasao) if cfg else "",
+                "logo_municipio_url": _asset_url(cfg.logo) if cfg else "",
+                "origem_url": reverse("educacao:declaracao_vinculo_pdf", args=[m.aluno_id]),
+            }
+        )
+    return contextos
+
+
+def _contextos_boletim(matriculas, *, user, base_url: str) -> list[dict]:
+    diarios = list(
+        DiarioTurma.objects.select_related("professor")
+        .filter(turma_id__in={m.turma_id for m in matriculas})
+        .order_by("professor__username")
+    )
+    diarios_por_turma: dict[int, list] = {}
+    for diario in diarios:
+        diarios_por_turma.setdefault(diario.turma_id, []).append(diario)
+
+    avaliacoes = list(
+        Avaliacao.objects.filter(diario_id__in=[d.id for d in diarios]).only("id", "diario_id", "titulo", "peso", "data")
+    )
+    avaliacoes_por_diario: dict[int, list] = {}
+    for avaliacao in avaliacoes:
+        avaliacoes_por_diario.setdefault(avaliacao.diario_id, []).append(avaliacao)
+
+    notas: dict[int, dict] = {}
+    rows = Nota.objects.filter(
+        avaliacao_id__in=[a.id for a in avaliacoes],
+        aluno_id__in=[m.aluno_id for m in matriculas],
+    ).values_list("aluno_id", "avaliacao_id", "valor")
+    for aluno_id, avaliacao_id, valor in rows:
+        notas.setdefault(aluno_id, {})[avaliacao_id] = valor
+
+    contextos = []
+    for m in matriculas:
+        linhas = linhas_boletim(diarios_por_turma.get(m.turma_id, []), avaliacoes_por_diario, notas.get(m.aluno_id, {}))
+        contextos.append(
+            {
+                "filtros": f"Aluno={m.aluno.nome} | Turma={m.turma.nome} | Ano={m.turma.ano_letivo}",
+                "headers": BOLETIM_HEADERS,
+                "rows": linhas_boletim_pdf(linhas),
+                "origem_url": reverse("educacao:boletim_aluno", args=[m.turma_id, m.aluno_id]),
+            }
+        )
+    return contextos
+
+
+_CONTEXTOS = {
+    TIPO_CARTEIRA: _contextos_carteira,
+    TIPO_DECLARACAO: _contextos_declaracao,
+    TIPO_BOLETIM: _contextos_boletim,
+}
+
+
+def _tamanho_bloco() -> int:
+    return max(1, int(getattr(settings, "DOCUMENTOS_LOTE_BLOCO", 50)))
+
+
+def montar_documentos_lote(matriculas, *, tipo: str, user=None, base_url: str = "") -> list[dict]:
+    """
+    HTML do corpo de cada documento e o DocumentoEmitido (ainda não gravado)
+    correspondente, na ordem das matrículas.
+    """
+    cfg = TIPOS[tipo]
+    agora = timezone.localtime()
+    base = {
+        "title": cfg["titulo"],
+        "subtitle": "",
+        "printed_at": agora.strftime("%d/%m/%Y %H:%M"),
+        "printed_by": getattr(user, "username", "") or "sistema",
+        "logo_url": pdf_asset_url(static("img/logo_prefeitura.png")),
+    }
+
+    documentos = []
+    for m, contexto in zip(matriculas, _CONTEXTOS[tipo](matriculas, user=user, base_url=base_url)):
+        emitido = preparar_documento_emitido(
+            tipo=cfg["documento"],
+            titulo=f"{cfg['titulo']} — {m.aluno.nome}"[:255],
+            gerado_por=user,
+            origem_url=contexto.pop("origem_url"),
+        )
+        validacao_url = urljoin(base_url, reverse("core:validar_documento_codigo", args=[emitido.codigo]))
+        contexto = {
+            **base,
+            "report_hash": str(emitido.codigo),
+            "qr_data_uri": _try_make_qr_data_uri(validacao_url) if cfg["qr_documento"] else None,
+            **contexto,
+        }
+        documentos.append(
+            {
+                "matricula": m,
+                "emitido": emitido,
+                "arquivo": f"{cfg['arquivo']}_{slugify(m.aluno.nome) or 'aluno'}_{m.aluno_id}.pdf",
+                "corpo": render_to_string(cfg["corpo"], contexto),
+            }
+        )
+    return documentos
+
+
+def _html_lote(titulo: str, corpos) -> str:
+    return render_to_string(LOTE_TEMPLATE, {"title": titulo, "corpos": corpos})
+
+
+def _unir_pdfs(partes: list[bytes]) -> bytes:
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for pdf_bytes in partes:
+        writer.append(PdfReader(io.BytesIO(pdf_bytes)))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def renderizar_documentos_lote(documentos: list[dict], *, tipo: str, formato: str = FORMATO_PDF) -> tuple[bytes, int]:
+    """
+    (conteúdo, páginas). Em PDF, blocos de DOCUMENTOS_LOTE_BLOCO documentos por
+    renderização, unidos no fim; em ZIP, um PDF por documento. Com o pool de PDFs
+    ativo, as renderizações correm em paralelo.
+    """
+    cfg = TIPOS[tipo]
+    folhas = (cfg["folha"],)
+    timeout = int(getattr(settings, "PDF_RENDER_TIMEOUT_SECONDS", 120))
+
+    if formato == FORMATO_ZIP:
+        futures = [submit_pdf_render(_html_lote(cfg["titulo"], [doc["corpo"]]), stylesheets=folhas) for doc in documentos]
+        buffer = io.BytesIO()
+        paginas = 0
+        # PDFs já saem comprimidos; o ZIP só os agrupa.
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+            for doc, future in zip(documentos, futures):
+                pdf_bytes, pages = future.result(timeout=timeout)
+                zf.writestr(doc["arquivo"], pdf_bytes)
+                paginas += pages
+        return buffer.getvalue(), paginas
+
+    bloco = _tamanho_bloco()
+    futures = [
+        submit_pdf_render(
+            _html_lote(cfg["titulo"], [doc["corpo"] for doc in documentos[inicio : inicio + bloco]]),
+            stylesheets=folhas,
+        )
+        for inicio in range(0, len(documentos), bloco)
+    ]
+    partes = [future.result(timeout=timeout) for future in futures]
+    paginas = sum(pages for _pdf, pages in partes)
+    if len(partes) == 1:
+        return partes[0][0], paginas
+    return _unir_pdfs([pdf_bytes for pdf_bytes, _pages in partes]), paginas
+
+
+def gerar_documentos_lote(matriculas, *, tipo: str, formato: str = FORMATO_PDF, user=None, base_url: str = "") -> dict:
+    """Monta, renderiza e registra (DocumentoEmitido em lote) os documentos das matrículas."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de documento inválido: {tipo}")
+    if formato not in dict(FORMATOS):
+        raise ValueError(f"Formato inválido: {formato}")
+
+    matriculas = list(matriculas)
+    documentos = montar_documentos_lote(matriculas, tipo=tipo, user=user, base_url=base_url)
+    conteudo, paginas = renderizar_documentos_lote(documentos, tipo=tipo, formato=formato)
+    registrar_documentos_emitidos([doc["emitido"] for doc in documentos])
+    return {
+        "conteudo": conteudo,
+        "formato": formato,
+        "documentos": len(documentos),
+        "paginas": paginas,
+    }
+
+
+def nome_arquivo_lote(tipo: str, formato: str, *, turma=None, unidade=None) -> str:
+    alvo = turma if turma is not None else unidade
+    rotulo = slugify(getattr(alvo, "nome", "")) or "lote"
+    agora = timezone.localtime().strftime("%Y%m%d_%H%M")
+    return f"{TIPOS[tipo]['arquivo']}_lote_{rotulo}_{agora}.{formato}"
+
+
+def enfileirar_documentos_lote(
+    request, *, tipo: str, formato: str, turma=None, unidade=None, incluir_inativos: bool = False
+):
+    """Cria o RelatorioPdfJob do lote e agenda a geração (educacao.gerar_documentos_lote)."""
+    from apps.core.models import RelatorioPdfJob
+
+    from .tasks import gerar_documentos_lote_task
+
+    alvo = turma if turma is not None else unidade
+    job = RelatorioPdfJob.objects.create(
+        titulo=f"{TIPOS[tipo]['rotulo']} • {alvo.nome}"[:255],
+        nome_arquivo=nome_arquivo_lote(tipo, formato, turma=turma, unidade=unidade),
+        solicitado_por=request.user,
+    )
+    params = {
+        "tipo": tipo,
+        "formato": formato,
+        "turma_id": getattr(turma, "pk", None),
+        "unidade_id": getattr(unidade, "pk", None),
+        "incluir_inativos": incluir_inativos,
+        "base_url": request.build_absolute_uri("/"),
+    }
+    try:
+        gerar_documentos_lote_task.delay(job.pk, **params)
+    except Exception:
+        # Broker indisponível: gera na própria requisição.
+        processar_documentos_lote_job(job.pk, **params)
+        job.refresh_from_db()
+    return job
+
+
+def processar_documentos_lote_job(
+    job_id: int,
+    *,
+    tipo: str,
+    formato: str,
+    turma_id: int | None = None,
+    unidade_id: int | None = None,
+    incluir_inativos: bool = False,
+    base_url: str = "",
+):
+    from django.core.files.base import ContentFile
+
+    from apps.core.models import RelatorioPdfJob
+    from apps.org.models import Unidade
+
+    from .models import Turma
+
+    job = RelatorioPdfJob.objects.select_related("solicitado_por").filter(pk=job_id).first()
+    if job is None or job.status == RelatorioPdfJob.Status.CONCLUIDO:
+        return job
+
+    job.status = RelatorioPdfJob.Status.PROCESSANDO
+    job.save(update_fields=["status"])
+    try:
+        matriculas = matriculas_lote(
+            job.solicitado_por,
+            turma=Turma.objects.filter(pk=turma_id).first() if turma_id else None,
+            unidade=Unidade.objects.filter(pk=unidade_id).first() if unidade_id else None,
+            incluir_inativos=incluir_inativos,
+        )
+        if not matriculas:
+            raise ValueError("Nenhuma matrícula encontrada para a seleção.")
+        resultado = gerar_documentos_lote(
+            matriculas,
+            tipo=tipo,
+            formato=formato,
+            user=job.solicitado_por,
+            base_url=base_url,
+        )
+        job.arquivo.save(f"{job.codigo}.{formato}", ContentFile(resultado["conteudo"]), save=False)
+        job.paginas = resultado["paginas"]
+        job.status = RelatorioPdfJob.Status.CONCLUIDO
+        job.erro = ""
+    except Exception as exc:
+        job.status = RelatorioPdfJob.Status.ERRO
+        job.erro = str(exc)[:2000]
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["arquivo", "paginas", "status", "erro", "concluido_em"])
+    return job
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Matricula
+from .models_diario import DiarioResumoAluno, DiarioResumoPeriodo, DiarioTurma
+from .models_periodos import FechamentoPeriodoLoteJob, FechamentoPeriodoTurma
+from .services_academico import classify_resultado, metricas_periodo_aluno
+from .services_resumo_diario import garantir_resumos
+
+FECHAMENTO_CAMPOS = (
+    "media_corte",
+    "frequencia_corte",
+    "total_alunos",
+    "aprovados",
+    "recuperacao",
+    "reprovados",
+    "observacao",
+    "fechado_por",
+    "fechado_em",
+)
+
+
+def _bloco_turmas() -> int:
+    return max(1, int(getattr(settings, "FECHAMENTO_LOTE_BLOCO", 200)))
+
+
+def resumos_fechamento(turma_ids: list[int], periodo, *, media_corte: Decimal, frequencia_corte: Decimal) -> dict:
+    """
+    Contagem de aprovados/recuperação/reprovados do período para várias turmas com
+    consultas agrupadas sobre o boletim materializado (não uma rodada por turma).
+    Mesma classificação de `calc_periodo_metrics_by_aluno` + `classify_resultado`.
+    """
+    media_corte = Decimal(str(media_corte))
+    frequencia_corte = Decimal(str(frequencia_corte))
+    resumos = {
+        turma_id: {"total_alunos": 0, "aprovados": 0, "recuperacao": 0, "reprovados": 0} for turma_id in turma_ids
+    }
+    if not turma_ids:
+        return resumos
+
+    garantir_resumos(DiarioTurma.objects.filter(turma_id__in=turma_ids).values_list("id", flat=True))
+    aulas = dict(
+        DiarioResumoPeriodo.objects.filter(diario__turma_id__in=turma_ids, periodo=periodo)
+        .values("diario__turma_id")
+        .annotate(total=Sum("total_aulas"))
+        .values_list("diario__turma_id", "total")
+    )
+    celulas = {
+        (turma_id, aluno_id): (soma, pesos, presencas)
+        for turma_id, aluno_id, soma, pesos, presencas in DiarioResumoAluno.objects.filter(
+            diario__turma_id__in=turma_ids, periodo=periodo
+        )
+        .values("diario__turma_id", "aluno_id")
+        .annotate(soma=Sum("soma_ponderada"), pesos=Sum("soma_pesos"), presencas=Sum("presencas"))
+        .values_list("diario__turma_id", "aluno_id", "soma", "pesos", "presencas")
+    }
+
+    matriculas = Matricula.objects.filter(turma_id__in=turma_ids, situacao=Matricula.Situacao.ATIVA)
+    for turma_id, aluno_id in matriculas.values_list("turma_id", "aluno_id"):
+        media, freq = metricas_periodo_aluno(celulas.get((turma_id, aluno_id)), aulas.get(turma_id) or 0)
+        resultado = classify_resultado(
+            media=media,
+            frequencia=freq,
+            media_corte=media_corte,
+            frequencia_corte=frequencia_corte,
+        )
+        resumo = resumos[turma_id]
+        resumo["total_alunos"] += 1
+        if resultado == "Aprovado":
+            resumo["aprovados"] += 1
+        elif resultado == "Recuperação":
+            resumo["recuperacao"] += 1
+        else:
+            resumo["reprovados"] += 1
+    return resumos
+
+
+def fechar_turmas_periodo(
+    turma_ids: list[int],
+    periodo,
+    *,
+    media_corte: Decimal,
+    frequencia_corte: Decimal,
+    observacao: str = "",
+    user=None,
+    progresso=None,
+) -> int:
+    """
+    Fecha o período para as turmas em blocos (FECHAMENTO_LOTE_BLOCO): resumos agrupados
+    e upsert em lote de FechamentoPeriodoTurma. `progresso(processadas)` é chamado a cada bloco.
+    """
+    turma_ids = list(dict.fromkeys(turma_ids))
+    bloco = _bloco_turmas()
+    processadas = 0
+    for inicio in range(0, len(turma_ids), bloco):
+        ids = turma_ids[inicio : inicio + bloco]
+        resumos = resumos_fechamento(ids, periodo, media_corte=media_corte, frequencia_corte=frequencia_corte)
+        agora = timezone.now()
+        with transaction.atomic():
+            existentes = {
+                obj.turma_id: obj
+                for obj in FechamentoPeriodoTurma.objects.select_for_update().filter(turma_id__in=ids, periodo=periodo)
+            }
+            novos = []
+            alterados = []
+            for turma_id in ids:
+                valores = {
+                    **resumos[turma_id],
+                    "media_corte": media_corte,
+                    "frequencia_corte": frequencia_corte,
+                    "observacao": (observacao or "").strip(),
+                    "fechado_por": user,
+                    "fechado_em": agora,
+                }
+                obj = existentes.get(turma_id)
+                if obj is None:
+                    novos.append(FechamentoPeriodoTurma(turma_id=turma_id, periodo=periodo, **valores))
+                    continue
+                for campo, valor in valores.items():
+                    setattr(obj, campo, valor)
+                alterados.append(obj)
+            FechamentoPeriodoTurma.objects.bulk_create(novos, batch_size=bloco)
+            FechamentoPeriodoTurma.objects.bulk_update(alterados, FECHAMENTO_CAMPOS, batch_size=bloco)
+        processadas += len(ids)
+        if progresso is not None:
+            progresso(processadas)
+    return processadas
+
+
+def enfileirar_fechamento_lote(
+    user, *, periodo, turma_ids: list[int], media_corte: Decimal, frequencia_corte: Decimal, observacao: str = ""
+) -> FechamentoPeriodoLoteJob:
+    """Cria o FechamentoPeriodoLoteJob e agenda o processamento (educacao.fechar_periodo_lote)."""
+    from .tasks import fechar_periodo_lote_task
+
+    job = FechamentoPeriodoLoteJob.objects.create(
+        periodo=periodo,
+        turma_ids=list(turma_ids),
+        total_turmas=len(turma_ids),
+        media_corte=media_corte,
+        frequencia_corte=frequencia_corte,
+        observacao=(observacao or "").strip(),
+        solicitado_por=user,
+    )
+    try:
+        fechar_periodo_lote_task.delay(job.pk)
+    except Exception:
+        # Broker indisponível: processa na própria requisição.
+        processar_fechamento_lote_job(job.pk)
+        job.refresh_from_db()
+    return job
+
+
+def processar_fechamento_lote_job(job_id: int) -> FechamentoPeriodoLoteJob | None:
+    job = FechamentoPeriodoLoteJob.objects.select_related("periodo", "solicitado_por").filter(pk=job_id).first()
+    if job is None or job.status == FechamentoPeriodoLoteJob.Status.CONCLUIDO:
+        return job
+
+    job.status = FechamentoPeriodoLoteJob.Status.PROCESSANDO
+    job.turmas_processadas = 0
+    job.save(update_fields=["status", "turmas_processadas"])
+
+    def progresso(processadas: int):
+        FechamentoPeriodoLoteJob.objects.filter(pk=job.pk).update(turmas_processadas=processadas)
+
+    try:
+        job.turmas_processadas = fechar_turmas_periodo(
+            job.turma_ids,
+            job.periodo,
+            media_corte=job.media_corte,
+            frequencia_corte=job.frequencia_corte,
+            observacao=job.observacao,
+            user=job.solicitado_por,
+            progresso=progresso,
+        )
+        job.status = FechamentoPeriodoLoteJob.Status.CONCLUIDO
+        job.erro = ""
+    except Exception as exc:
+        job.refresh_from_db(fields=["turmas_processadas"])
+        job.status = FechamentoPeriodoLoteJob.Status.ERRO
+        job.erro = str(exc)[:2000]
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["turmas_processadas", "status", "erro", "concluido_em"])
+    return job
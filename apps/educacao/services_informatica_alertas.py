@@ -0,0 +1,158 @@
+"""
+Alertas de frequência das turmas de informática calculados em conjunto.
+
+As frequências de todas as turmas do bloco vêm numa única consulta ordenada por data
+da aula; percentual e maior sequência de faltas de cada aluno saem de uma passada só.
+Os `InformaticaAlertaFrequencia` (baixa frequência e faltas consecutivas) de cada
+matrícula ativa são gravados com `bulk_create`/`bulk_update`, com as mesmas regras de
+ativação/resolução do recálculo por aluno.
+
+`recalcular_alertas_pendentes` é a rotina noturna: só revisita as turmas com
+frequência ou matrícula alterada desde a marca da última execução
+(`InformaticaAlertaRecalculo`).
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models_informatica import (
+    InformaticaAlertaFrequencia,
+    InformaticaAlertaRecalculo,
+    InformaticaFrequencia,
+    InformaticaMatricula,
+)
+
+FREQUENCIA_MINIMA = 75
+FALTAS_CONSECUTIVAS_LIMITE = 3
+ALERTAS_BATCH_SIZE = 1000
+
+ALERTA_CAMPOS = ("ativo", "percentual_frequencia", "faltas_consecutivas", "resolvido_em")
+
+
+def _bloco_turmas() -> int:
+    return max(1, int(getattr(settings, "INFORMATICA_ALERTAS_BLOCO_TURMAS", 200)))
+
+
+def calcular_frequencia_turmas(turma_ids: Iterable[int]) -> dict[tuple[int, int], tuple[float, int]]:
+    """(turma_id, aluno_id) -> (percentual de presença, maior sequência de faltas)."""
+    contagem: dict[tuple[int, int], list[int]] = {}
+    linhas = (
+        InformaticaFrequencia.objects.filter(aula__turma_id__in=list(turma_ids))
+        .order_by("aula__data_aula", "id")
+        .values_list("aula__turma_id", "aluno_id", "presente")
+    )
+    for turma_id, aluno_id, presente in linhas.iterator(chunk_size=ALERTAS_BATCH_SIZE):
+        # [total, presenças, faltas seguidas atuais, maior sequência]
+        item = contagem.get((turma_id, aluno_id))
+        if item is None:
+            item = contagem[(turma_id, aluno_id)] = [0, 0, 0, 0]
+        item[0] += 1
+        if presente:
+            item[1] += 1
+            item[2] = 0
+        else:
+            item[2] += 1
+            item[3] = max(item[3], item[2])
+    return {
+        chave: (round((presencas / total) * 100, 2), maior) for chave, (total, presencas, _, maior) in contagem.items()
+    }
+
+
+def _recalcular_bloco(turma_ids: list[int], agora) -> int:
+    frequencias = calcular_frequencia_turmas(turma_ids)
+    matriculas = list(
+        InformaticaMatricula.objects.filter(
+            turma_id__in=turma_ids, status=InformaticaMatricula.Status.MATRICULADO
+        ).values_list("id", "turma_id", "aluno_id")
+    )
+    existentes: dict[tuple[int, str], InformaticaAlertaFrequencia] = {}
+    for alerta in InformaticaAlertaFrequencia.objects.filter(
+        matricula_id__in=[matricula_id for matricula_id, _, _ in matriculas]
+    ).order_by("id"):
+        existentes.setdefault((alerta.matricula_id, alerta.tipo), alerta)
+
+    novos = []
+    alterados = []
+    for matricula_id, turma_id, aluno_id in matriculas:
+        percentual, faltas = frequencias.get((turma_id, aluno_id), (100.0, 0))
+        for tipo, ativo in (
+            (InformaticaAlertaFrequencia.Tipo.BAIXA_FREQUENCIA, percentual < FREQUENCIA_MINIMA),
+            (InformaticaAlertaFrequencia.Tipo.FALTAS_CONSECUTIVAS, faltas >= FALTAS_CONSECUTIVAS_LIMITE),
+        ):
+            alerta = existentes.get((matricula_id, tipo))
+            if alerta is None:
+                novos.append(
+                    InformaticaAlertaFrequencia(
+                        matricula_id=matricula_id,
+                        tipo=tipo,
+                        percentual_frequencia=Decimal(str(percentual)),
+                        faltas_consecutivas=faltas,
+                        ativo=ativo,
+                    )
+                )
+                continue
+            if (
+                alerta.ativo == ativo
+                and float(alerta.percentual_frequencia or 0) == float(percentual)
+                and int(alerta.faltas_consecutivas or 0) == int(faltas)
+            ):
+                continue
+            alerta.ativo = ativo
+            alerta.percentual_frequencia = Decimal(str(percentual))
+            alerta.faltas_consecutivas = faltas
+            if not ativo and not alerta.resolvido_em:
+                alerta.resolvido_em = agora
+            if ativo:
+                alerta.resolvido_em = None
+            alterados.append(alerta)
+
+    with transaction.atomic():
+        InformaticaAlertaFrequencia.objects.bulk_create(novos, batch_size=ALERTAS_BATCH_SIZE)
+        InformaticaAlertaFrequencia.objects.bulk_update(alterados, ALERTA_CAMPOS, batch_size=ALERTAS_BATCH_SIZE)
+    return len(novos) + len(alterados)
+
+
+def recalcular_alertas_turmas(turma_ids: Iterable[int]) -> int:
+    """Recalcula os alertas das turmas em blocos. Retorna os alertas criados/alterados."""
+    turma_ids = sorted(set(turma_ids))
+    agora = timezone.now()
+    bloco = _bloco_turmas()
+    return sum(
+        _recalcular_bloco(turma_ids[inicio : inicio + bloco], agora) for inicio in range(0, len(turma_ids), bloco)
+    )
+
+
+def recalcular_alertas_turma(turma_id: int) -> int:
+    return recalcular_alertas_turmas([turma_id])
+
+
+def turmas_alteradas_desde(marca) -> set[int]:
+    """Turmas com frequência ou matrícula criada/alterada depois de `marca` (todas, se None)."""
+    frequencias = InformaticaFrequencia.objects.all()
+    matriculas = InformaticaMatricula.objects.all()
+    if marca is not None:
+        frequencias = frequencias.filter(atualizado_em__gt=marca)
+        matriculas = matriculas.filter(atualizado_em__gt=marca)
+    turma_ids = set(frequencias.values_list("aula__turma_id", flat=True).distinct())
+    turma_ids.update(matriculas.values_list("turma_id", flat=True).distinct())
+    return turma_ids
+
+
+def recalcular_alertas_pendentes() -> InformaticaAlertaRecalculo:
+    """Rotina noturna: recalcula só as turmas alteradas desde a última marca."""
+    anterior = InformaticaAlertaRecalculo.objects.filter(concluido_em__isnull=False).first()
+    # A nova marca é o início desta execução: o que for gravado durante o recálculo
+    # entra na próxima.
+    execucao = InformaticaAlertaRecalculo.objects.create(marca=timezone.now())
+    turma_ids = turmas_alteradas_desde(anterior.marca if anterior else None)
+    execucao.alertas_alterados = recalcular_alertas_turmas(turma_ids)
+    execucao.turmas_processadas = len(turma_ids)
+    execucao.concluido_em = timezone.now()
+    execucao.save(update_fields=["alertas_alterados", "turmas_processadas", "concluido_em"])
+    return execucao
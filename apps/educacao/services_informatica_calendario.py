@@ -0,0 +1,369 @@
+"""
+Sincronização de encontros semanais e do calendário de aulas das turmas de informática.
+
+O conjunto de datas de aula é calculado em memória (período letivo, dias da grade e
+bloqueios do calendário educacional); as aulas já existentes da turma vêm numa consulta
+e só a diferença é gravada: `bulk_create` das datas novas, `bulk_update` das previstas
+com dados divergentes e um único UPDATE cancelando as previstas que saíram da grade.
+Encontros só são validados/gravados quando mudam, e a oferta do programa complementar é
+ressincronizada uma vez por turma.
+
+Uma grade com muitas turmas pode ser sincronizada em segundo plano
+(`InformaticaGradeSincronizacaoJob`, tarefa educacao.sincronizar_grade_informatica).
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from .models_calendario import CalendarioEducacionalEvento
+from .models_informatica import (
+    InformaticaAulaDiario,
+    InformaticaEncontroSemanal,
+    InformaticaGradeHorario,
+    InformaticaGradeSincronizacaoJob,
+    InformaticaTurma,
+)
+from .models_periodos import PeriodoLetivo
+
+INFORMATICA_INICIO_PADRAO_MUNICIPIO_ANO = {
+    ("governador nunes freire", 2026): date(2026, 3, 16),
+}
+
+TIPOS_BLOQUEIO = {
+    CalendarioEducacionalEvento.Tipo.FERIADO,
+    CalendarioEducacionalEvento.Tipo.RECESSO,
+    CalendarioEducacionalEvento.Tipo.FACULTATIVO,
+    CalendarioEducacionalEvento.Tipo.PEDAGOGICO,
+    CalendarioEducacionalEvento.Tipo.PLANEJAMENTO,
+}
+
+ENCONTRO_CAMPOS = (
+    "grade_horario",
+    "hora_inicio",
+    "hora_fim",
+    "minutos_aula_efetiva",
+    "minutos_intervalo_tecnico",
+    "tipo_encontro",
+    "formato_especial",
+    "ativo",
+)
+AULA_CAMPOS = (
+    "encontro",
+    "professor",
+    "tipo_encontro",
+    "duracao_total_minutos",
+    "pausa_interna_minutos",
+    "formato_especial",
+)
+AULAS_BATCH_SIZE = 500
+OBSERVACAO_CANCELAMENTO = "Cancelada por ajuste de grade/calendário."
+
+
+def sincronizacao_async_min_turmas() -> int:
+    return max(1, int(getattr(settings, "INFORMATICA_SYNC_GRADE_ASYNC_MIN_TURMAS", 5)))
+
+
+def periodo_datas_turma(turma: InformaticaTurma, *, memo: dict | None = None) -> tuple[date, date]:
+    memo = {} if memo is None else memo
+    chave_periodo = ("periodo", turma.ano_letivo)
+    if chave_periodo not in memo:
+        memo[chave_periodo] = tuple(
+            PeriodoLetivo.objects.filter(ano_letivo=turma.ano_letivo, ativo=True).values_list("inicio", "fim")
+        )
+    periodos = memo[chave_periodo]
+    if periodos:
+        inicio = min(item[0] for item in periodos)
+        fim = max(item[1] for item in periodos)
+    else:
+        hoje = timezone.localdate()
+        inicio = hoje
+        fim = hoje + timedelta(days=120)
+
+    # Permite início específico da oferta de Informática sem afetar o calendário geral.
+    unidade = getattr(getattr(turma, "laboratorio", None), "unidade", None)
+    secretaria_id = getattr(unidade, "secretaria_id", None)
+    unidade_id = getattr(unidade, "id", None)
+    if secretaria_id:
+        chave_evento = ("inicio", turma.ano_letivo, secretaria_id, unidade_id)
+        if chave_evento not in memo:
+            memo[chave_evento] = (
+                CalendarioEducacionalEvento.objects.filter(
+                    ano_letivo=turma.ano_letivo,
+                    secretaria_id=secretaria_id,
+                    ativo=True,
+                )
+                .filter(Q(unidade__isnull=True) | Q(unidade_id=unidade_id))
+                .filter(Q(titulo__icontains="informática") | Q(titulo__icontains="informatica"))
+                .order_by("data_inicio")
+                .values_list("data_inicio", flat=True)
+                .first()
+            )
+        if memo[chave_evento]:
+            inicio = max(inicio, memo[chave_evento])
+
+    municipio_nome = (
+        getattr(getattr(getattr(turma, "curso", None), "municipio", None), "nome", "") or ""
+    ).strip().lower()
+    fallback_inicio = INFORMATICA_INICIO_PADRAO_MUNICIPIO_ANO.get((municipio_nome, int(turma.ano_letivo or 0)))
+    if fallback_inicio:
+        inicio = max(inicio, fallback_inicio)
+
+    if inicio > fim:
+        inicio = fim
+    return inicio, fim
+
+
+def datas_bloqueadas_turma(turma: InformaticaTurma, inicio: date, fim: date, *, memo: dict | None = None) -> set[date]:
+    secretaria_id = turma.laboratorio.unidade.secretaria_id
+    unidade_id = turma.laboratorio.unidade_id
+    chave = ("bloqueios", turma.ano_letivo, secretaria_id, unidade_id, inicio, fim)
+    if memo is not None and chave in memo:
+        return memo[chave]
+
+    eventos = (
+        CalendarioEducacionalEvento.objects.filter(
+            ano_letivo=turma.ano_letivo,
+            secretaria_id=secretaria_id,
+            ativo=True,
+            data_inicio__lte=fim,
+            data_fim__gte=inicio,
+        )
+        .filter(Q(unidade__isnull=True) | Q(unidade_id=unidade_id))
+        .values_list("tipo", "dia_letivo", "data_inicio", "data_fim")
+    )
+    bloqueios = set()
+    for tipo, dia_letivo, data_inicio, data_fim in eventos:
+        if tipo not in TIPOS_BLOQUEIO and dia_letivo:
+            continue
+        cursor = max(inicio, data_inicio)
+        end = min(fim, data_fim or data_inicio)
+        while cursor <= end:
+            bloqueios.add(cursor)
+            cursor = cursor + timedelta(days=1)
+    if memo is not None:
+        memo[chave] = bloqueios
+    return bloqueios
+
+
+def sincronizar_encontros_turma(turma: InformaticaTurma) -> list[InformaticaEncontroSemanal]:
+    """
+    Ajusta os encontros semanais à grade da turma e retorna os ativos. Só os encontros
+    novos ou alterados passam por `full_clean` (conflitos de laboratório/professor).
+    """
+    if not turma.grade_horario_id:
+        return []
+
+    grade = turma.grade_horario
+    especial = grade.tipo_grade == InformaticaGradeHorario.TipoGrade.ESPECIAL_SEXTA
+    esperados = [int(day) for day in grade.dias_semana]
+    existentes = list(turma.encontros.all())
+    by_day = {int(e.dia_semana): e for e in existentes}
+
+    novos = []
+    alterados = []
+    for day in esperados:
+        payload = {
+            "grade_horario_id": grade.pk,
+            "hora_inicio": grade.hora_inicio,
+            "hora_fim": grade.hora_fim,
+            "minutos_aula_efetiva": grade.duracao_aula_minutos,
+            "minutos_intervalo_tecnico": grade.duracao_intervalo_minutos,
+            "tipo_encontro": "ESPECIAL_SEXTA" if especial else "REGULAR",
+            "formato_especial": bool(especial),
+            "ativo": True,
+        }
+        encontro = by_day.get(day)
+        if encontro is None:
+            encontro = InformaticaEncontroSemanal(turma=turma, dia_semana=day, **payload)
+            encontro.grade_horario = grade
+            encontro.full_clean()
+            novos.append(encontro)
+            continue
+        if all(getattr(encontro, campo) == valor for campo, valor in payload.items()):
+            continue
+        for campo, valor in payload.items():
+            setattr(encontro, campo, valor)
+        encontro.turma, encontro.grade_horario = turma, grade
+        encontro.full_clean()
+        alterados.append(encontro)
+
+    for item in existentes:
+        if int(item.dia_semana) not in esperados and item.ativo:
+            item.ativo = False
+            alterados.append(item)
+
+    if novos or alterados:
+        InformaticaEncontroSemanal.objects.bulk_create(novos)
+        InformaticaEncontroSemanal.objects.bulk_update(alterados, ENCONTRO_CAMPOS)
+        from .services_programas import ProgramasComplementaresService
+
+        ProgramasComplementaresService.sync_informatica_offer_schedule(turma=turma)
+
+    ativos = [e for e in [*existentes, *novos] if e.ativo]
+    return sorted(ativos, key=lambda e: (int(e.dia_semana), e.hora_inicio))
+
+
+def sincronizar_calendario_turma(
+    turma: InformaticaTurma, encontros: list[InformaticaEncontroSemanal] | None = None, *, memo: dict | None = None
+) -> dict[str, int]:
+    """
+    Gera/ajusta as aulas previstas da turma pela grade e pelo calendário. Retorna a
+    contagem de aulas criadas, atualizadas e canceladas.
+    """
+    resultado = {"criadas": 0, "atualizadas": 0, "canceladas": 0}
+    if not turma.grade_horario_id:
+        return resultado
+    if encontros is None:
+        encontros = list(turma.encontros_ativos_qs)
+    if not encontros:
+        return resultado
+
+    inicio, fim = periodo_datas_turma(turma, memo=memo)
+    bloqueios = datas_bloqueadas_turma(turma, inicio, fim, memo=memo)
+    encontros_por_dia = {int(e.dia_semana): e for e in encontros}
+
+    alvo: dict[date, InformaticaEncontroSemanal] = {}
+    cursor = inicio
+    while cursor <= fim:
+        encontro = encontros_por_dia.get(int(cursor.weekday()))
+        if encontro and cursor not in bloqueios:
+            alvo[cursor] = encontro
+        cursor = cursor + timedelta(days=1)
+
+    defaults = {
+        "professor_id": turma.instrutor_id,
+        "tipo_encontro": (
+            InformaticaAulaDiario.TipoEncontro.ESPECIAL_SEXTA
+            if turma.encontro_unico_semana
+            else InformaticaAulaDiario.TipoEncontro.REGULAR
+        ),
+        "duracao_total_minutos": turma.grade_horario.duracao_total_minutos,
+        "pausa_interna_minutos": turma.grade_horario.pausa_interna_opcional_minutos,
+        "formato_especial": bool(turma.encontro_unico_semana),
+    }
+
+    existentes = {
+        aula.data_aula: aula
+        for aula in InformaticaAulaDiario.objects.filter(turma_id=turma.id)
+    }
+    novas = []
+    atualizadas = []
+    canceladas = []
+    for data_aula, encontro in alvo.items():
+        aula = existentes.get(data_aula)
+        if aula is None:
+            novas.append(
+                InformaticaAulaDiario(
+                    turma_id=turma.id,
+                    data_aula=data_aula,
+                    encontro_id=encontro.id,
+                    status=InformaticaAulaDiario.Status.PREVISTA,
+                    **defaults,
+                )
+            )
+            continue
+        if aula.status != InformaticaAulaDiario.Status.PREVISTA:
+            continue
+        valores = {"encontro_id": encontro.id, **defaults}
+        if any(getattr(aula, campo) != valor for campo, valor in valores.items()):
+            for campo, valor in valores.items():
+                setattr(aula, campo, valor)
+            atualizadas.append(aula)
+
+    # Aulas previstas fora da grade atual viram canceladas para manter rastreabilidade.
+    canceladas = [
+        aula.pk
+        for data_aula, aula in existentes.items()
+        if aula.status == InformaticaAulaDiario.Status.PREVISTA and data_aula not in alvo
+    ]
+
+    with transaction.atomic():
+        InformaticaAulaDiario.objects.bulk_create(novas, batch_size=AULAS_BATCH_SIZE)
+        InformaticaAulaDiario.objects.bulk_update(atualizadas, AULA_CAMPOS, batch_size=AULAS_BATCH_SIZE)
+        if canceladas:
+            InformaticaAulaDiario.objects.filter(pk__in=canceladas).update(
+                status=InformaticaAulaDiario.Status.CANCELADA,
+                observacoes=Concat(Coalesce(F("observacoes"), Value("")), Value("\n" + OBSERVACAO_CANCELAMENTO)),
+            )
+    resultado.update(criadas=len(novas), atualizadas=len(atualizadas), canceladas=len(canceladas))
+    return resultado
+
+
+def sincronizar_turma_grade(turma: InformaticaTurma, *, memo: dict | None = None) -> dict[str, int]:
+    encontros = sincronizar_encontros_turma(turma)
+    return sincronizar_calendario_turma(turma, encontros, memo=memo)
+
+
+def turmas_sincronizaveis(grade: InformaticaGradeHorario):
+    return grade.turmas.filter(
+        status__in=[InformaticaTurma.Status.PLANEJADA, InformaticaTurma.Status.ATIVA]
+    ).select_related("grade_horario", "laboratorio__unidade", "curso__municipio")
+
+
+def sincronizar_turmas(turmas, *, progresso=None) -> int:
+    """
+    Salva e sincroniza cada turma (uma transação por turma), reaproveitando período e
+    bloqueios do calendário entre turmas. `progresso(processadas)` é chamado a cada turma.
+    """
+    memo: dict = {}
+    processadas = 0
+    for turma in turmas:
+        with transaction.atomic():
+            turma.save()
+            sincronizar_turma_grade(turma, memo=memo)
+        processadas += 1
+        if progresso is not None:
+            progresso(processadas)
+    return processadas
+
+
+def enfileirar_sincronizacao_grade(user, *, grade: InformaticaGradeHorario) -> InformaticaGradeSincronizacaoJob:
+    """Cria o job e agenda a sincronização das turmas da grade (educacao.sincronizar_grade_informatica)."""
+    from .tasks import sincronizar_grade_informatica_task
+
+    job = InformaticaGradeSincronizacaoJob.objects.create(
+        grade_horario=grade,
+        total_turmas=turmas_sincronizaveis(grade).count(),
+        solicitado_por=user,
+    )
+    try:
+        sincronizar_grade_informatica_task.delay(job.pk)
+    except Exception:
+        # Broker indisponível: processa na própria requisição.
+        processar_sincronizacao_grade_job(job.pk)
+        job.refresh_from_db()
+    return job
+
+
+def processar_sincronizacao_grade_job(job_id: int) -> InformaticaGradeSincronizacaoJob | None:
+    job = InformaticaGradeSincronizacaoJob.objects.select_related("grade_horario").filter(pk=job_id).first()
+    if job is None or job.status == InformaticaGradeSincronizacaoJob.Status.CONCLUIDO:
+        return job
+
+    job.status = InformaticaGradeSincronizacaoJob.Status.PROCESSANDO
+    job.turmas_processadas = 0
+    job.save(update_fields=["status", "turmas_processadas"])
+
+    def progresso(processadas: int):
+        InformaticaGradeSincronizacaoJob.objects.filter(pk=job.pk).update(turmas_processadas=processadas)
+
+    try:
+        turmas = list(turmas_sincronizaveis(job.grade_horario))
+        job.total_turmas = len(turmas)
+        job.turmas_processadas = sincronizar_turmas(turmas, progresso=progresso)
+        job.status = InformaticaGradeSincronizacaoJob.Status.CONCLUIDO
+        job.erro = ""
+    except Exception as exc:
+        job.refresh_from_db(fields=["turmas_processadas"])
+        job.status = InformaticaGradeSincronizacaoJob.Status.ERRO
+        job.erro = str(exc)[:2000]
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["total_turmas", "turmas_processadas", "status", "erro", "concluido_em"])
+    return job
@@ -0,0 +1,77 @@
+"""
+Gravação em lote de frequência e notas (diário regular e informática).
+
+Cada salvamento lê os lançamentos atuais da aula/avaliação numa consulta, compara com o
+que foi enviado e grava só o que mudou com um único upsert
+(`bulk_create(update_conflicts=True)`). Os sinais por linha não disparam; no lugar
+deles `lancamentos_salvos` é enviado uma vez com os alunos alterados, e o boletim
+materializado é recalculado uma vez por salvamento.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+
+from .models_diario import Frequencia, Nota
+from .models_informatica import InformaticaNota
+from .signals import lancamentos_salvos
+
+LANCAMENTOS_BATCH_SIZE = 500
+
+
+def _gravar(model, pai: str, instancia, valores: dict[int, dict], campos: tuple[str, ...]) -> int:
+    """
+    Upsert de `valores` (aluno_id -> {campo: valor}) nos lançamentos de `instancia`.
+    Retorna a quantidade de linhas criadas ou alteradas.
+    """
+    if not valores:
+        return 0
+    atuais = {
+        linha[0]: linha[1:]
+        for linha in model.objects.filter(**{pai: instancia}, aluno_id__in=list(valores)).values_list(
+            "aluno_id", *campos
+        )
+    }
+    mudancas = [
+        model(**{pai: instancia}, aluno_id=aluno_id, **dados)
+        for aluno_id, dados in valores.items()
+        if atuais.get(aluno_id) != tuple(dados[campo] for campo in campos)
+    ]
+    if not mudancas:
+        return 0
+
+    campos_upsert = list(campos)
+    if any(field.name == "atualizado_em" for field in model._meta.concrete_fields):
+        campos_upsert.append("atualizado_em")
+    with transaction.atomic():
+        model.objects.bulk_create(
+            mudancas,
+            batch_size=LANCAMENTOS_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=[pai, "aluno"],
+            update_fields=campos_upsert,
+        )
+        lancamentos_salvos.send(sender=model, instancia=instancia, aluno_ids={obj.aluno_id for obj in mudancas})
+    return len(mudancas)
+
+
+def salvar_frequencias(aula, status_por_aluno: dict[int, str]) -> int:
+    """Grava a chamada da aula (aluno_id -> status)."""
+    valores = {aluno_id: {"status": status} for aluno_id, status in status_por_aluno.items()}
+    return _gravar(Frequencia, "aula", aula, valores, ("status",))
+
+
+def salvar_notas(avaliacao, notas_por_aluno: dict[int, tuple]) -> int:
+    """Grava as notas da avaliação do diário (aluno_id -> (valor, conceito))."""
+    valores = {
+        aluno_id: {"valor": valor, "conceito": conceito} for aluno_id, (valor, conceito) in notas_por_aluno.items()
+    }
+    return _gravar(Nota, "avaliacao", avaliacao, valores, ("valor", "conceito"))
+
+
+def salvar_notas_informatica(avaliacao, notas_por_aluno: dict[int, tuple]) -> int:
+    """Grava as notas da avaliação de informática (aluno_id -> (valor, conceito))."""
+    valores = {
+        aluno_id: {"valor": valor, "conceito": conceito} for aluno_id, (valor, conceito) in notas_por_aluno.items()
+    }
+    return _gravar(InformaticaNota, "avaliacao", avaliacao, valores, ("valor", "conceito"))
@@ -0,0 +1,367 @@
+"""
+Boletim materializado: somas de notas/pesos e presenças por (diário, aluno, período)
+e total de aulas por (diário, período), em `DiarioResumoAluno`/`DiarioResumoPeriodo`.
+
+O período de uma nota/aula é resolvido pela data (inicio <= data <= fim), como no
+fechamento; a linha com `periodo` nulo acumula o diário inteiro (boletim da turma).
+A linha de total de aulas com `periodo` nulo marca o diário como materializado.
+A leitura (`carregar_resumos`) não grava: diários sem ela são somados em memória a
+partir das notas/frequências e a materialização fica para a tarefa
+`educacao.materializar_resumos` (ou o comando `rebuild_resumo_diario`); até lá os
+sinais de escrita os ignoram.
+
+Quem grava resumos de um diário trava antes a linha do `DiarioTurma`
+(`select_for_update`), de modo que recálculos simultâneos do mesmo diário não
+disputam as mesmas linhas (restrições de unicidade).
+
+Os sinais (`apps/educacao/signals.py`) recalculam só as células do aluno/diário
+afetado. Escritas em laço podem usar `resumos_adiados()` para recalcular uma vez por
+diário no fim do bloco. `QuerySet.update()` não dispara sinais: nesses casos use
+`atualizar_resumo_alunos`/`invalidar_diarios` ou o comando `rebuild_resumo_diario`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models_diario import Aula, DiarioResumoAluno, DiarioResumoPeriodo, DiarioTurma, Frequencia, Nota
+from .models_periodos import PeriodoLetivo
+
+logger = logging.getLogger(__name__)
+
+RESUMO_BATCH_SIZE = 1000
+# Evita enfileirar de novo a materialização de um diário a cada leitura.
+AGENDAMENTO_TTL_SECONDS = 300
+
+_estado = threading.local()
+
+
+def _bloco_diarios() -> int:
+    return max(1, int(getattr(settings, "EDUCACAO_RESUMO_BLOCO_DIARIOS", 200)))
+
+
+class _Periodos:
+    """Resolve os períodos que contêm uma data (com cache por data)."""
+
+    def __init__(self):
+        self._periodos = list(PeriodoLetivo.objects.order_by("inicio", "id").values_list("id", "inicio", "fim"))
+        self._cache: dict = {}
+
+    def da_data(self, data) -> tuple:
+        ids = self._cache.get(data)
+        if ids is None:
+            ids = tuple(pid for pid, inicio, fim in self._periodos if inicio <= data <= fim) + (None,)
+            self._cache[data] = ids
+        return ids
+
+
+def _celulas_alunos(diario_ids: list[int], aluno_ids: list[int] | None, periodos: _Periodos) -> dict:
+    """(diario_id, aluno_id, periodo_id) -> {soma_ponderada, soma_pesos, presencas}."""
+    celulas: dict = defaultdict(lambda: {"soma_ponderada": Decimal("0"), "soma_pesos": Decimal("0"), "presencas": 0})
+
+    notas = Nota.objects.filter(avaliacao__diario_id__in=diario_ids, valor__isnull=False)
+    if aluno_ids is not None:
+        notas = notas.filter(aluno_id__in=aluno_ids)
+    for diario_id, aluno_id, data, valor, peso in notas.values_list(
+        "avaliacao__diario_id", "aluno_id", "avaliacao__data", "valor", "avaliacao__peso"
+    ).iterator(chunk_size=RESUMO_BATCH_SIZE):
+        try:
+            peso = Decimal(str(peso or 1))
+            ponderado = Decimal(str(valor)) * peso
+        except (InvalidOperation, ValueError):
+            continue
+        for periodo_id in periodos.da_data(data):
+            celula = celulas[(diario_id, aluno_id, periodo_id)]
+            celula["soma_ponderada"] += ponderado
+            celula["soma_pesos"] += peso
+
+    presencas = Frequencia.objects.filter(aula__diario_id__in=diario_ids, status=Frequencia.Status.PRESENTE)
+    if aluno_ids is not None:
+        presencas = presencas.filter(aluno_id__in=aluno_ids)
+    for diario_id, aluno_id, data in presencas.values_list("aula__diario_id", "aluno_id", "aula__data").iterator(
+        chunk_size=RESUMO_BATCH_SIZE
+    ):
+        for periodo_id in periodos.da_data(data):
+            celulas[(diario_id, aluno_id, periodo_id)]["presencas"] += 1
+    return celulas
+
+
+def _totais_aulas(diario_ids: list[int], periodos: _Periodos) -> dict:
+    """(diario_id, periodo_id) -> {total_aulas}; sempre inclui o total do diário (marcador)."""
+    totais: dict = {(diario_id, None): {"total_aulas": 0} for diario_id in diario_ids}
+    for diario_id, data in Aula.objects.filter(diario_id__in=diario_ids).values_list("diario_id", "data").iterator(
+        chunk_size=RESUMO_BATCH_SIZE
+    ):
+        for periodo_id in periodos.da_data(data):
+            totais.setdefault((diario_id, periodo_id), {"total_aulas": 0})["total_aulas"] += 1
+    return totais
+
+
+def _travar_diarios(diario_ids: Iterable[int]) -> None:
+    """Trava as linhas dos diários (em ordem de id) até o fim da transação corrente."""
+    list(
+        DiarioTurma.objects.select_for_update()
+        .filter(pk__in=list(diario_ids))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _sincronizar(queryset, desejado: dict, chaves: tuple[str, ...]) -> int:
+    """
+    Aplica `desejado` sobre as linhas de `queryset` com insert/update/delete em lote.
+    Deve rodar em transação com os diários travados (`_travar_diarios`) desde antes
+    do cálculo de `desejado`.
+    """
+    model = queryset.model
+    existentes = {tuple(getattr(obj, campo) for campo in chaves): obj for obj in queryset}
+    agora = timezone.now()
+    novos = []
+    alterados = []
+    campos: set[str] = set()
+    for chave, valores in desejado.items():
+        obj = existentes.pop(chave, None)
+        if obj is None:
+            novos.append(model(**dict(zip(chaves, chave)), **valores))
+            continue
+        mudou = [campo for campo, valor in valores.items() if getattr(obj, campo) != valor]
+        if mudou:
+            for campo in mudou:
+                setattr(obj, campo, valores[campo])
+            obj.atualizado_em = agora
+            campos.update(mudou)
+            alterados.append(obj)
+
+    if existentes:
+        model.objects.filter(pk__in=[obj.pk for obj in existentes.values()]).delete()
+    if novos:
+        model.objects.bulk_create(novos, batch_size=RESUMO_BATCH_SIZE)
+    if alterados:
+        model.objects.bulk_update(alterados, [*sorted(campos), "atualizado_em"], batch_size=RESUMO_BATCH_SIZE)
+    return len(novos) + len(alterados) + len(existentes)
+
+
+def diarios_materializados(diario_ids: Iterable[int]) -> set[int]:
+    return set(
+        DiarioResumoPeriodo.objects.filter(diario_id__in=list(diario_ids), periodo__isnull=True).values_list(
+            "diario_id", flat=True
+        )
+    )
+
+
+def materializar_diarios(diario_ids: Iterable[int]) -> int:
+    """(Re)monta do zero os resumos dos diários informados. Retorna as linhas alteradas."""
+    diario_ids = sorted(set(diario_ids))
+    if not diario_ids:
+        return 0
+    periodos = _Periodos()
+    alteradas = 0
+    bloco = _bloco_diarios()
+    for inicio in range(0, len(diario_ids), bloco):
+        ids = diario_ids[inicio : inicio + bloco]
+        with transaction.atomic():
+            _travar_diarios(ids)
+            alteradas += _sincronizar(
+                DiarioResumoAluno.objects.filter(diario_id__in=ids),
+                _celulas_alunos(ids, None, periodos),
+                ("diario_id", "aluno_id", "periodo_id"),
+            )
+            alteradas += _sincronizar(
+                DiarioResumoPeriodo.objects.filter(diario_id__in=ids),
+                _totais_aulas(ids, periodos),
+                ("diario_id", "periodo_id"),
+            )
+    return alteradas
+
+
+def garantir_resumos(diario_ids: Iterable[int]) -> int:
+    """
+    Materializa os diários que ainda não têm resumo. Para rotinas que já gravam
+    (fechamento em lote, tarefa de materialização), não para telas de leitura.
+    """
+    diario_ids = set(diario_ids)
+    faltantes = diario_ids - diarios_materializados(diario_ids)
+    if not faltantes:
+        return 0
+    return materializar_diarios(faltantes)
+
+
+def agendar_materializacao(diario_ids: Iterable[int]) -> None:
+    """Enfileira, depois do commit, a materialização dos diários (uma vez por janela)."""
+    diario_ids = sorted(
+        diario_id
+        for diario_id in set(diario_ids)
+        if cache.add(f"gepub:resumo_diario:agendado:{diario_id}", 1, AGENDAMENTO_TTL_SECONDS)
+    )
+    if not diario_ids:
+        return
+
+    def enfileirar():
+        from .tasks import materializar_resumos_task
+
+        try:
+            materializar_resumos_task.delay(diario_ids)
+        except Exception:
+            # Broker indisponível: a leitura segue em memória até o comando rebuild_resumo_diario.
+            logger.warning("Não foi possível agendar a materialização dos diários %s.", diario_ids, exc_info=True)
+
+    transaction.on_commit(enfileirar)
+
+
+def invalidar_diarios(diario_ids: Iterable[int]) -> None:
+    """Descarta os resumos; a próxima leitura remonta os diários."""
+    diario_ids = list(set(diario_ids))
+    if not diario_ids:
+        return
+    DiarioResumoPeriodo.objects.filter(diario_id__in=diario_ids).delete()
+    DiarioResumoAluno.objects.filter(diario_id__in=diario_ids).delete()
+
+
+def atualizar_resumo_alunos(diario_id: int, aluno_ids: Iterable[int] | None = None) -> int:
+    """Recalcula as células dos alunos (ou de todos, se `aluno_ids` for None) em um diário já materializado."""
+    if _adiar(diario_id, aluno_ids=aluno_ids):
+        return 0
+    if not diarios_materializados([diario_id]):
+        return 0
+    queryset = DiarioResumoAluno.objects.filter(diario_id=diario_id)
+    if aluno_ids is not None:
+        aluno_ids = sorted(set(aluno_ids))
+        if not aluno_ids:
+            return 0
+        queryset = queryset.filter(aluno_id__in=aluno_ids)
+    with transaction.atomic():
+        _travar_diarios([diario_id])
+        return _sincronizar(
+            queryset,
+            _celulas_alunos([diario_id], aluno_ids, _Periodos()),
+            ("diario_id", "aluno_id", "periodo_id"),
+        )
+
+
+def atualizar_total_aulas(diario_id: int) -> int:
+    """Recalcula o total de aulas por período de um diário já materializado."""
+    if _adiar(diario_id, totais=True):
+        return 0
+    if not diarios_materializados([diario_id]):
+        return 0
+    with transaction.atomic():
+        _travar_diarios([diario_id])
+        return _sincronizar(
+            DiarioResumoPeriodo.objects.filter(diario_id=diario_id),
+            _totais_aulas([diario_id], _Periodos()),
+            ("diario_id", "periodo_id"),
+        )
+
+
+def _adiar(diario_id: int, *, aluno_ids: Iterable[int] | None = None, totais: bool = False) -> bool:
+    pendentes = getattr(_estado, "pendentes", None)
+    if pendentes is None:
+        return False
+    pendente = pendentes.setdefault(diario_id, {"alunos": set(), "todos": False, "totais": False})
+    if totais:
+        pendente["totais"] = True
+    elif aluno_ids is None:
+        pendente["todos"] = True
+    else:
+        pendente["alunos"].update(aluno_ids)
+    return True
+
+
+@contextmanager
+def resumos_adiados():
+    """
+    Acumula os recálculos disparados dentro do bloco e executa um por diário ao
+    sair (ex.: chamada ou lançamento de notas de uma turma inteira).
+    """
+    if getattr(_estado, "pendentes", None) is not None:
+        yield
+        return
+    _estado.pendentes = {}
+    try:
+        yield
+    finally:
+        pendentes, _estado.pendentes = _estado.pendentes, None
+    for diario_id, pendente in pendentes.items():
+        if pendente["totais"]:
+            atualizar_total_aulas(diario_id)
+        if pendente["todos"]:
+            atualizar_resumo_alunos(diario_id)
+        elif pendente["alunos"]:
+            atualizar_resumo_alunos(diario_id, pendente["alunos"])
+
+
+def _filtro_periodos(periodo_ids: Iterable[int | None]) -> Q:
+    periodo_ids = set(periodo_ids)
+    filtro = Q(periodo_id__in=[pid for pid in periodo_ids if pid is not None])
+    if None in periodo_ids:
+        filtro |= Q(periodo__isnull=True)
+    return filtro
+
+
+def carregar_resumos(
+    *, diario_ids: Iterable[int], periodo_ids: Iterable[int | None], aluno_ids: Iterable[int] | None = None
+) -> tuple[dict, dict]:
+    """
+    Lê os agregados materializados. Retorna (celulas, totais):
+    celulas[(diario_id, periodo_id, aluno_id)] = (soma_ponderada, soma_pesos, presencas)
+    totais[(diario_id, periodo_id)] = total_aulas
+
+    Diários ainda não materializados são somados em memória (sem gravar) e têm a
+    materialização agendada.
+    """
+    diario_ids = list(set(diario_ids))
+    periodo_ids = list(periodo_ids)
+    if not diario_ids or not periodo_ids:
+        return {}, {}
+    aluno_ids = None if aluno_ids is None else list(aluno_ids)
+    materializados = diarios_materializados(diario_ids)
+    faltantes = sorted(set(diario_ids) - materializados)
+
+    filtro = _filtro_periodos(periodo_ids)
+    totais = {
+        (diario_id, periodo_id): total
+        for diario_id, periodo_id, total in DiarioResumoPeriodo.objects.filter(filtro, diario_id__in=materializados)
+        .values_list("diario_id", "periodo_id", "total_aulas")
+    }
+    celulas_qs = DiarioResumoAluno.objects.filter(filtro, diario_id__in=materializados)
+    if aluno_ids is not None:
+        celulas_qs = celulas_qs.filter(aluno_id__in=aluno_ids)
+    celulas = {
+        (diario_id, periodo_id, aluno_id): (soma, pesos, presencas)
+        for diario_id, periodo_id, aluno_id, soma, pesos, presencas in celulas_qs.values_list(
+            "diario_id", "periodo_id", "aluno_id", "soma_ponderada", "soma_pesos", "presencas"
+        )
+    }
+
+    if faltantes:
+        periodos = _Periodos()
+        pedidos = set(periodo_ids)
+        for (diario_id, aluno_id, periodo_id), celula in _celulas_alunos(faltantes, aluno_ids, periodos).items():
+            if periodo_id in pedidos:
+                celulas[(diario_id, periodo_id, aluno_id)] = (
+                    celula["soma_ponderada"],
+                    celula["soma_pesos"],
+                    celula["presencas"],
+                )
+        for (diario_id, periodo_id), valores in _totais_aulas(faltantes, periodos).items():
+            if periodo_id in pedidos:
+                totais[(diario_id, periodo_id)] = valores["total_aulas"]
+        agendar_materializacao(faltantes)
+    return celulas, totais
+
+
+def media_ponderada(soma_ponderada, soma_pesos) -> Decimal | None:
+    if not soma_pesos:
+        return None
+    return (Decimal(str(soma_ponderada)) / Decimal(str(soma_pesos))).quantize(Decimal("0.01"))
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import date, time
+from itertools import accumulate
 
 from django.core.exceptions import ValidationError
 
@@ -114,6 +118,53 @@ class ScheduleEditImpactResult:
     impacted_students: list[dict] = field(default_factory=list)
 
 
+class _IntervalIndex:
+    """
+    Intervalos de horário por dia da semana, ordenados pelo início e com o maior
+    fim acumulado, para achar as sobreposições de um intervalo sem varrer tudo.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, list] = defaultdict(list)
+        self._index: dict[int, tuple[list, list, list]] | None = None
+
+    def add(self, weekday: int, start: time, end: time, payload) -> None:
+        self._pending[int(weekday)].append((start, end, payload))
+        self._index = None
+
+    def _build(self) -> dict[int, tuple[list, list, list]]:
+        if self._index is None:
+            self._index = {}
+            for weekday, items in self._pending.items():
+                items.sort(key=lambda item: item[0])
+                self._index[weekday] = (
+                    [item[0] for item in items],
+                    list(accumulate((item[1] for item in items), max)),
+                    items,
+                )
+        return self._index
+
+    def overlapping(self, weekday: int, start: time, end: time, *, allow_touching: bool) -> list:
+        entry = self._build().get(int(weekday))
+        if not entry:
+            return []
+        starts, max_ends, items = entry
+        # Só intervalos que começam antes do fim consultado podem sobrepor; o maior
+        # fim acumulado interrompe a busca quando nenhum anterior alcança o início.
+        limit = bisect_left(starts, end) if allow_touching else bisect_right(starts, end)
+        hits = []
+        for pos in range(limit - 1, -1, -1):
+            if max_ends[pos] < start or (allow_touching and max_ends[pos] == start):
+                break
+            item_end = items[pos][1]
+            if item_end > start or (not allow_touching and item_end == start):
+                hits.append(items[pos][2])
+        return hits
+
+
+_setting_memo = threading.local()
+
+
 class ScheduleConflictService:
     OVERRIDE_PERMISSION = "educacao.manage"
 
@@ -352,22 +403,31 @@ class ScheduleConflictService:
 
         from .models import Matricula
 
-        impacts: list[dict] = []
-        active_matriculas = Matricula.objects.select_related("aluno").filter(
-            turma=turma,
-            situacao=Matricula.Situacao.ATIVA,
-        )
-        for matricula in active_matriculas:
-            candidate = cls._candidate_from_regular_turma(
+        active_matriculas = list(
+            Matricula.objects.select_related("aluno").filter(
                 turma=turma,
-                data_inicio=matricula.data_matricula,
-                slots_override=[ScheduleSlot(weekday=weekday, start=hora_inicio, end=hora_fim)],
+                situacao=Matricula.Situacao.ATIVA,
             )
-            result = cls._validate_candidate(
-                aluno_id=matricula.aluno_id,
-                candidate=candidate,
-                exclude={"offer_keys": {("TURMA", turma.id), ("ATIVIDADE_COMPLEMENTAR", turma.id)}},
+        )
+        slots = [ScheduleSlot(weekday=weekday, start=hora_inicio, end=hora_fim)]
+        requests = [
+            (
+                matricula.aluno_id,
+                cls._candidate_from_regular_turma(
+                    turma=turma,
+                    data_inicio=matricula.data_matricula,
+                    slots_override=slots,
+                ),
             )
+            for matricula in active_matriculas
+        ]
+        results = cls._validate_candidates(
+            requests,
+            exclude={"offer_keys": {("TURMA", turma.id), ("ATIVIDADE_COMPLEMENTAR", turma.id)}},
+            setting=setting,
+        )
+        impacts: list[dict] = []
+        for matricula, result in zip(active_matriculas, results):
             if not result.has_conflict:
                 continue
             impacts.append(
@@ -421,36 +481,43 @@ class ScheduleConflictService:
 
         from .models_informatica import InformaticaMatricula, InformaticaTurma
 
-        impacts: list[dict] = []
         turmas_afetadas = grade.turmas.filter(
             status__in=[InformaticaTurma.Status.PLANEJADA, InformaticaTurma.Status.ATIVA]
         ).select_related("curso", "laboratorio", "laboratorio__unidade", "laboratorio__unidade__secretaria")
-        for turma in turmas_afetadas:
-            matriculas_ativas = turma.matriculas.select_related("aluno").filter(
-                status__in=InformaticaMatricula.statuses_ativos()
-            )
-            for matricula in matriculas_ativas:
-                candidate = cls._candidate_from_informatica_turma(
-                    turma=turma,
+        turmas = {turma.id: turma for turma in turmas_afetadas}
+        posicao = {turma_id: pos for pos, turma_id in enumerate(turmas)}
+        matriculas_ativas = sorted(
+            InformaticaMatricula.objects.select_related("aluno").filter(
+                turma_id__in=list(turmas),
+                status__in=InformaticaMatricula.statuses_ativos(),
+            ),
+            key=lambda matricula: posicao[matricula.turma_id],
+        )
+        requests = [
+            (
+                matricula.aluno_id,
+                cls._candidate_from_informatica_turma(
+                    turma=turmas[matricula.turma_id],
                     data_inicio=matricula.data_matricula,
                     slots_override=slots,
-                )
-                result = cls._validate_candidate(
-                    aluno_id=matricula.aluno_id,
-                    candidate=candidate,
-                    exclude={"offer_keys": {("INFORMATICA_TURMA", turma.id)}},
-                )
-                if not result.has_conflict:
-                    continue
-                impacts.append(
-                    {
-                        "aluno_id": matricula.aluno_id,
-                        "aluno_nome": matricula.aluno.nome,
-                        "turma_codigo": turma.codigo,
-                        "message": result.message,
-                        "conflicts": result.conflicts[:3],
-                    }
-                )
+                ),
+                {("INFORMATICA_TURMA", matricula.turma_id)},
+            )
+            for matricula in matriculas_ativas
+        ]
+        impacts: list[dict] = []
+        for matricula, result in zip(matriculas_ativas, cls._validate_candidates(requests, setting=setting)):
+            if not result.has_conflict:
+                continue
+            impacts.append(
+                {
+                    "aluno_id": matricula.aluno_id,
+                    "aluno_nome": matricula.aluno.nome,
+                    "turma_codigo": turmas[matricula.turma_id].codigo,
+                    "message": result.message,
+                    "conflicts": result.conflicts[:3],
+                }
+            )
 
         mode = cls._normalize_mode(getattr(setting, "blocking_mode", ""))
         if not impacts:
@@ -591,90 +658,147 @@ class ScheduleConflictService:
         candidate: EnrollmentScheduleContext,
         exclude: dict | None = None,
     ) -> ScheduleValidationResult:
-        setting = cls._resolve_setting()
-        mode = cls._normalize_mode(getattr(setting, "blocking_mode", ""))
-
-        if candidate.allow_overlap:
-            return ScheduleValidationResult(
-                has_conflict=False,
-                blocking_mode=mode,
-                message="Oferta configurada para permitir sobreposição de horário.",
-            )
-        if not candidate.slots:
-            return ScheduleValidationResult(
-                has_conflict=False,
-                blocking_mode=mode,
-                message="Oferta sem grade horária estruturada para comparação.",
-            )
+        return cls._validate_candidates([(aluno_id, candidate)], exclude=exclude)[0]
 
-        existing_contexts = cls._load_existing_contexts(aluno_id=aluno_id, exclude=exclude or {})
-        conflicts: list[ScheduleConflictItem] = []
-        seen: set[tuple] = set()
-        for existing in existing_contexts:
-            if existing.allow_overlap:
-                continue
-            if not bool(getattr(setting, "considerar_conflito_entre_modulos", True)):
-                if existing.module != candidate.module:
+    @classmethod
+    def _validate_candidates(
+        cls,
+        requests: list[tuple],
+        *,
+        exclude: dict | None = None,
+        setting=None,
+    ) -> list[ScheduleValidationResult]:
+        """
+        Valida vários (aluno_id, candidata[, offer_keys excluídas só deste pedido]) de uma vez:
+        as matrículas vigentes de todos os alunos vêm em poucas consultas e os horários
+        delas entram num índice por dia da semana consultado uma vez por bloco proposto.
+        """
+        if setting is None:
+            setting = cls._resolve_setting()
+        mode = cls._normalize_mode(getattr(setting, "blocking_mode", ""))
+        allow_touching = bool(getattr(setting, "considerar_intervalos_encostados_validos", True))
+        cross_module = bool(getattr(setting, "considerar_conflito_entre_modulos", True))
+
+        results: list[ScheduleValidationResult | None] = [None] * len(requests)
+        pending: list[int] = []
+        for pos, request in enumerate(requests):
+            candidate = request[1]
+            if candidate.allow_overlap:
+                results[pos] = ScheduleValidationResult(
+                    has_conflict=False,
+                    blocking_mode=mode,
+                    message="Oferta configurada para permitir sobreposição de horário.",
+                )
+            elif not candidate.slots:
+                results[pos] = ScheduleValidationResult(
+                    has_conflict=False,
+                    blocking_mode=mode,
+                    message="Oferta sem grade horária estruturada para comparação.",
+                )
+            else:
+                pending.append(pos)
+        if not pending:
+            return results
+
+        contexts_by_aluno = cls._load_existing_contexts_by_aluno(
+            aluno_ids={requests[pos][0] for pos in pending},
+            exclude=exclude or {},
+        )
+        index = _IntervalIndex()
+        for aluno_id, contexts in contexts_by_aluno.items():
+            for context_pos, existing in enumerate(contexts):
+                if existing.allow_overlap:
                     continue
-            if not cls._periods_overlap(
-                candidate.period_start,
-                candidate.period_end,
-                existing.period_start,
-                existing.period_end,
-            ):
-                continue
-            for new_slot in candidate.slots:
-                for old_slot in existing.slots:
-                    if int(new_slot.weekday) != int(old_slot.weekday):
-                        continue
-                    if not cls._times_overlap(
-                        new_slot.start,
-                        new_slot.end,
-                        old_slot.start,
-                        old_slot.end,
-                        allow_touching=bool(getattr(setting, "considerar_intervalos_encostados_validos", True)),
+                for slot_pos, old_slot in enumerate(existing.slots):
+                    index.add(old_slot.weekday, old_slot.start, old_slot.end, (aluno_id, context_pos, slot_pos))
+
+        hits_by_slot: dict[tuple, dict[int, list]] = {}
+        for pos in pending:
+            aluno_id, candidate = requests[pos][0], requests[pos][1]
+            extra_offer_keys = requests[pos][2] if len(requests[pos]) > 2 else ()
+            contexts = contexts_by_aluno.get(aluno_id, [])
+
+            matches = []
+            for new_pos, new_slot in enumerate(candidate.slots):
+                slot_key = (int(new_slot.weekday), new_slot.start, new_slot.end)
+                hits = hits_by_slot.get(slot_key)
+                if hits is None:
+                    hits = defaultdict(list)
+                    for hit_aluno_id, context_pos, slot_pos in index.overlapping(
+                        *slot_key, allow_touching=allow_touching
                     ):
-                        continue
-                    key = (
-                        existing.enrollment_type,
-                        existing.enrollment_id,
-                        existing.offer_type,
-                        existing.offer_id,
-                        new_slot.weekday,
-                        new_slot.start,
-                        new_slot.end,
-                        old_slot.start,
-                        old_slot.end,
-                    )
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    conflicts.append(
-                        ScheduleConflictItem(
-                            existing_enrollment_type=existing.enrollment_type,
-                            existing_enrollment_id=existing.enrollment_id,
-                            existing_offer_type=existing.offer_type,
-                            existing_offer_id=existing.offer_id,
-                            existing_offer_name=existing.offer_name,
-                            weekday=int(new_slot.weekday),
-                            weekday_label=WEEKDAY_LABELS.get(int(new_slot.weekday), str(new_slot.weekday)),
-                            existing_start=old_slot.start.strftime("%H:%M"),
-                            existing_end=old_slot.end.strftime("%H:%M"),
-                            new_start=new_slot.start.strftime("%H:%M"),
-                            new_end=new_slot.end.strftime("%H:%M"),
-                            unit_name=existing.unit_name,
-                            secretaria_name=existing.secretaria_name,
-                            existing_period_start=(
-                                existing.period_start.isoformat() if existing.period_start else None
-                            ),
-                            existing_period_end=existing.period_end.isoformat() if existing.period_end else None,
-                            new_offer_type=candidate.offer_type,
-                            new_offer_id=candidate.offer_id,
-                            new_offer_name=candidate.offer_name,
-                            frequency=new_slot.frequency,
-                        )
-                    )
+                        hits[hit_aluno_id].append((context_pos, slot_pos))
+                    hits_by_slot[slot_key] = hits
+                for context_pos, slot_pos in hits.get(aluno_id, ()):
+                    matches.append((context_pos, new_pos, slot_pos))
+
+            conflicts: list[ScheduleConflictItem] = []
+            seen: set[tuple] = set()
+            for context_pos, new_pos, slot_pos in sorted(matches):
+                existing = contexts[context_pos]
+                if (existing.offer_type, existing.offer_id) in extra_offer_keys:
+                    continue
+                if not cross_module and existing.module != candidate.module:
+                    continue
+                if not cls._periods_overlap(
+                    candidate.period_start,
+                    candidate.period_end,
+                    existing.period_start,
+                    existing.period_end,
+                ):
+                    continue
+                new_slot = candidate.slots[new_pos]
+                old_slot = existing.slots[slot_pos]
+                key = (
+                    existing.enrollment_type,
+                    existing.enrollment_id,
+                    existing.offer_type,
+                    existing.offer_id,
+                    new_slot.weekday,
+                    new_slot.start,
+                    new_slot.end,
+                    old_slot.start,
+                    old_slot.end,
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                conflicts.append(cls._conflict_item(candidate, new_slot, existing, old_slot))
+            results[pos] = cls._result_from_conflicts(conflicts, mode)
+        return results
+
+    @classmethod
+    def _conflict_item(
+        cls,
+        candidate: EnrollmentScheduleContext,
+        new_slot: ScheduleSlot,
+        existing: EnrollmentScheduleContext,
+        old_slot: ScheduleSlot,
+    ) -> ScheduleConflictItem:
+        return ScheduleConflictItem(
+            existing_enrollment_type=existing.enrollment_type,
+            existing_enrollment_id=existing.enrollment_id,
+            existing_offer_type=existing.offer_type,
+            existing_offer_id=existing.offer_id,
+            existing_offer_name=existing.offer_name,
+            weekday=int(new_slot.weekday),
+            weekday_label=WEEKDAY_LABELS.get(int(new_slot.weekday), str(new_slot.weekday)),
+            existing_start=old_slot.start.strftime("%H:%M"),
+            existing_end=old_slot.end.strftime("%H:%M"),
+            new_start=new_slot.start.strftime("%H:%M"),
+            new_end=new_slot.end.strftime("%H:%M"),
+            unit_name=existing.unit_name,
+            secretaria_name=existing.secretaria_name,
+            existing_period_start=(existing.period_start.isoformat() if existing.period_start else None),
+            existing_period_end=existing.period_end.isoformat() if existing.period_end else None,
+            new_offer_type=candidate.offer_type,
+            new_offer_id=candidate.offer_id,
+            new_offer_name=candidate.offer_name,
+            frequency=new_slot.frequency,
+        )
 
+    @classmethod
+    def _result_from_conflicts(cls, conflicts: list[ScheduleConflictItem], mode: str) -> ScheduleValidationResult:
         if not conflicts:
             return ScheduleValidationResult(
                 has_conflict=False,
@@ -705,38 +829,69 @@ class ScheduleConflictService:
     def _resolve_setting(cls):
         from .models_schedule_conflicts import ScheduleConflictSetting
 
-        return ScheduleConflictSetting.resolve()
+        # Dentro de uma requisição a configuração é lida uma vez (ver begin_setting_memo).
+        memo = getattr(_setting_memo, "value", None)
+        if memo is None:
+            return ScheduleConflictSetting.resolve()
+        if not memo:
+            memo.append(ScheduleConflictSetting.resolve())
+        return memo[0]
+
+    @classmethod
+    def begin_setting_memo(cls) -> None:
+        _setting_memo.value = []
+
+    @classmethod
+    def clear_setting_memo(cls) -> None:
+        _setting_memo.value = None
+
+    @classmethod
+    def reset_setting_memo(cls) -> None:
+        if getattr(_setting_memo, "value", None):
+            _setting_memo.value = []
 
     @classmethod
     def _load_existing_contexts(cls, *, aluno_id: int, exclude: dict) -> list[EnrollmentScheduleContext]:
-        from .models import Matricula, MatriculaCurso, Turma
-        from .models_informatica import InformaticaMatricula
-        from .models_programas import ProgramaComplementarParticipacao
+        return cls._load_existing_contexts_by_aluno(aluno_ids={aluno_id}, exclude=exclude).get(aluno_id, [])
+
+    @classmethod
+    def _load_existing_contexts_by_aluno(
+        cls, *, aluno_ids: set[int], exclude: dict
+    ) -> dict[int, list[EnrollmentScheduleContext]]:
+        from django.db.models import Prefetch
 
-        contexts: list[EnrollmentScheduleContext] = []
+        from .models import Matricula, MatriculaCurso
+        from .models_informatica import InformaticaEncontroSemanal, InformaticaMatricula
+        from .models_programas import ProgramaComplementarHorario, ProgramaComplementarParticipacao
+
+        contexts: dict[int, list[EnrollmentScheduleContext]] = defaultdict(list)
+        aluno_ids = list(aluno_ids)
         exclude_matricula_ids = set(exclude.get("matricula_ids") or [])
         exclude_matricula_curso_ids = set(exclude.get("matricula_curso_ids") or [])
         exclude_informatica_ids = set(exclude.get("informatica_matricula_ids") or [])
         exclude_programa_participacao_ids = set(exclude.get("programa_participacao_ids") or [])
         exclude_offer_keys = set(exclude.get("offer_keys") or [])
 
+        def collect(queryset, to_context):
+            for item in queryset:
+                context = to_context(item)
+                if not context.slots:
+                    continue
+                if (context.offer_type, context.offer_id) in exclude_offer_keys:
+                    continue
+                contexts[item.aluno_id].append(context)
+
         regular_qs = Matricula.objects.select_related(
             "turma",
             "turma__unidade",
             "turma__unidade__secretaria",
         ).prefetch_related("turma__grade_horario__aulas").filter(
-            aluno_id=aluno_id,
+            aluno_id__in=aluno_ids,
             situacao=Matricula.Situacao.ATIVA,
         )
         if exclude_matricula_ids:
             regular_qs = regular_qs.exclude(id__in=exclude_matricula_ids)
-        for item in regular_qs:
-            context = cls._context_from_regular_matricula(item)
-            if not context.slots:
-                continue
-            if (context.offer_type, context.offer_id) in exclude_offer_keys:
-                continue
-            contexts.append(context)
+        collect(regular_qs, cls._context_from_regular_matricula)
 
         curso_qs = MatriculaCurso.objects.select_related(
             "curso",
@@ -744,18 +899,12 @@ class ScheduleConflictService:
             "turma__unidade",
             "turma__unidade__secretaria",
         ).prefetch_related("turma__grade_horario__aulas").filter(
-            aluno_id=aluno_id,
+            aluno_id__in=aluno_ids,
             situacao__in=[MatriculaCurso.Situacao.MATRICULADO, MatriculaCurso.Situacao.EM_ANDAMENTO],
         )
         if exclude_matricula_curso_ids:
             curso_qs = curso_qs.exclude(id__in=exclude_matricula_curso_ids)
-        for item in curso_qs:
-            context = cls._context_from_course_matricula(item)
-            if not context.slots:
-                continue
-            if (context.offer_type, context.offer_id) in exclude_offer_keys:
-                continue
-            contexts.append(context)
+        collect(curso_qs, cls._context_from_course_matricula)
 
         info_qs = InformaticaMatricula.objects.select_related(
             "turma",
@@ -763,38 +912,30 @@ class ScheduleConflictService:
             "turma__laboratorio",
             "turma__laboratorio__unidade",
             "turma__laboratorio__unidade__secretaria",
-        ).prefetch_related("turma__encontros").filter(
-            aluno_id=aluno_id,
+        ).prefetch_related(
+            Prefetch("turma__encontros", queryset=InformaticaEncontroSemanal.objects.filter(ativo=True))
+        ).filter(
+            aluno_id__in=aluno_ids,
             status__in=InformaticaMatricula.statuses_ativos(),
         )
         if exclude_informatica_ids:
             info_qs = info_qs.exclude(id__in=exclude_informatica_ids)
-        for item in info_qs:
-            context = cls._context_from_informatica_matricula(item)
-            if not context.slots:
-                continue
-            if (context.offer_type, context.offer_id) in exclude_offer_keys:
-                continue
-            contexts.append(context)
+        collect(info_qs, cls._context_from_informatica_matricula)
 
         programa_qs = ProgramaComplementarParticipacao.objects.select_related(
             "programa",
             "oferta",
             "oferta__unidade",
             "oferta__unidade__secretaria",
-        ).prefetch_related("oferta__horarios").filter(
-            aluno_id=aluno_id,
+        ).prefetch_related(
+            Prefetch("oferta__horarios", queryset=ProgramaComplementarHorario.objects.filter(ativo=True))
+        ).filter(
+            aluno_id__in=aluno_ids,
             status__in=ProgramaComplementarParticipacao.statuses_ativos(),
         )
         if exclude_programa_participacao_ids:
             programa_qs = programa_qs.exclude(id__in=exclude_programa_participacao_ids)
-        for item in programa_qs:
-            context = cls._context_from_program_participacao(item)
-            if not context.slots:
-                continue
-            if (context.offer_type, context.offer_id) in exclude_offer_keys:
-                continue
-            contexts.append(context)
+        collect(programa_qs, cls._context_from_program_participacao)
 
         return contexts
 
@@ -1036,11 +1177,10 @@ class ScheduleConflictService:
     def _slots_from_informatica_turma(cls, turma) -> list[ScheduleSlot]:
         if turma is None:
             return []
-        encontros = getattr(turma, "encontros", None)
-        if encontros is None:
+        if getattr(turma, "encontros", None) is None:
             return []
         slots: list[ScheduleSlot] = []
-        for encontro in encontros.filter(ativo=True):
+        for encontro in cls._active_related(turma, "encontros"):
             if not getattr(encontro, "hora_inicio", None) or not getattr(encontro, "hora_fim", None):
                 continue
             slots.append(
@@ -1057,11 +1197,10 @@ class ScheduleConflictService:
     def _slots_from_program_offer(cls, oferta) -> list[ScheduleSlot]:
         if oferta is None:
             return []
-        horarios = getattr(oferta, "horarios", None)
-        if horarios is None:
+        if getattr(oferta, "horarios", None) is None:
             return []
         slots: list[ScheduleSlot] = []
-        for horario in horarios.filter(ativo=True):
+        for horario in cls._active_related(oferta, "horarios"):
             if not getattr(horario, "hora_inicio", None) or not getattr(horario, "hora_fim", None):
                 continue
             slots.append(
@@ -1093,6 +1232,14 @@ class ScheduleConflictService:
             )
         return slots
 
+    @staticmethod
+    def _active_related(instance, related_name: str):
+        """Itens ativos da relação, usando o prefetch quando houver (evita uma consulta por oferta)."""
+        prefetched = getattr(instance, "_prefetched_objects_cache", {})
+        if related_name in prefetched:
+            return [item for item in prefetched[related_name] if item.ativo]
+        return getattr(instance, related_name).filter(ativo=True)
+
     @staticmethod
     def _normalize_mode(raw_mode: str) -> str:
         mode = (raw_mode or "").strip().upper()
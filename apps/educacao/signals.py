@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from django.core.signals import request_finished, request_started
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .models_diario import Aula, Avaliacao, Frequencia, Nota
+from .models_periodos import PeriodoLetivo
+from .models_schedule_conflicts import ScheduleConflictSetting
+from .services_resumo_diario import atualizar_resumo_alunos, atualizar_total_aulas, invalidar_diarios
+from .services_schedule_conflicts import ScheduleConflictService
+
+# Enviado uma vez por salvamento em lote (services_lancamentos), no lugar dos sinais
+# por linha: sender = model gravado, instancia = aula/avaliação, aluno_ids = alunos alterados.
+lancamentos_salvos = Signal()
+
+
+def _exclusao_de(kwargs, *models) -> bool:
+    """True quando a exclusão partiu de um dos models (e não de cascata de diário/turma/aluno)."""
+    origem = kwargs.get("origin")
+    if origem is None:
+        return True
+    if isinstance(origem, QuerySet):
+        return origem.model in models
+    return isinstance(origem, models)
+
+
+def _diario_id(instance, campo: str, model) -> int | None:
+    if instance._meta.get_field(campo).is_cached(instance):
+        return getattr(instance, campo).diario_id
+    return model.objects.filter(pk=getattr(instance, f"{campo}_id")).values_list("diario_id", flat=True).first()
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def resumo_nota(sender, instance, **kwargs):
+    if not _exclusao_de(kwargs, Nota):
+        return
+    diario_id = _diario_id(instance, "avaliacao", Avaliacao)
+    if diario_id:
+        atualizar_resumo_alunos(diario_id, [instance.aluno_id])
+
+
+@receiver(post_save, sender=Frequencia)
+@receiver(post_delete, sender=Frequencia)
+def resumo_frequencia(sender, instance, **kwargs):
+    if not _exclusao_de(kwargs, Frequencia):
+        return
+    diario_id = _diario_id(instance, "aula", Aula)
+    if diario_id:
+        atualizar_resumo_alunos(diario_id, [instance.aluno_id])
+
+
+@receiver(lancamentos_salvos, sender=Nota)
+@receiver(lancamentos_salvos, sender=Frequencia)
+def resumo_lancamentos(sender, instancia, aluno_ids, **kwargs):
+    atualizar_resumo_alunos(instancia.diario_id, aluno_ids)
+
+
+@receiver(pre_save, sender=Avaliacao)
+@receiver(pre_save, sender=Aula)
+def resumo_guardar_anterior(sender, instance, **kwargs):
+    campos = ("diario_id", "data", "peso") if sender is Avaliacao else ("diario_id", "data")
+    instance._resumo_anterior = (
+        sender.objects.filter(pk=instance.pk).values_list(*campos).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Avaliacao)
+def resumo_avaliacao(sender, instance, created, **kwargs):
+    anterior = getattr(instance, "_resumo_anterior", None)
+    if created or anterior is None or anterior == (instance.diario_id, instance.data, instance.peso):
+        return
+    for diario_id in {anterior[0], instance.diario_id}:
+        atualizar_resumo_alunos(diario_id)
+
+
+@receiver(post_save, sender=Aula)
+def resumo_aula(sender, instance, created, **kwargs):
+    anterior = getattr(instance, "_resumo_anterior", None)
+    if created or anterior is None:
+        atualizar_total_aulas(instance.diario_id)
+        return
+    if anterior == (instance.diario_id, instance.data):
+        return
+    for diario_id in {anterior[0], instance.diario_id}:
+        atualizar_total_aulas(diario_id)
+        atualizar_resumo_alunos(diario_id)
+
+
+@receiver(post_delete, sender=Avaliacao)
+@receiver(post_delete, sender=Aula)
+def resumo_exclusao_diario(sender, instance, **kwargs):
+    # Notas/frequências em cascata são ignoradas pelos receivers acima; o diário é
+    # recalculado uma vez aqui.
+    if not _exclusao_de(kwargs, sender):
+        return
+    if sender is Aula:
+        atualizar_total_aulas(instance.diario_id)
+    atualizar_resumo_alunos(instance.diario_id)
+
+
+@receiver(pre_save, sender=PeriodoLetivo)
+def resumo_periodo_anterior(sender, instance, **kwargs):
+    instance._resumo_anterior = (
+        sender.objects.filter(pk=instance.pk).values_list("inicio", "fim").first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=PeriodoLetivo)
+def resumo_periodo(sender, instance, created, **kwargs):
+    anterior = getattr(instance, "_resumo_anterior", None)
+    intervalos = [(instance.inicio, instance.fim)]
+    if anterior is not None:
+        if tuple(anterior) == (instance.inicio, instance.fim):
+            return
+        intervalos.append(tuple(anterior))
+
+    diario_ids = set()
+    for inicio, fim in intervalos:
+        diario_ids.update(Aula.objects.filter(data__range=(inicio, fim)).values_list("diario_id", flat=True).distinct())
+        diario_ids.update(
+            Avaliacao.objects.filter(data__range=(inicio, fim)).values_list("diario_id", flat=True).distinct()
+        )
+    invalidar_diarios(diario_ids)
+
+
+@receiver(request_started)
+def conflitos_inicio_requisicao(sender, **kwargs):
+    ScheduleConflictService.begin_setting_memo()
+
+
+@receiver(request_finished)
+def conflitos_fim_requisicao(sender, **kwargs):
+    ScheduleConflictService.clear_setting_memo()
+
+
+@receiver(post_save, sender=ScheduleConflictSetting)
+@receiver(post_delete, sender=ScheduleConflictSetting)
+def conflitos_configuracao_alterada(sender, **kwargs):
+    ScheduleConflictService.reset_setting_memo()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from celery import shared_task
+
+from .services_documentos_lote import processar_documentos_lote_job
+from .services_fechamento_lote import processar_fechamento_lote_job
+from .services_informatica_alertas import recalcular_alertas_pendentes
+from .services_informatica_calendario import processar_sincronizacao_grade_job
+from .services_resumo_diario import garantir_resumos
+
+
+@shared_task(name="educacao.gerar_documentos_lote")
+def gerar_documentos_lote_task(job_id: int, **params):
+    job = processar_documentos_lote_job(job_id, **params)
+    return job.status if job else None
+
+
+@shared_task(name="educacao.fechar_periodo_lote")
+def fechar_periodo_lote_task(job_id: int):
+    job = processar_fechamento_lote_job(job_id)
+    return job.status if job else None
+
+
+@shared_task(name="educacao.recalcular_alertas_informatica")
+def recalcular_alertas_informatica_task():
+    execucao = recalcular_alertas_pendentes()
+    return {"turmas": execucao.turmas_processadas, "alertas": execucao.alertas_alterados}
+
+
+@shared_task(name="educacao.sincronizar_grade_informatica")
+def sincronizar_grade_informatica_task(job_id: int):
+    job = processar_sincronizacao_grade_job(job_id)
+    return job.status if job else None
+
+
+@shared_task(name="educacao.materializar_resumos")
+def materializar_resumos_task(diario_ids: list[int]):
+    return garantir_resumos(diario_ids)
@@ -1,4 +1,10 @@
-from django.test import TestCase
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch
 from django.urls import reverse
 from datetime import date, time, timedelta
@@ -14,7 +20,7 @@ from django.contrib.auth import get_user_model
 
 from apps.accounts.models import Profile
 from apps.almoxarifado.models import AlmoxarifadoCadastro
-from apps.core.models import AuditoriaEvento, TransparenciaEventoPublico
+from apps.core.models import AuditoriaEvento, DocumentoEmitido, RelatorioPdfJob, TransparenciaEventoPublico
 from apps.educacao.forms_horarios import AulaHorarioForm
 from apps.educacao.forms_diario import AulaForm
 from apps.educacao.forms_programas import ProgramaComplementarParticipacaoCreateForm
@@ -22,6 +28,7 @@ from apps.educacao.models import (
     Aluno,
     AlunoCertificado,
     AlunoDocumento,
+    CarteiraEstudantil,
     CoordenacaoEnsino,
     Curso,
     CursoDisciplina,
@@ -44,6 +51,8 @@ from apps.educacao.models_notas import BNCCCodigo, ComponenteCurricular
 from apps.educacao.models_diario import (
     Aula,
     Avaliacao,
+    DiarioResumoAluno,
+    DiarioResumoPeriodo,
     DiarioTurma,
     Frequencia,
     JustificativaFaltaPedido,
@@ -51,7 +60,7 @@ from apps.educacao.models_diario import (
     Nota,
     PlanoEnsinoProfessor,
 )
-from apps.educacao.models_periodos import FechamentoPeriodoTurma, PeriodoLetivo
+from apps.educacao.models_periodos import FechamentoPeriodoLoteJob, FechamentoPeriodoTurma, PeriodoLetivo
 from apps.educacao.models_assistencia import CardapioEscolar, RegistroRefeicaoEscolar, RegistroTransporteEscolar, RotaTransporteEscolar
 from apps.educacao.models_calendario import CalendarioEducacionalEvento
 from apps.educacao.models_beneficios import (
@@ -65,9 +74,13 @@ from apps.educacao.models_beneficios import (
     BeneficioTipoItem,
 )
 from apps.educacao.models_informatica import (
+    InformaticaAlertaFrequencia,
+    InformaticaAulaDiario,
     InformaticaCurso,
     InformaticaEncontroSemanal,
+    InformaticaFrequencia,
     InformaticaGradeHorario,
+    InformaticaGradeSincronizacaoJob,
     InformaticaLaboratorio,
     InformaticaMatricula,
     InformaticaMatriculaMovimentacao,
@@ -101,12 +114,20 @@ from apps.educacao.services_requisitos import (
     avaliar_requisitos_matricula,
     registrar_override_requisitos_matricula,
 )
-from apps.educacao.services_schedule_conflicts import ScheduleConflictService
+from apps.educacao.services_schedule_conflicts import ScheduleConflictService, ScheduleSlot, _IntervalIndex
 from apps.educacao.services_matricula_institucional import InstitutionalEnrollmentService
 from apps.educacao.services_turma_setup import (
     clonar_matriz_para_ano,
     preencher_componentes_base_matriz,
 )
+from apps.educacao.services_academico import calc_historico_resumo, calc_historico_resumos, calc_periodo_metrics_by_aluno
+from apps.educacao.services_documentos_lote import gerar_documentos_lote, matriculas_lote
+from apps.educacao.services_fechamento_lote import fechar_turmas_periodo
+from apps.educacao.services_informatica_alertas import recalcular_alertas_pendentes, recalcular_alertas_turmas
+from apps.educacao.services_informatica_calendario import enfileirar_sincronizacao_grade, sincronizar_turma_grade
+from apps.educacao.services_lancamentos import salvar_frequencias, salvar_notas
+from apps.educacao.services_resumo_diario import invalidar_diarios, materializar_diarios, resumos_adiados
+from apps.educacao.tasks import materializar_resumos_task
 from apps.educacao.views_renovacao import _processar_pedidos_renovacao
 from apps.educacao.models_schedule_conflicts import ScheduleConflictOverride, ScheduleConflictSetting
 from apps.org.models import Municipio, Secretaria, Unidade
@@ -1286,6 +1307,97 @@ class ScheduleConflictServiceTestCase(TestCase):
         self.assertEqual(ScheduleConflictOverride.objects.count(), 0)
 
 
+class ScheduleConflictBatchTestCase(TestCase):
+    def setUp(self):
+        municipio = Municipio.objects.create(nome="Cidade Lote Agenda", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="Secretaria Educação Lote")
+        self.unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola Lote", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma = self._turma("Turma Editada", time(10, 0), time(11, 0))
+        self.outras = [
+            self._turma("Reforço A", time(8, 0), time(9, 0)),
+            self._turma("Reforço B", time(9, 0), time(10, 0)),
+        ]
+
+    def _turma(self, nome: str, inicio: time, fim: time) -> Turma:
+        turma = Turma.objects.create(unidade=self.unidade, nome=nome, ano_letivo=2026, turno=Turma.Turno.MANHA)
+        grade = GradeHorario.objects.create(turma=turma)
+        AulaHorario.objects.create(grade=grade, dia=AulaHorario.Dia.TER, inicio=inicio, fim=fim, disciplina="Oficina")
+        return turma
+
+    def _matricular(self, total: int) -> list[Aluno]:
+        alunos = []
+        for pos in range(total):
+            aluno = Aluno.objects.create(nome=f"Aluno Lote {Aluno.objects.count() + 1}")
+            Matricula.objects.create(aluno=aluno, turma=self.turma, situacao=Matricula.Situacao.ATIVA)
+            Matricula.objects.create(aluno=aluno, turma=self.outras[pos % 2], situacao=Matricula.Situacao.ATIVA)
+            alunos.append(aluno)
+        return alunos
+
+    def _impacto(self):
+        return ScheduleConflictService.validate_regular_turma_slot_change(
+            turma=self.turma, dia_semana_codigo="TER", hora_inicio=time(8, 30), hora_fim=time(9, 30)
+        )
+
+    def test_lote_igual_validacao_por_aluno(self):
+        alunos = self._matricular(4)
+        impacto = self._impacto()
+        self.assertEqual(len(impacto.impacted_students), 4)
+
+        impactos = {item["aluno_id"]: item for item in impacto.impacted_students}
+        for aluno in alunos:
+            matricula = Matricula.objects.get(aluno=aluno, turma=self.turma)
+            candidate = ScheduleConflictService._candidate_from_regular_turma(
+                turma=self.turma,
+                data_inicio=matricula.data_matricula,
+                slots_override=[ScheduleSlot(weekday=1, start=time(8, 30), end=time(9, 30))],
+            )
+            individual = ScheduleConflictService._validate_candidate(
+                aluno_id=aluno.id,
+                candidate=candidate,
+                exclude={"offer_keys": {("TURMA", self.turma.id), ("ATIVIDADE_COMPLEMENTAR", self.turma.id)}},
+            )
+            self.assertTrue(individual.has_conflict)
+            self.assertEqual(impactos[aluno.id]["conflicts"], individual.conflicts[:3])
+
+    def test_consultas_nao_crescem_com_alunos(self):
+        self._matricular(2)
+        with CaptureQueriesContext(connection) as poucos:
+            self._impacto()
+        self._matricular(8)
+        with CaptureQueriesContext(connection) as muitos:
+            impacto = self._impacto()
+        self.assertEqual(len(impacto.impacted_students), 10)
+        self.assertEqual(len(poucos), len(muitos))
+
+    def test_indice_intervalos_encostados(self):
+        index = _IntervalIndex()
+        index.add(1, time(8, 0), time(9, 0), "a")
+        index.add(1, time(9, 0), time(10, 0), "b")
+        index.add(1, time(7, 0), time(12, 0), "c")
+        index.add(2, time(8, 0), time(9, 0), "d")
+
+        self.assertEqual(set(index.overlapping(1, time(10, 0), time(11, 0), allow_touching=True)), {"c"})
+        self.assertEqual(set(index.overlapping(1, time(10, 0), time(11, 0), allow_touching=False)), {"b", "c"})
+        self.assertEqual(set(index.overlapping(1, time(8, 30), time(9, 0), allow_touching=True)), {"a", "c"})
+        self.assertEqual(set(index.overlapping(1, time(12, 0), time(13, 0), allow_touching=True)), set())
+        self.assertEqual(index.overlapping(3, time(8, 0), time(9, 0), allow_touching=False), [])
+
+    def test_configuracao_memorizada_na_requisicao(self):
+        ScheduleConflictService.begin_setting_memo()
+        try:
+            primeira = ScheduleConflictService._resolve_setting()
+            with self.assertNumQueries(0):
+                self.assertIs(ScheduleConflictService._resolve_setting(), primeira)
+            ScheduleConflictSetting.objects.create(
+                nome="Warn", modo_validacao=ScheduleConflictSetting.ValidationMode.WARN, ativo=True
+            )
+            self.assertEqual(
+                ScheduleConflictService._resolve_setting().modo_validacao, ScheduleConflictSetting.ValidationMode.WARN
+            )
+        finally:
+            ScheduleConflictService.clear_setting_memo()
+
+
 class MatriculaInstitucionalBibliotecaTestCase(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -4925,6 +5037,115 @@ class OperacoesLoteViewTestCase(TestCase):
             export_mock.assert_called_once()
 
 
+def _fake_pdf_render(html, stylesheets=()):
+    """Substitui o WeasyPrint: uma página em branco por documento do HTML do lote."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    paginas = max(1, html.count('class="lote-documento"'))
+    for _ in range(paginas):
+        writer.add_blank_page(width=595, height=842)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue(), paginas
+
+
+class DocumentosLoteTestCase(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.admin = user_model.objects.create_superuser(
+            username="admin_documentos_lote",
+            password="123456",
+            email="admin_documentos_lote@local",
+        )
+        profile = getattr(self.admin, "profile", None)
+        if profile:
+            profile.must_change_password = False
+            profile.save(update_fields=["must_change_password"])
+        self.client.force_login(self.admin)
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        render_patch = patch("apps.core.services_pdf._render", side_effect=_fake_pdf_render)
+        self.render = render_patch.start()
+        self.addCleanup(render_patch.stop)
+
+        self.municipio = Municipio.objects.create(nome="Cidade Lote", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="SEMED Lote")
+        self.unidade = Unidade.objects.create(secretaria=self.secretaria, nome="Escola Lote", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma = Turma.objects.create(
+            unidade=self.unidade,
+            nome="5A",
+            ano_letivo=2026,
+            turno=Turma.Turno.MANHA,
+            modalidade=Turma.Modalidade.REGULAR,
+            etapa=Turma.Etapa.FUNDAMENTAL_ANOS_INICIAIS,
+            serie_ano=Turma.SerieAno.FUNDAMENTAL_5,
+            ativo=True,
+        )
+        self.alunos = [Aluno.objects.create(nome=f"Aluno Lote {idx}", nome_mae="Mãe Lote") for idx in range(3)]
+        for aluno in self.alunos:
+            Matricula.objects.create(aluno=aluno, turma=self.turma, situacao=Matricula.Situacao.ATIVA)
+        inativo = Aluno.objects.create(nome="Aluno Lote Transferido")
+        Matricula.objects.create(aluno=inativo, turma=self.turma, situacao=Matricula.Situacao.TRANSFERIDO)
+
+    def test_carteiras_em_pdf_unico_com_blocos_e_registro_em_lote(self):
+        from pypdf import PdfReader
+
+        matriculas = matriculas_lote(self.admin, turma=self.turma)
+        self.assertEqual([m.aluno.nome for m in matriculas], [a.nome for a in self.alunos])
+
+        with override_settings(DOCUMENTOS_LOTE_BLOCO=2):
+            resultado = gerar_documentos_lote(matriculas, tipo="carteira", user=self.admin, base_url="https://gepub.exemplo/")
+
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(self.render.call_args.args[1], ("css/pages/carteira-estudantil-pdf.css",))
+        self.assertEqual((resultado["documentos"], resultado["paginas"]), (3, 3))
+        self.assertEqual(len(PdfReader(BytesIO(resultado["conteudo"])).pages), 3)
+
+        carteiras = CarteiraEstudantil.objects.filter(aluno__in=self.alunos, ativa=True)
+        self.assertEqual(carteiras.count(), 3)
+        self.assertTrue(all(c.codigo_estudante == f"MAT-{c.matricula_id:06d}" for c in carteiras))
+        self.assertEqual(carteiras.first().dados_snapshot["escola"], "Escola Lote")
+        emitidos = DocumentoEmitido.objects.filter(tipo="EDUCACAO.CARTEIRA_ESTUDANTIL")
+        self.assertEqual(emitidos.count(), 3)
+        self.assertTrue(all(d.assinatura_emitente == "admin_documentos_lote" for d in emitidos))
+
+        # Reemissão reaproveita as carteiras ativas em vez de criar novas.
+        gerar_documentos_lote(matriculas, tipo="carteira", user=self.admin)
+        self.assertEqual(CarteiraEstudantil.objects.filter(aluno__in=self.alunos).count(), 3)
+
+    def test_consultas_nao_crescem_com_o_numero_de_alunos(self):
+        matriculas = matriculas_lote(self.admin, turma=self.turma)
+        for tipo in ("declaracao", "boletim"):
+            with CaptureQueriesContext(connection) as um:
+                gerar_documentos_lote(matriculas[:1], tipo=tipo, user=self.admin, formato="zip")
+            with CaptureQueriesContext(connection) as todos:
+                resultado = gerar_documentos_lote(matriculas, tipo=tipo, user=self.admin, formato="zip")
+            self.assertEqual(len(todos), len(um), tipo)
+            with ZipFile(BytesIO(resultado["conteudo"])) as zf:
+                self.assertEqual(len(zf.namelist()), 3)
+                self.assertTrue(all(nome.startswith(f"{tipo}") for nome in zf.namelist()))
+
+    def test_view_gera_lote_em_segundo_plano(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            resp = self.client.post(
+                reverse("educacao:documentos_lote"),
+                data={"tipo": "declaracao", "turma": str(self.turma.pk), "formato": "zip"},
+                HTTP_ACCEPT="application/json",
+            )
+            self.assertEqual(resp.status_code, 202)
+            job = RelatorioPdfJob.objects.get(codigo=resp.json()["job_id"])
+            self.assertEqual(job.status, RelatorioPdfJob.Status.CONCLUIDO, job.erro)
+            self.assertEqual(job.paginas, 3)
+            self.assertTrue(job.nome_arquivo.startswith("declaracao_vinculo_lote_5a_"))
+            self.assertTrue(job.nome_arquivo.endswith(".zip"))
+
+        resp = self.client.post(reverse("educacao:documentos_lote"), data={"tipo": "boletim", "formato": "pdf"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(RelatorioPdfJob.objects.count(), 1)
+
+
 class MinicursoFlowTestCase(TestCase):
     def setUp(self):
         user_model = get_user_model()
@@ -5022,3 +5243,567 @@ class MinicursoFlowTestCase(TestCase):
             tipo=AlunoCertificado.Tipo.CERTIFICADO_CURSO,
         ).first()
         self.assertIsNotNone(certificado)
+
+
+class ResumoDiarioTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_model = get_user_model()
+        self.professor = user_model.objects.create_user(username="prof_resumo", password="123456")
+        self.professor_2 = user_model.objects.create_user(username="prof_resumo_2", password="123456")
+        self.municipio = Municipio.objects.create(nome="Cidade Resumo", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="SEMED Resumo")
+        self.unidade = Unidade.objects.create(secretaria=self.secretaria, nome="Escola Resumo", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma = Turma.objects.create(unidade=self.unidade, nome="6A", ano_letivo=2026)
+        self.alunos = [Aluno.objects.create(nome=f"Aluno Resumo {idx}") for idx in range(2)]
+        for aluno in self.alunos:
+            Matricula.objects.create(aluno=aluno, turma=self.turma, situacao=Matricula.Situacao.ATIVA)
+        self.aluno_ids = [a.id for a in self.alunos]
+
+        self.bim1 = PeriodoLetivo.objects.create(
+            ano_letivo=2026, tipo=PeriodoLetivo.Tipo.BIMESTRE, numero=1, inicio=date(2026, 2, 1), fim=date(2026, 4, 30)
+        )
+        self.bim2 = PeriodoLetivo.objects.create(
+            ano_letivo=2026, tipo=PeriodoLetivo.Tipo.BIMESTRE, numero=2, inicio=date(2026, 5, 1), fim=date(2026, 7, 15)
+        )
+        self.sem1 = PeriodoLetivo.objects.create(
+            ano_letivo=2026, tipo=PeriodoLetivo.Tipo.SEMESTRE, numero=1, inicio=date(2026, 2, 1), fim=date(2026, 7, 15)
+        )
+        self.diario = DiarioTurma.objects.create(turma=self.turma, professor=self.professor, ano_letivo=2026)
+        self.diario_2 = DiarioTurma.objects.create(turma=self.turma, professor=self.professor_2, ano_letivo=2026)
+
+        a1, a2 = self.alunos
+        self.prova = Avaliacao.objects.create(diario=self.diario, titulo="Prova", peso=Decimal("2"), data=date(2026, 3, 10))
+        trabalho = Avaliacao.objects.create(diario=self.diario, titulo="Trabalho", peso=Decimal("1"), data=date(2026, 5, 20))
+        self.teste = Avaliacao.objects.create(diario=self.diario_2, titulo="Teste", peso=Decimal("1"), data=date(2026, 4, 2))
+        Nota.objects.create(avaliacao=self.prova, aluno=a1, valor=Decimal("8.00"))
+        Nota.objects.create(avaliacao=trabalho, aluno=a1, valor=Decimal("5.00"))
+        Nota.objects.create(avaliacao=self.teste, aluno=a1, valor=Decimal("6.50"))
+        Nota.objects.create(avaliacao=self.prova, aluno=a2, valor=Decimal("7.25"))
+
+        self.aulas = [
+            Aula.objects.create(diario=self.diario, data=date(2026, 3, 2)),
+            Aula.objects.create(diario=self.diario, data=date(2026, 3, 3)),
+            Aula.objects.create(diario=self.diario_2, data=date(2026, 4, 6)),
+            Aula.objects.create(diario=self.diario, data=date(2026, 5, 4)),
+        ]
+        for aula in self.aulas:
+            Frequencia.objects.create(aula=aula, aluno=a1, status=Frequencia.Status.PRESENTE)
+        Frequencia.objects.create(aula=self.aulas[0], aluno=a2, status=Frequencia.Status.PRESENTE)
+        Frequencia.objects.create(aula=self.aulas[1], aluno=a2, status=Frequencia.Status.FALTA)
+
+    def _metricas(self, periodo):
+        return calc_periodo_metrics_by_aluno(turma=self.turma, periodo=periodo, aluno_ids=self.aluno_ids)
+
+    def _linhas(self):
+        return set(
+            DiarioResumoAluno.objects.values_list(
+                "diario_id", "aluno_id", "periodo_id", "soma_ponderada", "soma_pesos", "presencas"
+            )
+        )
+
+    def test_leitura_nao_grava_e_agenda_materializacao(self):
+        a1, a2 = self.aluno_ids
+        self.assertFalse(DiarioResumoPeriodo.objects.exists())
+
+        with patch.object(materializar_resumos_task, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(
+                    self._metricas(self.bim1),
+                    ({a1: Decimal("7.50"), a2: Decimal("7.25")}, {a1: 100.0, a2: 33.3}, 3),
+                )
+                self._metricas(self.bim2)
+        self.assertFalse(DiarioResumoPeriodo.objects.exists())
+        delay.assert_called_once_with(sorted([self.diario.id, self.diario_2.id]))
+
+        materializar_resumos_task(*delay.call_args.args)
+        self.assertEqual(DiarioResumoPeriodo.objects.filter(periodo__isnull=True).count(), 2)
+        self.assertEqual(
+            self._metricas(self.bim1),
+            ({a1: Decimal("7.50"), a2: Decimal("7.25")}, {a1: 100.0, a2: 33.3}, 3),
+        )
+        self.assertEqual(self._metricas(self.bim2), ({a1: Decimal("5.00"), a2: None}, {a1: 100.0, a2: 0.0}, 1))
+        self.assertEqual(self._metricas(self.sem1)[0], {a1: Decimal("6.88"), a2: Decimal("7.25")})
+
+        with self.assertNumQueries(4):
+            self._metricas(self.bim1)
+
+    def test_sinais_atualizam_so_as_celulas_afetadas(self):
+        a1, a2 = self.aluno_ids
+        materializar_diarios([self.diario.id, self.diario_2.id])
+
+        nota = Nota.objects.get(avaliacao=self.prova, aluno_id=a2)
+        nota.valor = Decimal("9.00")
+        nota.save()
+        Frequencia.objects.filter(aula=self.aulas[1], aluno_id=a2).get().delete()
+        Frequencia.objects.create(aula=self.aulas[1], aluno_id=a2, status=Frequencia.Status.PRESENTE)
+        self.assertEqual(self._metricas(self.bim1), ({a1: Decimal("7.50"), a2: Decimal("9.00")}, {a1: 100.0, a2: 66.7}, 3))
+
+        # Avaliação muda de período; aula nova e aula excluída alteram o total.
+        self.prova.data = date(2026, 6, 1)
+        self.prova.save()
+        Aula.objects.create(diario=self.diario_2, data=date(2026, 4, 7))
+        self.aulas[3].delete()
+        self.assertEqual(self._metricas(self.bim1), ({a1: Decimal("6.50"), a2: None}, {a1: 75.0, a2: 50.0}, 4))
+        self.assertEqual(self._metricas(self.bim2), ({a1: Decimal("7.00"), a2: Decimal("9.00")}, {a1: None, a2: None}, 0))
+
+        incremental = self._linhas()
+        invalidar_diarios([self.diario.id, self.diario_2.id])
+        materializar_diarios([self.diario.id, self.diario_2.id])
+        self.assertEqual(incremental, self._linhas())
+
+    def test_resumos_adiados_e_periodo_alterado(self):
+        a1, a2 = self.aluno_ids
+        materializar_diarios([self.diario.id, self.diario_2.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            with resumos_adiados():
+                for aula in self.aulas[:3]:
+                    Frequencia.objects.update_or_create(aula=aula, aluno_id=a2, defaults={"status": Frequencia.Status.PRESENTE})
+        recalculos = [q for q in queries.captured_queries if "educacao_diarioresumoaluno" in q["sql"]]
+        self.assertLessEqual(len(recalculos), 6)
+        self.assertEqual(self._metricas(self.bim1)[1], {a1: 100.0, a2: 100.0})
+
+        # Mudar as datas de um período descarta os resumos dos diários afetados.
+        self.bim1.fim = date(2026, 3, 31)
+        self.bim1.save()
+        self.assertFalse(DiarioResumoPeriodo.objects.filter(diario=self.diario_2).exists())
+        self.assertEqual(self._metricas(self.bim1), ({a1: Decimal("8.00"), a2: Decimal("7.25")}, {a1: 100.0, a2: 100.0}, 2))
+
+    def test_historico_em_lote_e_exclusao_em_cascata(self):
+        a1 = self.aluno_ids[0]
+        materializar_diarios([self.diario.id, self.diario_2.id])
+        periodos = [self.bim1, self.bim2]
+        esperado = calc_historico_resumo(turma=self.turma, periodos=periodos, aluno_id=a1)
+        self.assertEqual(esperado, (Decimal("6.25"), 100.0, "Aprovado"))
+
+        PeriodoLetivo.objects.filter(pk=self.sem1.pk).update(ativo=False)
+        with self.assertNumQueries(5):
+            resumos = calc_historico_resumos(turmas=[self.turma], aluno_id=a1)
+        self.assertEqual(resumos, {self.turma.id: esperado})
+
+        self.diario_2.delete()
+        self.assertFalse(DiarioResumoAluno.objects.filter(diario_id=self.diario_2.id).exists())
+        self.assertEqual(self._metricas(self.bim1)[0][a1], Decimal("8.00"))
+
+
+class FechamentoPeriodoLoteEngineTestCase(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.admin = user_model.objects.create_superuser(
+            username="admin_fechamento_engine",
+            password="123456",
+            email="admin_fechamento_engine@local",
+        )
+        profile = getattr(self.admin, "profile", None)
+        if profile:
+            profile.must_change_password = False
+            profile.save(update_fields=["must_change_password"])
+        self.client.force_login(self.admin)
+
+        self.municipio = Municipio.objects.create(nome="Cidade Engine", uf="MA")
+        self.secretaria = Secretaria.objects.create(municipio=self.municipio, nome="SEMED Engine")
+        self.unidade = Unidade.objects.create(secretaria=self.secretaria, nome="Escola Engine", tipo=Unidade.Tipo.EDUCACAO)
+        self.periodo = PeriodoLetivo.objects.create(
+            ano_letivo=2026, tipo=PeriodoLetivo.Tipo.BIMESTRE, numero=1, inicio=date(2026, 2, 1), fim=date(2026, 4, 30)
+        )
+        self.turmas = [self._turma(f"7{letra}", notas) for letra, notas in (("A", ["8", "5.5", "3"]), ("B", ["6", "9"]))]
+        Turma.objects.create(unidade=self.unidade, nome="7C", ano_letivo=2026)
+
+    def _turma(self, nome: str, notas: list[str]) -> Turma:
+        turma = Turma.objects.create(unidade=self.unidade, nome=nome, ano_letivo=2026)
+        diario = DiarioTurma.objects.create(turma=turma, professor=self.admin, ano_letivo=2026)
+        avaliacao = Avaliacao.objects.create(diario=diario, titulo="Prova", data=date(2026, 3, 2))
+        aula = Aula.objects.create(diario=diario, data=date(2026, 3, 2))
+        for idx, valor in enumerate(notas):
+            aluno = Aluno.objects.create(nome=f"Aluno {nome} {idx}")
+            Matricula.objects.create(aluno=aluno, turma=turma, situacao=Matricula.Situacao.ATIVA)
+            Nota.objects.create(avaliacao=avaliacao, aluno=aluno, valor=Decimal(valor))
+            Frequencia.objects.create(aula=aula, aluno=aluno, status=Frequencia.Status.PRESENTE)
+        return turma
+
+    def _contagens(self):
+        return {
+            f.turma.nome: (f.total_alunos, f.aprovados, f.recuperacao, f.reprovados)
+            for f in FechamentoPeriodoTurma.objects.select_related("turma").filter(periodo=self.periodo)
+        }
+
+    def test_fechamento_agrupado_com_consultas_constantes(self):
+        progresso = []
+        with CaptureQueriesContext(connection) as queries:
+            fechar_turmas_periodo(
+                [t.id for t in self.turmas],
+                self.periodo,
+                media_corte=Decimal("6.00"),
+                frequencia_corte=Decimal("75.00"),
+                user=self.admin,
+                progresso=progresso.append,
+            )
+        self.assertEqual(self._contagens(), {"7A": (3, 1, 1, 1), "7B": (2, 2, 0, 0)})
+        self.assertEqual(progresso, [2])
+
+        Nota.objects.filter(avaliacao__diario__turma=self.turmas[0], valor=Decimal("3")).update(valor=Decimal("7"))
+        invalidar_diarios(DiarioTurma.objects.filter(turma=self.turmas[0]).values_list("id", flat=True))
+        self.turmas.append(self._turma("7D", ["4"]))
+        with CaptureQueriesContext(connection) as queries_maior:
+            fechar_turmas_periodo(
+                [t.id for t in self.turmas],
+                self.periodo,
+                media_corte=Decimal("6.00"),
+                frequencia_corte=Decimal("75.00"),
+                user=self.admin,
+            )
+        self.assertEqual(self._contagens(), {"7A": (3, 2, 1, 0), "7B": (2, 2, 0, 0), "7D": (1, 0, 0, 1)})
+        self.assertLessEqual(len(queries_maior), len(queries) + 12)
+
+    def test_view_enfileira_job_e_acompanha_progresso(self):
+        FechamentoPeriodoTurma.objects.create(turma=self.turmas[1], periodo=self.periodo, total_alunos=99)
+        payload = {
+            "_action": "fechar",
+            "ano_letivo": "2026",
+            "periodo": str(self.periodo.pk),
+            "unidade": str(self.unidade.pk),
+            "media_corte": "6.00",
+            "frequencia_corte": "75.00",
+            "somente_com_matriculas": "on",
+        }
+        with patch("apps.educacao.tasks.fechar_periodo_lote_task.delay", side_effect=OSError("broker")):
+            resp = self.client.post(reverse("educacao:fechamento_periodo_lote"), data=payload)
+
+        job = FechamentoPeriodoLoteJob.objects.get()
+        self.assertRedirects(resp, reverse("educacao:fechamento_periodo_lote_job", args=[job.codigo]))
+        self.assertEqual(job.turma_ids, [self.turmas[0].id])
+        self.assertEqual((job.status, job.turmas_processadas, job.progresso), ("CONCLUIDO", 1, 100))
+        self.assertEqual(self._contagens(), {"7A": (3, 1, 1, 1), "7B": (99, 0, 0, 0)})
+
+        resp_json = self.client.get(
+            reverse("educacao:fechamento_periodo_lote_job", args=[job.codigo]),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(resp_json.json()["progresso"], 100)
+
+        payload["_action"] = "preview"
+        resp_preview = self.client.post(reverse("educacao:fechamento_periodo_lote"), data=payload)
+        self.assertContains(resp_preview, "Prévia do lote (2)")
+
+
+
+class LancamentosLoteTestCase(TestCase):
+    def setUp(self):
+        professor = get_user_model().objects.create_user(username="prof_lote", password="123456")
+        self.professor = professor
+        municipio = Municipio.objects.create(nome="Cidade Lançamentos", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SEMED Lançamentos")
+        unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola Lançamentos", tipo=Unidade.Tipo.EDUCACAO)
+        self.turma = Turma.objects.create(unidade=unidade, nome="7A", ano_letivo=2026)
+        self.alunos = [Aluno.objects.create(nome=f"Aluno Lote {idx}") for idx in range(3)]
+        self.diario = DiarioTurma.objects.create(turma=self.turma, professor=professor, ano_letivo=2026)
+        self.aula = Aula.objects.create(diario=self.diario, data=date(2026, 3, 2))
+        self.avaliacao = Avaliacao.objects.create(diario=self.diario, titulo="Prova", data=date(2026, 3, 10))
+        materializar_diarios([self.diario.id])
+
+    def _resumo(self):
+        return set(
+            DiarioResumoAluno.objects.filter(periodo__isnull=True).values_list(
+                "aluno_id", "soma_ponderada", "soma_pesos", "presencas"
+            )
+        )
+
+    def test_frequencia_grava_so_o_que_mudou(self):
+        a1, a2, a3 = (a.id for a in self.alunos)
+        Frequencia.objects.create(aula=self.aula, aluno_id=a1, status=Frequencia.Status.FALTA)
+
+        chamada = {a1: Frequencia.Status.PRESENTE, a2: Frequencia.Status.PRESENTE, a3: Frequencia.Status.FALTA}
+        self.assertEqual(salvar_frequencias(self.aula, chamada), 3)
+        self.assertEqual(dict(self.aula.frequencias.values_list("aluno_id", "status")), chamada)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(salvar_frequencias(self.aula, chamada), 0)
+
+        chamada[a3] = Frequencia.Status.PRESENTE
+        self.assertEqual(salvar_frequencias(self.aula, chamada), 1)
+        self.assertEqual(Frequencia.objects.filter(aula=self.aula).count(), 3)
+
+        esperado = self._resumo()
+        materializar_diarios([self.diario.id])
+        self.assertEqual(self._resumo(), esperado)
+        self.assertEqual({linha[0]: linha[3] for linha in esperado}, {a1: 1, a2: 1, a3: 1})
+
+    def test_notas_upsert_e_resumo_uma_vez(self):
+        a1, a2, a3 = (a.id for a in self.alunos)
+        notas = {a1: (Decimal("8.5"), ""), a2: (None, ""), a3: (Decimal("6"), "")}
+        with CaptureQueriesContext(connection) as poucos:
+            self.assertEqual(salvar_notas(self.avaliacao, notas), 3)
+        self.assertEqual(
+            dict(Nota.objects.filter(avaliacao=self.avaliacao).values_list("aluno_id", "valor")),
+            {a1: Decimal("8.50"), a2: None, a3: Decimal("6.00")},
+        )
+
+        mais_alunos = [Aluno.objects.create(nome=f"Aluno Extra {idx}").id for idx in range(20)]
+        outra = Avaliacao.objects.create(diario=self.diario, titulo="Trabalho", data=date(2026, 3, 12))
+        with CaptureQueriesContext(connection) as muitos:
+            salvar_notas(outra, {aluno_id: (Decimal("7"), "") for aluno_id in mais_alunos})
+        self.assertEqual(len(poucos), len(muitos))
+
+        self.assertEqual(salvar_notas(self.avaliacao, {**notas, a1: (Decimal("8.50"), "")}), 0)
+        esperado = self._resumo()
+        materializar_diarios([self.diario.id])
+        self.assertEqual(self._resumo(), esperado)
+
+    def test_view_frequencia_audita_registros_alterados(self):
+        profile = getattr(self.professor, "profile", None) or Profile.objects.create(user=self.professor)
+        profile.role = "PROFESSOR"
+        profile.must_change_password = False
+        profile.save(update_fields=["role", "must_change_password"])
+        for aluno in self.alunos:
+            Matricula.objects.create(aluno=aluno, turma=self.turma, situacao="ATIVA")
+        self.client.force_login(self.professor)
+        url = reverse("educacao:aula_frequencia", args=[self.diario.pk, self.aula.pk])
+        dados = {f"aluno_{a.id}": Frequencia.Status.PRESENTE for a in self.alunos}
+
+        self.client.post(url, dados)
+        self.client.post(url, dados)
+
+        evento = AuditoriaEvento.objects.get(evento="FREQUENCIA_LANCADA", entidade_id=str(self.aula.pk))
+        self.assertEqual(evento.depois["alterados"], 3)
+        self.assertEqual(evento.municipio_id, self.turma.unidade.secretaria.municipio_id)
+
+
+class InformaticaAlertasFrequenciaTestCase(TestCase):
+    def setUp(self):
+        self.prof = get_user_model().objects.create_user(username="prof_info_alertas", password="123456")
+        municipio = Municipio.objects.create(nome="Cidade Alertas", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SME Alertas")
+        self.unidade = Unidade.objects.create(secretaria=secretaria, nome="Escola Alertas", tipo=Unidade.Tipo.EDUCACAO)
+        self.curso = InformaticaCurso.objects.create(municipio=municipio, nome="Informática Alertas")
+        self.laboratorio = InformaticaLaboratorio.objects.create(
+            nome="Lab Alertas",
+            unidade=self.unidade,
+            quantidade_computadores=12,
+            capacidade_operacional=12,
+            status=InformaticaLaboratorio.Status.ATIVO,
+        )
+        self.turmas = [self._turma(idx) for idx in range(2)]
+
+    def _turma(self, idx: int):
+        grade = InformaticaGradeHorario.objects.create(
+            nome=f"Grade Alertas {idx}",
+            codigo=f"GRD-ALT-{idx}",
+            tipo_grade=InformaticaGradeHorario.TipoGrade.PADRAO_SEMANAL,
+            laboratorio=self.laboratorio,
+            turno=InformaticaGradeHorario.Turno.MANHA if idx == 0 else InformaticaGradeHorario.Turno.TARDE,
+            dia_semana_1=InformaticaGradeHorario.DiaSemana.SEGUNDA,
+            dia_semana_2=InformaticaGradeHorario.DiaSemana.QUARTA,
+            hora_inicio=time(8 + idx * 6, 0),
+            hora_fim=time(9 + idx * 6, 0),
+            capacidade_maxima=12,
+            status=InformaticaGradeHorario.Status.ATIVA,
+            professor_principal=self.prof,
+        )
+        turma = InformaticaTurma.objects.create(
+            curso=self.curso,
+            grade_horario=grade,
+            laboratorio=self.laboratorio,
+            codigo=f"INF-ALT-{idx}",
+            instrutor=self.prof,
+            ano_letivo=2026,
+            max_vagas=12,
+            status=InformaticaTurma.Status.ATIVA,
+        )
+        turma.aulas_teste = [
+            InformaticaAulaDiario.objects.create(turma=turma, data_aula=date(2026, 3, 2) + timedelta(days=7 * n))
+            for n in range(5)
+        ]
+        turma.matriculas_teste = []
+        for n in range(3):
+            aluno = Aluno.objects.create(nome=f"Aluno Alertas {idx}-{n}")
+            turma.matriculas_teste.append(
+                InformaticaMatricula.objects.create(
+                    aluno=aluno,
+                    escola_origem=self.unidade,
+                    curso=self.curso,
+                    turma=turma,
+                    status=InformaticaMatricula.Status.MATRICULADO,
+                )
+            )
+        return turma
+
+    def _chamada(self, turma, matricula, presencas: str):
+        for aula, marca in zip(turma.aulas_teste, presencas):
+            InformaticaFrequencia.objects.update_or_create(
+                aula=aula, aluno_id=matricula.aluno_id, defaults={"presente": marca == "P"}
+            )
+
+    def _alertas(self, matricula):
+        return {
+            alerta.tipo: (alerta.ativo, float(alerta.percentual_frequencia), alerta.faltas_consecutivas)
+            for alerta in InformaticaAlertaFrequencia.objects.filter(matricula=matricula)
+        }
+
+    def test_percentual_e_sequencia_de_faltas_por_aluno(self):
+        turma = self.turmas[0]
+        faltoso, assiduo, sem_chamada = turma.matriculas_teste
+        self._chamada(turma, faltoso, "PFFFP")
+        self._chamada(turma, assiduo, "PPPFP")
+
+        self.assertEqual(recalcular_alertas_turmas([turma.id]), 6)
+        tipo = InformaticaAlertaFrequencia.Tipo
+        self.assertEqual(
+            self._alertas(faltoso), {tipo.BAIXA_FREQUENCIA: (True, 40.0, 3), tipo.FALTAS_CONSECUTIVAS: (True, 40.0, 3)}
+        )
+        self.assertEqual(
+            self._alertas(assiduo),
+            {tipo.BAIXA_FREQUENCIA: (False, 80.0, 1), tipo.FALTAS_CONSECUTIVAS: (False, 80.0, 1)},
+        )
+        self.assertEqual(
+            self._alertas(sem_chamada),
+            {tipo.BAIXA_FREQUENCIA: (False, 100.0, 0), tipo.FALTAS_CONSECUTIVAS: (False, 100.0, 0)},
+        )
+        self.assertEqual(recalcular_alertas_turmas([turma.id]), 0)
+
+    def test_resolve_e_reativa_alerta(self):
+        turma = self.turmas[0]
+        matricula = turma.matriculas_teste[0]
+        self._chamada(turma, matricula, "FFFPP")
+        recalcular_alertas_turmas([turma.id])
+
+        self._chamada(turma, matricula, "PPPPP")
+        recalcular_alertas_turmas([turma.id])
+        alertas = InformaticaAlertaFrequencia.objects.filter(matricula=matricula)
+        self.assertEqual(alertas.count(), 2)
+        self.assertFalse(alertas.filter(ativo=True).exists())
+        self.assertFalse(alertas.filter(resolvido_em__isnull=True).exists())
+
+        self._chamada(turma, matricula, "PFFFF")
+        recalcular_alertas_turmas([turma.id])
+        self.assertEqual(alertas.filter(ativo=True, resolvido_em__isnull=True).count(), 2)
+
+    def test_consultas_nao_crescem_com_turmas(self):
+        for turma in self.turmas:
+            for matricula in turma.matriculas_teste:
+                self._chamada(turma, matricula, "PFPFF")
+        with CaptureQueriesContext(connection) as uma:
+            recalcular_alertas_turmas([self.turmas[0].id])
+        InformaticaAlertaFrequencia.objects.all().delete()
+        with CaptureQueriesContext(connection) as duas:
+            recalcular_alertas_turmas([turma.id for turma in self.turmas])
+        self.assertEqual(len(uma), len(duas))
+        self.assertEqual(InformaticaAlertaFrequencia.objects.count(), 12)
+
+    def test_rotina_noturna_so_revisita_turmas_alteradas(self):
+        for turma in self.turmas:
+            self._chamada(turma, turma.matriculas_teste[0], "PPPPP")
+        primeira = recalcular_alertas_pendentes()
+        self.assertEqual((primeira.turmas_processadas, primeira.alertas_alterados), (2, 12))
+
+        self.assertEqual(recalcular_alertas_pendentes().turmas_processadas, 0)
+
+        turma = self.turmas[1]
+        self._chamada(turma, turma.matriculas_teste[0], "FFFFF")
+        terceira = recalcular_alertas_pendentes()
+        self.assertEqual((terceira.turmas_processadas, terceira.alertas_alterados), (1, 2))
+        self.assertEqual(
+            InformaticaAlertaFrequencia.objects.filter(ativo=True).values("matricula__turma").distinct().count(), 1
+        )
+
+
+class InformaticaSincronizacaoCalendarioTestCase(TestCase):
+    def setUp(self):
+        self.coord = get_user_model().objects.create_user(username="coord_info_sync", password="123456")
+        profile, _ = Profile.objects.get_or_create(user=self.coord, defaults={"ativo": True})
+        municipio = Municipio.objects.create(nome="Cidade Sincronização", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="SME Sincronização")
+        unidade = Unidade.objects.create(
+            secretaria=secretaria, nome="Escola Sincronização", tipo=Unidade.Tipo.EDUCACAO
+        )
+        profile.role = Profile.Role.EDU_COORD
+        profile.must_change_password = False
+        profile.unidade = unidade
+        profile.save(update_fields=["role", "must_change_password", "unidade"])
+        PeriodoLetivo.objects.create(
+            ano_letivo=2026, tipo=PeriodoLetivo.Tipo.BIMESTRE, numero=1, inicio=date(2026, 3, 2), fim=date(2026, 3, 31)
+        )
+        CalendarioEducacionalEvento.objects.create(
+            ano_letivo=2026,
+            secretaria=secretaria,
+            titulo="Feriado municipal",
+            tipo=CalendarioEducacionalEvento.Tipo.FERIADO,
+            data_inicio=date(2026, 3, 4),
+            data_fim=date(2026, 3, 4),
+        )
+        curso = InformaticaCurso.objects.create(municipio=municipio, nome="Informática Sincronização")
+        laboratorio = InformaticaLaboratorio.objects.create(
+            nome="Lab Sincronização",
+            unidade=unidade,
+            quantidade_computadores=12,
+            capacidade_operacional=12,
+            status=InformaticaLaboratorio.Status.ATIVO,
+        )
+        self.grade = InformaticaGradeHorario.objects.create(
+            nome="Grade Sincronização",
+            codigo="GRD-SYNC-01",
+            tipo_grade=InformaticaGradeHorario.TipoGrade.PADRAO_SEMANAL,
+            laboratorio=laboratorio,
+            turno=InformaticaGradeHorario.Turno.MANHA,
+            dia_semana_1=InformaticaGradeHorario.DiaSemana.SEGUNDA,
+            dia_semana_2=InformaticaGradeHorario.DiaSemana.QUARTA,
+            hora_inicio=time(8, 0),
+            hora_fim=time(9, 0),
+            duracao_total_minutos=60,
+            duracao_aula_minutos=45,
+            duracao_intervalo_minutos=15,
+            capacidade_maxima=12,
+            status=InformaticaGradeHorario.Status.ATIVA,
+            ano_letivo=2026,
+        )
+        self.turma = InformaticaTurma.objects.create(
+            curso=curso,
+            grade_horario=self.grade,
+            laboratorio=laboratorio,
+            codigo="INF-SYNC-01",
+            ano_letivo=2026,
+            max_vagas=12,
+            status=InformaticaTurma.Status.ATIVA,
+        )
+
+    def _aulas(self, status):
+        return sorted(self.turma.aulas.filter(status=status).values_list("data_aula", flat=True))
+
+    def test_sincroniza_so_a_diferenca(self):
+        self.assertEqual(sincronizar_turma_grade(self.turma), {"criadas": 8, "atualizadas": 0, "canceladas": 0})
+        self.assertNotIn(date(2026, 3, 4), self._aulas(InformaticaAulaDiario.Status.PREVISTA))
+        self.turma.aulas.filter(data_aula=date(2026, 3, 9)).update(status=InformaticaAulaDiario.Status.REALIZADA)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sincronizar_turma_grade(self.turma), {"criadas": 0, "atualizadas": 0, "canceladas": 0})
+        self.assertLessEqual(len(queries), 8)
+
+        self.grade.dia_semana_1 = InformaticaGradeHorario.DiaSemana.TERCA
+        self.grade.dia_semana_2 = InformaticaGradeHorario.DiaSemana.QUINTA
+        self.grade.save()
+        self.turma.refresh_from_db()
+        self.assertEqual(sincronizar_turma_grade(self.turma), {"criadas": 9, "atualizadas": 0, "canceladas": 7})
+
+        self.assertEqual(
+            list(self.turma.encontros.filter(ativo=True).values_list("dia_semana", flat=True).order_by("dia_semana")),
+            [InformaticaEncontroSemanal.DiaSemana.TERCA, InformaticaEncontroSemanal.DiaSemana.QUINTA],
+        )
+        self.assertEqual(self._aulas(InformaticaAulaDiario.Status.REALIZADA), [date(2026, 3, 9)])
+        self.assertEqual({d.weekday() for d in self._aulas(InformaticaAulaDiario.Status.PREVISTA)}, {1, 3})
+        cancelada = self.turma.aulas.filter(status=InformaticaAulaDiario.Status.CANCELADA).first()
+        self.assertIn("Cancelada por ajuste de grade/calendário.", cancelada.observacoes)
+
+    def test_job_da_grade_sincroniza_turmas_com_progresso(self):
+        with patch("apps.educacao.tasks.sincronizar_grade_informatica_task.delay", side_effect=OSError("broker")):
+            job = enfileirar_sincronizacao_grade(self.coord, grade=self.grade)
+
+        self.assertEqual((job.status, job.total_turmas, job.turmas_processadas), ("CONCLUIDO", 1, 1))
+        self.assertEqual(len(self._aulas(InformaticaAulaDiario.Status.PREVISTA)), 8)
+
+        self.client.force_login(self.coord)
+        resp = self.client.get(
+            reverse("educacao:informatica_grade_sincronizacao_job", args=[job.codigo]),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(resp.json()["progresso"], 100)
+        self.assertEqual(InformaticaGradeSincronizacaoJob.objects.count(), 1)
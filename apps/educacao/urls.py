@@ -26,6 +26,7 @@ from . import views_renovacao
 from . import views_lotes
 from . import views_fechamento_lote
 from . import views_operacoes_lote
+from . import views_documentos_lote
 from . import views_minicursos
 from . import views_biblioteca
 from . import views_programas
@@ -89,6 +90,7 @@ urlpatterns = [
     path("matriculas/nova/", views_matriculas.matricula_create, name="matricula_create"),
     path("matriculas/evasao-lote/", views_lotes.evasao_lote, name="evasao_lote"),
     path("alunos/operacoes-lote/", views_operacoes_lote.operacoes_lote, name="operacoes_lote"),
+    path("alunos/documentos-lote/", views_documentos_lote.documentos_lote, name="documentos_lote"),
     path("portal/professor/", views_portal.portal_professor, name="portal_professor"),
     path("portal/aluno/<int:pk>/", views_portal.portal_aluno, name="portal_aluno"),
     path("portal/aluno/<int:pk>/editais/<int:inscricao_id>/", views_portal.portal_aluno_edital_detail, name="portal_aluno_edital_detail"),
@@ -373,6 +375,11 @@ urlpatterns = [
     path("periodos/<int:pk>/editar/", periodo_update, name="periodo_update"),
     path("periodos/gerar-bimestres/", periodo_gerar_bimestres, name="periodo_gerar_bimestres"),
     path("periodos/fechamento-lote/", views_fechamento_lote.fechamento_periodo_lote, name="fechamento_periodo_lote"),
+    path(
+        "periodos/fechamento-lote/<uuid:codigo>/",
+        views_fechamento_lote.fechamento_periodo_lote_job,
+        name="fechamento_periodo_lote_job",
+    ),
 
     # ======================
     # MINICURSOS
@@ -424,6 +431,11 @@ urlpatterns = [
     path("informatica/grades/", views_informatica.informatica_grade_list, name="informatica_grade_list"),
     path("informatica/grades/nova/", views_informatica.informatica_grade_create, name="informatica_grade_create"),
     path("informatica/grades/<int:pk>/editar/", views_informatica.informatica_grade_update, name="informatica_grade_update"),
+    path(
+        "informatica/grades/sincronizacao/<uuid:codigo>/",
+        views_informatica.informatica_grade_sincronizacao_job,
+        name="informatica_grade_sincronizacao_job",
+    ),
     path("informatica/grades/<int:pk>/duplicar/", views_informatica.informatica_grade_duplicate, name="informatica_grade_duplicate"),
     path("informatica/grades/<int:pk>/toggle/", views_informatica.informatica_grade_toggle, name="informatica_grade_toggle"),
 
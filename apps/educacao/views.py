@@ -17,6 +17,7 @@ from apps.core.rbac import (
     scope_filter_turmas,
     scope_filter_unidades,
 )
+from apps.core.services_kpis import escopo_do_usuario, ler_painel
 from apps.org.models import Secretaria, Unidade
 
 from .models import Aluno, Matricula, MatrizCurricular, RenovacaoMatricula, Turma
@@ -102,9 +103,15 @@ def _build_month_calendar_context(eventos, ref_date):
 @require_perm("educacao.view")
 def index(request):
     user = request.user
+    # Recortes territoriais (admin, município, secretaria, unidade) leem o snapshot
+    # compartilhado do escopo; os demais perfis mantêm o cache por usuário.
+    escopo = escopo_do_usuario(user)
     cache_key = f"edu_dashboard_{user.id}"
 
-    data = cache.get(cache_key)
+    if escopo is not None:
+        data = dict(ler_painel(escopo, "educacao_index"))
+    else:
+        data = cache.get(cache_key)
 
     if data is None:
         unidades_educacao_qs = scope_filter_unidades(
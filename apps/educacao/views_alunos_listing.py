@@ -9,7 +9,7 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import escape
 
-from apps.core.exports import export_csv, export_pdf_table
+from apps.core.exports import export_pdf_table, stream_csv
 from apps.core.rbac import can, scope_filter_alunos, scope_filter_matriculas, scope_filter_turmas
 from apps.nee.forms import AlunoNecessidadeForm, ApoioMatriculaForm
 from apps.nee.models import AlunoNecessidade, ApoioMatricula
@@ -173,12 +173,17 @@ def aluno_list(request):
     export = (request.GET.get("export") or "").strip().lower()
 
     if export in ("csv", "pdf"):
-        items = list(qs.order_by("nome").values_list("nome", "cpf", "nis", "ativo"))
+        items = qs.order_by("nome").values_list("nome", "cpf", "nis", "ativo")
         headers_export = ["Nome", "CPF", "NIS", "Ativo"]
-        rows_export = [[nome or "", cpf or "", nis or "", "Sim" if ativo else "Não"] for (nome, cpf, nis, ativo) in items]
+
+        def _row(item):
+            nome, cpf, nis, ativo = item
+            return [nome or "", cpf or "", nis or "", "Sim" if ativo else "Não"]
 
         if export == "csv":
-            return export_csv("alunos.csv", headers_export, rows_export)
+            return stream_csv("alunos.csv", headers_export, items, row_mapper=_row)
+
+        rows_export = [_row(item) for item in items]
 
         filtros = f"Busca={q or '-'}"
         return export_pdf_table(
@@ -1,4 +1,4 @@
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
@@ -11,6 +11,8 @@ from apps.core.rbac import can, is_professor_profile_role, scope_filter_turmas,
 
 from .models import Aluno, AlunoCertificado, Matricula, Turma
 from .models_diario import DiarioTurma, Avaliacao, Nota
+from .services_documentos_lote import BOLETIM_HEADERS, linhas_boletim, linhas_boletim_pdf
+from .services_resumo_diario import carregar_resumos, media_ponderada
 
 
 def _is_professor(user) -> bool:
@@ -50,34 +52,14 @@ def boletim_turma(request, pk: int):
     boletim = []
     diarios_list = list(diarios)
 
-    # pré-carrega avaliações e notas
-    avaliacao_qs = Avaliacao.objects.filter(diario_id__in=[d.id for d in diarios_list]).only("id", "diario_id", "titulo", "peso", "data")
-    aval_por_diario = {}
-    for a in avaliacao_qs:
-        aval_por_diario.setdefault(a.diario_id, []).append(a)
-
-    nota_qs = Nota.objects.filter(avaliacao_id__in=[a.id for a in avaliacao_qs]).values("avaliacao_id", "aluno_id", "valor")
-    notas_map = {}
-    for n in nota_qs:
-        notas_map[(n["avaliacao_id"], n["aluno_id"])] = n["valor"]
+    # somas ponderadas já materializadas por (diário, aluno) — diário inteiro
+    celulas, _totais = carregar_resumos(diario_ids=[d.id for d in diarios_list], periodo_ids=[None])
 
     def calc_media(diario_id: int, aluno_id: int):
-        avals = aval_por_diario.get(diario_id, [])
-        soma = Decimal("0")
-        soma_pesos = Decimal("0")
-        for av in avals:
-            valor = notas_map.get((av.id, aluno_id), None)
-            if valor is None:
-                continue
-            try:
-                peso = Decimal(str(av.peso or 1))
-            except (InvalidOperation, ValueError):
-                peso = Decimal("1")
-            soma += Decimal(str(valor)) * peso
-            soma_pesos += peso
-        if soma_pesos == 0:
+        celula = celulas.get((diario_id, None, aluno_id))
+        if celula is None:
             return None
-        return (soma / soma_pesos).quantize(Decimal("0.01"))
+        return media_ponderada(celula[0], celula[1])
 
     for m in alunos_qs:
         item = {"aluno": m.aluno, "medias": [], "media_geral": None}
@@ -155,58 +137,18 @@ def boletim_aluno(request, pk: int, aluno_id: int):
     nota_qs = Nota.objects.filter(avaliacao_id__in=[a.id for a in avaliacao_qs], aluno=aluno).values("avaliacao_id", "valor")
     notas_map = {n["avaliacao_id"]: n["valor"] for n in nota_qs}
 
-    linhas = []
-    for d in diarios_list:
-        avals = aval_por_diario.get(d.id, [])
-        soma = Decimal("0")
-        soma_pesos = Decimal("0")
-
-        aval_rows = []
-        for av in avals:
-            valor = notas_map.get(av.id, None)
-            aval_rows.append({
-                "titulo": av.titulo,
-                "peso": av.peso,
-                "data": av.data,
-                "nota": valor,
-            })
-            if valor is None:
-                continue
-            peso = Decimal(str(av.peso or 1))
-            soma += Decimal(str(valor)) * peso
-            soma_pesos += peso
-
-        media = (soma / soma_pesos).quantize(Decimal("0.01")) if soma_pesos else None
-        linhas.append({
-            "diario": d,
-            "avaliacoes": aval_rows,
-            "media": media,
-        })
+    linhas = linhas_boletim(diarios_list, aval_por_diario, notas_map)
 
     export = (request.GET.get("export") or "").strip().lower()
     if export == "pdf":
-        headers = ["Professor", "Avaliação", "Peso", "Data", "Nota"]
-        rows = []
-        for bloco in linhas:
-            prof = getattr(getattr(bloco["diario"], "professor", None), "username", "—")
-            if not bloco["avaliacoes"]:
-                rows.append([prof, "—", "—", "—", "—"])
-                continue
-            for av in bloco["avaliacoes"]:
-                rows.append([
-                    prof,
-                    av["titulo"],
-                    str(av["peso"]),
-                    av["data"].strftime("%d/%m/%Y") if av["data"] else "—",
-                    str(av["nota"]) if av["nota"] is not None else "—",
-                ])
+        rows = linhas_boletim_pdf(linhas)
 
         filtros = f"Aluno={aluno.nome} | Turma={turma.nome} | Ano={turma.ano_letivo}"
         return export_pdf_table(
             request,
             filename="boletim_aluno.pdf",
             title="Boletim — Aluno",
-            headers=headers,
+            headers=BOLETIM_HEADERS,
             rows=rows,
             filtros=filtros,
         )
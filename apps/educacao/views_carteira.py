@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import date
 from uuid import UUID
 
 from django.contrib.auth.decorators import login_required
@@ -15,6 +14,7 @@ from apps.core.exports import _try_make_qr_data_uri, export_pdf_template
 from apps.core.rbac import scope_filter_alunos
 
 from .models import Aluno, AlunoDocumento, CarteiraEstudantil, Matricula, MatriculaCurso
+from .services_documentos_lote import CARTEIRA_STYLESHEET, snapshot_carteira, validade_padrao_carteira
 
 try:
     from apps.nee.models import AlunoNecessidade
@@ -27,11 +27,6 @@ except Exception:  # pragma: no cover
     PortalMunicipalConfig = None  # type: ignore
 
 
-def _validade_padrao() -> date:
-    today = timezone.localdate()
-    return date(today.year, 12, 31)
-
-
 def _matricula_referencia(aluno: Aluno) -> Matricula | None:
     qs = (
         Matricula.objects.select_related(
@@ -47,49 +42,23 @@ def _matricula_referencia(aluno: Aluno) -> Matricula | None:
 
 
 def _montar_snapshot(aluno: Aluno, matricula: Matricula | None) -> dict:
-    unidade = getattr(getattr(matricula, "turma", None), "unidade", None)
-    secretaria = getattr(unidade, "secretaria", None)
-    municipio = getattr(secretaria, "municipio", None)
-    turma = getattr(matricula, "turma", None)
-
     cursos = list(
         MatriculaCurso.objects.select_related("curso")
         .filter(aluno=aluno)
         .order_by("-data_matricula", "-id")
         .values_list("curso__nome", "situacao")[:6]
     )
-    cursos_resumo = [f"{nome} ({situacao.replace('_', ' ').title()})" for nome, situacao in cursos if nome]
 
-    nee_resumo: list[str] = []
+    necessidades: list[str] = []
     if AlunoNecessidade is not None:
-        nee_qs = (
+        necessidades = list(
             AlunoNecessidade.objects.select_related("tipo")
             .filter(aluno=aluno, ativo=True)
             .order_by("-id")
             .values_list("tipo__nome", flat=True)[:6]
         )
-        nee_resumo = [str(nome) for nome in nee_qs if nome]
-
-    return {
-        "aluno_nome": aluno.nome,
-        "nome_mae": aluno.nome_mae or "",
-        "nome_pai": aluno.nome_pai or "",
-        "cpf": aluno.cpf or "",
-        "nis": aluno.nis or "",
-        "data_nascimento": aluno.data_nascimento.strftime("%d/%m/%Y") if aluno.data_nascimento else "",
-        "escola": getattr(unidade, "nome", "") or "",
-        "secretaria": getattr(secretaria, "nome", "") or "",
-        "municipio": getattr(municipio, "nome", "") or "",
-        "turma": getattr(turma, "nome", "") or "",
-        "ano_letivo": str(getattr(turma, "ano_letivo", "") or ""),
-        "turno": turma.get_turno_display() if turma else "",
-        "situacao_matricula": matricula.get_situacao_display() if matricula else "",
-        "modalidade": turma.get_modalidade_display() if turma else "",
-        "etapa": turma.get_etapa_display() if turma else "",
-        "cursos_complementares": cursos_resumo,
-        "possui_nee": bool(nee_resumo),
-        "necessidades_especiais": nee_resumo,
-    }
+
+    return snapshot_carteira(aluno, matricula, cursos=cursos, necessidades=necessidades)
 
 
 @login_required
@@ -110,11 +79,11 @@ def carteira_emitir_pdf(request, aluno_id: int):
             aluno=aluno,
             matricula=matricula,
             emitida_por=request.user,
-            validade=_validade_padrao(),
+            validade=validade_padrao_carteira(),
         )
 
     carteira.emitida_por = request.user
-    carteira.validade = carteira.validade or _validade_padrao()
+    carteira.validade = carteira.validade or validade_padrao_carteira()
     carteira.dados_snapshot = snapshot
     carteira.save()
 
@@ -154,6 +123,7 @@ def carteira_emitir_pdf(request, aluno_id: int):
         filename=filename,
         title="Carteira Estudantil",
         template_name="educacao/pdf/carteira_estudantil.html",
+        stylesheets=[CARTEIRA_STYLESHEET],
         hash_payload=f"carteira|{carteira.codigo_verificacao}|{carteira.codigo_estudante}",
         context={
             "carteira": carteira,
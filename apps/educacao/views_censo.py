@@ -1,20 +1,18 @@
 from __future__ import annotations
 
-from io import BytesIO
 from urllib.parse import urlencode
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count, Q
-from django.http import HttpResponse
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils.html import format_html, format_html_join
 from django.utils import timezone
 
 from apps.core.decorators import require_perm
-from apps.core.exports import export_csv
+from apps.core.exports import export_csv, stream_xlsx
 from apps.core.rbac import scope_filter_alunos, scope_filter_matriculas, scope_filter_turmas, scope_filter_unidades
 from apps.org.models import Unidade
 
@@ -39,29 +37,11 @@ def _normalize_year(v: str, fallback: int) -> int:
 
 def _render_xlsx(filename: str, title: str, headers: list[str], rows: list[list[str]]):
     try:
-        from openpyxl import Workbook  # type: ignore
+        import openpyxl  # type: ignore  # noqa: F401
     except Exception:
         return None
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Censo"
-    ws.append([title])
-    ws.append([])
-    ws.append(headers)
-    for r in rows:
-        ws.append(r)
-
-    buffer = BytesIO()
-    wb.save(buffer)
-
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response["X-Content-Type-Options"] = "nosniff"
-    return response
+    return stream_xlsx(filename, headers, rows, sheet_title="Censo", leading_rows=[[title], []])
 
 
 def _dataset_escolas(*, unidades_qs):
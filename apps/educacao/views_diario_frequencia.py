@@ -10,9 +10,11 @@ from django.urls import reverse
 
 from apps.core.exports import export_pdf_table
 from apps.core.rbac import scope_filter_turmas
+from apps.core.services_auditoria import registrar_auditoria
 
 from .models import Turma, Matricula
 from .models_diario import Aula, Frequencia
+from .services_lancamentos import salvar_frequencias
 from .views_diario_permissions import can_edit_diario, can_view_diario
 
 
@@ -54,15 +56,22 @@ def aula_frequencia_impl(request, pk: int, aula_id: int):
         if not can_edit:
             return HttpResponseForbidden("403 — Somente o professor responsável pode lançar frequência.")
 
-        for m in alunos_qs:
-            status = (request.POST.get(f"aluno_{m.aluno_id}") or "P").strip()
-            Frequencia.objects.update_or_create(
-                aula=aula,
-                aluno=m.aluno,
-                defaults={"status": status},
+        alterados = salvar_frequencias(
+            aula,
+            {m.aluno_id: (request.POST.get(f"aluno_{m.aluno_id}") or "P").strip() for m in alunos_qs},
+        )
+        if alterados:
+            registrar_auditoria(
+                municipio=diario.turma.unidade.secretaria.municipio,
+                modulo="EDUCACAO",
+                evento="FREQUENCIA_LANCADA",
+                entidade="Aula",
+                entidade_id=aula.pk,
+                usuario=request.user,
+                depois={"diario_id": diario.pk, "alterados": alterados},
             )
 
-        messages.success(request, "Frequência salva com sucesso.")
+        messages.success(request, f"Frequência salva com sucesso ({alterados} registro(s) alterado(s)).")
         base = reverse("educacao:aula_frequencia", args=[diario.pk, aula.pk])
         return redirect(f"{base}?q={q}" if q else base)
 
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from django import forms
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.urls import reverse
+
+from apps.core.decorators import require_perm
+from apps.core.rbac import scope_filter_turmas, scope_filter_unidades
+from apps.core.services_pdf import pdf_job_response
+from apps.org.models import Unidade
+
+from .models import Turma
+from .services_documentos_lote import FORMATO_PDF, FORMATOS, TIPOS, enfileirar_documentos_lote, matriculas_lote
+
+
+class DocumentosLoteForm(forms.Form):
+    tipo = forms.ChoiceField(
+        label="Documento",
+        choices=[(tipo, cfg["rotulo"]) for tipo, cfg in TIPOS.items()],
+    )
+    turma = forms.ModelChoiceField(
+        label="Turma",
+        queryset=Turma.objects.none(),
+        required=False,
+    )
+    unidade = forms.ModelChoiceField(
+        label="Unidade (todas as turmas)",
+        queryset=Unidade.objects.none(),
+        required=False,
+        help_text="Usada quando nenhuma turma é selecionada.",
+    )
+    formato = forms.ChoiceField(
+        label="Formato",
+        choices=FORMATOS,
+        initial=FORMATO_PDF,
+    )
+    incluir_inativos = forms.BooleanField(
+        label="Incluir matrículas não ativas",
+        required=False,
+        initial=False,
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["turma"].queryset = scope_filter_turmas(
+            user,
+            Turma.objects.select_related("unidade").filter(unidade__tipo=Unidade.Tipo.EDUCACAO),
+        ).order_by("-ano_letivo", "nome")
+        self.fields["unidade"].queryset = scope_filter_unidades(
+            user,
+            Unidade.objects.filter(tipo=Unidade.Tipo.EDUCACAO),
+        ).order_by("nome")
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("turma") and not cleaned.get("unidade"):
+            raise forms.ValidationError("Selecione a turma ou a unidade.")
+        return cleaned
+
+
+@login_required
+@require_perm("educacao.manage")
+def documentos_lote(request):
+    form = DocumentosLoteForm(request.POST or None, user=request.user)
+    actions = [
+        {
+            "label": "Operações em lote",
+            "url": reverse("educacao:operacoes_lote"),
+            "icon": "fa-solid fa-arrow-left",
+            "variant": "gp-button--ghost",
+        }
+    ]
+
+    if request.method == "POST" and form.is_valid():
+        turma = form.cleaned_data.get("turma")
+        unidade = None if turma else form.cleaned_data.get("unidade")
+        incluir_inativos = bool(form.cleaned_data.get("incluir_inativos"))
+        if not matriculas_lote(request.user, turma=turma, unidade=unidade, incluir_inativos=incluir_inativos):
+            messages.warning(request, "Nenhuma matrícula encontrada para gerar os documentos.")
+        else:
+            job = enfileirar_documentos_lote(
+                request,
+                tipo=form.cleaned_data["tipo"],
+                formato=form.cleaned_data["formato"],
+                turma=turma,
+                unidade=unidade,
+                incluir_inativos=incluir_inativos,
+            )
+            return pdf_job_response(request, job)
+
+    return render(
+        request,
+        "educacao/documentos_lote.html",
+        {
+            "form": form,
+            "actions": actions,
+        },
+    )
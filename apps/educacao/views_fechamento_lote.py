@@ -5,8 +5,9 @@ from decimal import Decimal
 from django import forms
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.shortcuts import redirect, render
+from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 
@@ -15,8 +16,8 @@ from apps.core.rbac import scope_filter_turmas, scope_filter_unidades
 from apps.org.models import Secretaria, Unidade
 
 from .models import Matricula, Turma
-from .models_periodos import FechamentoPeriodoTurma, PeriodoLetivo
-from .services_academico import calc_periodo_metrics_by_aluno, classify_resultado
+from .models_periodos import FechamentoPeriodoLoteJob, FechamentoPeriodoTurma, PeriodoLetivo
+from .services_fechamento_lote import enfileirar_fechamento_lote
 
 
 def _unidades_educacao_scope(user):
@@ -131,53 +132,18 @@ def _turmas_lote_scope(user, cleaned_data: dict):
     return qs
 
 
-def _resumo_turma_periodo(*, turma: Turma, periodo: PeriodoLetivo, media_corte: Decimal, frequencia_corte: Decimal):
-    matriculas = list(
-        Matricula.objects.select_related("aluno")
-        .filter(turma=turma, situacao=Matricula.Situacao.ATIVA)
-        .order_by("aluno__nome")
-    )
-    aluno_ids = [m.aluno_id for m in matriculas]
-    media_map, freq_map, _ = calc_periodo_metrics_by_aluno(turma=turma, periodo=periodo, aluno_ids=aluno_ids)
-
-    aprovados = 0
-    recuperacao = 0
-    reprovados = 0
-    for aluno_id in aluno_ids:
-        resultado = classify_resultado(
-            media=media_map.get(aluno_id),
-            frequencia=freq_map.get(aluno_id),
-            media_corte=Decimal(str(media_corte)),
-            frequencia_corte=Decimal(str(frequencia_corte)),
-        )
-        if resultado == "Aprovado":
-            aprovados += 1
-        elif resultado == "Recuperação":
-            recuperacao += 1
-        else:
-            reprovados += 1
-
-    return {
-        "total_alunos": len(aluno_ids),
-        "aprovados": aprovados,
-        "recuperacao": recuperacao,
-        "reprovados": reprovados,
-    }
-
-
 def _rows_preview(*, turmas: list[Turma], periodo: PeriodoLetivo, fechamentos_map: dict[int, FechamentoPeriodoTurma]):
     rows = []
     for turma in turmas:
         fechamento = fechamentos_map.get(turma.id)
         status = "Fechada" if fechamento else "Aberta"
         fechado_em = fechamento.fechado_em.strftime("%d/%m/%Y %H:%M") if fechamento and fechamento.fechado_em else "—"
-        matriculas_ativas = Matricula.objects.filter(turma=turma, situacao=Matricula.Situacao.ATIVA).count()
         rows.append(
             {
                 "cells": [
                     {"text": turma.nome},
                     {"text": turma.unidade.nome},
-                    {"text": str(matriculas_ativas)},
+                    {"text": str(turma.matriculas_ativas)},
                     {"text": status},
                     {"text": fechado_em},
                     {"text": str(periodo)},
@@ -207,9 +173,11 @@ def fechamento_periodo_lote(request):
         cleaned = form.cleaned_data
         periodo = cleaned["periodo"]
 
-        turmas_qs = _turmas_lote_scope(request.user, cleaned)
+        turmas_qs = _turmas_lote_scope(request.user, cleaned).annotate(
+            matriculas_ativas=Count("matriculas", filter=Q(matriculas__situacao=Matricula.Situacao.ATIVA))
+        )
         if cleaned.get("somente_com_matriculas", True):
-            turmas_qs = turmas_qs.filter(matriculas__situacao=Matricula.Situacao.ATIVA).distinct()
+            turmas_qs = turmas_qs.filter(matriculas_ativas__gt=0)
 
         turmas = list(turmas_qs)
         fechamentos_map = {
@@ -224,35 +192,21 @@ def fechamento_periodo_lote(request):
         preview_total = len(preview_rows)
 
         if action == "fechar":
-            processadas = 0
-            with transaction.atomic():
-                for turma in turmas:
-                    if turma.id in fechamentos_map and not cleaned.get("incluir_turmas_ja_fechadas"):
-                        continue
-                    resumo = _resumo_turma_periodo(
-                        turma=turma,
-                        periodo=periodo,
-                        media_corte=cleaned["media_corte"],
-                        frequencia_corte=cleaned["frequencia_corte"],
-                    )
-                    FechamentoPeriodoTurma.objects.update_or_create(
-                        turma=turma,
-                        periodo=periodo,
-                        defaults={
-                            "media_corte": cleaned["media_corte"],
-                            "frequencia_corte": cleaned["frequencia_corte"],
-                            "total_alunos": resumo["total_alunos"],
-                            "aprovados": resumo["aprovados"],
-                            "recuperacao": resumo["recuperacao"],
-                            "reprovados": resumo["reprovados"],
-                            "observacao": (cleaned.get("observacao") or "").strip(),
-                            "fechado_por": request.user,
-                        },
-                    )
-                    processadas += 1
-
-            messages.success(request, f"Fechamento em lote concluído para {processadas} turma(s).")
-            return redirect("educacao:fechamento_periodo_lote")
+            turma_ids = [
+                t.id for t in turmas if cleaned.get("incluir_turmas_ja_fechadas") or t.id not in fechamentos_map
+            ]
+            if not turma_ids:
+                messages.warning(request, "Nenhuma turma aberta para fechar com os filtros informados.")
+                return redirect("educacao:fechamento_periodo_lote")
+            job = enfileirar_fechamento_lote(
+                request.user,
+                periodo=periodo,
+                turma_ids=turma_ids,
+                media_corte=cleaned["media_corte"],
+                frequencia_corte=cleaned["frequencia_corte"],
+                observacao=cleaned.get("observacao") or "",
+            )
+            return redirect("educacao:fechamento_periodo_lote_job", codigo=job.codigo)
 
         if action == "reabrir":
             turmas_ids = [t.id for t in turmas]
@@ -283,3 +237,44 @@ def fechamento_periodo_lote(request):
             ],
         },
     )
+
+
+@login_required
+@require_perm("educacao.manage")
+def fechamento_periodo_lote_job(request, codigo):
+    job = get_object_or_404(
+        FechamentoPeriodoLoteJob.objects.select_related("periodo"),
+        codigo=codigo,
+        solicitado_por=request.user,
+    )
+    em_andamento = job.status in {FechamentoPeriodoLoteJob.Status.PENDENTE, FechamentoPeriodoLoteJob.Status.PROCESSANDO}
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse(
+            {
+                "job_id": str(job.codigo),
+                "status": job.status,
+                "total_turmas": job.total_turmas,
+                "turmas_processadas": job.turmas_processadas,
+                "progresso": job.progresso,
+                "erro": job.erro,
+            }
+        )
+
+    return render(
+        request,
+        "educacao/fechamento_periodo_lote_job.html",
+        {
+            "job": job,
+            "em_andamento": em_andamento,
+            "actions": [
+                {
+                    "label": "Fechamento em lote",
+                    "url": reverse("educacao:fechamento_periodo_lote"),
+                    "icon": "fa-solid fa-arrow-left",
+                    "variant": "gp-button--ghost",
+                }
+            ],
+        },
+    )
+
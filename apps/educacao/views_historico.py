@@ -11,8 +11,7 @@ from apps.core.exports import export_csv, export_pdf_table
 from apps.core.rbac import scope_filter_alunos, scope_filter_matriculas
 
 from .models import Aluno, AlunoCertificado, Matricula
-from .models_periodos import PeriodoLetivo
-from .services_academico import calc_historico_resumo
+from .services_academico import calc_historico_resumos
 
 
 @login_required
@@ -35,16 +34,17 @@ def historico_aluno(request, pk: int):
         .order_by("-turma__ano_letivo", "turma__nome"),
     )
 
+    matriculas = list(matriculas)
+    resumos = calc_historico_resumos(
+        turmas=[m.turma for m in matriculas],
+        aluno_id=aluno.id,
+        media_corte=Decimal("6.00"),
+        frequencia_corte=Decimal("75.00"),
+    )
+
     rows_calc = []
     for m in matriculas:
-        periodos = PeriodoLetivo.objects.filter(ano_letivo=m.turma.ano_letivo, ativo=True).order_by("numero")
-        media_final, freq_final, resultado = calc_historico_resumo(
-            turma=m.turma,
-            periodos=periodos,
-            aluno_id=aluno.id,
-            media_corte=Decimal("6.00"),
-            frequencia_corte=Decimal("75.00"),
-        )
+        media_final, freq_final, resultado = resumos[m.turma_id]
         rows_calc.append(
             {
                 "turma": m.turma.nome,
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from datetime import date, timedelta
+from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -34,13 +34,13 @@ from .forms_informatica import (
     turmas_scope,
 )
 from .models import Aluno, Matricula
-from .models_calendario import CalendarioEducacionalEvento
 from .models_informatica import (
     InformaticaAlertaFrequencia,
     InformaticaAulaDiario,
     InformaticaCurso,
     InformaticaEncontroSemanal,
     InformaticaGradeHorario,
+    InformaticaGradeSincronizacaoJob,
     InformaticaFrequencia,
     InformaticaLaboratorio,
     InformaticaListaEspera,
@@ -50,16 +50,18 @@ from .models_informatica import (
     InformaticaSolicitacaoVaga,
     InformaticaTurma,
 )
-from .models_periodos import PeriodoLetivo
+from .services_informatica_alertas import recalcular_alertas_turma
+from .services_informatica_calendario import (
+    enfileirar_sincronizacao_grade,
+    sincronizacao_async_min_turmas,
+    sincronizar_turma_grade,
+    sincronizar_turmas,
+    turmas_sincronizaveis,
+)
 from .services_informatica_matricula import registrar_movimentacao_informatica
 from .services_schedule_conflicts import ScheduleConflictService
 
 
-INFORMATICA_INICIO_PADRAO_MUNICIPIO_ANO = {
-    ("governador nunes freire", 2026): date(2026, 3, 16),
-}
-
-
 def _forbidden(message: str = "403 — Você não tem permissão para acessar esta página."):
     return HttpResponseForbidden(message)
 
@@ -218,68 +220,8 @@ def _renumber_lista_espera(curso_id: int):
         InformaticaListaEspera.objects.filter(pk=item_id).update(posicao=idx)
 
 
-def _upsert_alerta(matricula: InformaticaMatricula, tipo: str, ativo: bool, percentual: float, faltas_consecutivas: int):
-    alerta, _ = InformaticaAlertaFrequencia.objects.get_or_create(
-        matricula=matricula,
-        tipo=tipo,
-        defaults={
-            "percentual_frequencia": percentual,
-            "faltas_consecutivas": faltas_consecutivas,
-            "ativo": ativo,
-        },
-    )
-    if alerta.ativo != ativo or float(alerta.percentual_frequencia or 0) != float(percentual) or int(
-        alerta.faltas_consecutivas or 0
-    ) != int(faltas_consecutivas):
-        alerta.ativo = ativo
-        alerta.percentual_frequencia = percentual
-        alerta.faltas_consecutivas = faltas_consecutivas
-        if not ativo and not alerta.resolvido_em:
-            alerta.resolvido_em = timezone.now()
-        if ativo:
-            alerta.resolvido_em = None
-        alerta.save(update_fields=["ativo", "percentual_frequencia", "faltas_consecutivas", "resolvido_em"])
-
-
 def _recalcular_alertas_frequencia_turma(turma_id: int):
-    matriculas = list(
-        InformaticaMatricula.objects.filter(
-            turma_id=turma_id,
-            status=InformaticaMatricula.Status.MATRICULADO,
-        ).select_related("aluno")
-    )
-    for m in matriculas:
-        freq_qs = InformaticaFrequencia.objects.filter(aula__turma_id=turma_id, aluno_id=m.aluno_id).order_by(
-            "aula__data_aula", "id"
-        )
-        total = freq_qs.count()
-        presencas = freq_qs.filter(presente=True).count()
-        percentual = round((presencas / total) * 100, 2) if total > 0 else 100.0
-
-        consecutivas = 0
-        max_consecutivas = 0
-        for item in freq_qs:
-            if item.presente:
-                consecutivas = 0
-            else:
-                consecutivas += 1
-                if consecutivas > max_consecutivas:
-                    max_consecutivas = consecutivas
-
-        _upsert_alerta(
-            matricula=m,
-            tipo=InformaticaAlertaFrequencia.Tipo.BAIXA_FREQUENCIA,
-            ativo=percentual < 75,
-            percentual=percentual,
-            faltas_consecutivas=max_consecutivas,
-        )
-        _upsert_alerta(
-            matricula=m,
-            tipo=InformaticaAlertaFrequencia.Tipo.FALTAS_CONSECUTIVAS,
-            ativo=max_consecutivas >= 3,
-            percentual=percentual,
-            faltas_consecutivas=max_consecutivas,
-        )
+    recalcular_alertas_turma(turma_id)
 
 
 def _seed_frequencias_aula(aula: InformaticaAulaDiario):
@@ -305,186 +247,6 @@ def _seed_frequencias_aula(aula: InformaticaAulaDiario):
         InformaticaFrequencia.objects.bulk_create(novos)
 
 
-def _periodo_datas_turma(turma: InformaticaTurma) -> tuple[date, date]:
-    periodos = PeriodoLetivo.objects.filter(ano_letivo=turma.ano_letivo, ativo=True).order_by("inicio")
-    if periodos.exists():
-        inicio = periodos.first().inicio
-        fim = periodos.order_by("-fim").first().fim
-    else:
-        hoje = timezone.localdate()
-        inicio = hoje
-        fim = hoje + timedelta(days=120)
-
-    # Permite início específico da oferta de Informática sem afetar o calendário geral.
-    unidade = getattr(getattr(turma, "laboratorio", None), "unidade", None)
-    secretaria_id = getattr(unidade, "secretaria_id", None)
-    unidade_id = getattr(unidade, "id", None)
-    if secretaria_id:
-        ev_inicio = (
-            CalendarioEducacionalEvento.objects.filter(
-                ano_letivo=turma.ano_letivo,
-                secretaria_id=secretaria_id,
-                ativo=True,
-            )
-            .filter(Q(unidade__isnull=True) | Q(unidade_id=unidade_id))
-            .filter(
-                Q(titulo__icontains="informática")
-                | Q(titulo__icontains="informatica")
-            )
-            .order_by("data_inicio")
-            .first()
-        )
-        if ev_inicio and ev_inicio.data_inicio:
-            inicio = max(inicio, ev_inicio.data_inicio)
-
-    municipio_nome = (
-        getattr(getattr(getattr(turma, "curso", None), "municipio", None), "nome", "")
-        or ""
-    ).strip().lower()
-    fallback_inicio = INFORMATICA_INICIO_PADRAO_MUNICIPIO_ANO.get((municipio_nome, int(turma.ano_letivo or 0)))
-    if fallback_inicio:
-        inicio = max(inicio, fallback_inicio)
-
-    if inicio > fim:
-        inicio = fim
-    return inicio, fim
-
-
-def _datas_bloqueadas_turma(turma: InformaticaTurma, inicio: date, fim: date) -> set[date]:
-    secretaria_id = turma.laboratorio.unidade.secretaria_id
-    unidade_id = turma.laboratorio.unidade_id
-
-    eventos = CalendarioEducacionalEvento.objects.filter(
-        ano_letivo=turma.ano_letivo,
-        secretaria_id=secretaria_id,
-        ativo=True,
-        data_inicio__lte=fim,
-        data_fim__gte=inicio,
-    ).filter(Q(unidade__isnull=True) | Q(unidade_id=unidade_id))
-
-    tipos_bloqueio = {
-        CalendarioEducacionalEvento.Tipo.FERIADO,
-        CalendarioEducacionalEvento.Tipo.RECESSO,
-        CalendarioEducacionalEvento.Tipo.FACULTATIVO,
-        CalendarioEducacionalEvento.Tipo.PEDAGOGICO,
-        CalendarioEducacionalEvento.Tipo.PLANEJAMENTO,
-    }
-    bloqueios = set()
-    for ev in eventos:
-        if ev.tipo not in tipos_bloqueio and ev.dia_letivo:
-            continue
-        cursor = max(inicio, ev.data_inicio)
-        end = min(fim, ev.data_fim or ev.data_inicio)
-        while cursor <= end:
-            bloqueios.add(cursor)
-            cursor = cursor + timedelta(days=1)
-    return bloqueios
-
-
-def _sync_encontros_da_grade(turma: InformaticaTurma):
-    if not turma.grade_horario_id:
-        return
-
-    grade = turma.grade_horario
-    expected_days = list(grade.dias_semana)
-    existentes = list(turma.encontros.all())
-    by_day = {int(e.dia_semana): e for e in existentes}
-
-    for day in expected_days:
-        encontro = by_day.get(int(day))
-        payload = {
-            "turma": turma,
-            "grade_horario": grade,
-            "dia_semana": int(day),
-            "hora_inicio": grade.hora_inicio,
-            "hora_fim": grade.hora_fim,
-            "minutos_aula_efetiva": grade.duracao_aula_minutos,
-            "minutos_intervalo_tecnico": grade.duracao_intervalo_minutos,
-            "tipo_encontro": (
-                "ESPECIAL_SEXTA"
-                if grade.tipo_grade == InformaticaGradeHorario.TipoGrade.ESPECIAL_SEXTA
-                else "REGULAR"
-            ),
-            "formato_especial": bool(grade.tipo_grade == InformaticaGradeHorario.TipoGrade.ESPECIAL_SEXTA),
-            "ativo": True,
-        }
-        if encontro:
-            for key, value in payload.items():
-                setattr(encontro, key, value)
-        else:
-            encontro = InformaticaEncontroSemanal(**payload)
-        encontro.full_clean()
-        encontro.save()
-
-    for item in existentes:
-        if int(item.dia_semana) not in expected_days:
-            item.ativo = False
-            item.save(update_fields=["ativo"])
-
-
-def _sync_calendario_aulas_turma(turma: InformaticaTurma):
-    if not turma.grade_horario_id:
-        return
-    encontros = list(turma.encontros_ativos_qs)
-    if not encontros:
-        return
-
-    inicio, fim = _periodo_datas_turma(turma)
-    bloqueios = _datas_bloqueadas_turma(turma, inicio, fim)
-    encontros_por_dia = {int(e.dia_semana): e for e in encontros}
-
-    cursor = inicio
-    datas_validas = set()
-    while cursor <= fim:
-        weekday = int(cursor.weekday())
-        encontro = encontros_por_dia.get(weekday)
-        if encontro and cursor not in bloqueios:
-            datas_validas.add(cursor)
-            defaults = {
-                "encontro": encontro,
-                "professor_id": turma.instrutor_id,
-                "status": InformaticaAulaDiario.Status.PREVISTA,
-                "tipo_encontro": (
-                    InformaticaAulaDiario.TipoEncontro.ESPECIAL_SEXTA
-                    if turma.encontro_unico_semana
-                    else InformaticaAulaDiario.TipoEncontro.REGULAR
-                ),
-                "duracao_total_minutos": turma.grade_horario.duracao_total_minutos,
-                "pausa_interna_minutos": turma.grade_horario.pausa_interna_opcional_minutos,
-                "formato_especial": bool(turma.encontro_unico_semana),
-            }
-            aula, created = InformaticaAulaDiario.objects.get_or_create(
-                turma_id=turma.id,
-                data_aula=cursor,
-                defaults=defaults,
-            )
-            if not created and aula.status == InformaticaAulaDiario.Status.PREVISTA:
-                changed = False
-                for key, value in defaults.items():
-                    if getattr(aula, key) != value:
-                        setattr(aula, key, value)
-                        changed = True
-                if changed:
-                    aula.save()
-        cursor = cursor + timedelta(days=1)
-
-    # Aulas previstas fora da grade atual viram canceladas para manter rastreabilidade.
-    previstas = InformaticaAulaDiario.objects.filter(
-        turma_id=turma.id,
-        status=InformaticaAulaDiario.Status.PREVISTA,
-    )
-    for aula in previstas:
-        if aula.data_aula not in datas_validas:
-            aula.status = InformaticaAulaDiario.Status.CANCELADA
-            aula.observacoes = (aula.observacoes or "") + "\nCancelada por ajuste de grade/calendário."
-            aula.save(update_fields=["status", "observacoes"])
-
-
-def _sync_turma_grade(turma: InformaticaTurma):
-    _sync_encontros_da_grade(turma)
-    _sync_calendario_aulas_turma(turma)
-
-
 def _processar_solicitacao(solicitacao: InformaticaSolicitacaoVaga, user):
     turmas = InformaticaTurma.objects.filter(
         curso_id=solicitacao.curso_id,
@@ -1072,19 +834,25 @@ def informatica_grade_update(request, pk: int):
                     ],
                 },
             )
+        em_segundo_plano = False
         try:
             with transaction.atomic():
                 obj.full_clean()
                 obj.save()
-                for turma in obj.turmas.filter(status__in=[InformaticaTurma.Status.PLANEJADA, InformaticaTurma.Status.ATIVA]):
-                    turma.save()
-                    _sync_turma_grade(turma)
+                turmas = list(turmas_sincronizaveis(obj))
+                # Muitas turmas na grade: a sincronização vai para segundo plano.
+                em_segundo_plano = len(turmas) >= sincronizacao_async_min_turmas()
+                if not em_segundo_plano:
+                    sincronizar_turmas(turmas)
         except ValidationError as exc:
             form.add_error(None, exc)
         else:
             if impact.has_conflict and impact.blocking_mode in {"warn", "allow"}:
                 messages.warning(request, impact.message)
             messages.success(request, "Grade de horário atualizada com sucesso.")
+            if em_segundo_plano:
+                job = enfileirar_sincronizacao_grade(request.user, grade=obj)
+                return redirect("educacao:informatica_grade_sincronizacao_job", codigo=job.codigo)
             return redirect("educacao:informatica_grade_list")
 
     return render(
@@ -1106,6 +874,52 @@ def informatica_grade_update(request, pk: int):
     )
 
 
+@login_required
+def informatica_grade_sincronizacao_job(request, codigo):
+    no_perm = _assert_informatica_write(request)
+    if no_perm:
+        return no_perm
+
+    job = get_object_or_404(
+        InformaticaGradeSincronizacaoJob.objects.select_related("grade_horario"),
+        codigo=codigo,
+        solicitado_por=request.user,
+    )
+    em_andamento = job.status in {
+        InformaticaGradeSincronizacaoJob.Status.PENDENTE,
+        InformaticaGradeSincronizacaoJob.Status.PROCESSANDO,
+    }
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse(
+            {
+                "job_id": str(job.codigo),
+                "status": job.status,
+                "total_turmas": job.total_turmas,
+                "turmas_processadas": job.turmas_processadas,
+                "progresso": job.progresso,
+                "erro": job.erro,
+            }
+        )
+
+    return render(
+        request,
+        "educacao/informatica/grade_sincronizacao_job.html",
+        {
+            "job": job,
+            "em_andamento": em_andamento,
+            "actions": [
+                {
+                    "label": "Voltar",
+                    "url": reverse("educacao:informatica_grade_list"),
+                    "icon": "fa-solid fa-arrow-left",
+                    "variant": "gp-button--ghost",
+                }
+            ],
+        },
+    )
+
+
 @login_required
 def informatica_grade_duplicate(request, pk: int):
     no_perm = _assert_informatica_write(request)
@@ -1280,7 +1094,7 @@ def informatica_turma_create(request):
             with transaction.atomic():
                 turma.full_clean()
                 turma.save()
-                _sync_turma_grade(turma)
+                sincronizar_turma_grade(turma)
 
         except ValidationError as exc:
             form.add_error(None, exc)
@@ -1321,7 +1135,7 @@ def informatica_turma_update(request, pk: int):
             with transaction.atomic():
                 turma.full_clean()
                 turma.save()
-                _sync_turma_grade(turma)
+                sincronizar_turma_grade(turma)
         except ValidationError as exc:
             form.add_error(None, exc)
         else:
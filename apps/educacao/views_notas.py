@@ -2,7 +2,6 @@ from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.db.models import Avg, Count, Q
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
@@ -11,6 +10,7 @@ from django.urls import reverse
 from apps.core.decorators import require_perm
 from apps.core.exports import export_pdf_table
 from apps.core.rbac import can, is_professor_profile_role, scope_filter_turmas
+from apps.core.services_auditoria import registrar_auditoria
 
 from .forms_notas import AvaliacaoForm
 from .models import Matricula, Turma
@@ -20,6 +20,7 @@ from .models_diario import (
     DiarioTurma,
     Nota,
 )
+from .services_lancamentos import salvar_notas
 
 
 def _is_professor(user) -> bool:
@@ -302,25 +303,29 @@ def notas_lancar(request, pk: int):
         if not can_edit:
             return HttpResponseForbidden("403 — Somente o professor responsável pode lançar notas.")
 
-        with transaction.atomic():
-            for m in alunos_qs:
-                raw = request.POST.get(f"mat_{m.id}") or ""
-                if is_modo_conceito:
-                    conceito = _normalize_conceito(raw)
-                    defaults = {"valor": None, "conceito": conceito}
-                else:
-                    valor = _parse_decimal(raw)
-                    defaults = {"valor": valor, "conceito": ""}
-
-                Nota.objects.update_or_create(
-                    avaliacao=avaliacao,
-                    aluno=m.aluno,
-                    defaults=defaults,
-                )
+        notas = {}
+        for m in alunos_qs:
+            raw = request.POST.get(f"mat_{m.id}") or ""
+            if is_modo_conceito:
+                notas[m.aluno_id] = (None, _normalize_conceito(raw))
+            else:
+                notas[m.aluno_id] = (_parse_decimal(raw), "")
+        alterados = salvar_notas(avaliacao, notas)
+        if alterados:
+            registrar_auditoria(
+                municipio=avaliacao.diario.turma.unidade.secretaria.municipio,
+                modulo="EDUCACAO",
+                evento="NOTAS_LANCADAS",
+                entidade="Avaliacao",
+                entidade_id=avaliacao.pk,
+                usuario=request.user,
+                depois={"diario_id": avaliacao.diario_id, "alterados": alterados},
+            )
 
         messages.success(
             request,
-            "Conceitos salvos com sucesso." if is_modo_conceito else "Notas salvas com sucesso.",
+            ("Conceitos salvos com sucesso" if is_modo_conceito else "Notas salvas com sucesso")
+            + f" ({alterados} registro(s) alterado(s)).",
         )
         return redirect("educacao:notas_lancar", pk=avaliacao.pk)
 
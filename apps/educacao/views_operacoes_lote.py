@@ -187,7 +187,13 @@ def operacoes_lote(request):
             "url": reverse("educacao:index"),
             "icon": "fa-solid fa-arrow-left",
             "variant": "gp-button--ghost",
-        }
+        },
+        {
+            "label": "Documentos em lote",
+            "url": reverse("educacao:documentos_lote"),
+            "icon": "fa-solid fa-file-pdf",
+            "variant": "gp-button--ghost",
+        },
     ]
 
     if request.method == "POST" and form.is_valid():
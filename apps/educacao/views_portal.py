@@ -14,8 +14,7 @@ from apps.core.rbac import role_scope_base, scope_filter_alunos, scope_filter_ma
 from .models import Aluno, Matricula, Turma
 from .models_beneficios import BeneficioEdital, BeneficioEditalInscricao
 from .models_diario import Avaliacao, DiarioTurma, Nota
-from .models_periodos import PeriodoLetivo
-from .services_academico import calc_historico_resumo
+from .services_academico import calc_historico_resumos
 
 
 def _nota_lancada_q():
@@ -296,13 +295,9 @@ def aluno_meus_dados(request, codigo: str):
     rows_matriculas = []
     medias_validas: list[Decimal] = []
     total_matriculas = len(matriculas)
+    resumos = calc_historico_resumos(turmas=[m.turma for m in matriculas], aluno_id=aluno.id)
     for idx, matricula in enumerate(matriculas):
-        periodos = PeriodoLetivo.objects.filter(ano_letivo=matricula.turma.ano_letivo, ativo=True).order_by("numero")
-        media_final, freq_final, _resultado = calc_historico_resumo(
-            turma=matricula.turma,
-            periodos=periodos,
-            aluno_id=aluno.id,
-        )
+        media_final, freq_final, _resultado = resumos[matricula.turma_id]
         if media_final is not None:
             try:
                 medias_validas.append(Decimal(str(media_final)))
@@ -6,7 +6,6 @@ from decimal import Decimal, InvalidOperation
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.db.models import Avg, Count, Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
@@ -15,6 +14,7 @@ from django.utils import timezone
 
 from apps.core.decorators import require_perm
 from apps.core.rbac import can, role_scope_base, scope_filter_turmas
+from apps.core.services_auditoria import registrar_auditoria
 
 from .forms_professor_area import (
     InformaticaAvaliacaoForm,
@@ -48,6 +48,7 @@ from .models_informatica import (
     InformaticaTurma,
 )
 from .models_periodos import FechamentoPeriodoTurma, PeriodoLetivo
+from .services_lancamentos import salvar_notas_informatica
 
 
 def _clean_code(value: str | None) -> str:
@@ -2954,31 +2955,40 @@ def professor_informatica_notas_lancar(request, codigo: str, avaliacao_id: int):
     conceitos_validos = {item[0] for item in AVALIACAO_CONCEITOS_CHOICES}
 
     if request.method == "POST":
-        with transaction.atomic():
-            for m in matriculas:
-                raw = (request.POST.get(f"aluno_{m.aluno_id}") or "").strip()
-                valor = None
-                conceito = ""
-                if is_modo_conceito:
-                    conceito = raw.upper()
-                    if conceito not in conceitos_validos:
-                        conceito = ""
-                elif raw:
-                    try:
-                        valor = Decimal(raw.replace(",", "."))
-                    except (InvalidOperation, TypeError, ValueError):
-                        valor = None
-
-                InformaticaNota.objects.update_or_create(
-                    avaliacao=avaliacao,
-                    aluno_id=m.aluno_id,
-                    defaults={"valor": valor, "conceito": conceito},
-                )
+        notas = {}
+        for m in matriculas:
+            raw = (request.POST.get(f"aluno_{m.aluno_id}") or "").strip()
+            valor = None
+            conceito = ""
+            if is_modo_conceito:
+                conceito = raw.upper()
+                if conceito not in conceitos_validos:
+                    conceito = ""
+            elif raw:
+                try:
+                    valor = Decimal(raw.replace(",", "."))
+                except (InvalidOperation, TypeError, ValueError):
+                    valor = None
+            notas[m.aluno_id] = (valor, conceito)
+        alterados = salvar_notas_informatica(avaliacao, notas)
+        if alterados:
+            registrar_auditoria(
+                municipio=turma.curso.municipio,
+                modulo="EDUCACAO",
+                evento="NOTAS_INFORMATICA_LANCADAS",
+                entidade="InformaticaAvaliacao",
+                entidade_id=avaliacao.pk,
+                usuario=request.user,
+                depois={"turma_id": turma.pk, "alterados": alterados},
+            )
         messages.success(
             request,
-            "Conceitos da informática salvos com sucesso."
-            if is_modo_conceito
-            else "Notas de informática salvas com sucesso.",
+            (
+                "Conceitos da informática salvos com sucesso"
+                if is_modo_conceito
+                else "Notas de informática salvas com sucesso"
+            )
+            + f" ({alterados} registro(s) alterado(s)).",
         )
         return redirect(
             "educacao:professor_informatica_notas_lancar",
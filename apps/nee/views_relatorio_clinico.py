@@ -7,7 +7,7 @@ from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.urls import NoReverseMatch, reverse
 
-from weasyprint import HTML
+from apps.core.services_pdf import render_pdf
 
 from .utils import get_scoped_aluno
 from .models import LaudoNEE, RecursoNEE, AcompanhamentoNEE, AlunoNecessidade, PlanoClinicoNEE
@@ -53,7 +53,7 @@ def aluno_relatorio_clinico_pdf(request: HttpRequest, aluno_id: int) -> HttpResp
     }
 
     html = render_to_string("nee/relatorios/pdf/aluno_clinico.html", ctx, request=request)
-    pdf = HTML(string=html, base_url=request.build_absolute_uri("/")).write_pdf()
+    pdf = render_pdf(html)
 
     resp = HttpResponse(pdf, content_type="application/pdf")
     resp["Content-Disposition"] = f'inline; filename="nee_relatorio_clinico_aluno_{aluno.pk}.pdf"'
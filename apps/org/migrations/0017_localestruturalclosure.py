@@ -0,0 +1,39 @@
+# Generated by Django 5.2.12 on 2026-10-16 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_closure(apps, schema_editor):
+    from apps.org.services.locais_closure import rebuild_local_estrutural_closure
+
+    rebuild_local_estrutural_closure(
+        apps.get_model("org", "LocalEstrutural"),
+        apps.get_model("org", "LocalEstruturalClosure"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0016_localestrutural'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocalEstruturalClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_descendants', to='org.localestrutural')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_ancestors', to='org.localestrutural')),
+            ],
+            options={
+                'verbose_name': 'Hierarquia de local estrutural',
+                'verbose_name_plural': 'Hierarquia de locais estruturais',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='org_locales_descend_96b99b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uniq_local_estrutural_closure_par')],
+            },
+        ),
+        migrations.RunPython(popular_closure, migrations.RunPython.noop),
+    ]
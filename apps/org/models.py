@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from urllib.parse import quote_plus
 
@@ -539,7 +539,54 @@ class LocalEstrutural(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        previous_parent_id = None
+        if self.pk:
+            previous_parent_id = (
+                LocalEstrutural.objects.filter(pk=self.pk).values_list("local_pai_id", flat=True).first()
+            )
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created or previous_parent_id != self.local_pai_id:
+                from apps.org.services.locais_closure import move_local_estrutural_subtree
+
+                move_local_estrutural_subtree(self)
+
+
+class LocalEstruturalClosure(models.Model):
+    """
+    Tabela de fechamento da hierarquia de locais estruturais: um par
+    (ancestral, descendente) por caminho, incluindo o próprio local (profundidade 0).
+    Mantida em LocalEstrutural.save(); exclusões propagam por CASCADE.
+    """
+
+    ancestor = models.ForeignKey(
+        LocalEstrutural,
+        on_delete=models.CASCADE,
+        related_name="closure_descendants",
+    )
+    descendant = models.ForeignKey(
+        LocalEstrutural,
+        on_delete=models.CASCADE,
+        related_name="closure_ancestors",
+    )
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Hierarquia de local estrutural"
+        verbose_name_plural = "Hierarquia de locais estruturais"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="uniq_local_estrutural_closure_par",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["descendant", "ancestor"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
 
 
 class SecretariaTemplate(models.Model):
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from django.db import transaction
+
+
+CLOSURE_BATCH_SIZE = 2000
+
+
+def _models(local_model=None, closure_model=None):
+    if local_model is None or closure_model is None:
+        from apps.org.models import LocalEstrutural, LocalEstruturalClosure
+
+        return LocalEstrutural, LocalEstruturalClosure
+    return local_model, closure_model
+
+
+def move_local_estrutural_subtree(local) -> None:
+    """
+    Atualiza a tabela de fechamento após criar o local ou trocar seu local pai.
+    Apenas os caminhos que atravessam a subárvore do local são refeitos.
+    """
+    _local_model, closure_model = _models()
+
+    subtree = dict(
+        closure_model.objects.filter(ancestor_id=local.pk).values_list("descendant_id", "depth")
+    )
+    subtree.setdefault(local.pk, 0)
+    subtree_ids = list(subtree.keys())
+
+    with transaction.atomic():
+        closure_model.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+        rows = [closure_model(ancestor_id=local.pk, descendant_id=local.pk, depth=0)]
+        if local.local_pai_id:
+            parent_ancestors = closure_model.objects.filter(descendant_id=local.local_pai_id).values_list(
+                "ancestor_id", "depth"
+            )
+            rows.extend(
+                closure_model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + 1 + depth)
+                for ancestor_id, ancestor_depth in parent_ancestors
+                for descendant_id, depth in subtree.items()
+            )
+        closure_model.objects.bulk_create(rows, batch_size=CLOSURE_BATCH_SIZE, ignore_conflicts=True)
+
+
+def rebuild_local_estrutural_closure(local_model=None, closure_model=None) -> int:
+    """Recria a tabela de fechamento inteira (migração inicial / reparo). Retorna o total de pares."""
+    local_model, closure_model = _models(local_model, closure_model)
+
+    parent_of = dict(local_model.objects.values_list("id", "local_pai_id"))
+    rows = []
+    for local_id in parent_of:
+        depth = 0
+        current = local_id
+        seen: set[int] = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(closure_model(ancestor_id=current, descendant_id=local_id, depth=depth))
+            current = parent_of.get(current)
+            depth += 1
+
+    with transaction.atomic():
+        closure_model.objects.all().delete()
+        closure_model.objects.bulk_create(rows, batch_size=CLOSURE_BATCH_SIZE)
+    return len(rows)
+
+
+def local_estrutural_descendants_qs(local_id: int):
+    """Subconsulta com os ids do local e de todos os seus descendentes (uma única consulta indexada)."""
+    _local_model, closure_model = _models()
+    return closure_model.objects.filter(ancestor_id=local_id).values("descendant_id")
@@ -15,6 +15,7 @@ from apps.core.models import (
     PortalNoticia,
     PortalPaginaPublica,
 )
+from apps.org.services.locais_closure import rebuild_local_estrutural_closure
 from apps.org.services.provisioning import seed_secretaria_templates
 from apps.org.models import (
     Address,
@@ -24,6 +25,7 @@ from apps.org.models import (
     SecretariaConfiguracao,
     Unidade,
     LocalEstrutural,
+    LocalEstruturalClosure,
     MunicipioModuloAtivo,
     SecretariaModuloAtivo,
     OnboardingStep,
@@ -382,6 +384,40 @@ class LocalEstruturalModelTestCase(TestCase):
         with self.assertRaises(ValidationError):
             raiz.full_clean()
 
+    def _local(self, nome, pai=None):
+        return LocalEstrutural.objects.create(
+            municipio=self.municipio,
+            secretaria=self.secretaria,
+            unidade=self.unidade,
+            local_pai=pai,
+            nome=nome,
+        )
+
+    def _descendentes(self, local):
+        return set(
+            LocalEstruturalClosure.objects.filter(ancestor=local).values_list("descendant__nome", flat=True)
+        )
+
+    def test_closure_acompanha_criacao_e_mudanca_de_pai(self):
+        bloco_a = self._local("Bloco A")
+        bloco_b = self._local("Bloco B")
+        sala = self._local("Sala 01", pai=bloco_a)
+        armario = self._local("Armário", pai=sala)
+
+        self.assertEqual(self._descendentes(bloco_a), {"Bloco A", "Sala 01", "Armário"})
+        self.assertEqual(
+            LocalEstruturalClosure.objects.get(ancestor=bloco_a, descendant=armario).depth,
+            2,
+        )
+
+        sala.local_pai = bloco_b
+        sala.save()
+        self.assertEqual(self._descendentes(bloco_a), {"Bloco A"})
+        self.assertEqual(self._descendentes(bloco_b), {"Bloco B", "Sala 01", "Armário"})
+
+        self.assertEqual(rebuild_local_estrutural_closure(), LocalEstruturalClosure.objects.count())
+        self.assertEqual(self._descendentes(bloco_b), {"Bloco B", "Sala 01", "Armário"})
+
 
 class OrgAddressMapsTestCase(TestCase):
     def setUp(self):
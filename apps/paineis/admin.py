@@ -39,7 +39,7 @@ class ChartAdmin(admin.ModelAdmin):
 
 @admin.register(QueryCache)
 class QueryCacheAdmin(admin.ModelAdmin):
-    list_display = ("dataset", "chave", "hits", "expira_em", "criado_em")
+    list_display = ("dataset", "chave", "hits", "expira_em", "acessado_em", "criado_em")
     list_filter = ("dataset",)
     search_fields = ("dataset__nome", "chave")
 
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.paineis.services.columnar import ColumnarTable, build_columnar_bytes, build_dashboard_payload_columnar
+from apps.paineis.services.dashboard import build_dashboard_payload, load_rows_from_csv_bytes
+
+SCHEMA = [
+    {"name": "data", "type": "DATA"},
+    {"name": "secretaria", "type": "TEXTO"},
+    {"name": "unidade", "type": "TEXTO"},
+    {"name": "categoria", "type": "TEXTO"},
+    {"name": "descricao", "type": "TEXTO"},
+    {"name": "valor", "type": "NUMERO"},
+]
+
+SCENARIOS = (
+    ("sem filtro", {}),
+    ("secretaria", {"secretaria": "Secretaria 3"}),
+    ("período", {"date_start": "2024-03-01", "date_end": "2024-09-30"}),
+    ("combinado", {"secretaria": "Secretaria 1", "categoria": "Categoria 2", "date_start": "2024-01-01"}),
+)
+
+
+def _synthetic_rows(total: int) -> list[dict[str, str]]:
+    rng = random.Random(42)
+    start = date(2023, 1, 1)
+    return [
+        {
+            "data": (start + timedelta(days=rng.randrange(730))).isoformat(),
+            "secretaria": f"Secretaria {rng.randrange(8)}",
+            "unidade": f"Unidade {rng.randrange(120)}",
+            "categoria": f"Categoria {rng.randrange(12)}",
+            "descricao": f"Registro {idx}",
+            "valor": f"{rng.randrange(100000) / 100:.2f}".replace(".", ","),
+        }
+        for idx in range(total)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o dashboard de paineis reparseando o CSV tratado a cada acesso com o "
+        "artefato colunar (.gpcol) mapeado em memória, sobre um dataset sintético."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500000, help="Linhas do dataset sintético.")
+
+    def handle(self, *args, **options):
+        headers = [col["name"] for col in SCHEMA]
+        rows = _synthetic_rows(max(1, options["rows"]))
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=headers, delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+        csv_bytes = out.getvalue().encode("utf-8")
+
+        started = time.perf_counter()
+        artifact = build_columnar_bytes(headers, rows, SCHEMA)
+        self.stdout.write(
+            f"linhas={len(rows)} csv={len(csv_bytes) / 2**20:.1f} MiB colunar={len(artifact) / 2**20:.1f} MiB "
+            f"geração={time.perf_counter() - started:.2f}s"
+        )
+        del rows
+
+        with tempfile.NamedTemporaryFile(suffix=".gpcol") as tmp:
+            tmp.write(artifact)
+            tmp.flush()
+            started = time.perf_counter()
+            table = ColumnarTable(mmap.mmap(tmp.fileno(), 0, access=mmap.ACCESS_READ))
+            self.stdout.write(f"abertura do artefato (mmap + cabeçalho): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+            self.stdout.write(
+                f"{'cenário':<12}{'linhas':>9}{'csv ms':>11}{'colunar ms':>13}{'ganho':>8}{'repetido ms':>14}"
+            )
+            for label, filters in SCENARIOS:
+                started = time.perf_counter()
+                _headers, csv_rows = load_rows_from_csv_bytes(csv_bytes)
+                expected = build_dashboard_payload(csv_rows, SCHEMA, filters)
+                csv_ms = (time.perf_counter() - started) * 1000
+                del csv_rows
+
+                col_ms = self._time_columnar(table, filters)
+                # Segunda chamada: agregados memorizados na tabela, só máscara e posições.
+                memo_ms = self._time_columnar(table, filters)
+                payload = build_dashboard_payload_columnar(table, SCHEMA, filters)
+
+                if payload["kpis"] != expected["kpis"]:
+                    self.stderr.write(f"{label}: divergência {payload['kpis']} != {expected['kpis']}")
+                self.stdout.write(
+                    f"{label:<12}{payload['kpis']['linhas_filtradas']:>9}{csv_ms:>11.1f}{col_ms:>13.1f}"
+                    f"{csv_ms / col_ms if col_ms else 0:>7.0f}x{memo_ms:>14.1f}"
+                )
+                del expected
+
+    def _time_columnar(self, table, filters: dict) -> float:
+        started = time.perf_counter()
+        payload = build_dashboard_payload_columnar(table, SCHEMA, filters)
+        payload["rows"][:120]
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.paineis.services.columnar import ColumnarWriter, build_columnar_bytes
+from apps.paineis.services.ingest import ingest_dataset_bytes, ingest_dataset_stream
+
+
+def _write_synthetic_csv(path: str, rows: int) -> None:
+    rng = random.Random(7)
+    start = date(2022, 1, 1)
+    with open(path, "w", encoding="utf-8", newline="") as fobj:
+        writer = csv.writer(fobj, delimiter=";")
+        writer.writerow(["Data", "Secretaria", "Unidade", "Categoria", "Descrição", "Valor"])
+        for idx in range(rows):
+            writer.writerow(
+                [
+                    (start + timedelta(days=rng.randrange(1000))).strftime("%d/%m/%Y"),
+                    f"Secretaria {rng.randrange(8)}",
+                    f"Unidade {rng.randrange(150)}",
+                    f"Categoria {rng.randrange(15)}",
+                    f"Atendimento registrado sob o protocolo {idx:09d}",
+                    f"{rng.randrange(1000000) / 100:.2f}".replace(".", ","),
+                ]
+            )
+
+
+def _in_memory(path: str) -> int:
+    with open(path, "rb") as fobj:
+        result = ingest_dataset_bytes(fobj.read(), "CSV")
+    build_columnar_bytes(result["headers"], result["rows"], result["schema"])
+    return result["profile"]["row_count"]
+
+
+def _streaming(path: str) -> int:
+    with (
+        open(path, "rb") as source,
+        tempfile.TemporaryFile() as processed,
+        tempfile.TemporaryFile() as artifact,
+        ColumnarWriter() as columnar,
+    ):
+        result = ingest_dataset_stream(source, "CSV", processed_out=processed, sinks=[columnar])
+        columnar.write(artifact, result["schema"])
+    return result["profile"]["row_count"]
+
+
+def _measure(target, path: str, queue) -> None:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    rows = target(path)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((rows, elapsed, (peak - baseline) / 1024))
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede pico de memória (RSS) e tempo da ingestão de paineis: caminho em memória "
+        "(ingest_dataset_bytes) contra o pipeline em fluxo (CSV tratado + artefato colunar "
+        "em arquivos temporários). Cada caminho roda num processo filho."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Linhas do CSV sintético.")
+        parser.add_argument("--skip-memory", action="store_true", help="Não roda o caminho em memória.")
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context("fork")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dataset.csv")
+            _write_synthetic_csv(path, max(1, options["rows"]))
+            self.stdout.write(f"CSV sintético: {options['rows']} linhas, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+            paths = [("fluxo", _streaming)]
+            if not options["skip_memory"]:
+                paths.insert(0, ("em memória", _in_memory))
+            for label, target in paths:
+                queue = context.Queue()
+                process = context.Process(target=_measure, args=(target, path, queue))
+                process.start()
+                rows, elapsed, peak_mib = queue.get()
+                process.join()
+                self.stdout.write(
+                    f"{label:<11} linhas={rows:<9} tempo={elapsed:.1f}s  pico RSS adicional={peak_mib:.0f} MiB"
+                )
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.paineis.models import DatasetVersion
+from apps.paineis.services.columnar import save_columnar_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o artefato colunar (.gpcol) das versões concluídas processadas antes do formato "
+        "colunar, a partir do CSV tratado. Até lá o dashboard dessas versões varre o CSV. "
+        "Rode build_paineis_rollups em seguida para agregá-las."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", type=int, default=0, help="Restringe a um dataset.")
+        parser.add_argument("--todas", action="store_true", help="Regrava também versões que já têm artefato.")
+
+    def handle(self, *args, **options):
+        versions = (
+            DatasetVersion.objects.select_related("dataset")
+            .filter(status=DatasetVersion.Status.CONCLUIDO)
+            .exclude(Q(arquivo_tratado="") | Q(arquivo_tratado__isnull=True))
+        )
+        if options["dataset"]:
+            versions = versions.filter(dataset_id=options["dataset"])
+        if not options["todas"]:
+            versions = versions.filter(Q(arquivo_colunar="") | Q(arquivo_colunar__isnull=True))
+
+        built = failed = 0
+        for version in versions.order_by("id").iterator():
+            try:
+                save_columnar_artifact(version)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"{version}: {exc}")
+                continue
+            built += 1
+            self.stdout.write(f"{version}: {version.arquivo_colunar.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Artefatos gerados: {built}; falhas: {failed}."))
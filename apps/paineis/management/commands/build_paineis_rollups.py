@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.paineis.models import DatasetVersion
+from apps.paineis.services.columnar import load_columnar_table
+from apps.paineis.services.rollup import build_version_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os agregados (rollup) das versões concluídas processadas antes do rollup. "
+        "Versões já agregadas são mantidas, salvo com --todas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", type=int, default=0, help="Restringe a um dataset.")
+        parser.add_argument("--todas", action="store_true", help="Recalcula também versões que já têm rollup.")
+
+    def handle(self, *args, **options):
+        versions = DatasetVersion.objects.select_related("dataset").filter(status=DatasetVersion.Status.CONCLUIDO)
+        if options["dataset"]:
+            versions = versions.filter(dataset_id=options["dataset"])
+        if not options["todas"]:
+            versions = versions.filter(rollup_json={})
+
+        built = skipped = 0
+        for version in versions.order_by("id").iterator():
+            table = load_columnar_table(version)
+            if table is None:
+                skipped += 1
+                continue
+            version.rollup_json = build_version_rollup(version, table)
+            DatasetVersion.objects.filter(pk=version.pk).update(rollup_json=version.rollup_json)
+            built += 1
+            self.stdout.write(
+                f"{version}: {version.rollup_json['celulas']} células"
+                + ("" if version.rollup_json["disponivel"] else f" (sem rollup: {version.rollup_json['motivo']})")
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rollups gerados: {built}; sem artefato: {skipped}."))
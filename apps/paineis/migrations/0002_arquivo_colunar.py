@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paineis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetversion',
+            name='arquivo_colunar',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='paineis/colunar/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paineis', '0002_arquivo_colunar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='querycache',
+            name='acessado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='querycache',
+            index=models.Index(fields=['expira_em'], name='paineis_que_expira__3b38f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='querycache',
+            index=models.Index(fields=['dataset', 'acessado_em'], name='paineis_que_dataset_775136_idx'),
+        ),
+    ]
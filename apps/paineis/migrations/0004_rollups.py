@@ -0,0 +1,40 @@
+# Generated by Django 5.2.12 on 2026-10-17 00:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paineis', '0003_query_cache_acesso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetversion',
+            name='rollup_json',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name='DatasetRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.CharField(blank=True, default='', max_length=7)),
+                ('secretaria', models.CharField(blank=True, default='', max_length=255)),
+                ('unidade', models.CharField(blank=True, default='', max_length=255)),
+                ('categoria', models.CharField(blank=True, default='', max_length=255)),
+                ('ranking', models.CharField(blank=True, default='', max_length=255)),
+                ('ranking_ordem', models.PositiveIntegerField(default=0)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('soma', models.FloatField(default=0)),
+                ('versao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='paineis.datasetversion')),
+            ],
+            options={
+                'verbose_name': 'Agregado do dataset',
+                'verbose_name_plural': 'Agregados do dataset',
+                'ordering': ['versao', 'mes', 'id'],
+                'indexes': [models.Index(fields=['versao', 'mes'], name='paineis_dat_versao__221b29_idx'), models.Index(fields=['versao', 'secretaria', 'unidade', 'categoria'], name='paineis_dat_versao__b88570_idx')],
+            },
+        ),
+    ]
@@ -97,11 +97,13 @@ class DatasetVersion(models.Model):
 
     arquivo_original = models.FileField(upload_to="paineis/original/%Y/%m/", blank=True, null=True)
     arquivo_tratado = models.FileField(upload_to="paineis/tratado/%Y/%m/", blank=True, null=True)
+    arquivo_colunar = models.FileField(upload_to="paineis/colunar/%Y/%m/", blank=True, null=True, editable=False)
 
     status = models.CharField(max_length=14, choices=Status.choices, default=Status.PENDENTE)
     schema_json = models.JSONField(default=dict, blank=True)
     profile_json = models.JSONField(default=dict, blank=True)
     preview_json = models.JSONField(default=list, blank=True)
+    rollup_json = models.JSONField(default=dict, blank=True, editable=False)
     logs = models.TextField(blank=True, default="")
 
     criado_por = models.ForeignKey(
@@ -129,6 +131,32 @@ class DatasetVersion(models.Model):
         return f"{self.dataset.nome} • v{self.numero}"
 
 
+class DatasetRollup(models.Model):
+    """Célula pré-agregada (mês × secretaria × unidade × categoria × ranking) de uma versão processada."""
+
+    versao = models.ForeignKey(DatasetVersion, on_delete=models.CASCADE, related_name="rollups")
+    mes = models.CharField(max_length=7, blank=True, default="")
+    secretaria = models.CharField(max_length=255, blank=True, default="")
+    unidade = models.CharField(max_length=255, blank=True, default="")
+    categoria = models.CharField(max_length=255, blank=True, default="")
+    ranking = models.CharField(max_length=255, blank=True, default="")
+    ranking_ordem = models.PositiveIntegerField(default=0)
+    linhas = models.PositiveIntegerField(default=0)
+    soma = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = "Agregado do dataset"
+        verbose_name_plural = "Agregados do dataset"
+        ordering = ["versao", "mes", "id"]
+        indexes = [
+            models.Index(fields=["versao", "mes"]),
+            models.Index(fields=["versao", "secretaria", "unidade", "categoria"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.versao} • {self.mes or '-'}"
+
+
 class DatasetColumn(models.Model):
     class Tipo(models.TextChoices):
         TEXTO = "TEXTO", "Texto"
@@ -226,6 +254,7 @@ class QueryCache(models.Model):
     resultado_json = models.JSONField(default=dict, blank=True)
     hits = models.PositiveIntegerField(default=0)
     expira_em = models.DateTimeField(null=True, blank=True)
+    acessado_em = models.DateTimeField(null=True, blank=True)
     criado_em = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -235,6 +264,10 @@ class QueryCache(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["dataset", "chave"], name="uniq_bi_query_cache_chave"),
         ]
+        indexes = [
+            models.Index(fields=["expira_em"]),
+            models.Index(fields=["dataset", "acessado_em"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.dataset.nome} • {self.chave}"
@@ -1,12 +1,23 @@
+from .columnar import build_dashboard_payload_columnar, load_columnar_table
 from .dashboard import build_dashboard_payload, build_dataset_package, load_rows_from_csv_bytes
-from .ingest import ingest_dataset_bytes
+from .ingest import ingest_dataset_bytes, ingest_dataset_stream
 from .processing import ensure_default_dashboard, process_dataset_version
+from .query_cache import cached_dashboard_payload, evict_query_cache, invalidate_dataset_query_cache
+from .rollup import build_dashboard_payload_rollup, build_version_rollup
 
 __all__ = [
     "ingest_dataset_bytes",
+    "ingest_dataset_stream",
     "load_rows_from_csv_bytes",
     "build_dashboard_payload",
+    "build_dashboard_payload_columnar",
+    "load_columnar_table",
     "build_dataset_package",
     "process_dataset_version",
     "ensure_default_dashboard",
+    "cached_dashboard_payload",
+    "invalidate_dataset_query_cache",
+    "evict_query_cache",
+    "build_version_rollup",
+    "build_dashboard_payload_rollup",
 ]
@@ -0,0 +1,755 @@
+"""
+Armazenamento colunar das versões tratadas de dataset.
+
+Na ingestão, além do CSV tratado, gravamos um artefato binário (.gpcol) com as
+colunas já tipadas. O dashboard abre esse arquivo via mmap (sem reparsear CSV
+a cada acesso), filtra com máscaras de bytes e agrega sobre os arrays.
+
+Layout do arquivo:
+
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint32 LE) | cabeçalho JSON | blocos
+
+- toda coluna é codificada por dicionário: valores distintos ficam no
+  cabeçalho e cada linha guarda só o código (uint8/uint16/uint32, conforme a
+  cardinalidade); colunas com mais de PAINEIS_COLUMNAR_MAX_DICTIONARY valores
+  distintos ficam como texto bruto (offsets uint64 + bytes UTF-8);
+- colunas DATA guardam, por entrada do dicionário, o ordinal da data (0 = vazia
+  ou inválida);
+- colunas NUMERO ganham um bloco float64 por linha (0.0 quando vazio/inválido,
+  como no caminho CSV).
+
+Os blocos são alinhados em 8 bytes para permitir `memoryview.cast` direto sobre
+o mmap. Máscaras são `bytes` com 0/1 por linha: em colunas de código uint8 são
+geradas em C com `bytes.translate` e combinadas com AND de inteiros.
+
+Somas de valores (KPI, série mensal e ranking) são exatas, como as somas em
+Decimal de `build_dashboard_payload` no caminho CSV: o cabeçalho guarda a escala
+decimal da coluna NUMERO (casas que tornam todos os valores inteiros) e a soma
+corre sobre inteiros `round(float64 × 10^escala)`, exatos enquanto os valores
+escalados ficam abaixo de 2^50. Fora disso, soma-se em Decimal.
+
+O artefato é gerado no processamento da versão; versões antigas o recebem pelo
+comando `build_paineis_columnar`. A leitura nunca grava: sem artefato, o
+dashboard varre o CSV tratado.
+"""
+
+from __future__ import annotations
+
+import array
+import io
+import json
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from contextlib import ExitStack
+from copy import deepcopy
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache, partial
+from itertools import compress
+
+from django.conf import settings
+
+from .dashboard import _pick_category_column, _pick_date_column, _pick_numeric_column
+from .ingest import _parse_date, _parse_number
+
+MAGIC = b"GPCOL1\x00\x00"
+FORMAT_VERSION = 1
+FILTER_COLUMNS = ("secretaria", "unidade", "categoria")
+# Abaixo de 1/8 das linhas, indexar posições sai mais barato que percorrer a máscara inteira.
+SPARSE_SELECTION_RATIO = 8
+AGGREGATES_MEMO_SIZE = 64
+NUMERIC_MAX_SCALE = 9
+# Abaixo disso, round(float64 × 10^escala) devolve exatamente o valor escalado.
+EXACT_SCALED_LIMIT = 2**50
+COLUMNAR_CHUNK_ROWS = 65536
+COPY_BUFFER_BYTES = 1024 * 1024
+
+_HEADER_LEN = struct.Struct("<I")
+_ALIGN = 8
+
+
+def _codes_typecode(cardinality: int) -> str:
+    if cardinality <= 0x100:
+        return "B"
+    if cardinality <= 0x10000:
+        return "H"
+    return "I"
+
+
+class _ColumnSpill:
+    """Estado de uma coluna durante a escrita: dicionário + códigos em arquivo temporário, ou texto bruto."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.dictionary: dict[str, int] | None = {}
+        self.values: list[str] = []
+        self.codes = array.array("I")
+        self.codes_file = tempfile.TemporaryFile()
+        self.offsets = array.array("Q")
+        self.pending: list[bytes] = []
+        self.blob_size = 0
+        self.offsets_file = None
+        self.blob_file = None
+
+    def add_raw(self, value: str) -> None:
+        encoded = value.encode("utf-8")
+        self.offsets.append(self.blob_size)
+        self.pending.append(encoded)
+        self.blob_size += len(encoded)
+
+    def flush(self) -> None:
+        if self.dictionary is not None:
+            self.codes.tofile(self.codes_file)
+            del self.codes[:]
+            return
+        self.offsets.tofile(self.offsets_file)
+        del self.offsets[:]
+        self.blob_file.write(b"".join(self.pending))
+        self.pending.clear()
+
+    def to_raw(self) -> None:
+        """Dicionário estourou o limite: regrava os códigos já emitidos como texto bruto."""
+        self.flush()
+        self.offsets_file = tempfile.TemporaryFile()
+        self.blob_file = tempfile.TemporaryFile()
+        values, self.values, self.dictionary = self.values, [], None
+        for chunk in _iter_array_file(self.codes_file, "I"):
+            for code in chunk:
+                self.add_raw(values[code])
+            self.flush()
+        self.codes_file.close()
+        self.codes_file = None
+
+    def iter_raw_values(self):
+        self.offsets_file.seek(0)
+        self.blob_file.seek(0)
+        previous = None
+        for chunk in _iter_array_file(self.offsets_file, "Q"):
+            for offset in chunk:
+                if previous is not None:
+                    yield self.blob_file.read(offset - previous).decode("utf-8")
+                previous = offset
+        if previous is not None:
+            yield self.blob_file.read(self.blob_size - previous).decode("utf-8")
+
+    def close(self) -> None:
+        for fobj in (self.codes_file, self.offsets_file, self.blob_file):
+            if fobj is not None:
+                fobj.close()
+
+
+def _iter_array_file(fobj, typecode: str, chunk_items: int = COLUMNAR_CHUNK_ROWS):
+    fobj.seek(0)
+    itemsize = array.array(typecode).itemsize
+    while True:
+        raw = fobj.read(chunk_items * itemsize)
+        if not raw:
+            return
+        yield array.array(typecode, raw)
+
+
+class ColumnarWriter:
+    """
+    Escrita em fluxo do artefato .gpcol, com memória limitada: os códigos vão
+    para arquivos temporários a cada COLUMNAR_CHUNK_ROWS linhas e colunas cujo
+    dicionário passa de PAINEIS_COLUMNAR_MAX_DICTIONARY valores viram texto
+    bruto (offsets + bytes). Serve de destino de linhas para a ingestão
+    (`start(headers)` / `append(values)`).
+    """
+
+    def __init__(self, *, max_dictionary: int | None = None):
+        self.max_dictionary = max_dictionary or int(getattr(settings, "PAINEIS_COLUMNAR_MAX_DICTIONARY", 0x10000))
+        self.headers: list[str] = []
+        self.rows = 0
+        self._columns: list[_ColumnSpill] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self, headers: list[str]) -> None:
+        self.headers = list(headers)
+        self._columns = [_ColumnSpill(name) for name in headers]
+
+    def append(self, values: list[str]) -> None:
+        for column, value in zip(self._columns, values):
+            dictionary = column.dictionary
+            if dictionary is None:
+                column.add_raw(value)
+                continue
+            code = dictionary.get(value)
+            if code is None:
+                if len(column.values) >= self.max_dictionary:
+                    column.to_raw()
+                    column.add_raw(value)
+                    continue
+                code = dictionary[value] = len(column.values)
+                column.values.append(value)
+            column.codes.append(code)
+        self.rows += 1
+        if self.rows % COLUMNAR_CHUNK_ROWS == 0:
+            for column in self._columns:
+                column.flush()
+
+    def write(self, out, schema: list[dict]) -> None:
+        """Grava o artefato completo em `out` (arquivo binário)."""
+        for column in self._columns:
+            column.flush()
+        types = {str(col.get("name", "")): col.get("type") for col in schema}
+        total = self.rows
+        columns_meta: list[dict] = []
+        blocks: list[tuple[int, object]] = []
+
+        for column in self._columns:
+            tipo = types.get(column.name) or "TEXTO"
+            meta = {"nome": column.name, "tipo": tipo}
+            if column.dictionary is not None:
+                typecode = _codes_typecode(len(column.values))
+                meta.update(codificacao="dicionario", dicionario=column.values)
+                meta["codigos"] = {"bloco": len(blocks), "typecode": typecode}
+                blocks.append((total * array.array(typecode).itemsize, partial(_write_codes, column, typecode)))
+                if tipo == "DATA":
+                    meta["dias"] = [_date_ordinal(value) for value in column.values]
+            else:
+                meta["codificacao"] = "bruto"
+                meta["offsets"] = {"bloco": len(blocks), "typecode": "Q"}
+                blocks.append(((total + 1) * 8, partial(_write_offsets, column)))
+                meta["texto"] = {"bloco": len(blocks)}
+                blocks.append((column.blob_size, partial(_copy_file, column.blob_file)))
+            if tipo == "NUMERO":
+                numbers = column.values if column.dictionary is not None else column.iter_raw_values()
+                meta["valores"] = {
+                    "bloco": len(blocks),
+                    "typecode": "d",
+                    "escala": _decimal_scale(_parse_number(value) for value in numbers),
+                }
+                blocks.append((total * 8, partial(_write_numbers, column)))
+            columns_meta.append(meta)
+
+        header = {
+            "versao": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "linhas": total,
+            "schema": schema,
+            "colunas": columns_meta,
+            "blocos": [],
+        }
+        # Offsets dependem do tamanho do cabeçalho, que depende dos offsets: basta
+        # iterar até estabilizar (em geral duas passadas).
+        offsets: list[int] = []
+        while True:
+            header["blocos"] = offsets
+            header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            cursor = _align(len(MAGIC) + _HEADER_LEN.size + len(header_bytes))
+            new_offsets = []
+            for size, _writer in blocks:
+                new_offsets.append(cursor)
+                cursor = _align(cursor + size)
+            if new_offsets == offsets:
+                break
+            offsets = new_offsets
+
+        out.write(MAGIC)
+        out.write(_HEADER_LEN.pack(len(header_bytes)))
+        out.write(header_bytes)
+        position = len(MAGIC) + _HEADER_LEN.size + len(header_bytes)
+        for offset, (size, writer) in zip(offsets, blocks):
+            out.write(b"\x00" * (offset - position))
+            writer(out)
+            position = offset + size
+
+    def close(self) -> None:
+        for column in self._columns:
+            column.close()
+        self._columns = []
+
+
+def _decimal_scale(numbers) -> int | None:
+    """Casas decimais que tornam todos os valores inteiros; None se o float64 não os representa exatamente."""
+    scale = 0
+    largest = Decimal("0")
+    for number in numbers:
+        if number is None:
+            continue
+        if not number.is_finite():
+            return None
+        scale = max(scale, -number.as_tuple().exponent)
+        largest = max(largest, abs(number))
+    if scale > NUMERIC_MAX_SCALE or largest.scaleb(scale) >= EXACT_SCALED_LIMIT:
+        return None
+    return scale
+
+
+def _date_ordinal(value: str) -> int:
+    parsed = _parse_date(value)
+    return parsed.toordinal() if parsed else 0
+
+
+def _write_codes(column: _ColumnSpill, typecode: str, out) -> None:
+    for chunk in _iter_array_file(column.codes_file, "I"):
+        (chunk if typecode == "I" else array.array(typecode, chunk)).tofile(out)
+
+
+def _write_offsets(column: _ColumnSpill, out) -> None:
+    _copy_file(column.offsets_file, out)
+    array.array("Q", [column.blob_size]).tofile(out)
+
+
+def _write_numbers(column: _ColumnSpill, out) -> None:
+    if column.dictionary is not None:
+        by_code = [float(_parse_number(value) or 0) for value in column.values]
+        for chunk in _iter_array_file(column.codes_file, "I"):
+            array.array("d", (by_code[code] for code in chunk)).tofile(out)
+        return
+    numbers = array.array("d")
+    for value in column.iter_raw_values():
+        numbers.append(float(_parse_number(value) or 0))
+        if len(numbers) >= COLUMNAR_CHUNK_ROWS:
+            numbers.tofile(out)
+            del numbers[:]
+    numbers.tofile(out)
+
+
+def _copy_file(source, out) -> None:
+    source.seek(0)
+    shutil.copyfileobj(source, out, COPY_BUFFER_BYTES)
+
+
+def build_columnar_bytes(headers: list[str], rows: list[dict], schema: list[dict]) -> bytes:
+    """Serializa as linhas tratadas no formato colunar (.gpcol)."""
+    out = io.BytesIO()
+    with ColumnarWriter() as writer:
+        writer.start(headers)
+        for row in rows:
+            writer.append([(row.get(name, "") or "").strip() for name in headers])
+        writer.write(out, schema)
+    return out.getvalue()
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class ColumnarTable:
+    """Leitura de um artefato .gpcol sobre um buffer (mmap ou bytes) sem cópia dos blocos."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Arquivo colunar inválido.")
+        start = len(MAGIC) + _HEADER_LEN.size
+        (header_len,) = _HEADER_LEN.unpack(view[len(MAGIC) : start])
+        header = json.loads(bytes(view[start : start + header_len]).decode("utf-8"))
+        if header.get("versao") != FORMAT_VERSION:
+            raise ValueError("Versão do arquivo colunar não suportada.")
+
+        self.linhas: int = int(header["linhas"])
+        self.schema: list[dict] = header.get("schema") or []
+        self.headers: list[str] = [col["nome"] for col in header["colunas"]]
+        self._swap = header.get("byteorder") != sys.byteorder
+        self._colunas = {col["nome"]: col for col in header["colunas"]}
+        self._offsets = header["blocos"]
+        self._view = view
+        self._codes_cache: dict[str, object] = {}
+        self._planes_cache: dict[str, tuple[bytes, ...]] = {}
+        # Compartilhada entre as threads do processo (lru_cache de `_open_table`).
+        self._aggregates: OrderedDict[tuple, dict] = OrderedDict()
+        self._aggregates_lock = threading.Lock()
+
+    def _block(self, spec: dict, length: int | None = None):
+        typecode = spec["typecode"]
+        itemsize = array.array(typecode).itemsize
+        offset = self._offsets[spec["bloco"]]
+        raw = self._view[offset : offset + (self.linhas if length is None else length) * itemsize]
+        if self._swap and itemsize > 1:
+            data = array.array(typecode, raw.tobytes())
+            data.byteswap()
+            return data
+        return raw.cast(typecode)
+
+    def has_column(self, name: str) -> bool:
+        return name in self._colunas
+
+    def column_type(self, name: str) -> str:
+        return self._colunas[name]["tipo"]
+
+    def _is_raw(self, name: str) -> bool:
+        return self._colunas[name].get("codificacao") == "bruto"
+
+    def _raw_value(self, name: str, position: int) -> str:
+        offsets = self._raw_offsets(name)
+        start = self._offsets[self._colunas[name]["texto"]["bloco"]]
+        return bytes(self._view[start + offsets[position] : start + offsets[position + 1]]).decode("utf-8")
+
+    def _raw_offsets(self, name: str):
+        cached = self._codes_cache.get(("offsets", name))
+        if cached is None:
+            cached = self._codes_cache[("offsets", name)] = self._block(self._colunas[name]["offsets"], self.linhas + 1)
+        return cached
+
+    def _encode_raw(self, name: str) -> None:
+        """Coluna bruta usada em filtro/agrupamento: dicionário montado sob demanda e guardado na tabela."""
+        dictionary: dict[str, int] = {}
+        codes = array.array("I")
+        for position in range(self.linhas):
+            value = self._raw_value(name, position)
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            codes.append(code)
+        meta = self._colunas[name]
+        meta["dicionario"] = list(dictionary)
+        if meta["tipo"] == "DATA":
+            meta["dias"] = [_date_ordinal(value) for value in meta["dicionario"]]
+        self._codes_cache[name] = codes
+
+    def dictionary(self, name: str) -> list[str]:
+        if "dicionario" not in self._colunas[name]:
+            self._encode_raw(name)
+        return self._colunas[name]["dicionario"]
+
+    def codes(self, name: str):
+        cached = self._codes_cache.get(name)
+        if cached is None:
+            if self._is_raw(name):
+                self._encode_raw(name)
+                return self._codes_cache[name]
+            cached = self._codes_cache[name] = self._block(self._colunas[name]["codigos"])
+        return cached
+
+    def numbers(self, name: str):
+        spec = self._colunas[name].get("valores")
+        return self._block(spec) if spec else None
+
+    def date_ordinals(self, name: str) -> list[int]:
+        self.dictionary(name)
+        return self._colunas[name].get("dias") or []
+
+    def exact_numbers(self, name: str) -> tuple[object, int]:
+        """
+        (valores por linha, escala) da coluna NUMERO para somas exatas: inteiros
+        valor × 10^escala quando representáveis, senão Decimal com escala 0.
+        """
+        cached = self._codes_cache.get(("exatos", name))
+        if cached is None:
+            spec = self._colunas[name]["valores"]
+            if "escala" in spec:
+                scale = spec["escala"]
+            else:
+                # Artefato gravado antes da escala no cabeçalho.
+                scale = _decimal_scale(_parse_number(value) for value in self.dictionary(name))
+            if scale is not None:
+                factor = float(10**scale)
+                cached = (array.array("q", map(round, map(factor.__mul__, self.numbers(name)))), scale)
+            else:
+                decimals = [_parse_number(value) or Decimal("0") for value in self.dictionary(name)]
+                cached = ([decimals[code] for code in self.codes(name)], 0)
+            self._codes_cache[("exatos", name)] = cached
+        return cached
+
+    def memo_aggregates(self, key: tuple, compute) -> dict:
+        """
+        Agregados de uma combinação de filtros, memorizados (LRU de
+        AGGREGATES_MEMO_SIZE) sob trava; o cálculo em si roda fora dela.
+        """
+        with self._aggregates_lock:
+            aggregates = self._aggregates.get(key)
+            if aggregates is not None:
+                self._aggregates.move_to_end(key)
+                return aggregates
+        aggregates = compute()
+        with self._aggregates_lock:
+            self._aggregates[key] = aggregates
+            self._aggregates.move_to_end(key)
+            while len(self._aggregates) > AGGREGATES_MEMO_SIZE:
+                self._aggregates.popitem(last=False)
+        return aggregates
+
+    def _planes(self, name: str) -> tuple[bytes, ...]:
+        """Planos de bytes dos códigos (byte menos significativo primeiro), para uso com translate."""
+        planes = self._planes_cache.get(name)
+        if planes is None:
+            codes = self.codes(name)
+            raw = codes.tobytes()
+            if sys.byteorder == "little" or codes.itemsize == 1:
+                planes = (raw,) if codes.itemsize == 1 else (raw[0::2], raw[1::2])
+            else:
+                planes = (raw[1::2], raw[0::2])
+            self._planes_cache[name] = planes
+        return planes
+
+    def mask_codes(self, name: str, allowed: set[int]) -> bytes:
+        """Máscara 0/1 por linha para `código in allowed`."""
+        codes = self.codes(name)
+        if codes.itemsize > 2:
+            return bytes(code in allowed for code in codes)
+
+        planes = self._planes(name)
+        if len(planes) == 1:
+            return planes[0].translate(_membership_table(allowed))
+
+        # uint16: para cada byte alto presente em `allowed`, (alto == h) AND (baixo in L_h).
+        low, high = planes
+        by_high: dict[int, set[int]] = {}
+        for code in allowed:
+            by_high.setdefault(code >> 8, set()).add(code & 0xFF)
+        combined = 0
+        for hi, lows in by_high.items():
+            combined |= int.from_bytes(high.translate(_membership_table({hi})), "little") & int.from_bytes(
+                low.translate(_membership_table(lows)), "little"
+            )
+        return combined.to_bytes(self.linhas, "little")
+
+    def value(self, name: str, position: int) -> str:
+        if name in self._codes_cache or not self._is_raw(name):
+            return self._colunas[name]["dicionario"][self.codes(name)[position]]
+        return self._raw_value(name, position)
+
+    def row(self, position: int, headers: list[str] | None = None) -> dict[str, str]:
+        return {name: self.value(name, position) for name in (headers or self.headers) if name in self._colunas}
+
+
+def _membership_table(allowed: set[int]) -> bytes:
+    return bytes(1 if code in allowed else 0 for code in range(256))
+
+
+class ColumnarRows:
+    """Sequência preguiçosa das linhas filtradas: só decodifica o que for lido (tabela/exportação)."""
+
+    def __init__(self, table: ColumnarTable, positions, headers: list[str]):
+        self._table = table
+        self._positions = positions
+        self._headers = headers
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __bool__(self) -> bool:
+        return len(self._positions) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._table.row(pos, self._headers) for pos in self._positions[index]]
+        return self._table.row(self._positions[index], self._headers)
+
+    def __iter__(self):
+        for pos in self._positions:
+            yield self._table.row(pos, self._headers)
+
+
+def _and_masks(masks: list[bytes], total: int) -> bytes | None:
+    if not masks:
+        return None
+    if len(masks) == 1:
+        return masks[0]
+    combined = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        combined &= int.from_bytes(mask, "little")
+    return combined.to_bytes(total, "little")
+
+
+def _select(values, mask: bytes | None, positions):
+    """Valores das linhas selecionadas: compress em C, ou indexação direta quando a seleção é esparsa."""
+    if mask is None:
+        return values
+    if len(positions) * SPARSE_SELECTION_RATIO < len(values):
+        return [values[pos] for pos in positions]
+    return compress(values, mask)
+
+
+def filter_mask(table: ColumnarTable, *, date_column: str | None, filters: dict) -> bytes | None:
+    """Máscara equivalente a `filter_rows`; None quando nenhum filtro se aplica."""
+    total = table.linhas
+    masks: list[bytes] = []
+
+    for name in FILTER_COLUMNS:
+        wanted = filters.get(name, "")
+        if not wanted:
+            continue
+        if not table.has_column(name):
+            return bytes(total)
+        try:
+            code = table.dictionary(name).index(wanted)
+        except ValueError:
+            return bytes(total)
+        masks.append(table.mask_codes(name, {code}))
+
+    start = _parse_date(filters.get("date_start", "")) if filters.get("date_start") else None
+    end = _parse_date(filters.get("date_end", "")) if filters.get("date_end") else None
+    if date_column and table.has_column(date_column) and (start or end):
+        start_ord = start.toordinal() if start else None
+        end_ord = end.toordinal() if end else None
+        allowed = {
+            code
+            for code, ordinal in enumerate(table.date_ordinals(date_column))
+            if ordinal
+            and (start_ord is None or ordinal >= start_ord)
+            and (end_ord is None or ordinal <= end_ord)
+        }
+        masks.append(table.mask_codes(date_column, allowed))
+
+    return _and_masks(masks, total)
+
+
+def _group_sum(table: ColumnarTable, name: str, mask: bytes | None, positions, values) -> dict[int, int]:
+    """Soma (ou contagem, sem coluna de valor) por código da coluna `name` nas linhas da máscara."""
+    codes = _select(table.codes(name), mask, positions)
+    if values is None:
+        return dict(Counter(codes))
+    totals = [0] * len(table.dictionary(name))
+    for code, value in zip(codes, _select(values, mask, positions)):
+        totals[code] += value
+    return {code: totals[code] for code in set(_select(table.codes(name), mask, positions))}
+
+
+def _unscale(total, scale: int) -> Decimal:
+    return Decimal(total).scaleb(-scale)
+
+
+def _line_series(table: ColumnarTable, date_col: str | None, mask: bytes | None, positions, values, scale) -> dict:
+    if not positions or not date_col or not table.has_column(date_col):
+        return {"labels": [], "values": []}
+
+    months = [
+        date.fromordinal(ordinal).strftime("%Y-%m") if ordinal else "" for ordinal in table.date_ordinals(date_col)
+    ]
+    grouped: dict[str, int] = {}
+    for code, total in _group_sum(table, date_col, mask, positions, values).items():
+        label = months[code]
+        if label:
+            grouped[label] = grouped.get(label, 0) + total
+
+    labels = sorted(grouped)
+    return {"labels": labels, "values": [float(_unscale(grouped[label], scale)) for label in labels]}
+
+
+def _ranking(table: ColumnarTable, category_col: str | None, mask: bytes | None, positions, values, scale) -> dict:
+    if not positions or not category_col or not table.has_column(category_col):
+        return {"labels": [], "values": []}
+
+    dictionary = table.dictionary(category_col)
+    grouped: dict[str, int] = {}
+    for code, total in sorted(_group_sum(table, category_col, mask, positions, values).items()):
+        label = dictionary[code] or "(sem informação)"
+        grouped[label] = grouped.get(label, 0) + total
+
+    ordered = sorted(grouped.items(), key=lambda item: item[1], reverse=True)[:12]
+    return {"labels": [k for k, _ in ordered], "values": [float(_unscale(v, scale)) for _, v in ordered]}
+
+
+def _positions(table: ColumnarTable, mask: bytes | None):
+    return range(table.linhas) if mask is None else list(compress(range(table.linhas), mask))
+
+
+def filtered_rows_columnar(table: ColumnarTable, schema: list[dict], filters: dict) -> ColumnarRows:
+    """Apenas as linhas filtradas, sem agregar (agregados vindos do cache de consultas)."""
+    mask = filter_mask(table, date_column=_pick_date_column(schema), filters=filters)
+    return ColumnarRows(table, _positions(table, mask), [col.get("name") for col in schema])
+
+
+def build_dashboard_payload_columnar(table: ColumnarTable, schema: list[dict], filters: dict) -> dict:
+    """Mesmo contrato de `build_dashboard_payload`, calculado sobre o artefato colunar."""
+    date_col = _pick_date_column(schema)
+    value_col = _pick_numeric_column(schema)
+    category_col = _pick_category_column(schema)
+    headers = [col.get("name") for col in schema]
+
+    mask = filter_mask(table, date_column=date_col, filters=filters)
+    positions = _positions(table, mask)
+
+    def compute() -> dict:
+        values, scale = None, 0
+        if value_col and table.has_column(value_col) and table.numbers(value_col) is not None:
+            values, scale = table.exact_numbers(value_col)
+        return {
+            "soma": _unscale(sum(_select(values, mask, positions)), scale) if values is not None else Decimal("0"),
+            "line": _line_series(table, date_col, mask, positions, values, scale),
+            "ranking": _ranking(table, category_col, mask, positions, values, scale),
+            "filter_options": {
+                name: sorted(value for value in table.dictionary(name) if value)[:100] if table.has_column(name) else []
+                for name in FILTER_COLUMNS
+            },
+        }
+
+    # O artefato é imutável: agregados por combinação de filtros ficam memorizados na tabela.
+    memo_key = (date_col, value_col, category_col, tuple(sorted((k, v) for k, v in filters.items() if v)))
+    aggregates = table.memo_aggregates(memo_key, compute)
+
+    return {
+        "rows": ColumnarRows(table, positions, headers),
+        "headers": headers,
+        "kpis": {
+            "linhas_filtradas": len(positions),
+            "linhas_total": table.linhas,
+            "colunas": len(headers),
+            "soma_principal": f"{aggregates['soma']:.2f}" if value_col else "-",
+            "coluna_valor": value_col or "-",
+        },
+        "line": deepcopy(aggregates["line"]),
+        "ranking": deepcopy(aggregates["ranking"]),
+        "date_col": date_col,
+        "value_col": value_col,
+        "category_col": category_col,
+        "filter_options": deepcopy(aggregates["filter_options"]),
+    }
+
+
+@lru_cache(maxsize=getattr(settings, "PAINEIS_COLUMNAR_CACHE_SIZE", 8))
+def _open_table(storage, name: str) -> ColumnarTable:
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        with storage.open(name, "rb") as fobj:
+            return ColumnarTable(fobj.read())
+    with open(path, "rb") as fobj:
+        return ColumnarTable(mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def load_columnar_table(version) -> ColumnarTable | None:
+    """
+    Tabela colunar da versão, mapeada em memória e reaproveitada entre
+    requisições do mesmo processo. None para versões sem artefato (anteriores
+    ao formato colunar, até rodar `build_paineis_columnar`): quem lê varre o CSV.
+    """
+    if not version.arquivo_colunar:
+        return None
+    try:
+        return _open_table(version.arquivo_colunar.storage, version.arquivo_colunar.name)
+    except (OSError, ValueError):
+        return None
+
+
+def save_columnar_artifact(version, *, writer: ColumnarWriter | None = None) -> None:
+    """
+    Grava `arquivo_colunar` a partir do writer alimentado na ingestão ou, sem
+    ele, relendo o CSV tratado em fluxo.
+    """
+    from django.core.files import File
+    from django.utils.text import slugify
+
+    from .dashboard import iter_csv_records
+
+    with ExitStack() as stack:
+        if writer is None:
+            writer = stack.enter_context(ColumnarWriter())
+            source = stack.enter_context(version.arquivo_tratado.open("rb"))
+            headers, records = iter_csv_records(source)
+            writer.start(headers)
+            for values in records:
+                writer.append(values)
+
+        schema = (version.schema_json or {}).get("columns") or [{"name": h, "type": "TEXTO"} for h in writer.headers]
+        artifact = stack.enter_context(tempfile.TemporaryFile())
+        writer.write(artifact, schema)
+        artifact.seek(0)
+        name = f"{slugify(version.dataset.nome or 'dataset')}_v{version.numero}.gpcol"
+        version.arquivo_colunar.save(name, File(artifact), save=False)
+    if version.pk:
+        type(version).objects.filter(pk=version.pk).update(arquivo_colunar=version.arquivo_colunar.name)
@@ -6,24 +6,44 @@ import zipfile
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
+from itertools import chain, islice
+from typing import Iterator
 
 from .ingest import _parse_date, _parse_number, data_dictionary_csv, profile_json_bytes
 
 
 def load_rows_from_csv_bytes(raw: bytes) -> tuple[list[str], list[dict[str, str]]]:
-    text = raw.decode("utf-8-sig", errors="ignore")
-    lines = [line for line in text.splitlines() if line.strip()]
-    if not lines:
-        return [], []
-
-    sample = "\n".join(lines[:5])
+    headers, records = iter_csv_records(io.BytesIO(raw))
+    return headers, [dict(zip(headers, values)) for values in records]
+
+
+def iter_csv_records(stream) -> tuple[list[str], Iterator[list[str]]]:
+    """
+    Leitura em fluxo do CSV tratado: cabeçalhos e um iterador de valores
+    alinhados a eles (mesma semântica de `load_rows_from_csv_bytes`).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="ignore")
+    lines = (line for line in text if line.strip())
+    head = list(islice(lines, 5))
+    if not head:
+        return [], iter(())
+
+    sample = "\n".join(line.rstrip("\r\n") for line in head)
     delimiter = ";" if sample.count(";") >= sample.count(",") else ","
-    reader = csv.DictReader(io.StringIO("\n".join(lines)), delimiter=delimiter)
-    headers = [h.strip() for h in (reader.fieldnames or []) if h and h.strip()]
-    rows = []
-    for row in reader:
-        rows.append({h: (row.get(h, "") or "").strip() for h in headers})
-    return headers, rows
+    reader = csv.reader(chain(head, lines), delimiter=delimiter)
+    fieldnames = next(reader, [])
+    headers = [h.strip() for h in fieldnames if h and h.strip()]
+    positions = {name: idx for idx, name in enumerate(fieldnames)}
+    indexes = [positions.get(h) for h in headers]
+
+    def records():
+        for record in reader:
+            if not record:
+                continue
+            size = len(record)
+            yield [record[idx].strip() if idx is not None and idx < size else "" for idx in indexes]
+
+    return headers, records()
 
 
 def filter_rows(
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import io
 import json
 from collections import Counter
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+from typing import Iterator
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from urllib.request import Request, urlopen
 
@@ -40,6 +43,10 @@ SENSITIVE_HINTS = {
 
 ALLOWED_GOOGLE_SHEETS_HOSTS = {"docs.google.com"}
 
+INFER_SAMPLE_ROWS = 2000
+DUPLICATE_SAMPLE_ROWS = 20000
+PREVIEW_ROWS = 40
+
 
 def _clean_cell(value) -> str:
     if value is None:
@@ -129,67 +136,62 @@ def _detect_sensitive(header: str) -> bool:
     return any(hint in check for hint in SENSITIVE_HINTS)
 
 
-def _read_csv_rows(raw: bytes) -> tuple[list[str], list[dict[str, str]]]:
-    text = raw.decode("utf-8-sig", errors="ignore")
-    lines = [line for line in text.splitlines() if line.strip()]
-    if not lines:
+def _stream_csv_rows(stream) -> tuple[list[str], Iterator[list[str]]]:
+    """Cabeçalhos normalizados e linhas (alinhadas a eles) de um CSV binário, lido em fluxo."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="ignore")
+    lines = (line for line in text if line.strip())
+    head = list(islice(lines, 5))
+    if not head:
         raise ValueError("Arquivo CSV está vazio.")
 
-    sample = "\n".join(lines[:5])
+    sample = "\n".join(line.rstrip("\r\n") for line in head)
     try:
         delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
     except csv.Error:
         delimiter = ";" if ";" in sample else ","
 
-    reader = csv.reader(io.StringIO("\n".join(lines)), delimiter=delimiter)
-    all_rows = list(reader)
-    if not all_rows:
+    reader = csv.reader(chain(head, lines), delimiter=delimiter)
+    first = next(reader, None)
+    if first is None:
         raise ValueError("Arquivo CSV sem linhas válidas.")
 
-    headers = _normalize_headers([_clean_cell(v) for v in all_rows[0]])
-    rows: list[dict[str, str]] = []
-    for row_values in all_rows[1:]:
-        row_dict: dict[str, str] = {}
-        for idx, header in enumerate(headers):
-            row_dict[header] = _clean_cell(row_values[idx]) if idx < len(row_values) else ""
-        rows.append(row_dict)
+    headers = _normalize_headers([_clean_cell(v) for v in first])
+    return headers, _aligned_rows(reader, len(headers))
+
 
-    return headers, rows
+def _aligned_rows(records, width: int, *, skip_empty: bool = False) -> Iterator[list[str]]:
+    for record in records:
+        cells = [_clean_cell(v) for v in record[:width]]
+        if skip_empty and not any(cells):
+            continue
+        if len(cells) < width:
+            cells.extend([""] * (width - len(cells)))
+        yield cells
 
 
-def _read_xlsx_rows(raw: bytes) -> tuple[list[str], list[dict[str, str]]]:
+def _stream_xlsx_rows(stream) -> tuple[list[str], Iterator[list[str]]]:
     try:
         from openpyxl import load_workbook
     except Exception as exc:  # pragma: no cover
         raise ValueError("Leitura XLSX indisponível. Instale openpyxl para habilitar.") from exc
 
-    wb = load_workbook(io.BytesIO(raw), data_only=True, read_only=True)
-    ws = wb.active
-
-    header_row = None
-    rows: list[dict[str, str]] = []
-
-    for idx, values in enumerate(ws.iter_rows(values_only=True), start=1):
-        cells = [_clean_cell(v) for v in values]
-        if idx == 1:
-            header_row = cells
-            continue
-        if not header_row:
-            continue
-
-        if not any(cells):
-            continue
+    # read_only lê as linhas sob demanda a partir do arquivo, sem montar a planilha em memória.
+    wb = load_workbook(stream, data_only=True, read_only=True)
+    values = wb.active.iter_rows(values_only=True)
+    first = next(values, None)
+    if first is None:
+        wb.close()
+        raise ValueError("Planilha XLSX sem cabeçalho na primeira linha.")
 
-        headers = _normalize_headers(header_row)
-        row_dict: dict[str, str] = {}
-        for cidx, header in enumerate(headers):
-            row_dict[header] = cells[cidx] if cidx < len(cells) else ""
-        rows.append(row_dict)
+    headers = _normalize_headers([_clean_cell(v) for v in first])
 
-    if not header_row:
-        raise ValueError("Planilha XLSX sem cabeçalho na primeira linha.")
+    def rows():
+        try:
+            yield from _aligned_rows(values, len(headers), skip_empty=True)
+        finally:
+            wb.close()
 
-    return _normalize_headers(header_row), rows
+    return headers, rows()
 
 
 def _google_sheet_csv_url(url: str) -> str:
@@ -226,7 +228,7 @@ def _google_sheet_csv_url(url: str) -> str:
     return urlunparse(("https", parsed.netloc, path, "", urlencode(params), ""))
 
 
-def _fetch_google_sheet(url: str) -> bytes:
+def _stream_google_sheet_rows(url: str) -> tuple[list[str], Iterator[list[str]]]:
     final_url = _google_sheet_csv_url(url)
     req = Request(
         final_url,
@@ -235,122 +237,222 @@ def _fetch_google_sheet(url: str) -> bytes:
             "Accept": "text/csv,*/*;q=0.8",
         },
     )
-    with urlopen(req, timeout=20) as resp:
-        return resp.read()
-
-
-def _build_schema_and_profile(headers: list[str], rows: list[dict[str, str]]) -> tuple[list[dict], dict]:
-    schema: list[dict] = []
-    nulls_by_column: dict[str, int] = {}
-    duplicates_count = 0
-    seen_rows: set[tuple] = set()
-    numeric_stats: dict[str, dict] = {}
-
-    for header in headers:
-        values = [r.get(header, "") for r in rows]
-        col_type = _infer_column_type(values[:2000])
-        role = "MEDIDA" if col_type == "NUMERO" else "DIMENSAO"
-        sample = next((v for v in values if v), "")
+    resp = urlopen(req, timeout=20)
+    try:
+        headers, rows = _stream_csv_rows(resp)
+    except Exception:
+        resp.close()
+        raise
 
-        schema.append(
+    def closing_rows():
+        try:
+            yield from rows
+        finally:
+            resp.close()
+
+    return headers, closing_rows()
+
+
+class _StreamProfile:
+    """
+    Schema e perfil em uma passada, com memória limitada: tipos inferidos nas
+    primeiras INFER_SAMPLE_ROWS linhas (as únicas mantidas em memória), nulos,
+    amostra e min/máx/soma das colunas numéricas acumulados online, duplicatas
+    por hash nas primeiras DUPLICATE_SAMPLE_ROWS linhas.
+    """
+
+    def __init__(self, headers: list[str]):
+        self.headers = headers
+        self.row_count = 0
+        self.nulls = [0] * len(headers)
+        self.samples = [""] * len(headers)
+        self.types: list[str] | None = None
+        self.numeric_indexes: list[int] = []
+        self.numeric_stats: dict[int, list[Decimal]] = {}
+        self.duplicates = 0
+        self._sample_rows: list[list[str]] = []
+        self._seen: set[bytes] = set()
+
+    def add(self, values: list[str]) -> None:
+        self.row_count += 1
+        for idx, value in enumerate(values):
+            if not value:
+                self.nulls[idx] += 1
+            elif not self.samples[idx]:
+                self.samples[idx] = value
+
+        if self.row_count <= DUPLICATE_SAMPLE_ROWS:
+            marker = hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=16).digest()
+            if marker in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(marker)
+            if self.row_count == DUPLICATE_SAMPLE_ROWS:
+                self._seen = set()
+
+        if self.types is None:
+            self._sample_rows.append(values)
+            if len(self._sample_rows) >= INFER_SAMPLE_ROWS:
+                self._infer_types()
+        else:
+            self._accumulate(values)
+
+    def _infer_types(self) -> None:
+        sample, self._sample_rows = self._sample_rows, []
+        self.types = [_infer_column_type([row[idx] for row in sample]) for idx in range(len(self.headers))]
+        self.numeric_indexes = [idx for idx, col_type in enumerate(self.types) if col_type == "NUMERO"]
+        for row in sample:
+            self._accumulate(row)
+
+    def _accumulate(self, values: list[str]) -> None:
+        for idx in self.numeric_indexes:
+            number = _parse_number(values[idx])
+            if number is None:
+                continue
+            stats = self.numeric_stats.get(idx)
+            if stats is None:
+                self.numeric_stats[idx] = [number, number, number]
+                continue
+            if number < stats[0]:
+                stats[0] = number
+            if number > stats[1]:
+                stats[1] = number
+            stats[2] += number
+
+    def finish(self) -> tuple[list[dict], dict]:
+        if self.types is None:
+            self._infer_types()
+
+        schema = [
             {
                 "name": header,
                 "type": col_type,
-                "role": role,
+                "role": "MEDIDA" if col_type == "NUMERO" else "DIMENSAO",
                 "sensitive": _detect_sensitive(header),
-                "sample": sample[:120],
+                "sample": self.samples[idx][:120],
             }
-        )
-        nulls_by_column[header] = sum(1 for v in values if not v)
-
-        if col_type == "NUMERO":
-            parsed = [_parse_number(v) for v in values]
-            nums = [n for n in parsed if n is not None]
-            if nums:
-                numeric_stats[header] = {
-                    "min": str(min(nums)),
-                    "max": str(max(nums)),
-                    "sum": str(sum(nums)),
-                }
-
-    for row in rows[:20000]:
-        marker = tuple(row.get(h, "") for h in headers)
-        if marker in seen_rows:
-            duplicates_count += 1
-        else:
-            seen_rows.add(marker)
-
-    warnings: list[str] = []
-    if duplicates_count:
-        warnings.append(f"Foram detectadas {duplicates_count} linhas duplicadas na amostra.")
-
-    type_counter = Counter(item["type"] for item in schema)
-
-    profile = {
-        "row_count": len(rows),
-        "column_count": len(headers),
-        "nulls_by_column": nulls_by_column,
-        "duplicate_rows_sample": duplicates_count,
-        "types_summary": dict(type_counter),
-        "numeric_stats": numeric_stats,
-        "warnings": warnings,
-    }
+            for idx, (header, col_type) in enumerate(zip(self.headers, self.types))
+        ]
+        numeric_stats = {
+            self.headers[idx]: {"min": str(stats[0]), "max": str(stats[1]), "sum": str(stats[2])}
+            for idx, stats in sorted(self.numeric_stats.items())
+        }
 
-    return schema, profile
+        warnings: list[str] = []
+        if self.duplicates:
+            warnings.append(f"Foram detectadas {self.duplicates} linhas duplicadas na amostra.")
 
+        profile = {
+            "row_count": self.row_count,
+            "column_count": len(self.headers),
+            "nulls_by_column": dict(zip(self.headers, self.nulls)),
+            "duplicate_rows_sample": self.duplicates,
+            "types_summary": dict(Counter(item["type"] for item in schema)),
+            "numeric_stats": numeric_stats,
+            "warnings": warnings,
+        }
+        return schema, profile
 
-def _build_processed_csv(headers: list[str], rows: list[dict[str, str]]) -> bytes:
-    out = io.StringIO()
-    writer = csv.DictWriter(out, fieldnames=headers, delimiter=";")
-    writer.writeheader()
-    for row in rows:
-        writer.writerow({h: row.get(h, "") for h in headers})
-    text = out.getvalue()
-    return ("\ufeff" + text).encode("utf-8")
 
+class _RowCollector:
+    """Destino de linhas em memória (compatibilidade de `ingest_dataset_bytes`)."""
+
+    def start(self, headers: list[str]) -> None:
+        self.headers = headers
+        self.rows: list[dict[str, str]] = []
+
+    def append(self, values: list[str]) -> None:
+        self.rows.append(dict(zip(self.headers, values)))
 
-def ingest_dataset_bytes(
-    raw: bytes,
-    fonte: str,
-    *,
-    filename: str = "",
-    google_sheet_url: str = "",
-) -> dict:
-    source = (fonte or "").strip().upper()
 
+def _open_source_rows(stream, source: str, google_sheet_url: str) -> tuple[list[str], Iterator[list[str]]]:
     if source == Dataset.Fonte.GOOGLE_SHEETS:
-        raw = _fetch_google_sheet(google_sheet_url)
-        headers, rows = _read_csv_rows(raw)
-    elif source == Dataset.Fonte.CSV:
-        headers, rows = _read_csv_rows(raw)
-    elif source == Dataset.Fonte.XLSX:
-        headers, rows = _read_xlsx_rows(raw)
-    elif source in {Dataset.Fonte.PDF, Dataset.Fonte.DOCX}:
+        return _stream_google_sheet_rows(google_sheet_url)
+    if source == Dataset.Fonte.CSV:
+        return _stream_csv_rows(stream)
+    if source == Dataset.Fonte.XLSX:
+        return _stream_xlsx_rows(stream)
+    if source in {Dataset.Fonte.PDF, Dataset.Fonte.DOCX}:
         raise ValueError(
             "Extração de PDF/DOCX ainda é condicional no MVP. Exporte para CSV/XLSX para ingestão segura."
         )
-    else:
-        raise ValueError("Fonte de dados não suportada para ingestão.")
+    raise ValueError("Fonte de dados não suportada para ingestão.")
 
+
+def ingest_dataset_stream(
+    stream,
+    fonte: str,
+    *,
+    processed_out,
+    filename: str = "",
+    google_sheet_url: str = "",
+    sinks=(),
+) -> dict:
+    """
+    Ingestão em uma passada e memória limitada: lê a origem em fluxo, perfila
+    online, grava o CSV tratado em `processed_out` (arquivo binário) e repassa
+    cada linha aos `sinks` (objetos com `start(headers)` e `append(values)`).
+    """
+    source = (fonte or "").strip().upper()
+    headers, rows = _open_source_rows(stream, source, google_sheet_url)
     if not headers:
         raise ValueError("Não foi possível identificar colunas no arquivo enviado.")
 
-    schema, profile = _build_schema_and_profile(headers, rows)
-    processed_csv = _build_processed_csv(headers, rows)
+    profile = _StreamProfile(headers)
+    for sink in sinks:
+        sink.start(headers)
 
+    preview_rows: list[dict[str, str]] = []
+    text_out = io.TextIOWrapper(processed_out, encoding="utf-8", newline="")
+    try:
+        text_out.write("\ufeff")
+        writer = csv.writer(text_out, delimiter=";")
+        writer.writerow(headers)
+        for values in rows:
+            profile.add(values)
+            writer.writerow(values)
+            for sink in sinks:
+                sink.append(values)
+            if len(preview_rows) < PREVIEW_ROWS:
+                preview_rows.append(dict(zip(headers, values)))
+    finally:
+        text_out.flush()
+        text_out.detach()
+
+    schema, profile_data = profile.finish()
     return {
         "source": source,
         "filename": filename,
         "headers": headers,
-        "rows": rows,
-        "preview_rows": rows[:40],
+        "preview_rows": preview_rows,
         "schema": schema,
-        "profile": profile,
-        "processed_csv_bytes": processed_csv,
-        "warnings": profile.get("warnings", []),
+        "profile": profile_data,
+        "warnings": profile_data.get("warnings", []),
     }
 
 
+def ingest_dataset_bytes(
+    raw: bytes,
+    fonte: str,
+    *,
+    filename: str = "",
+    google_sheet_url: str = "",
+) -> dict:
+    collector = _RowCollector()
+    processed = io.BytesIO()
+    result = ingest_dataset_stream(
+        io.BytesIO(raw),
+        fonte,
+        processed_out=processed,
+        filename=filename,
+        google_sheet_url=google_sheet_url,
+        sinks=[collector],
+    )
+    result["rows"] = collector.rows
+    result["processed_csv_bytes"] = processed.getvalue()
+    return result
+
+
 def data_dictionary_csv(schema: list[dict]) -> bytes:
     output = io.StringIO()
     writer = csv.writer(output, delimiter=";")
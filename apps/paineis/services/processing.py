@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import io
+import tempfile
+from contextlib import ExitStack
+
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files import File
 from django.utils import timezone
 from django.utils.text import slugify
 
 from apps.core.services_auditoria import registrar_auditoria
 
 from ..models import Chart, Dashboard, Dataset, DatasetColumn, DatasetVersion
-from .ingest import ingest_dataset_bytes
+from .columnar import ColumnarWriter, load_columnar_table, save_columnar_artifact
+from .ingest import ingest_dataset_stream
+from .query_cache import invalidate_dataset_query_cache
+from .rollup import build_version_rollup
 
 
 def _resolve_actor(*, actor_id: int | None = None, actor=None):
@@ -102,28 +109,38 @@ def process_dataset_version(
     version.logs = "Processamento iniciado."
     version.save(update_fields=["status", "logs"])
 
-    raw_bytes = b""
-    if version.arquivo_original:
-        with version.arquivo_original.open("rb") as fobj:
-            raw_bytes = fobj.read()
-
     try:
-        ingestion = ingest_dataset_bytes(
-            raw_bytes,
-            dataset.fonte,
-            filename=(version.arquivo_original.name if version.arquivo_original else ""),
-            google_sheet_url=google_sheet_url,
-        )
-
-        treated_name = f"{slugify(dataset.nome or 'dataset')}_v{version.numero}.csv"
-        version.arquivo_tratado.save(treated_name, ContentFile(ingestion["processed_csv_bytes"]), save=False)
-        version.schema_json = {"columns": ingestion["schema"]}
+        # Origem lida em fluxo; CSV tratado e artefato colunar vão para arquivos
+        # temporários, então a memória do worker não cresce com o tamanho do upload.
+        with ExitStack() as stack:
+            source = (
+                stack.enter_context(version.arquivo_original.open("rb")) if version.arquivo_original else io.BytesIO()
+            )
+            processed = stack.enter_context(tempfile.TemporaryFile())
+            columnar = stack.enter_context(ColumnarWriter())
+            ingestion = ingest_dataset_stream(
+                source,
+                dataset.fonte,
+                processed_out=processed,
+                filename=(version.arquivo_original.name if version.arquivo_original else ""),
+                google_sheet_url=google_sheet_url,
+                sinks=[columnar],
+            )
+
+            treated_name = f"{slugify(dataset.nome or 'dataset')}_v{version.numero}.csv"
+            processed.seek(0)
+            version.arquivo_tratado.save(treated_name, File(processed), save=False)
+            version.schema_json = {"columns": ingestion["schema"]}
+            save_columnar_artifact(version, writer=columnar)
+        table = load_columnar_table(version)
+        version.rollup_json = build_version_rollup(version, table) if table is not None else {}
         version.profile_json = ingestion["profile"]
         version.preview_json = ingestion["preview_rows"]
         version.status = DatasetVersion.Status.CONCLUIDO
         version.logs = "\n".join(ingestion.get("warnings") or []) or "Processamento concluído."
         version.processado_em = timezone.now()
         version.save()
+        invalidate_dataset_query_cache(dataset.pk)
 
         DatasetColumn.objects.filter(versao=version).delete()
         DatasetColumn.objects.bulk_create(
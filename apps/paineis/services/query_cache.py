@@ -0,0 +1,260 @@
+"""
+Cache de resultados de agregação do dashboard (QueryCache).
+
+Duas camadas:
+- L1: LRU do processo com TTL curto; hits (inclusive o acerto em L2 que a
+  preencheu) contados em memória e descarregados no banco em lote, a cada
+  QUERY_CACHE_HITS_FLUSH ou quando a entrada sai da L1 (contagem aproximada,
+  nunca bloqueia a leitura);
+- L2: linhas de QueryCache (dataset + chave), com `expira_em`, `hits` e
+  `acessado_em`, no máximo PAINEIS_QUERY_CACHE_MAX_ENTRIES por dataset; além
+  disso o resultado fica só na L1.
+
+Filtros cobertos pelo rollup da versão não passam pelo cache: as células
+pré-agregadas já os respondem com uma consulta.
+
+A chave combina a versão processada (pk + processado_em) com os filtros
+normalizados: uma versão nova ou reprocessada nunca reaproveita agregados
+antigos. process_dataset_version remove as linhas do dataset e a tarefa
+paineis.evict_query_cache apara entradas expiradas ou frias.
+
+Só os agregados (KPIs, séries, ranking, opções de filtro) são guardados; as
+linhas filtradas da tabela continuam vindo do artefato colunar/CSV.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from ..models import QueryCache
+from .columnar import build_dashboard_payload_columnar, filtered_rows_columnar
+from .dashboard import _pick_date_column, build_dashboard_payload, filter_rows
+from .ingest import _parse_date
+from .rollup import build_dashboard_payload_rollup
+
+QUERY_CACHE_L1_TTL_SECONDS = 30.0
+QUERY_CACHE_L1_MAX_ENTRIES = 256
+QUERY_CACHE_HITS_FLUSH = 20
+
+FILTER_KEYS = ("date_start", "date_end", "secretaria", "unidade", "categoria")
+
+_l1: OrderedDict[tuple, list] = OrderedDict()
+_l1_lock = threading.Lock()
+
+
+def _ttl_seconds() -> int:
+    return int(getattr(settings, "PAINEIS_QUERY_CACHE_TTL_SECONDS", 3600))
+
+
+def normalize_filters(filters: dict) -> dict:
+    """
+    Filtros na forma canônica da chave: sem vazios e datas em ISO. Datas que não
+    interpretam são descartadas, como o próprio filtro faz.
+    """
+    normalized = {}
+    for key in FILTER_KEYS:
+        value = (filters.get(key) or "").strip()
+        if not value:
+            continue
+        if key in {"date_start", "date_end"}:
+            parsed = _parse_date(value)
+            if not parsed:
+                continue
+            value = parsed.isoformat()
+        normalized[key] = value
+    return normalized
+
+
+def query_cache_key(version, filters: dict) -> tuple[str, dict]:
+    processado = version.processado_em.isoformat() if version.processado_em else ""
+    parametros = {"versao": version.pk, "processado_em": processado, "filtros": normalize_filters(filters)}
+    digest = hashlib.sha1(json.dumps(parametros, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"dashboard:v{version.pk}:{digest}", parametros
+
+
+def _take_hits(entry: list, minimum: int = 1) -> tuple[int, int] | None:
+    """(pk, hits) pendentes da entrada para descarregar, zerando o contador."""
+    if entry[1] is None or entry[3] < minimum:
+        return None
+    hits, entry[3] = entry[3], 0
+    return entry[1], hits
+
+
+def _l1_get(key: tuple):
+    """(entrada ou None, hits a descarregar ou None)."""
+    with _l1_lock:
+        entry = _l1.get(key)
+        if entry is None:
+            return None, None
+        if entry[0] < time.monotonic():
+            _l1.pop(key, None)
+            return None, _take_hits(entry)
+        _l1.move_to_end(key)
+        entry[3] += 1
+        return entry, _take_hits(entry, QUERY_CACHE_HITS_FLUSH)
+
+
+def _l1_set(key: tuple, pk: int | None, payload: dict, expira_em, *, hits: int = 0) -> None:
+    ttl = QUERY_CACHE_L1_TTL_SECONDS
+    if expira_em is not None:
+        ttl = min(ttl, max(0.0, (expira_em - timezone.now()).total_seconds()))
+    with _l1_lock:
+        _l1[key] = [time.monotonic() + ttl, pk, payload, hits]
+        _l1.move_to_end(key)
+        evicted = []
+        while len(_l1) > QUERY_CACHE_L1_MAX_ENTRIES:
+            evicted.append(_take_hits(_l1.popitem(last=False)[1]))
+    _register_hits(*evicted)
+
+
+def _register_hits(*pending: tuple[int, int] | None) -> None:
+    for item in pending:
+        if item is not None:
+            pk, hits = item
+            QueryCache.objects.filter(pk=pk).update(hits=F("hits") + hits, acessado_em=timezone.now())
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, "PAINEIS_QUERY_CACHE_MAX_ENTRIES", 200))
+
+
+def get_cached_payload(version, filters: dict) -> dict | None:
+    """Agregados em cache para a versão/filtros, ou None (ausente ou expirado)."""
+    chave, _parametros = query_cache_key(version, filters)
+    l1_key = (version.dataset_id, chave)
+    entry, pending = _l1_get(l1_key)
+    _register_hits(pending)
+    if entry is not None:
+        return deepcopy(entry[2])
+
+    row = (
+        QueryCache.objects.filter(dataset_id=version.dataset_id, chave=chave)
+        .only("id", "resultado_json", "expira_em")
+        .first()
+    )
+    if row is None or not row.resultado_json or (row.expira_em and row.expira_em <= timezone.now()):
+        return None
+    # O acerto fica contado na L1 e vai para o banco junto com os próximos.
+    _l1_set(l1_key, row.pk, row.resultado_json, row.expira_em, hits=1)
+    return deepcopy(row.resultado_json)
+
+
+def store_cached_payload(version, filters: dict, payload: dict) -> None:
+    """
+    Grava os agregados do payload (sem as linhas) em L2 e L1. Com o dataset já
+    no limite de linhas (PAINEIS_QUERY_CACHE_MAX_ENTRIES), fica só na L1.
+    """
+    chave, parametros = query_cache_key(version, filters)
+    resultado = {key: value for key, value in payload.items() if key != "rows"}
+    expira_em = timezone.now() + timedelta(seconds=_ttl_seconds())
+    l1_key = (version.dataset_id, chave)
+    if QueryCache.objects.filter(dataset_id=version.dataset_id).exclude(chave=chave).count() >= _max_entries():
+        _l1_set(l1_key, None, resultado, expira_em)
+        return
+    try:
+        with transaction.atomic():
+            row, _created = QueryCache.objects.update_or_create(
+                dataset_id=version.dataset_id,
+                chave=chave,
+                defaults={
+                    "parametros_json": parametros,
+                    "resultado_json": resultado,
+                    "expira_em": expira_em,
+                    "acessado_em": timezone.now(),
+                },
+            )
+    except IntegrityError:
+        # Outra requisição gravou a mesma chave ao mesmo tempo; o resultado é equivalente.
+        return
+    _l1_set(l1_key, row.pk, resultado, expira_em)
+
+
+def cached_dashboard_payload(version, schema: list[dict], filters: dict, *, table=None, rows=None) -> dict:
+    """
+    `build_dashboard_payload` com cache de agregados. Informe `table` (artefato
+    colunar) ou `rows` (CSV tratado); em hit, só as linhas filtradas são obtidas.
+    Filtros cobertos pelo rollup da versão são respondidos pelas células
+    pré-agregadas, sem varredura e sem ocupar o cache.
+    """
+    payload = build_dashboard_payload_rollup(version, schema, filters)
+    if payload is None:
+        payload = get_cached_payload(version, filters)
+    if payload is not None:
+        if table is not None:
+            payload["rows"] = filtered_rows_columnar(table, schema, filters)
+        else:
+            payload["rows"] = filter_rows(
+                rows or [],
+                date_column=_pick_date_column(schema),
+                **{key: filters.get(key, "") for key in FILTER_KEYS},
+            )
+        return payload
+
+    if table is not None:
+        payload = build_dashboard_payload_columnar(table, schema, filters)
+    else:
+        payload = build_dashboard_payload(rows or [], schema, filters)
+    store_cached_payload(version, filters, payload)
+    return payload
+
+
+def invalidate_dataset_query_cache(dataset_id: int) -> int:
+    """Descarta o cache de consultas do dataset (nova versão processada)."""
+    with _l1_lock:
+        for key in [key for key in _l1 if key[0] == dataset_id]:
+            _l1.pop(key, None)
+    deleted, _ = QueryCache.objects.filter(dataset_id=dataset_id).delete()
+    return deleted
+
+
+def evict_query_cache(*, max_entries_per_dataset: int | None = None, cold_days: int | None = None) -> dict:
+    """
+    Apara o QueryCache: remove expiradas, entradas sem acesso há `cold_days` e,
+    por dataset, o excedente de `max_entries_per_dataset` (menos acessadas primeiro).
+    """
+    now = timezone.now()
+    if max_entries_per_dataset is None:
+        max_entries_per_dataset = _max_entries()
+    if cold_days is None:
+        cold_days = int(getattr(settings, "PAINEIS_QUERY_CACHE_COLD_DAYS", 7))
+
+    expired, _ = QueryCache.objects.filter(expira_em__lte=now).delete()
+    cold, _ = QueryCache.objects.filter(acessado_em__lt=now - timedelta(days=cold_days)).delete()
+
+    trimmed = 0
+    crowded = (
+        QueryCache.objects.values("dataset_id")
+        .order_by()
+        .annotate(total=Count("id"))
+        .filter(total__gt=max_entries_per_dataset)
+        .values_list("dataset_id", flat=True)
+    )
+    for dataset_id in list(crowded):
+        keep = (
+            QueryCache.objects.filter(dataset_id=dataset_id)
+            .order_by(F("acessado_em").desc(nulls_last=True), "-hits", "-id")
+            .values_list("id", flat=True)[:max_entries_per_dataset]
+        )
+        deleted, _ = QueryCache.objects.filter(dataset_id=dataset_id).exclude(id__in=list(keep)).delete()
+        trimmed += deleted
+
+    return {"expiradas": expired, "frias": cold, "excedentes": trimmed}
+
+
+def clear_local_query_cache() -> None:
+    """Esvazia a L1 do processo, descarregando antes os hits pendentes."""
+    with _l1_lock:
+        pending = [_take_hits(entry) for entry in _l1.values()]
+        _l1.clear()
+    _register_hits(*pending)
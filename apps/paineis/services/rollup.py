@@ -0,0 +1,225 @@
+"""
+Agregados pré-calculados (rollup) das versões processadas.
+
+Na ingestão, a partir do artefato colunar, cada versão ganha:
+- linhas de DatasetRollup com contagem e soma por célula
+  mês × secretaria × unidade × categoria × coluna de ranking;
+- `rollup_json` com os dicionários de valores distintos (opções de filtro),
+  as colunas escolhidas para data/valor/ranking e o total de linhas.
+
+O dashboard responde pelos agregados quando o filtro é coberto pelas células:
+filtros de igualdade nas dimensões e datas em limites de mês (início no dia 1,
+fim no último dia do mês). Fora disso (ou em versões sem rollup), vale a
+varredura do artefato colunar/CSV. Versões com células demais
+(PAINEIS_ROLLUP_MAX_CELLS) ou dimensões com valores longos ficam sem rollup.
+"""
+
+from __future__ import annotations
+
+import calendar
+import math
+from collections import Counter
+from datetime import date
+from itertools import repeat
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import DatasetRollup
+from .columnar import FILTER_COLUMNS
+from .dashboard import _pick_category_column, _pick_date_column, _pick_numeric_column
+from .ingest import _parse_date
+
+ROLLUP_VALUE_MAX_LENGTH = 255
+ROLLUP_BATCH_SIZE = 2000
+
+
+def _max_cells() -> int:
+    return int(getattr(settings, "PAINEIS_ROLLUP_MAX_CELLS", 50000))
+
+
+def _dimension(table, name: str | None):
+    """(dicionário, códigos por linha) de uma dimensão; coluna ausente vira dimensão constante vazia."""
+    if not name or not table.has_column(name):
+        return [""], repeat(0, table.linhas)
+    return table.dictionary(name), table.codes(name)
+
+
+def build_version_rollup(version, table) -> dict:
+    """
+    Recalcula as células de rollup da versão a partir da tabela colunar e
+    devolve o `rollup_json` correspondente (sem salvar a versão).
+    """
+    schema = (version.schema_json or {}).get("columns") or table.schema
+    date_col = _pick_date_column(schema)
+    value_col = _pick_numeric_column(schema)
+    category_col = _pick_category_column(schema)
+    info = {
+        "linhas": table.linhas,
+        "date_col": date_col,
+        "value_col": value_col,
+        "category_col": category_col,
+        "dimensoes": {
+            name: sorted(value for value in table.dictionary(name) if value)[:100] if table.has_column(name) else []
+            for name in FILTER_COLUMNS
+        },
+        "celulas": 0,
+        "disponivel": False,
+    }
+
+    with transaction.atomic():
+        DatasetRollup.objects.filter(versao=version).delete()
+
+        names = (*FILTER_COLUMNS, category_col)
+        dimensions = [_dimension(table, name) for name in names]
+        if any(len(value) > ROLLUP_VALUE_MAX_LENGTH for dictionary, _codes in dimensions for value in dictionary):
+            info["motivo"] = "valores longos"
+            return info
+
+        if date_col and table.has_column(date_col):
+            months = sorted({date.fromordinal(day).strftime("%Y-%m") for day in table.date_ordinals(date_col) if day})
+            month_index = {label: idx for idx, label in enumerate(months, start=1)}
+            month_of_code = [
+                month_index[date.fromordinal(day).strftime("%Y-%m")] if day else 0
+                for day in table.date_ordinals(date_col)
+            ]
+            month_codes = map(month_of_code.__getitem__, table.codes(date_col))
+        else:
+            months, month_codes = [], repeat(0, table.linhas)
+        month_labels = ["", *months]
+
+        keys = zip(month_codes, *(codes for _dictionary, codes in dimensions))
+        values = table.numbers(value_col) if value_col and table.has_column(value_col) else None
+        if values is None:
+            counts = Counter(keys)
+            sums = {key: float(count) for key, count in counts.items()}
+        else:
+            counts: dict[tuple, int] = {}
+            sums: dict[tuple, float] = {}
+            for key, value in zip(keys, values):
+                if key in counts:
+                    counts[key] += 1
+                    sums[key] += value
+                else:
+                    counts[key] = 1
+                    sums[key] = value
+
+        if len(counts) > _max_cells():
+            info["motivo"] = "células demais"
+            return info
+
+        dictionaries = [dictionary for dictionary, _codes in dimensions]
+        DatasetRollup.objects.bulk_create(
+            (
+                DatasetRollup(
+                    versao=version,
+                    mes=month_labels[key[0]],
+                    secretaria=dictionaries[0][key[1]],
+                    unidade=dictionaries[1][key[2]],
+                    categoria=dictionaries[2][key[3]],
+                    ranking=dictionaries[3][key[4]],
+                    ranking_ordem=key[4],
+                    linhas=count,
+                    soma=sums[key],
+                )
+                for key, count in counts.items()
+            ),
+            batch_size=ROLLUP_BATCH_SIZE,
+        )
+
+    info.update(celulas=len(counts), disponivel=True)
+    return info
+
+
+def _month_bounds(filters: dict) -> tuple[str, str] | None:
+    """Intervalo de meses (YYYY-MM) equivalente ao filtro de datas, ou None se ele corta um mês."""
+    start = _parse_date(filters.get("date_start", "")) if filters.get("date_start") else None
+    end = _parse_date(filters.get("date_end", "")) if filters.get("date_end") else None
+    if start and start.day != 1:
+        return None
+    if end and end.day != calendar.monthrange(end.year, end.month)[1]:
+        return None
+    return (start.strftime("%Y-%m") if start else "", end.strftime("%Y-%m") if end else "")
+
+
+def rollup_covers(version, schema: list[dict], filters: dict) -> bool:
+    info = version.rollup_json or {}
+    if not info.get("disponivel"):
+        return False
+    picks = (_pick_date_column(schema), _pick_numeric_column(schema), _pick_category_column(schema))
+    if picks != (info.get("date_col"), info.get("value_col"), info.get("category_col")):
+        return False
+    return not info.get("date_col") or _month_bounds(filters) is not None
+
+
+def build_dashboard_payload_rollup(version, schema: list[dict], filters: dict) -> dict | None:
+    """
+    Agregados do dashboard (sem "rows") respondidos pelas células de rollup, ou
+    None quando o filtro não é coberto e a varredura completa é necessária.
+    """
+    if not rollup_covers(version, schema, filters):
+        return None
+    info = version.rollup_json
+    date_col, value_col, category_col = info["date_col"], info["value_col"], info["category_col"]
+
+    cells = DatasetRollup.objects.filter(versao=version)
+    for name in FILTER_COLUMNS:
+        if filters.get(name):
+            cells = cells.filter(**{name: filters[name]})
+    if date_col:
+        start, end = _month_bounds(filters)
+        if start or end:
+            cells = cells.exclude(mes="")
+        if start:
+            cells = cells.filter(mes__gte=start)
+        if end:
+            cells = cells.filter(mes__lte=end)
+
+    # Uma consulta só; as células são poucas perto das linhas e somá-las aqui sai mais barato que GROUP BY.
+    linhas = 0
+    parcelas: list[float] = []
+    by_month: dict[str, float] = {}
+    by_rank: dict[int, list] = {}
+    for mes, ranking, ordem, count, soma in cells.order_by().values_list(
+        "mes", "ranking", "ranking_ordem", "linhas", "soma"
+    ):
+        linhas += count
+        parcelas.append(soma)
+        if mes:
+            by_month[mes] = by_month.get(mes, 0.0) + soma
+        entry = by_rank.setdefault(ordem, [ranking, 0.0])
+        entry[1] += soma
+
+    line = {"labels": [], "values": []}
+    ranking_payload = {"labels": [], "values": []}
+    if linhas:
+        if date_col:
+            labels = sorted(by_month)
+            line = {"labels": labels, "values": [by_month[label] for label in labels]}
+        if category_col:
+            # Empates seguem a ordem do dicionário, como no caminho colunar.
+            grouped: dict[str, float] = {}
+            for _ordem, (label, total) in sorted(by_rank.items()):
+                label = label or "(sem informação)"
+                grouped[label] = grouped.get(label, 0.0) + total
+            ordered = sorted(grouped.items(), key=lambda item: item[1], reverse=True)[:12]
+            ranking_payload = {"labels": [k for k, _ in ordered], "values": [v for _, v in ordered]}
+
+    headers = [col.get("name") for col in schema]
+    soma = math.fsum(parcelas) if value_col else 0.0
+    return {
+        "headers": headers,
+        "kpis": {
+            "linhas_filtradas": linhas,
+            "linhas_total": info["linhas"],
+            "colunas": len(headers),
+            "soma_principal": f"{soma:.2f}" if value_col else "-",
+            "coluna_valor": value_col or "-",
+        },
+        "line": line,
+        "ranking": ranking_payload,
+        "date_col": date_col,
+        "value_col": value_col,
+        "category_col": category_col,
+        "filter_options": {name: list(values) for name, values in info["dimensoes"].items()},
+    }
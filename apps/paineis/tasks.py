@@ -3,6 +3,7 @@ from __future__ import annotations
 from celery import shared_task
 
 from .services.processing import process_dataset_version
+from .services.query_cache import evict_query_cache
 
 
 @shared_task(name="paineis.process_dataset_version")
@@ -12,3 +13,8 @@ def process_dataset_version_task(version_id: int, google_sheet_url: str = "", ac
         google_sheet_url=google_sheet_url,
         actor_id=actor_id,
     )
+
+
+@shared_task(name="paineis.evict_query_cache")
+def evict_query_cache_task():
+    return evict_query_cache()
@@ -1,10 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
 from django.contrib.auth import get_user_model
-from django.test import SimpleTestCase, TestCase
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from .services.columnar import ColumnarTable, ColumnarWriter, build_columnar_bytes, build_dashboard_payload_columnar
 from .services.dashboard import build_dashboard_payload
-from .services.ingest import ingest_dataset_bytes
-from .models import Dataset, DatasetVersion
+from .services.ingest import ingest_dataset_bytes, ingest_dataset_stream
+from .models import Dataset, DatasetRollup, DatasetVersion, QueryCache
+from .services.query_cache import (
+    cached_dashboard_payload,
+    clear_local_query_cache,
+    evict_query_cache,
+    invalidate_dataset_query_cache,
+)
+from .services.rollup import build_dashboard_payload_rollup, build_version_rollup
 from apps.org.models import Municipio
 
 
@@ -21,6 +35,26 @@ class IngestDatasetTests(SimpleTestCase):
         self.assertEqual(schema["valor"]["type"], "NUMERO")
         self.assertEqual(schema["valor"]["role"], "MEDIDA")
 
+    def test_stream_ingest_writes_processed_csv_and_feeds_sinks(self):
+        raw = "Data;Secretaria;Valor\n2026-01-01;Saude;1.200,50\n\n2026-01-01;Saude;1.200,50\n;Obras;\n".encode("utf-8")
+        processed = BytesIO()
+        with ColumnarWriter() as writer:
+            result = ingest_dataset_stream(BytesIO(raw), "CSV", processed_out=processed, sinks=[writer])
+            artifact = BytesIO()
+            writer.write(artifact, result["schema"])
+
+        self.assertEqual(
+            processed.getvalue().decode("utf-8"),
+            "\ufeffdata;secretaria;valor\r\n2026-01-01;Saude;1.200,50\r\n2026-01-01;Saude;1.200,50\r\n;Obras;\r\n",
+        )
+        profile = result["profile"]
+        self.assertEqual(profile["row_count"], 3)
+        self.assertEqual(profile["nulls_by_column"], {"data": 1, "secretaria": 0, "valor": 1})
+        self.assertEqual(profile["duplicate_rows_sample"], 1)
+        self.assertEqual(profile["numeric_stats"]["valor"], {"min": "1200.50", "max": "1200.50", "sum": "2401.00"})
+        self.assertEqual(len(result["preview_rows"]), 3)
+        self.assertEqual(ColumnarTable(artifact.getvalue()).linhas, 3)
+
     def test_dashboard_payload_with_filters(self):
         rows = [
             {"data": "2026-01-01", "secretaria": "Saude", "categoria": "A", "valor": "10"},
@@ -51,6 +85,281 @@ class IngestDatasetTests(SimpleTestCase):
         self.assertEqual(payload["line"]["values"], [30.0])
 
 
+class ColumnarDashboardTests(SimpleTestCase):
+    schema = [
+        {"name": "data", "type": "DATA"},
+        {"name": "secretaria", "type": "TEXTO"},
+        {"name": "categoria", "type": "TEXTO"},
+        {"name": "valor", "type": "NUMERO"},
+    ]
+
+    def _rows(self):
+        rows = []
+        for idx in range(600):
+            rows.append(
+                {
+                    "data": f"2025-{idx % 12 + 1:02d}-{idx % 28 + 1:02d}" if idx % 50 else "",
+                    "secretaria": ["Saude", "Educacao", "Obras"][idx % 3],
+                    "categoria": f"C{idx % 7}" if idx % 11 else "",
+                    "valor": f"{idx % 40},{25 * (idx % 4)}",
+                }
+            )
+        return rows
+
+    def _assert_same_payload(self, rows, filters):
+        headers = [col["name"] for col in self.schema]
+        table = ColumnarTable(build_columnar_bytes(headers, rows, self.schema))
+        expected = build_dashboard_payload(rows, self.schema, filters)
+        payload = build_dashboard_payload_columnar(table, self.schema, filters)
+
+        self.assertEqual(payload["kpis"], expected["kpis"])
+        self.assertEqual(payload["line"], expected["line"])
+        self.assertEqual(payload["ranking"], expected["ranking"])
+        self.assertEqual(payload["filter_options"], expected["filter_options"])
+        self.assertEqual(payload["rows"][:120], expected["rows"][:120])
+        self.assertEqual(list(payload["rows"]), expected["rows"])
+
+    def test_payload_matches_csv_path(self):
+        rows = self._rows()
+        self._assert_same_payload(rows, {})
+        self._assert_same_payload(rows, {"secretaria": "Saude", "date_start": "2025-03-01", "date_end": "2025-08-15"})
+        self._assert_same_payload(rows, {"categoria": "C3", "date_end": "01/06/2025"})
+        self._assert_same_payload(rows, {"secretaria": "Inexistente"})
+        self._assert_same_payload(rows, {"unidade": "Sem coluna"})
+
+    def test_high_cardinality_columns_fall_back_to_raw_text(self):
+        rows = self._rows()
+        headers = [col["name"] for col in self.schema]
+        with ColumnarWriter(max_dictionary=5) as writer:
+            writer.start(headers)
+            for row in rows:
+                writer.append([row[name] for name in headers])
+            out = BytesIO()
+            writer.write(out, self.schema)
+        table = ColumnarTable(out.getvalue())
+
+        self.assertEqual(table.row(7), rows[7])
+        filters = {"secretaria": "Obras", "categoria": "C4", "date_start": "2025-02-01", "date_end": "2025-10-31"}
+        expected = build_dashboard_payload(rows, self.schema, filters)
+        payload = build_dashboard_payload_columnar(table, self.schema, filters)
+        self.assertEqual(payload["kpis"], expected["kpis"])
+        self.assertEqual(payload["line"], expected["line"])
+        self.assertEqual(payload["ranking"], expected["ranking"])
+        self.assertEqual(list(payload["rows"]), expected["rows"])
+
+    def test_wide_dictionary_date_filter(self):
+        rows = [
+            {
+                "data": f"{idx % 28 + 1:02d}/{idx // 28 % 12 + 1:02d}/2024",
+                "secretaria": "Saude",
+                "categoria": "",
+                "valor": "1",
+            }
+            for idx in range(400)
+        ]
+        headers = [col["name"] for col in self.schema]
+        table = ColumnarTable(build_columnar_bytes(headers, rows, self.schema))
+        self.assertEqual(table.codes("data").itemsize, 2)
+        self._assert_same_payload(rows, {"date_start": "2024-02-10", "date_end": "2024-05-20"})
+
+    def test_decimal_sums_and_shared_memo(self):
+        # 0,005 em float arredonda para cima; em Decimal (caminho CSV), para o par mais próximo.
+        rows = [{"data": "2025-01-02", "secretaria": s, "categoria": "C1", "valor": "0,005"} for s in ("A", "B", "B")]
+        self._assert_same_payload(rows[:1], {})
+        self._assert_same_payload(rows, {"secretaria": "B"})
+        # Casas demais para o float64: soma em Decimal.
+        rows.append({"data": "2025-02-03", "secretaria": "B", "categoria": "C2", "valor": "0,0000000001"})
+        self._assert_same_payload(rows, {})
+
+        headers = [col["name"] for col in self.schema]
+        table = ColumnarTable(build_columnar_bytes(headers, self._rows(), self.schema))
+        filtros = [{"categoria": f"C{idx}", "secretaria": sec} for idx in range(7) for sec in ("Saude", "Obras")]
+        with mock.patch("apps.paineis.services.columnar.AGGREGATES_MEMO_SIZE", 4):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                payloads = list(
+                    pool.map(lambda filters: build_dashboard_payload_columnar(table, self.schema, filters), filtros * 3)
+                )
+            self.assertEqual(len(table._aggregates), 4)
+        self.assertEqual(payloads[0]["kpis"], build_dashboard_payload(self._rows(), self.schema, filtros[0])["kpis"])
+
+
+class QueryCacheTests(TestCase):
+    schema = [
+        {"name": "data", "type": "DATA"},
+        {"name": "secretaria", "type": "TEXTO"},
+        {"name": "valor", "type": "NUMERO"},
+    ]
+    rows = [
+        {"data": "2026-01-01", "secretaria": "Saude", "valor": "10"},
+        {"data": "2026-02-01", "secretaria": "Educacao", "valor": "5"},
+    ]
+
+    def setUp(self):
+        clear_local_query_cache()
+        municipio = Municipio.objects.create(nome="Municipio Cache BI", uf="MA")
+        self.dataset = Dataset.objects.create(municipio=municipio, nome="Dataset cache")
+        self.version = DatasetVersion.objects.create(
+            dataset=self.dataset,
+            numero=1,
+            status=DatasetVersion.Status.CONCLUIDO,
+            processado_em=timezone.now(),
+        )
+
+    def tearDown(self):
+        clear_local_query_cache()
+
+    def test_two_level_hits_and_normalized_key(self):
+        filters = {"secretaria": "Saude", "date_start": "01/01/2026", "unidade": ""}
+        first = cached_dashboard_payload(self.version, self.schema, filters, rows=self.rows)
+        self.assertEqual(first["kpis"]["linhas_filtradas"], 1)
+        entry = QueryCache.objects.get(dataset=self.dataset)
+        self.assertEqual(entry.parametros_json["filtros"], {"secretaria": "Saude", "date_start": "2026-01-01"})
+        self.assertNotIn("rows", entry.resultado_json)
+
+        with self.assertNumQueries(0):
+            again = cached_dashboard_payload(
+                self.version,
+                self.schema,
+                {"secretaria": "Saude", "date_start": "2026-01-01"},
+                rows=self.rows,
+            )
+        self.assertEqual(again["kpis"], first["kpis"])
+        self.assertEqual(again["rows"], [self.rows[0]])
+
+        # Esvaziar a L1 descarrega o hit que ela contou.
+        clear_local_query_cache()
+        entry.refresh_from_db()
+        self.assertEqual(entry.hits, 1)
+
+        # Acerto em L2: só a leitura; o hit fica na L1 até o próximo descarregamento.
+        with self.assertNumQueries(1):
+            cached_dashboard_payload(self.version, self.schema, filters, rows=self.rows)
+        cached_dashboard_payload(self.version, self.schema, filters, rows=self.rows)
+        entry.refresh_from_db()
+        self.assertEqual(entry.hits, 1)
+        clear_local_query_cache()
+        entry.refresh_from_db()
+        self.assertEqual(entry.hits, 3)
+
+    @override_settings(PAINEIS_QUERY_CACHE_MAX_ENTRIES=1)
+    def test_l2_rows_are_capped_per_dataset(self):
+        cached_dashboard_payload(self.version, self.schema, {"secretaria": "Saude"}, rows=self.rows)
+        payload = cached_dashboard_payload(self.version, self.schema, {"secretaria": "Educacao"}, rows=self.rows)
+        self.assertEqual(payload["kpis"]["linhas_filtradas"], 1)
+        self.assertEqual(QueryCache.objects.filter(dataset=self.dataset).count(), 1)
+
+        # Fora da L2, o resultado ainda é servido pela L1 do processo.
+        with self.assertNumQueries(0):
+            again = cached_dashboard_payload(self.version, self.schema, {"secretaria": "Educacao"}, rows=self.rows)
+        self.assertEqual(again["kpis"], payload["kpis"])
+
+    def test_expired_entry_is_recomputed(self):
+        cached_dashboard_payload(self.version, self.schema, {}, rows=self.rows)
+        QueryCache.objects.update(expira_em=timezone.now() - timedelta(seconds=1), resultado_json={"kpis": {}})
+        clear_local_query_cache()
+
+        payload = cached_dashboard_payload(self.version, self.schema, {}, rows=self.rows)
+        self.assertEqual(payload["kpis"]["linhas_filtradas"], 2)
+        self.assertGreater(QueryCache.objects.get().expira_em, timezone.now())
+
+    def test_invalidation_and_eviction(self):
+        cached_dashboard_payload(self.version, self.schema, {}, rows=self.rows)
+        self.assertEqual(invalidate_dataset_query_cache(self.dataset.pk), 1)
+
+        now = timezone.now()
+        QueryCache.objects.bulk_create(
+            [
+                QueryCache(dataset=self.dataset, chave="expirada", expira_em=now - timedelta(minutes=1)),
+                QueryCache(dataset=self.dataset, chave="fria", acessado_em=now - timedelta(days=30)),
+            ]
+            + [
+                QueryCache(dataset=self.dataset, chave=f"k{idx}", acessado_em=now - timedelta(minutes=idx))
+                for idx in range(5)
+            ]
+        )
+        result = evict_query_cache(max_entries_per_dataset=3, cold_days=7)
+
+        self.assertEqual(result, {"expiradas": 1, "frias": 1, "excedentes": 2})
+        self.assertEqual(
+            sorted(QueryCache.objects.values_list("chave", flat=True)),
+            ["k0", "k1", "k2"],
+        )
+
+
+class RollupDashboardTests(TestCase):
+    schema = ColumnarDashboardTests.schema
+
+    def setUp(self):
+        clear_local_query_cache()
+        municipio = Municipio.objects.create(nome="Municipio Rollup BI", uf="MA")
+        self.dataset = Dataset.objects.create(
+            municipio=municipio,
+            nome="Dataset rollup",
+            visibilidade=Dataset.Visibilidade.PUBLICO,
+        )
+        self.version = DatasetVersion.objects.create(
+            dataset=self.dataset,
+            numero=1,
+            status=DatasetVersion.Status.CONCLUIDO,
+            processado_em=timezone.now(),
+            schema_json={"columns": self.schema},
+        )
+        self.rows = ColumnarDashboardTests._rows(self)
+        headers = [col["name"] for col in self.schema]
+        self.table = ColumnarTable(build_columnar_bytes(headers, self.rows, self.schema))
+
+    def tearDown(self):
+        clear_local_query_cache()
+
+    def test_covered_filters_match_full_scan(self):
+        self.version.rollup_json = build_version_rollup(self.version, self.table)
+        self.assertTrue(self.version.rollup_json["disponivel"])
+        self.assertLess(self.version.rollup_json["celulas"], len(self.rows))
+        self.assertEqual(DatasetRollup.objects.filter(versao=self.version).count(), self.version.rollup_json["celulas"])
+
+        for filters in (
+            {},
+            {"secretaria": "Saude"},
+            {"categoria": "C3", "date_start": "01/03/2025", "date_end": "2025-06-30"},
+            {"date_end": "2025-02-28"},
+            {"secretaria": "Inexistente"},
+            {"unidade": "Sem coluna"},
+        ):
+            with self.subTest(filters=filters):
+                with self.assertNumQueries(1):
+                    payload = build_dashboard_payload_rollup(self.version, self.schema, filters)
+                expected = build_dashboard_payload_columnar(self.table, self.schema, filters)
+                self.assertEqual(payload["kpis"], expected["kpis"])
+                self.assertEqual(payload["line"], expected["line"])
+                self.assertEqual(payload["ranking"], expected["ranking"])
+                self.assertEqual(payload["filter_options"], expected["filter_options"])
+
+    def test_uncovered_filters_fall_back_to_scan(self):
+        self.version.rollup_json = build_version_rollup(self.version, self.table)
+        filters = {"secretaria": "Obras", "date_start": "2025-03-15"}
+        self.assertIsNone(build_dashboard_payload_rollup(self.version, self.schema, filters))
+
+        payload = cached_dashboard_payload(self.version, self.schema, filters, table=self.table)
+        expected = build_dashboard_payload_columnar(self.table, self.schema, filters)
+        self.assertEqual(payload["kpis"], expected["kpis"])
+        self.assertEqual(QueryCache.objects.filter(dataset=self.dataset).count(), 1)
+
+        covered = {"secretaria": "Obras", "date_start": "2025-03-01"}
+        payload = cached_dashboard_payload(self.version, self.schema, covered, table=self.table)
+        expected = build_dashboard_payload_columnar(self.table, self.schema, covered)
+        self.assertEqual(payload["kpis"], expected["kpis"])
+        self.assertEqual(list(payload["rows"]), list(expected["rows"]))
+        self.assertEqual(QueryCache.objects.filter(dataset=self.dataset).count(), 1)
+
+    @override_settings(PAINEIS_ROLLUP_MAX_CELLS=10)
+    def test_too_many_cells_skip_rollup(self):
+        self.version.rollup_json = build_version_rollup(self.version, self.table)
+        self.assertFalse(self.version.rollup_json["disponivel"])
+        self.assertEqual(self.version.rollup_json["dimensoes"]["secretaria"], ["Educacao", "Obras", "Saude"])
+        self.assertFalse(DatasetRollup.objects.filter(versao=self.version).exists())
+        self.assertIsNone(build_dashboard_payload_rollup(self.version, self.schema, {}))
+
+
 class DatasetPublishChecklistTests(TestCase):
     def setUp(self):
         user_model = get_user_model()
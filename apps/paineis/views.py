@@ -10,7 +10,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from apps.core.decorators import require_perm
-from apps.core.exports import export_csv, export_pdf_template
+from apps.core.exports import export_csv, export_pdf_template, stream_csv
 from apps.core.rbac import is_admin, role_scope_base
 from apps.core.services_auditoria import registrar_auditoria
 from apps.org.models import Municipio
@@ -18,8 +18,9 @@ from apps.org.models import Municipio
 from .forms import DatasetCreateForm
 from .models import Dataset, DatasetColumn, DatasetVersion, ExportJob
 from .services import (
-    build_dashboard_payload,
     build_dataset_package,
+    cached_dashboard_payload,
+    load_columnar_table,
     load_rows_from_csv_bytes,
     process_dataset_version,
 )
@@ -495,8 +496,12 @@ def dashboard(request, dataset_pk: int):
         messages.error(request, "Dataset sem versão tratada disponível.")
         return redirect("paineis:dataset_detail", pk=dataset.pk)
 
-    with version.arquivo_tratado.open("rb") as fobj:
-        headers, rows = load_rows_from_csv_bytes(fobj.read())
+    table = load_columnar_table(version)
+    if table is not None:
+        headers, rows = table.headers, None
+    else:
+        with version.arquivo_tratado.open("rb") as fobj:
+            headers, rows = load_rows_from_csv_bytes(fobj.read())
 
     schema = (version.schema_json or {}).get("columns") or [{"name": h, "type": "TEXTO"} for h in headers]
 
@@ -508,7 +513,7 @@ def dashboard(request, dataset_pk: int):
         "categoria": (request.GET.get("categoria") or "").strip(),
     }
 
-    payload = build_dashboard_payload(rows, schema, filters)
+    payload = cached_dashboard_payload(version, schema, filters, table=table, rows=rows)
     ranking_labels = payload.get("ranking", {}).get("labels") or []
     ranking_values = payload.get("ranking", {}).get("values") or []
     pie_items = [
@@ -521,11 +526,11 @@ def dashboard(request, dataset_pk: int):
 
     export = (request.GET.get("export") or "").strip().lower()
     if export == "csv":
-        rows_export = [[row.get(h, "") for h in payload["headers"]] for row in payload["rows"]]
-        return export_csv(
+        return stream_csv(
             f"dataset_{dataset.pk}_filtrado.csv",
             payload["headers"],
-            rows_export,
+            payload["rows"],
+            row_mapper=lambda row: [row.get(h, "") for h in payload["headers"]],
         )
 
     if export == "pdf":
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.org.models import Municipio, Secretaria, Unidade
+from apps.saude.models import AgendamentoSaude, BloqueioAgendaSaude, ProfissionalSaude
+from apps.saude.services_agenda import remarcar_agendamentos
+
+
+def _legado_conflito(*, unidade_id, profissional_id, sala_id, inicio, fim, ignore_agendamento_id=None) -> bool:
+    """Verificação anterior ao índice em memória: até três EXISTS por horário testado."""
+    agendamentos = AgendamentoSaude.objects.filter(unidade_id=unidade_id, inicio__lt=fim, fim__gt=inicio).exclude(
+        status=AgendamentoSaude.Status.CANCELADO
+    )
+    if ignore_agendamento_id:
+        agendamentos = agendamentos.exclude(pk=ignore_agendamento_id)
+    conflito = agendamentos.filter(profissional_id=profissional_id).exists()
+    if not conflito and sala_id:
+        conflito = agendamentos.filter(sala_id=sala_id).exists()
+    if conflito:
+        return True
+    return (
+        BloqueioAgendaSaude.objects.filter(unidade_id=unidade_id, inicio__lt=fim, fim__gt=inicio)
+        .filter(Q(profissional_id=profissional_id) | Q(profissional__isnull=True))
+        .filter((Q(sala_id=sala_id) if sala_id else Q(sala__isnull=True)) | Q(sala__isnull=True))
+        .exists()
+    )
+
+
+def _legado_remarcar(agendamentos, *, max_dias: int, base_date):
+    remarcados = 0
+    for item in agendamentos:
+        duracao = item.fim - item.inicio
+        horario = timezone.localtime(item.inicio).timetz().replace(tzinfo=None)
+        for delta in range(max_dias):
+            inicio = timezone.make_aware(datetime.combine(base_date + timedelta(days=delta), horario))
+            fim = inicio + duracao
+            if _legado_conflito(
+                unidade_id=item.unidade_id,
+                profissional_id=item.profissional_id,
+                sala_id=item.sala_id,
+                inicio=inicio,
+                fim=fim,
+                ignore_agendamento_id=item.pk,
+            ):
+                continue
+            item.inicio, item.fim, item.status = inicio, fim, AgendamentoSaude.Status.MARCADO
+            item.save(update_fields=["inicio", "fim", "status"])
+            remarcados += 1
+            break
+    return remarcados
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a remarcação automática de faltas testando dia a dia no banco com o índice "
+        "de disponibilidade em memória, sobre uma agenda sintética. Tudo é desfeito no fim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--faltas", type=int, default=500)
+        parser.add_argument("--profissionais", type=int, default=10)
+        parser.add_argument("--dias", type=int, default=21)
+        parser.add_argument("--ocupacao", type=float, default=0.6, help="Fração dos horários já ocupados.")
+
+    def handle(self, *args, **options):
+        base_date = timezone.localdate() + timedelta(days=1)
+        dias = max(1, options["dias"])
+        with transaction.atomic():
+            faltas = self._seed(options, base_date, dias)
+            self.stdout.write(f"{len(faltas)} falta(s), {options['profissionais']} profissional(is), {dias} dia(s)")
+
+            with transaction.atomic():
+                legado = self._run(
+                    "dia a dia",
+                    lambda: _legado_remarcar(self._recarregar(faltas), max_dias=dias, base_date=base_date),
+                )
+                horarios_legado = self._horarios(faltas)
+                transaction.set_rollback(True)
+            with transaction.atomic():
+                remarcados, _ = self._run(
+                    "índice em memória",
+                    lambda: remarcar_agendamentos(self._recarregar(faltas), max_dias=dias, base_date=base_date),
+                )
+                horarios = self._horarios(faltas)
+                transaction.set_rollback(True)
+            transaction.set_rollback(True)
+
+        divergencias = sum(1 for pk, horario in horarios.items() if horarios_legado.get(pk) != horario)
+        self.stdout.write(f"Remarcados: dia a dia={legado} índice={len(remarcados)} divergências={divergencias}")
+
+    def _seed(self, options, base_date, dias: int) -> list[int]:
+        rng = random.Random(42)
+        user = get_user_model().objects.create(username=f"bench_agenda_{rng.randrange(10**9)}")
+        municipio = Municipio.objects.create(nome=f"Bench Agenda {user.pk}", uf="MA")
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="Saúde")
+        unidade = Unidade.objects.create(secretaria=secretaria, nome="UBS Bench", tipo=Unidade.Tipo.SAUDE)
+        profissionais = [
+            ProfissionalSaude.objects.create(unidade=unidade, nome=f"Profissional {i}")
+            for i in range(max(1, options["profissionais"]))
+        ]
+        horarios = [dtime(hora, minuto) for hora in range(8, 17) for minuto in (0, 30)]
+
+        ocupados = []
+        for profissional in profissionais:
+            for delta in range(dias):
+                for horario in horarios:
+                    if rng.random() < options["ocupacao"]:
+                        inicio = timezone.make_aware(datetime.combine(base_date + timedelta(days=delta), horario))
+                        ocupados.append(
+                            AgendamentoSaude(
+                                unidade=unidade,
+                                profissional=profissional,
+                                paciente_nome="Ocupado",
+                                inicio=inicio,
+                                fim=inicio + timedelta(minutes=30),
+                            )
+                        )
+        AgendamentoSaude.objects.bulk_create(ocupados, batch_size=1000)
+        for delta in range(0, dias, 7):
+            inicio = timezone.make_aware(datetime.combine(base_date + timedelta(days=delta), dtime(8)))
+            BloqueioAgendaSaude.objects.create(
+                unidade=unidade,
+                profissional=rng.choice(profissionais),
+                inicio=inicio,
+                fim=inicio + timedelta(hours=4),
+                motivo="Reunião",
+                criado_por=user,
+            )
+
+        faltas = []
+        for i in range(max(1, options["faltas"])):
+            inicio = timezone.make_aware(
+                datetime.combine(base_date - timedelta(days=1 + i % 20), rng.choice(horarios))
+            )
+            faltas.append(
+                AgendamentoSaude(
+                    unidade=unidade,
+                    profissional=rng.choice(profissionais),
+                    paciente_nome=f"Paciente {i}",
+                    inicio=inicio,
+                    fim=inicio + timedelta(minutes=30),
+                    status=AgendamentoSaude.Status.FALTA,
+                )
+            )
+        return [item.pk for item in AgendamentoSaude.objects.bulk_create(faltas, batch_size=1000)]
+
+    def _recarregar(self, pks: list[int]):
+        return list(AgendamentoSaude.objects.filter(pk__in=pks).order_by("inicio", "id"))
+
+    def _horarios(self, pks: list[int]) -> dict:
+        return dict(
+            AgendamentoSaude.objects.filter(pk__in=pks, status=AgendamentoSaude.Status.MARCADO).values_list(
+                "pk", "inicio"
+            )
+        )
+
+    def _run(self, label: str, func):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<20} consultas={len(queries):<7} tempo={elapsed * 1000:.1f} ms")
+        return result
@@ -0,0 +1,254 @@
+"""
+Disponibilidade da agenda da saúde calculada em memória.
+
+`DisponibilidadeAgenda` carrega de uma vez, para a janela de busca, os agendamentos
+não cancelados, os bloqueios e a grade ativa dos profissionais/salas envolvidos e
+responde "próximo horário livre" sem novas consultas. Cada remarcação é reservada na
+própria linha do tempo, então um lote nunca coloca dois agendamentos no mesmo horário.
+
+Regras de conflito (as mesmas da validação anterior, por consulta):
+- agendamento do mesmo profissional ou da mesma sala, na mesma unidade, que se sobreponha;
+- bloqueio da unidade do profissional (ou sem profissional) e da sala (ou sem sala).
+Quando o profissional tem grade ativa na unidade, o horário também precisa caber num
+bloco da grade daquele dia; sem grade cadastrada, qualquer dia serve.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AgendamentoSaude, BloqueioAgendaSaude, GradeAgendaSaude
+
+DURACAO_PADRAO = timedelta(minutes=30)
+
+
+def max_dias_remarcacao() -> int:
+    return int(getattr(settings, "SAUDE_REMARCACAO_MAX_DIAS", 21) or 21)
+
+
+class _LinhaDoTempo:
+    """Intervalos ordenados pelo início; a maior duração limita a busca de sobreposições."""
+
+    __slots__ = ("inicios", "itens", "maior_duracao")
+
+    def __init__(self):
+        self.inicios: list[datetime] = []
+        self.itens: list[tuple] = []
+        self.maior_duracao = timedelta(0)
+
+    def adicionar(self, inicio: datetime, fim: datetime, ref=None) -> None:
+        pos = bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.itens.insert(pos, (inicio, fim, ref))
+        self.maior_duracao = max(self.maior_duracao, fim - inicio)
+
+    def remover(self, inicio: datetime, ref) -> None:
+        pos = bisect_left(self.inicios, inicio)
+        while pos < len(self.inicios) and self.inicios[pos] == inicio:
+            if self.itens[pos][2] == ref:
+                del self.inicios[pos]
+                del self.itens[pos]
+                return
+            pos += 1
+
+    def ocupado(self, inicio: datetime, fim: datetime, *, ignorar=None) -> bool:
+        # Nenhum intervalo que começa antes de (inicio - maior_duracao) alcança `inicio`.
+        primeiro = bisect_left(self.inicios, inicio - self.maior_duracao)
+        ultimo = bisect_left(self.inicios, fim)
+        for pos in range(primeiro, ultimo):
+            _, item_fim, ref = self.itens[pos]
+            if item_fim > inicio and (ref is None or ref != ignorar):
+                return True
+        return False
+
+
+class DisponibilidadeAgenda:
+    def __init__(
+        self,
+        *,
+        unidade_ids: Iterable[int],
+        profissional_ids: Iterable[int],
+        sala_ids: Iterable[int] = (),
+        inicio: datetime,
+        fim: datetime,
+    ):
+        unidade_ids = list(set(unidade_ids))
+        profissional_ids = list(set(profissional_ids))
+        sala_ids = [sala_id for sala_id in set(sala_ids) if sala_id]
+        self.inicio = inicio
+        self.fim = fim
+        self._linhas: dict[tuple, _LinhaDoTempo] = defaultdict(_LinhaDoTempo)
+        self._posicoes: dict[int, tuple] = {}
+        self._grades: dict[tuple, dict[int, list[tuple[time, time]]]] = defaultdict(lambda: defaultdict(list))
+
+        recurso = Q(profissional_id__in=profissional_ids)
+        if sala_ids:
+            recurso |= Q(sala_id__in=sala_ids)
+        agendamentos = (
+            AgendamentoSaude.objects.filter(recurso, unidade_id__in=unidade_ids, inicio__lt=fim, fim__gt=inicio)
+            .exclude(status=AgendamentoSaude.Status.CANCELADO)
+            .values_list("id", "unidade_id", "profissional_id", "sala_id", "inicio", "fim")
+        )
+        for pk, unidade_id, profissional_id, sala_id, item_inicio, item_fim in agendamentos:
+            self._ocupar(pk, unidade_id, profissional_id, sala_id, item_inicio, item_fim)
+
+        bloqueios = BloqueioAgendaSaude.objects.filter(
+            unidade_id__in=unidade_ids, inicio__lt=fim, fim__gt=inicio
+        ).values_list("unidade_id", "profissional_id", "sala_id", "inicio", "fim")
+        for unidade_id, profissional_id, sala_id, item_inicio, item_fim in bloqueios:
+            self._linhas[("B", unidade_id, profissional_id, sala_id)].adicionar(item_inicio, item_fim)
+
+        grades = GradeAgendaSaude.objects.filter(
+            unidade_id__in=unidade_ids, profissional_id__in=profissional_ids, ativo=True
+        ).values_list("unidade_id", "profissional_id", "dia_semana", "inicio", "fim")
+        for unidade_id, profissional_id, dia_semana, grade_inicio, grade_fim in grades:
+            self._grades[(unidade_id, profissional_id)][int(dia_semana)].append((grade_inicio, grade_fim))
+
+    @classmethod
+    def para_agendamentos(cls, agendamentos: list[AgendamentoSaude], *, max_dias: int, base_date=None):
+        """Carrega a janela de remarcação (a partir de amanhã) dos recursos dos agendamentos."""
+        base_date = base_date or timezone.localdate() + timedelta(days=1)
+        maior_duracao = max((_duracao(item) for item in agendamentos), default=DURACAO_PADRAO)
+        inicio = timezone.make_aware(datetime.combine(base_date, time.min))
+        fim = timezone.make_aware(datetime.combine(base_date + timedelta(days=max(1, max_dias)), time.min))
+        return cls(
+            unidade_ids=[item.unidade_id for item in agendamentos],
+            profissional_ids=[item.profissional_id for item in agendamentos],
+            sala_ids=[item.sala_id for item in agendamentos],
+            inicio=inicio,
+            fim=fim + maior_duracao,
+        )
+
+    def _ocupar(self, pk, unidade_id, profissional_id, sala_id, inicio, fim) -> None:
+        self._linhas[("P", unidade_id, profissional_id)].adicionar(inicio, fim, pk)
+        if sala_id:
+            self._linhas[("S", unidade_id, sala_id)].adicionar(inicio, fim, pk)
+        self._posicoes[pk] = (unidade_id, profissional_id, sala_id, inicio)
+
+    def _liberar(self, pk) -> None:
+        posicao = self._posicoes.pop(pk, None)
+        if posicao is None:
+            return
+        unidade_id, profissional_id, sala_id, inicio = posicao
+        self._linhas[("P", unidade_id, profissional_id)].remover(inicio, pk)
+        if sala_id:
+            self._linhas[("S", unidade_id, sala_id)].remover(inicio, pk)
+
+    def _ocupado(self, chave: tuple, inicio, fim, *, ignorar=None) -> bool:
+        linha = self._linhas.get(chave)
+        return linha is not None and linha.ocupado(inicio, fim, ignorar=ignorar)
+
+    def _na_grade(self, unidade_id: int, profissional_id: int, inicio: datetime, fim: datetime) -> bool:
+        grade = self._grades.get((unidade_id, profissional_id))
+        if not grade:
+            return True
+        inicio_local = timezone.localtime(inicio)
+        fim_local = timezone.localtime(fim)
+        if fim_local.date() != inicio_local.date():
+            return False
+        return any(
+            bloco_inicio <= inicio_local.time() and fim_local.time() <= bloco_fim
+            for bloco_inicio, bloco_fim in grade.get(inicio_local.weekday(), ())
+        )
+
+    def livre(
+        self,
+        *,
+        unidade_id: int,
+        profissional_id: int,
+        sala_id: int | None,
+        inicio: datetime,
+        fim: datetime,
+        ignorar_agendamento_id: int | None = None,
+    ) -> bool:
+        if self._ocupado(("P", unidade_id, profissional_id), inicio, fim, ignorar=ignorar_agendamento_id):
+            return False
+        if sala_id and self._ocupado(("S", unidade_id, sala_id), inicio, fim, ignorar=ignorar_agendamento_id):
+            return False
+        salas = (sala_id, None) if sala_id else (None,)
+        for bloqueio_profissional in (profissional_id, None):
+            for bloqueio_sala in salas:
+                if self._ocupado(("B", unidade_id, bloqueio_profissional, bloqueio_sala), inicio, fim):
+                    return False
+        return self._na_grade(unidade_id, profissional_id, inicio, fim)
+
+    def proximo_horario_livre(self, agendamento: AgendamentoSaude, *, max_dias: int, base_date=None):
+        """Mesmo horário do agendamento nos próximos `max_dias` dias, a partir de amanhã."""
+        duracao = _duracao(agendamento)
+        horario = timezone.localtime(agendamento.inicio).timetz().replace(tzinfo=None)
+        base_date = base_date or timezone.localdate() + timedelta(days=1)
+        for delta in range(max(1, int(max_dias))):
+            inicio = timezone.make_aware(datetime.combine(base_date + timedelta(days=delta), horario))
+            fim = inicio + duracao
+            if self.livre(
+                unidade_id=agendamento.unidade_id,
+                profissional_id=agendamento.profissional_id,
+                sala_id=agendamento.sala_id,
+                inicio=inicio,
+                fim=fim,
+                ignorar_agendamento_id=agendamento.pk,
+            ):
+                return inicio, fim
+        return None
+
+    def reservar(self, agendamento: AgendamentoSaude, inicio: datetime, fim: datetime) -> None:
+        """Move o agendamento na linha do tempo (libera o horário antigo e ocupa o novo)."""
+        self._liberar(agendamento.pk)
+        self._ocupar(
+            agendamento.pk, agendamento.unidade_id, agendamento.profissional_id, agendamento.sala_id, inicio, fim
+        )
+
+
+def _duracao(agendamento: AgendamentoSaude) -> timedelta:
+    duracao = agendamento.fim - agendamento.inicio
+    if duracao.total_seconds() <= 0:
+        return DURACAO_PADRAO
+    return duracao
+
+
+def planejar_remarcacoes(agendamentos: Iterable[AgendamentoSaude], *, max_dias: int | None = None, base_date=None):
+    """
+    Acha, numa única passada e na ordem recebida, o próximo horário livre de cada
+    agendamento. Retorna [(agendamento, (inicio, fim) | None)] sem gravar nada.
+    """
+    agendamentos = list(agendamentos)
+    if not agendamentos:
+        return []
+    max_dias = max_dias or max_dias_remarcacao()
+    disponibilidade = DisponibilidadeAgenda.para_agendamentos(agendamentos, max_dias=max_dias, base_date=base_date)
+    plano = []
+    for agendamento in agendamentos:
+        horario = disponibilidade.proximo_horario_livre(agendamento, max_dias=max_dias, base_date=base_date)
+        if horario is not None:
+            disponibilidade.reservar(agendamento, *horario)
+        plano.append((agendamento, horario))
+    return plano
+
+
+def remarcar_agendamentos(agendamentos: Iterable[AgendamentoSaude], *, max_dias: int | None = None, base_date=None):
+    """
+    Remarca os agendamentos para o próximo horário livre e grava tudo com um
+    `bulk_update`. Retorna (remarcados, sem_horario).
+    """
+    carimbo = f"Remarcação automática em {timezone.localtime(timezone.now()).strftime('%d/%m/%Y %H:%M')}"
+    remarcados = []
+    sem_horario = []
+    for item, horario in planejar_remarcacoes(agendamentos, max_dias=max_dias, base_date=base_date):
+        if horario is None:
+            sem_horario.append(item)
+            continue
+        item.inicio, item.fim = horario
+        item.status = AgendamentoSaude.Status.MARCADO
+        item.motivo = (item.motivo or "").strip()
+        item.motivo += ("\n" if item.motivo else "") + carimbo
+        remarcados.append(item)
+    if remarcados:
+        AgendamentoSaude.objects.bulk_update(remarcados, ["inicio", "fim", "status", "motivo"], batch_size=500)
+    return remarcados, sem_horario
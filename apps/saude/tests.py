@@ -1,3 +1,5 @@
+from datetime import date, datetime, time, timedelta
+
 from django.test import TestCase
 from unittest.mock import patch
 from django.urls import reverse
@@ -9,11 +11,14 @@ from apps.org.models import Municipio, Secretaria, Unidade
 from apps.saude.models import (
     AgendamentoSaude,
     AtendimentoSaude,
+    BloqueioAgendaSaude,
     EspecialidadeSaude,
     FilaEsperaSaude,
+    GradeAgendaSaude,
     PacienteSaude,
     ProfissionalSaude,
 )
+from apps.saude.services_agenda import planejar_remarcacoes, remarcar_agendamentos
 from django.contrib.auth import get_user_model
 
 
@@ -189,6 +194,81 @@ class SaudeAgendaRegulacaoEnhancementsTestCase(TestCase):
         self.assertGreaterEqual(metrics["fora_sla"], 1)
 
 
+class SaudeAgendaDisponibilidadeTestCase(TestCase):
+    # Segunda-feira: os dias da janela ficam previsíveis para a grade.
+    BASE = date(2030, 1, 7)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="agenda_disp", password="Senha@123")
+        municipio = Municipio.objects.create(nome="Mun Agenda Disp", uf="MA", ativo=True)
+        secretaria = Secretaria.objects.create(municipio=municipio, nome="Sec Agenda Disp", ativo=True)
+        self.unidade = Unidade.objects.create(
+            secretaria=secretaria, nome="UBS Disp", tipo=Unidade.Tipo.SAUDE, ativo=True
+        )
+        self.profissional = ProfissionalSaude.objects.create(
+            unidade=self.unidade, nome="Dr. Disp", cargo=ProfissionalSaude.Cargo.MEDICO
+        )
+
+    def _quando(self, dia: date, hora: int = 10):
+        return timezone.make_aware(datetime.combine(dia, time(hora, 0)))
+
+    def _falta(self, nome: str = "Paciente Falta"):
+        inicio = self._quando(self.BASE - timedelta(days=3))
+        return AgendamentoSaude.objects.create(
+            unidade=self.unidade,
+            profissional=self.profissional,
+            paciente_nome=nome,
+            inicio=inicio,
+            fim=inicio + timedelta(minutes=30),
+            status=AgendamentoSaude.Status.FALTA,
+        )
+
+    def test_lote_nao_reserva_o_mesmo_horario_duas_vezes(self):
+        faltas = [self._falta(f"Paciente {i}") for i in range(3)]
+        AgendamentoSaude.objects.create(
+            unidade=self.unidade,
+            profissional=self.profissional,
+            paciente_nome="Ocupado",
+            inicio=self._quando(self.BASE),
+            fim=self._quando(self.BASE) + timedelta(minutes=30),
+        )
+        remarcados, sem_horario = remarcar_agendamentos(faltas, max_dias=3, base_date=self.BASE)
+
+        self.assertEqual(len(remarcados), 2)
+        self.assertEqual(len(sem_horario), 1)
+        inicios = sorted(
+            AgendamentoSaude.objects.filter(pk__in=[item.pk for item in remarcados]).values_list("inicio", flat=True)
+        )
+        self.assertEqual(
+            inicios, [self._quando(self.BASE + timedelta(days=1)), self._quando(self.BASE + timedelta(days=2))]
+        )
+
+    def test_respeita_bloqueio_e_grade(self):
+        falta = self._falta()
+        BloqueioAgendaSaude.objects.create(
+            unidade=self.unidade,
+            inicio=self._quando(self.BASE, 0),
+            fim=self._quando(self.BASE + timedelta(days=1), 0),
+            motivo="Reunião",
+            criado_por=self.user,
+        )
+        GradeAgendaSaude.objects.create(
+            unidade=self.unidade,
+            profissional=self.profissional,
+            dia_semana=GradeAgendaSaude.DiaSemana.QUARTA,
+            inicio=time(8, 0),
+            fim=time(12, 0),
+        )
+        [(_, horario)] = planejar_remarcacoes([falta], max_dias=7, base_date=self.BASE)
+        self.assertEqual(horario[0], self._quando(self.BASE + timedelta(days=2)))
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        faltas = [self._falta(f"Paciente {i}") for i in range(20)]
+        with self.assertNumQueries(3):
+            plano = planejar_remarcacoes(faltas, max_dias=30, base_date=self.BASE)
+        self.assertEqual(len({horario for _, horario in plano}), 20)
+
+
 class SaudePortalInscritosTestCase(TestCase):
     def setUp(self):
         user_model = get_user_model()
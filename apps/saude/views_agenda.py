@@ -1,6 +1,5 @@
-from datetime import datetime, time, timedelta
+from datetime import timedelta
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
@@ -16,7 +15,8 @@ from apps.core.rbac import can, scope_filter_unidades
 from apps.org.models import Unidade
 
 from .forms import AgendamentoSaudeForm
-from .models import AgendamentoSaude, BloqueioAgendaSaude, ProfissionalSaude
+from .models import AgendamentoSaude, ProfissionalSaude
+from .services_agenda import max_dias_remarcacao, remarcar_agendamentos
 
 
 def _scoped_unidades(user):
@@ -27,59 +27,6 @@ def _scoped_profissionais(unidades_qs):
     return ProfissionalSaude.objects.filter(unidade_id__in=unidades_qs.values_list("id", flat=True), ativo=True).order_by("nome")
 
 
-def _has_slot_conflict(*, unidade_id: int, profissional_id: int, sala_id: int | None, inicio, fim, ignore_agendamento_id: int | None = None) -> bool:
-    agendamentos = AgendamentoSaude.objects.filter(
-        unidade_id=unidade_id,
-        inicio__lt=fim,
-        fim__gt=inicio,
-    ).exclude(status=AgendamentoSaude.Status.CANCELADO)
-    if ignore_agendamento_id:
-        agendamentos = agendamentos.exclude(pk=ignore_agendamento_id)
-    agendamento_conflict = agendamentos.filter(profissional_id=profissional_id).exists()
-    if not agendamento_conflict and sala_id:
-        agendamento_conflict = agendamentos.filter(sala_id=sala_id).exists()
-    if agendamento_conflict:
-        return True
-
-    bloqueios = BloqueioAgendaSaude.objects.filter(
-        unidade_id=unidade_id,
-        inicio__lt=fim,
-        fim__gt=inicio,
-    )
-    bloqueio_conflict = bloqueios.filter(
-        Q(profissional_id=profissional_id) | Q(profissional__isnull=True)
-    ).filter(
-        (Q(sala_id=sala_id) if sala_id else Q(sala__isnull=True)) | Q(sala__isnull=True)
-    ).exists()
-    return bloqueio_conflict
-
-
-def _find_next_available_slot(agendamento: AgendamentoSaude, *, max_days: int = 21):
-    duration = agendamento.fim - agendamento.inicio
-    if duration.total_seconds() <= 0:
-        duration = timedelta(minutes=30)
-
-    original_start_local = timezone.localtime(agendamento.inicio)
-    base_date = timezone.localdate() + timedelta(days=1)
-    for delta_day in range(max(1, int(max_days))):
-        candidate_date = base_date + timedelta(days=delta_day)
-        candidate_start_naive = datetime.combine(candidate_date, original_start_local.timetz().replace(tzinfo=None))
-        candidate_start = timezone.make_aware(candidate_start_naive)
-        candidate_end = candidate_start + duration
-
-        if _has_slot_conflict(
-            unidade_id=agendamento.unidade_id,
-            profissional_id=agendamento.profissional_id,
-            sala_id=agendamento.sala_id,
-            inicio=candidate_start,
-            fim=candidate_end,
-            ignore_agendamento_id=agendamento.pk,
-        ):
-            continue
-        return candidate_start, candidate_end
-    return None
-
-
 @login_required
 @require_perm("saude.view")
 def agenda_list(request):
@@ -198,7 +145,9 @@ def agenda_remarcacao_auto(request):
 
     inicio_janela = timezone.now() - timedelta(days=dias_busca)
     faltas_qs = (
-        AgendamentoSaude.objects.select_related("unidade", "profissional", "especialidade", "aluno")
+        AgendamentoSaude.objects.select_related(
+            "unidade", "unidade__secretaria__municipio", "profissional", "especialidade", "aluno"
+        )
         .filter(
             unidade_id__in=unidades_qs.values_list("id", flat=True),
             status=AgendamentoSaude.Status.FALTA,
@@ -207,29 +156,11 @@ def agenda_remarcacao_auto(request):
         .order_by("inicio", "id")[:limite]
     )
 
-    remarcados = 0
-    sem_slot = 0
+    remarcados, sem_horario = remarcar_agendamentos(faltas_qs, max_dias=max_dias_remarcacao())
+    sem_slot = len(sem_horario)
     notificacoes = 0
 
-    for item in faltas_qs:
-        max_days = int(getattr(settings, "SAUDE_REMARCACAO_MAX_DIAS", 21) or 21)
-        next_slot = _find_next_available_slot(item, max_days=max_days)
-        if not next_slot:
-            sem_slot += 1
-            continue
-
-        novo_inicio, novo_fim = next_slot
-        item.inicio = novo_inicio
-        item.fim = novo_fim
-        item.status = AgendamentoSaude.Status.MARCADO
-        item.motivo = (item.motivo or "").strip()
-        item.motivo += (
-            ("\n" if item.motivo else "")
-            + f"Remarcação automática em {timezone.localtime(timezone.now()).strftime('%d/%m/%Y %H:%M')}"
-        )
-        item.save(update_fields=["inicio", "fim", "status", "motivo"])
-        remarcados += 1
-
+    for item in remarcados:
         contato = ""
         if item.aluno_id and getattr(item.aluno, "telefone", ""):
             contato = (item.aluno.telefone or "").strip()
@@ -265,7 +196,7 @@ def agenda_remarcacao_auto(request):
     if remarcados:
         messages.success(
             request,
-            f"Remarcação automática concluída. Remarcados: {remarcados}, sem slot: {sem_slot}, notificações enfileiradas: {notificacoes}.",
+            f"Remarcação automática concluída. Remarcados: {len(remarcados)}, sem slot: {sem_slot}, notificações enfileiradas: {notificacoes}.",
         )
     else:
         messages.warning(request, f"Nenhum agendamento foi remarcado. Sem slot: {sem_slot}.")
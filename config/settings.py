@@ -317,13 +317,26 @@ CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = _env_bool(
 CELERY_TASK_ROUTES = {
     "comunicacao.process_job": {"queue": "comunicacao"},
     "comunicacao.process_pending": {"queue": "comunicacao"},
+    "comunicacao.enqueue_event": {"queue": "comunicacao"},
 }
 CELERY_BEAT_SCHEDULE = {
     "comunicacao-process-pending": {
         "task": "comunicacao.process_pending",
         "schedule": _env_int("COMUNICACAO_PROCESS_INTERVAL_SECONDS", default=60),
         "args": (_env_int("COMUNICACAO_PROCESS_BATCH_SIZE", default=200),),
-    }
+    },
+    "paineis-evict-query-cache": {
+        "task": "paineis.evict_query_cache",
+        "schedule": _env_int("PAINEIS_QUERY_CACHE_EVICT_INTERVAL_SECONDS", default=60 * 60),
+    },
+    "educacao-recalcular-alertas-informatica": {
+        "task": "educacao.recalcular_alertas_informatica",
+        "schedule": _env_int("INFORMATICA_ALERTAS_INTERVAL_SECONDS", default=24 * 60 * 60),
+    },
+    "core-atualizar-kpis": {
+        "task": "core.atualizar_kpis",
+        "schedule": _env_int("KPI_SNAPSHOT_INTERVAL_SECONDS", default=5 * 60),
+    },
 }
 
 # =========================
@@ -406,6 +419,12 @@ SECURE_CROSS_ORIGIN_RESOURCE_POLICY = os.getenv(
 
 # Limites de upload para módulos utilitários.
 PAINEIS_MAX_UPLOAD_MB = _env_int("PAINEIS_MAX_UPLOAD_MB", default=50)
+PAINEIS_COLUMNAR_CACHE_SIZE = _env_int("PAINEIS_COLUMNAR_CACHE_SIZE", default=8)
+PAINEIS_COLUMNAR_MAX_DICTIONARY = _env_int("PAINEIS_COLUMNAR_MAX_DICTIONARY", default=65536)
+PAINEIS_QUERY_CACHE_TTL_SECONDS = _env_int("PAINEIS_QUERY_CACHE_TTL_SECONDS", default=60 * 60)
+PAINEIS_QUERY_CACHE_MAX_ENTRIES = _env_int("PAINEIS_QUERY_CACHE_MAX_ENTRIES", default=200)
+PAINEIS_QUERY_CACHE_COLD_DAYS = _env_int("PAINEIS_QUERY_CACHE_COLD_DAYS", default=7)
+PAINEIS_ROLLUP_MAX_CELLS = _env_int("PAINEIS_ROLLUP_MAX_CELLS", default=50000)
 CONVERSOR_MAX_UPLOAD_MB = _env_int("CONVERSOR_MAX_UPLOAD_MB", default=80)
 COMUNICACAO_API_MAX_JSON_BODY_BYTES = _env_int(
     "COMUNICACAO_API_MAX_JSON_BODY_BYTES",
@@ -413,8 +432,45 @@ COMUNICACAO_API_MAX_JSON_BODY_BYTES = _env_int(
 )
 COMUNICACAO_RETRY_BASE_MINUTES = _env_int("COMUNICACAO_RETRY_BASE_MINUTES", default=2)
 COMUNICACAO_RETRY_MAX_MINUTES = _env_int("COMUNICACAO_RETRY_MAX_MINUTES", default=60)
+COMUNICACAO_DISPATCH_WORKERS = _env_int("COMUNICACAO_DISPATCH_WORKERS", default=8)
+COMUNICACAO_DISPATCH_CHUNK_SIZE = _env_int("COMUNICACAO_DISPATCH_CHUNK_SIZE", default=50)
+COMUNICACAO_CLAIM_TIMEOUT_MINUTES = _env_int("COMUNICACAO_CLAIM_TIMEOUT_MINUTES", default=15)
+# Intervalo do heartbeat que renova os jobs reivindicados enquanto o lote ainda está sendo enviado.
+COMUNICACAO_CLAIM_HEARTBEAT_SECONDS = _env_int("COMUNICACAO_CLAIM_HEARTBEAT_SECONDS", default=60)
+COMUNICACAO_SYNC_ENQUEUE_MAX_RECIPIENTS = _env_int("COMUNICACAO_SYNC_ENQUEUE_MAX_RECIPIENTS", default=500)
+COMUNICACAO_TWILIO_API_BASE = (os.getenv("COMUNICACAO_TWILIO_API_BASE", "") or "https://api.twilio.com").strip()
+COMUNICACAO_META_API_BASE = (os.getenv("COMUNICACAO_META_API_BASE", "") or "https://graph.facebook.com").strip()
 COMUNICACAO_WEBHOOK_SHARED_SECRET = (os.getenv("COMUNICACAO_WEBHOOK_SHARED_SECRET", "") or "").strip()
 
+# Relatórios PDF (apps.core.services_pdf): pool de processos aquecidos (0 = no próprio processo),
+# base dos assets servidos do disco e limiar de linhas para gerar em segundo plano.
+PDF_RENDER_WORKERS = _env_int("PDF_RENDER_WORKERS", default=0)
+PDF_RENDER_TIMEOUT_SECONDS = _env_int("PDF_RENDER_TIMEOUT_SECONDS", default=120)
+PDF_RENDER_BASE_URL = (os.getenv("PDF_RENDER_BASE_URL", "") or "http://gepub.pdf/").strip()
+PDF_ASYNC_MIN_ROWS = _env_int("PDF_ASYNC_MIN_ROWS", default=2000)
+# Documentos em lote (apps.educacao.services_documentos_lote): documentos por renderização no PDF único.
+DOCUMENTOS_LOTE_BLOCO = _env_int("DOCUMENTOS_LOTE_BLOCO", default=50)
+# Boletim materializado (apps.educacao.services_resumo_diario): diários por transação ao (re)montar.
+EDUCACAO_RESUMO_BLOCO_DIARIOS = _env_int("EDUCACAO_RESUMO_BLOCO_DIARIOS", default=200)
+# Fechamento de período em lote (apps.educacao.services_fechamento_lote): turmas por bloco/transação.
+FECHAMENTO_LOTE_BLOCO = _env_int("FECHAMENTO_LOTE_BLOCO", default=200)
+# Alertas de frequência da informática (apps.educacao.services_informatica_alertas): turmas por bloco.
+INFORMATICA_ALERTAS_BLOCO_TURMAS = _env_int("INFORMATICA_ALERTAS_BLOCO_TURMAS", default=200)
+# Edição de grade da informática: a partir de quantas turmas a sincronização vai para segundo plano.
+INFORMATICA_SYNC_GRADE_ASYNC_MIN_TURMAS = _env_int("INFORMATICA_SYNC_GRADE_ASYNC_MIN_TURMAS", default=5)
+# OMR em lote (apps.avaliacoes.omr): processos spawn do pool (0/1 = no próprio processo) e limites
+# de descompactação do ZIP/TIFF, por imagem, no total e em páginas, contra arquivos maliciosos.
+OMR_BATCH_WORKERS = _env_int("OMR_BATCH_WORKERS", default=0)
+OMR_BATCH_MAX_ENTRY_BYTES = _env_int("OMR_BATCH_MAX_ENTRY_BYTES", default=25 * 1024 * 1024)
+OMR_BATCH_MAX_TOTAL_BYTES = _env_int("OMR_BATCH_MAX_TOTAL_BYTES", default=400 * 1024 * 1024)
+OMR_BATCH_MAX_PAGES = _env_int("OMR_BATCH_MAX_PAGES", default=500)
+# Snapshots de KPIs dos dashboards (apps.core.services_kpis): idade máxima antes de recalcular na leitura.
+KPI_SNAPSHOT_TTL_SECONDS = _env_int("KPI_SNAPSHOT_TTL_SECONDS", default=15 * 60)
+# Widgets do dashboard (apps.core.services_widgets): TTL padrão dos fragmentos no cache e
+# threads para calculá-los juntos no modo completo (?completo=1).
+DASHBOARD_WIDGET_TTL_SECONDS = _env_int("DASHBOARD_WIDGET_TTL_SECONDS", default=2 * 60)
+DASHBOARD_WIDGET_WORKERS = _env_int("DASHBOARD_WIDGET_WORKERS", default=4)
+
 EMAIL_BACKEND = os.getenv(
     "DJANGO_EMAIL_BACKEND",
     "django.core.mail.backends.console.EmailBackend" if DEBUG else "django.core.mail.backends.smtp.EmailBackend",